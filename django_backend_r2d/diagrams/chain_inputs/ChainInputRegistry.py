@@ -0,0 +1,21 @@
+from typing import Optional, Type
+from model_manager.interfaces.BaseChainInput import BaseChainInput
+from diagrams.chain_inputs.ClassDiagramAuditAnalyzeChainInputs import ClassDiagramAuditAnalyzeChainInputs
+from diagrams.chain_inputs.ERDiagramAuditAnalyzeChainInputs import ERDiagramAuditAnalyzeChainInputs
+from diagrams.chain_inputs.SequenceDiagramAuditAnalyzeChainInputs import SequenceDiagramAuditAnalyzeChainInputs
+from jobs.constants import ValidJobTypes
+
+"""
+Chain inputs used to generate each diagram job type, the chain input provides the default prompt templates and response schemas of the job type.
+"""
+CHAIN_INPUTS = {
+    ValidJobTypes.CLASS_DIAGRAM.value: ClassDiagramAuditAnalyzeChainInputs,
+    ValidJobTypes.ER_DIAGRAM.value: ERDiagramAuditAnalyzeChainInputs,
+    ValidJobTypes.SEQUENCE_DIAGRAM.value: SequenceDiagramAuditAnalyzeChainInputs,
+}
+
+def get_chain_input_class(job_type:str) -> Optional[Type[BaseChainInput]]:
+    """
+    Returns the chain input class of the job type, or None if the job type is not processed by an analyze and audit chain.
+    """
+    return CHAIN_INPUTS.get(job_type)
@@ -16,6 +16,7 @@ class ClassDiagramAuditAnalyzeChainInputs(BaseChainInput):
         audit_criteria (dict, optional): Optional criteria for the audit.
         model_response_schema (dict, optional): Optional schema for the model response.
         auditor_response_schema (dict, optional): Optional schema for the auditor response.
+        bypass_cache (bool, optional): Set to True to bypass the LLM response cache for this job.
     
     functions:
         get_job_parameters: Returns the job parameters.
@@ -34,7 +35,8 @@ class ClassDiagramAuditAnalyzeChainInputs(BaseChainInput):
                  job_parameters: dict = None,
                  analysis_context: dict = None, audit_criteria: dict = None,
                  model_response_schema: dict = MERMAID_CLASS_DIAGRAM_SCHEMA,
-                 auditor_response_schema: dict = MERMAID_CLASS_DIAGRAM_SCHEMA):
+                 auditor_response_schema: dict = MERMAID_CLASS_DIAGRAM_SCHEMA,
+                 bypass_cache: bool = False):
         """
         Initialize the chain inputs for the class diagram chain.
         """
@@ -44,4 +46,5 @@ class ClassDiagramAuditAnalyzeChainInputs(BaseChainInput):
                          job_parameters=job_parameters,
                          analysis_context=analysis_context, audit_criteria=audit_criteria,
                          model_response_schema=model_response_schema,
-                         auditor_response_schema=auditor_response_schema)
\ No newline at end of file
+                         auditor_response_schema=auditor_response_schema,
+                         bypass_cache=bypass_cache)
\ No newline at end of file
@@ -0,0 +1,54 @@
+from enum import Enum
+from jobs.constants import ValidJobTypes
+
+class DiagramPipelines(Enum):
+    """
+    List of diagram pipelines, see DIAGRAM_PIPELINES for the stages of each pipeline.
+    SERIAL: class diagrams -> ER diagrams -> sequence diagrams, each stage uses the diagrams of the previous stage.
+    PARALLEL: class and ER diagrams are generated concurrently from the user stories, sequence diagrams fan in on both.
+    """
+    SERIAL = "serial"
+    PARALLEL = "parallel"
+
+"""
+Stages of each diagram pipeline, a stage is named after the job type it creates and lists the stages it depends on.
+Stages without dependencies are generated from the user stories of the submitted job, and run concurrently.
+Stored on the submitted job (Job.pipeline) when the pipeline starts, see diagrams/services/PipelineEngine.py
+"""
+DIAGRAM_PIPELINES = {
+    DiagramPipelines.SERIAL.value: {
+        "name": DiagramPipelines.SERIAL.value,
+        "stages": [
+            {"stage": ValidJobTypes.CLASS_DIAGRAM.value, "depends_on": []},
+            {"stage": ValidJobTypes.ER_DIAGRAM.value, "depends_on": [ValidJobTypes.CLASS_DIAGRAM.value]},
+            {"stage": ValidJobTypes.SEQUENCE_DIAGRAM.value, "depends_on": [ValidJobTypes.ER_DIAGRAM.value]},
+        ],
+    },
+    DiagramPipelines.PARALLEL.value: {
+        "name": DiagramPipelines.PARALLEL.value,
+        "stages": [
+            {"stage": ValidJobTypes.CLASS_DIAGRAM.value, "depends_on": []},
+            {"stage": ValidJobTypes.ER_DIAGRAM.value, "depends_on": []},
+            {"stage": ValidJobTypes.SEQUENCE_DIAGRAM.value, "depends_on": [ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value]},
+        ],
+    },
+}
+
+"""
+Dependencies supported by each stage, the job parameters of a stage are built from the diagrams of the stages it depends on.
+"""
+PIPELINE_STAGE_INPUTS = {
+    ValidJobTypes.CLASS_DIAGRAM.value: [set()],
+    ValidJobTypes.ER_DIAGRAM.value: [set(), {ValidJobTypes.CLASS_DIAGRAM.value}],
+    ValidJobTypes.SEQUENCE_DIAGRAM.value: [set(), {ValidJobTypes.ER_DIAGRAM.value}, {ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value}],
+}
+
+"""
+Fields of the audited diagrams passed by a stage to the stages that depend on it when R2D_ORCHESTRATION_MODE is direct,
+these are the fields used by ClassDiagramConsumer.build_next_job_parameters and ERDiagramConsumer.build_next_job_parameters.
+"""
+STAGE_ARTIFACT_FIELDS = {
+    ValidJobTypes.CLASS_DIAGRAM.value: ("feature", "classes", "description", "helper_classes", "is_audited", "is_validated"),
+    ValidJobTypes.ER_DIAGRAM.value: ("feature", "entities", "description", "is_audited", "is_validated"),
+    ValidJobTypes.SEQUENCE_DIAGRAM.value: (),
+}
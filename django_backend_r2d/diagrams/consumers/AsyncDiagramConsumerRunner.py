@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from enum import Enum
+from typing import Callable
+from django.conf import settings
+from framework.utils.DatabaseExecutor import DatabaseExecutor
+from model_manager.constants import ModelProvider
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
+from diagrams.consumers.ERDiagramConsumer import ERDiagramConsumer
+from diagrams.consumers.SequenceDiagramConsumer import SequenceDiagramConsumer
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class AsyncDiagramConsumerRunner:
+    """
+    Runs diagram consumers on a single, long lived asyncio event loop owned by the worker process.
+
+    LLM calls are network bound, awaiting them on a shared event loop allows a single worker process to multiplex
+    many in-flight requests instead of holding one prefork process per request.
+    The event loop runs in a daemon thread so that callers (e.g., Celery tasks) can submit coroutines without creating a new event loop
+    for every job. Reusing the event loop is required as the async HTTP clients held by pooled models are bound to the loop they were first used on.
+
+    Jobs submitted by submit are processed in the background, the caller only waits while R2D_ASYNC_MAX_IN_FLIGHT_JOBS jobs are in-flight,
+    so a worker process accepts more jobs than the threads of its pool. Database calls are executed by the DatabaseExecutor.
+
+    functions:
+        submit: Processes a single job on the shared event loop without waiting for it to complete.
+        run: Processes a single job on the shared event loop and blocks until it completes.
+        arun: Coroutine that processes a single job and creates the next job record.
+        reset: Stops the event loop of the current process.
+    """
+    consumers = {
+        ValidJobTypes.CLASS_DIAGRAM.value: ClassDiagramConsumer,
+        ValidJobTypes.ER_DIAGRAM.value: ERDiagramConsumer,
+        ValidJobTypes.SEQUENCE_DIAGRAM.value: SequenceDiagramConsumer,
+    }
+
+    _lock = threading.Lock()
+    _loop = None
+    _in_flight = None
+    _pid = None
+
+    @classmethod
+    def submit(cls, job_type:str, model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str, resume:bool=False,
+               on_error:Callable = None, on_exit:Callable = None) -> Future:
+        """
+        Processes the job on the shared event loop without waiting for it to complete, the next job record is created once the job completes.
+        Blocks until the number of in-flight jobs of the process is below R2D_ASYNC_MAX_IN_FLIGHT_JOBS.
+        args:
+            job_type (str): The job type e.g., class_diagram
+            model_provider (str or Enum): The model provider.
+            model_name (str or Enum): The model name.
+            auditor_name (str or Enum): The auditor name.
+            job_id (str): The job ID.
+            resume (bool): Set to True to resume the job from the last completed step of the chain.
+            on_error (Callable): Invoked with the error if the job fails e.g., to retry the job, executed by the DatabaseExecutor.
+            on_exit (Callable): Invoked once the job completes or fails e.g., to release the lease of the job, executed by the DatabaseExecutor.
+        returns:
+            Future: Completes with the job ID of the next job record, or None if the job failed.
+        """
+        loop, in_flight = cls._get_event_loop()
+        in_flight.acquire()
+        try:
+            coroutine = cls._arun_in_background(in_flight, on_error, on_exit, job_type=job_type, model_provider=model_provider,
+                                                model_name=model_name, auditor_name=auditor_name, job_id=job_id, resume=resume)
+            return asyncio.run_coroutine_threadsafe(coroutine, loop)
+        except Exception:
+            in_flight.release()
+            raise
+
+    @classmethod
+    def run(cls, job_type:str, model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str, resume:bool=False, hand_off:bool=True) -> str | list[dict]:
+        """
+        Processes the job on the shared event loop and blocks until it completes.
+        args:
+            job_type (str): The job type e.g., class_diagram
+            model_provider (str or Enum): The model provider.
+            model_name (str or Enum): The model name.
+            auditor_name (str or Enum): The auditor name.
+            job_id (str): The job ID.
+            resume (bool): Set to True to resume the job from the last completed step of the chain.
+            hand_off (bool): Set to False to only process the job, the next job is created by the PipelineEngine.
+        returns:
+            job_id (str): The job ID of the next job record, or the processed job ID if this is the last job.
+            list[dict]: The saved diagrams if hand_off is False.
+        """
+        loop, _ = cls._get_event_loop()
+        future = asyncio.run_coroutine_threadsafe(cls.arun(job_type, model_provider, model_name, auditor_name, job_id, resume, hand_off), loop)
+        return future.result()
+
+    @classmethod
+    async def arun(cls, job_type:str, model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str, resume:bool=False, hand_off:bool=True) -> str | list[dict]:
+        """
+        Processes the job and creates the next job record, mirrors the behaviour of the synchronous diagram tasks.
+        args:
+            job_type (str): The job type e.g., class_diagram
+            model_provider (str or Enum): The model provider.
+            model_name (str or Enum): The model name.
+            auditor_name (str or Enum): The auditor name.
+            job_id (str): The job ID.
+            resume (bool): Set to True to resume the job from the last completed step of the chain.
+            hand_off (bool): Set to False to only process the job, the next job is created by the PipelineEngine.
+        returns:
+            job_id (str): The job ID of the next job record, or the processed job ID if this is the last job.
+            list[dict]: The saved diagrams if hand_off is False.
+        raises:
+            ValueError: If the job type is not supported.
+        """
+        consumer_class = cls.consumers.get(job_type)
+        if consumer_class is None:
+            raise ValueError(f"Unsupported job_type: {job_type}")
+
+        # Consumer initialization retrieves the job parameters from the database
+        consumer = await DatabaseExecutor.run(consumer_class, model_provider=model_provider, model_name=model_name,
+                                              auditor_name=auditor_name, job_id=job_id)
+        diagrams = await (consumer.aresume_record(job_id) if resume else consumer.aprocess_record(job_id))
+        logger.info(f"Successfully created {job_type} for - {job_id}")
+        if not hand_off:
+            return diagrams
+
+        if job_type == ValidJobTypes.CLASS_DIAGRAM.value:
+            return await DatabaseExecutor.run(consumer.create_next_record, parent_id=job_id, class_diagrams=diagrams,
+                                              job_type=ValidJobTypes.ER_DIAGRAM.value, job_status=ValidJobStatus.SUBMITTED.value)
+        if job_type == ValidJobTypes.ER_DIAGRAM.value:
+            return await DatabaseExecutor.run(consumer.create_next_record, parent_id=job_id, er_diagrams=diagrams,
+                                              job_type=ValidJobTypes.SEQUENCE_DIAGRAM.value, job_status=ValidJobStatus.SUBMITTED.value)
+        # No new jobs will be created after sequence diagram creation
+        await DatabaseExecutor.run(consumer.complete_all_jobs, job_id)
+        return job_id
+
+    @classmethod
+    async def _arun_in_background(cls, in_flight:threading.Semaphore, on_error:Callable, on_exit:Callable, **job):
+        """
+        Processes a job submitted by submit, errors are passed to on_error instead of being raised as no caller awaits the job.
+        """
+        try:
+            return await cls.arun(**job)
+        except Exception as e:
+            logger.error(f"Error processing {job['job_type']} for - {job['job_id']}: {e}")
+            if on_error is not None:
+                await cls._run_callback(on_error, e)
+        finally:
+            if on_exit is not None:
+                await cls._run_callback(on_exit)
+            in_flight.release()
+
+    @staticmethod
+    async def _run_callback(callback:Callable, *args):
+        try:
+            await DatabaseExecutor.run(callback, *args)
+        except Exception as e:
+            logger.error(f"Callback of async diagram job failed: {e}")
+
+    @classmethod
+    def _get_event_loop(cls) -> tuple[asyncio.AbstractEventLoop, threading.Semaphore]:
+        """
+        Returns the event loop owned by the current process and the semaphore limiting its in-flight jobs, starting the loop in a daemon thread if required.
+        A new event loop is created after fork as threads are not inherited by child processes.
+        """
+        with cls._lock:
+            if cls._loop is None or cls._pid != os.getpid():
+                cls._loop = asyncio.new_event_loop()
+                cls._in_flight = threading.BoundedSemaphore(getattr(settings, "R2D_ASYNC_MAX_IN_FLIGHT_JOBS", 100))
+                cls._pid = os.getpid()
+                thread = threading.Thread(target=cls._loop.run_forever, name="r2d-async-consumer-loop", daemon=True)
+                thread.start()
+                logger.debug(f"Started async consumer event loop for process {cls._pid}")
+            return cls._loop, cls._in_flight
+
+    @classmethod
+    def reset(cls):
+        """
+        Stops the event loop of the current process, jobs in-flight on the loop are cancelled.
+        """
+        with cls._lock:
+            if cls._loop is not None and cls._pid == os.getpid():
+                cls._loop.call_soon_threadsafe(cls._loop.stop)
+            cls._loop = None
+            cls._in_flight = None
+            cls._pid = None
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """
+        Discards the event loop inherited from the parent process, its thread does not exist in the child process.
+        """
+        cls._lock = threading.Lock()
+        cls._loop = None
+        cls._in_flight = None
+        cls._pid = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=AsyncDiagramConsumerRunner._reset_after_fork)
@@ -7,6 +7,7 @@ from jobs.interfaces.JobServiceInterface import JobServiceInterface
 from jobs.interfaces.JobQueueInterface import JobQueueInterface
 from jobs.services.JobService import JobService
 from jobs.services.JobQueueService import JobQueueService
+from jobs.services.JobContext import JobContext
 from jobs.services.JobExceptions import JobNotFoundException
 from jobs.constants import ValidJobStatus, ValidJobTypes
 from model_manager.constants import ModelProvider, OpenAIModels
@@ -31,6 +32,7 @@ class ClassDiagramConsumer(BaseConsumer):
         job_id (str): The job ID.
         job_service (JobServiceInterface): The job service. Default is JobService.
         job_queue_service (JobQueueInterface): The job queue service. Default is JobQueueService.
+        job_context (JobContext): The loaded job, the job is loaded once from the job_id if no context is provided.
     
     Raises:
         BaseConsumerException: If error encountered while updating the job status or job queue status.
@@ -38,18 +40,20 @@ class ClassDiagramConsumer(BaseConsumer):
     """    
     def __init__(self, model_provider:ModelProvider, model_name:Enum, 
                  auditor_name:Enum, job_id:str, job_service:JobServiceInterface = JobService(), 
-                 job_queue_service:JobServiceInterface = JobQueueService()):    
+                 job_queue_service:JobServiceInterface = JobQueueService(), job_context:JobContext = None):    
         
+        # Load the job once, the context is shared by the diagram service and the consumer
+        job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
         # Initialize the diagram service
         self.diagram_service = ClassDiagramService(model_provider=model_provider, model_name=model_name, 
-                                                   auditor_name=auditor_name, job_id=job_id)
+                                                   auditor_name=auditor_name, job_id=job_id, job_context=job_context)
         # Initialize the repository
         self.repository = ClassDiagramRepository()
         self.job_service = job_service
         self.job_queue_service = job_queue_service
         # Initialize BaseConsumer with the diagram service and repository
         super().__init__(consumer_name="ClassDiagramConsumer",diagram_service=self.diagram_service, 
-                         repository=self.repository, job_service=self.job_service, job_queue_service=self.job_queue_service)
+                         repository=self.repository, job_service=self.job_service, job_queue_service=self.job_queue_service, job_context=job_context)
     
     def get_specific_error(self, message: str) -> ClassDiagramConsumerError:
         """
@@ -75,7 +79,25 @@ class ClassDiagramConsumer(BaseConsumer):
             str: The job ID of the new job record.
         """
         logger.debug(f"Creating next job record for ER diagram processing")
-        
+        job_parameters = self.build_next_job_parameters(class_diagrams)
+            
+        logger.debug(f"Job parameters for creating ER Diagram Jobs: {job_parameters}")
+        # Create a new job record with parent_id as the job_id, with status as 'Submitted' and type as 'er_diagram'
+        job = self.create_new_job(parent_job_id=parent_id, job_parameters=job_parameters, 
+                                  job_type=job_type, job_status=job_status)
+        self.job_service.update_job_description(parent_id, f"Job Completed")
+        return job.job_id
+
+    @staticmethod
+    def build_next_job_parameters(class_diagrams:list[dict]) -> dict:
+        """
+        Aggregates the features, classes, descriptions and helper classes of the audited class diagrams into the job parameters of an ER diagram job.
+        Used by create_next_record and by the PipelineEngine when the ER diagram stage depends on the class diagram stage.
+        args:
+            class_diagrams (list[dict]): The class diagrams to use.
+        returns:
+            dict: The job parameters e.g., {"features": [...], "classes": [...], "descriptions": [...], "helper_classes": [...]}
+        """
         # Initialize empty lists to collect the aggregated values
         features = []
         classes = []
@@ -84,8 +106,8 @@ class ClassDiagramConsumer(BaseConsumer):
                     
         # Iterate over self.class_diagrams and collect values for each key
         for diagram in class_diagrams:
-            if not diagram.get('is_audited'):
-                # only retrieve audited diagrams
+            if not (diagram.get('is_audited') or diagram.get('is_validated')):
+                # only retrieve audited diagrams, or diagrams that passed the validator and were not audited
                 continue
             
             if 'feature' in diagram:
@@ -97,16 +119,9 @@ class ClassDiagramConsumer(BaseConsumer):
             if 'helper_classes' in diagram:
                 helper_classes.extend(diagram['helper_classes'])
 
-        job_parameters = {
+        return {
             'features': list(set(features)),
             'classes': classes,
             'descriptions': descriptions,
             'helper_classes': helper_classes
         }
-            
-        logger.debug(f"Job parameters for creating ER Diagram Jobs: {job_parameters}")
-        # Create a new job record with parent_id as the job_id, with status as 'Submitted' and type as 'er_diagram'
-        job = self.create_new_job(parent_job_id=parent_id, job_parameters=job_parameters, 
-                                  job_type=job_type, job_status=job_status)
-        self.job_service.update_job_description(parent_id, f"Job Completed")
-        return job.job_id
@@ -7,6 +7,7 @@ from jobs.interfaces.JobServiceInterface import JobServiceInterface
 from jobs.interfaces.JobQueueInterface import JobQueueInterface
 from jobs.services.JobService import JobService
 from jobs.services.JobQueueService import JobQueueService
+from jobs.services.JobContext import JobContext
 from jobs.services.JobExceptions import JobNotFoundException
 from jobs.constants import ValidJobStatus, ValidJobTypes
 from model_manager.constants import ModelProvider, OpenAIModels
@@ -34,6 +35,7 @@ class ERDiagramConsumer(BaseConsumer):
         job_id (str): The job ID.
         job_service (JobServiceInterface): The job service. Default is JobService.
         job_queue_service (JobQueueInterface): The job queue service. Default is JobQueueService.
+        job_context (JobContext): The loaded job, the job is loaded once from the job_id if no context is provided.
     
     Raises:
         BaseConsumerException: If error encountered while updating the job status or job queue status.
@@ -41,18 +43,20 @@ class ERDiagramConsumer(BaseConsumer):
     """    
     def __init__(self, model_provider:ModelProvider, model_name:Enum, 
                  auditor_name:Enum, job_id:str, job_service:JobServiceInterface = JobService(), 
-                 job_queue_service:JobServiceInterface = JobQueueService()):    
+                 job_queue_service:JobServiceInterface = JobQueueService(), job_context:JobContext = None):    
         
         self.job_id = job_id
+        # Load the job once, the context is shared by the diagram service and the consumer
+        job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
         # Initialize the diagram service
         self.diagram_service = ERDiagramService(model_provider=model_provider, model_name=model_name, 
-                                                   auditor_name=auditor_name, job_id=job_id, serializer_class=CreateERDiagramSerializer)
+                                                   auditor_name=auditor_name, job_id=job_id, job_context=job_context, serializer_class=CreateERDiagramSerializer)
         # Initialize the repository
         self.repository = ERDiagramRepository()
 
         # Initialize BaseConsumer with the diagram service and repository
         super().__init__(consumer_name="ERDiagramConsumer", diagram_service=self.diagram_service, 
-                         repository=self.repository, job_service=job_service, job_queue_service=job_queue_service)
+                         repository=self.repository, job_service=job_service, job_queue_service=job_queue_service, job_context=job_context)
 
          
     def get_specific_error(self, message: str) -> ERDiagramConsumerError:
@@ -80,6 +84,29 @@ class ERDiagramConsumer(BaseConsumer):
         """
         logger.debug(f"Creating next job record for ER diagram processing")
         
+        # Try to retrieve classes, helper_classes and descriptions by checking to see if class_diagrams have already been created
+        class_diagrams = self._retrieve_class_diagrams(parent_id) # parent_id is the job_id of er_diagram job
+        logger.debug(f"Retrieved class diagrams: {class_diagrams}")
+        job_parameters = self.build_next_job_parameters(er_diagrams, class_diagrams)
+            
+        logger.debug(f"Job parameters for ER diagram processing: {job_parameters}")
+        
+        # Create a new job record with parent_id as the job_id, with status as 'Submitted' and type as 'sequence_diagram'
+        job = self.create_new_job(parent_job_id=parent_id, job_parameters=job_parameters, 
+                                  job_type=job_type, job_status=job_status)
+        return job.job_id
+
+    @staticmethod
+    def build_next_job_parameters(er_diagrams:list[dict], class_diagrams:list[dict]) -> dict:
+        """
+        Aggregates the audited ER diagrams and the class diagrams into the job parameters of a sequence diagram job.
+        Used by create_next_record and by the PipelineEngine when the sequence diagram stage depends on the ER diagram stage.
+        args:
+            er_diagrams (list[dict]): The ER diagrams to use.
+            class_diagrams (list[dict]): The class diagrams to use, empty if no class diagrams were created.
+        returns:
+            dict: The job parameters e.g., {"features": [...], "entities": [...], "entity_descriptions": [...], "classes": [...], ...}
+        """
         # Initialize empty lists to collect the aggregated values
         features = []
         entities = []
@@ -87,8 +114,8 @@ class ERDiagramConsumer(BaseConsumer):
         
         # Iterate over er_diagrams and collect values for each key
         for diagram in er_diagrams:
-            if not diagram.get('is_audited'):
-                # only retrieve audited diagrams
+            if not (diagram.get('is_audited') or diagram.get('is_validated')):
+                # only retrieve audited diagrams, or diagrams that passed the validator and were not audited
                 continue
             if 'feature' in diagram:
                 features.extend(diagram['feature'])
@@ -97,13 +124,9 @@ class ERDiagramConsumer(BaseConsumer):
             if 'description' in diagram:
                 descriptions.append(diagram['description'])
         
-        # Try to retrieve classes, helper_classes and descriptions by checking to see if class_diagrams have already been created
         classes = []
         class_descriptions = []
         helper_classes = []
-    
-        class_diagrams = self._retrieve_class_diagrams(parent_id) # parent_id is the job_id of er_diagram job
-        logger.debug(f"Retrieved class diagrams: {class_diagrams}")
         
         # Iterate over class_diagrams and collect values for each key
         for diagram in class_diagrams:
@@ -115,7 +138,7 @@ class ERDiagramConsumer(BaseConsumer):
                 helper_classes.extend(diagram['helper_classes'])
                 
         # Additional parameters to pass to the next job
-        job_parameters = {
+        return {
             'features': list(set(features)), # Remove duplicated features
             'entities': entities,
             'entity_descriptions': descriptions,
@@ -123,13 +146,6 @@ class ERDiagramConsumer(BaseConsumer):
             'class_descriptions': class_descriptions,
             'helper_classes': list(set(helper_classes)), # Remove duplicated helper classes
             }
-            
-        logger.debug(f"Job parameters for ER diagram processing: {job_parameters}")
-        
-        # Create a new job record with parent_id as the job_id, with status as 'Submitted' and type as 'sequence_diagram'
-        job = self.create_new_job(parent_job_id=parent_id, job_parameters=job_parameters, 
-                                  job_type=job_type, job_status=job_status)
-        return job.job_id
 
     def _retrieve_class_diagrams(self, job_id:str) -> list:
         """
@@ -139,8 +155,8 @@ class ERDiagramConsumer(BaseConsumer):
         returns:
             list[dict]: The class diagrams for the parent job.
         """
-        # Checks if this er diagram has an associated parent job with type = class_diagram
-        parent_job = self.job_service.get_parent_job(job_id)
+        # Checks if this er diagram has an associated parent job with type = class_diagram, the parent is loaded with the job context
+        parent_job = self.job_context.parent_job if self.job_context is not None and self.job_context.matches(job_id) else self.job_service.get_parent_job(job_id)
         if not parent_job:
             return []
         # Class diagram jobs will be the parent of er diagram jobs 
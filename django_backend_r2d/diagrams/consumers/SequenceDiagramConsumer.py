@@ -7,6 +7,7 @@ from jobs.interfaces.JobServiceInterface import JobServiceInterface
 from jobs.interfaces.JobQueueInterface import JobQueueInterface
 from jobs.services.JobService import JobService
 from jobs.services.JobQueueService import JobQueueService
+from jobs.services.JobContext import JobContext
 from jobs.services.JobExceptions import JobNotFoundException
 from jobs.constants import ValidJobStatus, ValidJobTypes
 from model_manager.constants import ModelProvider, OpenAIModels
@@ -33,6 +34,7 @@ class SequenceDiagramConsumer(BaseConsumer):
         job_id (str): The job ID.
         job_service (JobServiceInterface): The job service. Default is JobService.
         job_queue_service (JobQueueInterface): The job queue service. Default is JobQueueService.
+        job_context (JobContext): The loaded job, the job is loaded once from the job_id if no context is provided.
     
     Raises:
         BaseConsumerException: If error encountered while updating the job status or job queue status.
@@ -40,18 +42,20 @@ class SequenceDiagramConsumer(BaseConsumer):
     """    
     def __init__(self, model_provider:ModelProvider, model_name:Enum, 
                  auditor_name:Enum, job_id:str, job_service:JobServiceInterface = JobService(), 
-                 job_queue_service:JobServiceInterface = JobQueueService()):    
+                 job_queue_service:JobServiceInterface = JobQueueService(), job_context:JobContext = None):    
         
         self.job_id = job_id
+        # Load the job once, the context is shared by the diagram service and the consumer
+        job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
         # Initialize the diagram service
         self.diagram_service = SequenceDiagramService(model_provider=model_provider, model_name=model_name, 
-                                                   auditor_name=auditor_name, job_id=job_id, serializer_class=CreateSequenceDiagramSerializer)
+                                                   auditor_name=auditor_name, job_id=job_id, job_context=job_context, serializer_class=CreateSequenceDiagramSerializer)
         # Initialize the repository
         self.repository = SequenceDiagramRepository()
 
         # Initialize BaseConsumer with the diagram service and repository
         super().__init__(consumer_name="SequenceDiagramConsumer", diagram_service=self.diagram_service, 
-                         repository=self.repository, job_service=job_service, job_queue_service=job_queue_service)
+                         repository=self.repository, job_service=job_service, job_queue_service=job_queue_service, job_context=job_context)
 
          
     def get_specific_error(self, message: str) -> SequenceDiagramConsumerError:
@@ -1,20 +1,47 @@
 from abc import ABC, abstractmethod
+from django.conf import settings
+from django.db import transaction
+from model_manager.services.MermaidParser import MermaidParser
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
 
 class BaseDiagramRepository(ABC):
     """
     Interface that all diagram repository must implement.
     """
-    @abstractmethod
+    parser = MermaidParser()
+    diagram_model = None # Model of the diagrams saved by the repository e.g., ClassDiagram
+
     def save_diagram(self, job_id:str, chain_response: dict) -> list[dict]:
         """
-        Iterate through the chain_response and save the er diagrams.
-        
+        Replaces the diagrams of the job with the diagrams of the chain_response.
+        The diagrams saved by a previous attempt of the job are deleted and the diagrams are inserted in a single transaction,
+        so that a job is never left without diagrams or with the diagrams of two attempts if saving fails.
+
+        args:
+            job_id: str - The job_id to save the diagrams for.
+            chain_response: dict - The chain response to save.
+        returns:
+            saved_diagrams: list[dict] - List of diagrams (dict) objects that were saved.
+        """
+        with transaction.atomic():
+            self.delete_diagrams(job_id)
+            return self.insert_diagrams(job_id, chain_response)
+
+    @abstractmethod
+    def insert_diagrams(self, job_id:str, chain_response: dict) -> list[dict]:
+        """
+        Iterate through the chain_response and save the diagrams, invoked by save_diagram within its transaction.
+        Each diagram is saved within a savepoint so that a diagram that fails to save does not roll back the other diagrams.
+
         args:
-            job_id: str - The job_id to save the er diagrams for.
+            job_id: str - The job_id to save the diagrams for.
             chain_response: dict - The chain response to save.
         returns:
             saved_diagrams: list[dict] - List of diagrams (dict) objects that were saved.
-        
+
         Assumes chain_response to be a dictionary containing one or more key-value pairs.
         e.g., {"model_1":"model_1_output", "model_2":"model_2_output"} this allows repository to be chain agnostic.
         """
@@ -39,5 +66,50 @@ class BaseDiagramRepository(ABC):
         returns:
             list - The class diagrams for the job_id. 
         """
-    
-    
\ No newline at end of file
+
+    def delete_diagrams(self, job_id:str) -> int:
+        """
+        Deletes the diagrams saved for the job, invoked by save_diagram so that saving the diagrams of a job again replaces them.
+        A task that is retried or redelivered after its diagrams were saved does not duplicate the diagrams of the job.
+        args:
+            job_id: str - The job_id of the diagrams to delete.
+        returns:
+            int - The number of diagrams deleted.
+        """
+        deleted, _ = self.diagram_model.objects.filter(job_id=job_id).delete()
+        if deleted:
+            logger.info(f"Replacing {deleted} diagrams previously saved for - {job_id}")
+        return deleted
+
+    def repair_diagram(self, diagram:dict, diagram_type:str, names_field:str, helper_field:str = None) -> dict:
+        """
+        Repairs the syntax faults of the diagram and replaces the names listed by the model with the names found in the diagram.
+        Names listed by the model are kept if the diagram has lines that could not be parsed. Disabled by R2D_MERMAID_AUTO_REPAIR.
+        args:
+            diagram (dict): The diagram to save e.g., {"diagram": "classDiagram ...", "classes": [...], "helper_classes": [...]}
+            diagram_type (str): The type of the diagram, used if the diagram has no header e.g., classDiagram.
+            names_field (str): The field listing the names of the diagram e.g., classes, entities or actors.
+            helper_field (str): Optional field listing names that are excluded from names_field e.g., helper_classes.
+        returns:
+            dict: The diagram with the repaired diagram and names.
+        """
+        if not getattr(settings, "R2D_MERMAID_AUTO_REPAIR", True) or not isinstance(diagram.get("diagram"), str):
+            return diagram
+        parsed = self.parser.parse(diagram["diagram"], diagram_type)
+        if parsed.diagram_type is None:
+            logger.warning(f"Unable to repair diagram of feature {diagram.get('feature')}: {parsed.issues}")
+            return diagram
+        if parsed.repairs:
+            logger.info(f"Repaired diagram of feature {diagram.get('feature')}: {parsed.repairs}")
+
+        names = parsed.get_names()
+        if not parsed.is_valid():
+            logger.warning(f"Diagram of feature {diagram.get('feature')} has lines that could not be parsed: {parsed.issues}")
+            names += [name for name in (diagram.get(names_field) or []) if name not in names]
+        repaired = {**diagram, "diagram": parsed.to_mermaid()}
+        if helper_field is not None:
+            helpers = [name for name in (diagram.get(helper_field) or []) if name in names]
+            repaired[helper_field] = helpers
+            names = [name for name in names if name not in helpers]
+        repaired[names_field] = names
+        return repaired
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import json 
+from framework.utils.DatabaseExecutor import DatabaseExecutor
 from rest_framework.exceptions import ValidationError
 from enum import Enum
 from framework.factories.ModelFactory import ModelFactory
@@ -7,12 +8,16 @@ from framework.factories.AuditorFactory import AuditorFactory
 from model_manager.interfaces.BaseChainInput import BaseChainInput
 from model_manager.interfaces.BasePromptBuilder import BasePromptBuilder
 from model_manager.constants import ModelProvider, OpenAIModels
-from model_manager.services.ModelExceptions import ModelInitializationError, ModelAnalysisError, AnalyzeAndAuditChainException
+from model_manager.services.ModelExceptions import ModelInitializationError, ModelAnalysisError, AnalyzeAndAuditChainException, ModelCircuitOpenError
 from model_manager.chains.AnalyzeAndAuditChain import AnalyzeAndAuditChain 
 from jobs.models import Job
 from jobs.services.JobExceptions import JobNotFoundException
+from jobs.services.JobCheckpointService import JobCheckpointService
+from jobs.services.JobContext import JobContext
 from diagrams.services.DiagramExceptions import UMLDiagramCreationError
+from diagrams.services.DiagramReuseService import DiagramReuseService
 from diagrams.serializers.UMLDiagramSerializer import UMLDiagramSerializer
+from diagrams.services.JobParametersValidator import JobParametersValidator
 import logging
 
 
@@ -48,6 +53,16 @@ class BaseDiagramService(ABC):
         # Set the serializer class to use
         self.serializer_class = serializer_class
         
+        # Saves the output of each step of the chain, retried jobs resume from the last completed step
+        self.checkpoint_service = JobCheckpointService()
+        
+        # Validates the job parameters, the validated job parameters are not validated again when the chain is rebuilt
+        self.job_parameters_validator = JobParametersValidator()
+        self._validated_job_parameters = None
+
+        # Audited diagrams of similar features of previous jobs, retrieved once when first used, see get_similar_diagrams
+        self.similar_diagrams = None
+        
     def generate_diagram(self) -> dict:
         """
         Generate user stories based on the model name and prompt. 
@@ -59,83 +74,196 @@ class BaseDiagramService(ABC):
             {"analysis_results": {}, "audited_results": {}}
         raises: 
             UMLDiagramCreationError - If there is an error in creating the UML diagram.
+            ModelCircuitOpenError - If the circuit of the model is open.
         """
         job_id = self.chain_input.get_job_id()
         
         try:
-            # Set the job parameters - Validates the job parameters using the serializer class provided fallback to UMLDiagramSerializer
-            self._validate_and_set_job_parameters(self.chain_input.get_job_parameters())
-            
-            # Initialize Models
-            model = self.model_factory.get_model(self.model_provider, self.model_name)
-            auditor = self.auditor_factory.get_auditor(self.model_provider, self.auditor_name)
-            
-            # Set Audit Criteria here - Audit criteria should be set based on the type of diagram being generated
-            audit_criteria = self.chain_input.get_audit_criteria()
-            
             # Initialize the chain
-            chain = AnalyzeAndAuditChain(model, auditor, self.chain_input, self.prompt_builder)
+            chain = self._build_chain()
             
             # Execute the chain 
             chain_response = chain.execute_chain()
             logger.debug(f"Chain response: {chain_response}")
             
             return chain_response
-        except ModelInitializationError as e:
+        except Exception as e:
+            raise self._to_diagram_creation_error(job_id, e)
+
+    async def agenerate_diagram(self) -> dict:
+        """
+        Asynchronous variant of generate_diagram, awaits the chain so that a single worker process can 
+        multiplex many in-flight LLM calls.
+        
+        returns:
+            chain_response: dict - The response from the chain execution. 
+            {"analysis_results": {}, "audited_results": {}}
+        raises: 
+            UMLDiagramCreationError - If there is an error in creating the UML diagram.
+            ModelCircuitOpenError - If the circuit of the model is open.
+        """
+        job_id = self.chain_input.get_job_id()
+        
+        try:
+            # Similar diagrams are queried before the chain is built, as the ORM cannot be used from the event loop
+            await DatabaseExecutor.run(self.get_similar_diagrams)
+            chain = self._build_chain()
+            chain_response = await chain.aexecute_chain()
+            logger.debug(f"Chain response: {chain_response}")
+            return chain_response
+        except Exception as e:
+            raise self._to_diagram_creation_error(job_id, e)
+
+    def restrict_to_features(self, features:list[str]):
+        """
+        Limits the job parameters sent through the chain to the features provided, used when the diagrams of the other features 
+        are copied from a previous job, see DiagramReuseService.
+        args:
+            features (list[str]): The features to generate diagrams for.
+        """
+        job_parameters = self.chain_input.get_job_parameters()
+        self.chain_input.set_job_parameters(DiagramReuseService.restrict_job_parameters(job_parameters, features))
+
+    def get_similar_diagrams(self) -> dict:
+        """
+        Returns the audited diagrams of similar features of previous jobs, retrieved once when first used so that initializing
+        the service does not query the embeddings, see retrieve_similar_diagrams.
+        returns:
+            dict: The similar diagrams of each feature, see SemanticReuseService.get_similar_diagrams.
+        """
+        if self.similar_diagrams is None:
+            self.similar_diagrams = self.retrieve_similar_diagrams(self.chain_input.get_job_id())
+        return self.similar_diagrams
+
+    def retrieve_similar_diagrams(self, job_id) -> dict:
+        """
+        Retrieves the audited diagrams of similar features of previous jobs of the user.
+        Override to copy near-identical diagrams and add similar diagrams to the analysis context, see SemanticReuseService.get_similar_diagrams.
+        args:
+            job_id (str): The job ID to use.
+        returns:
+            dict: The similar diagrams of each feature. Default is no similar diagrams.
+        """
+        return {}
+
+    def _build_chain(self) -> AnalyzeAndAuditChain:
+        """
+        Validates the job parameters and initializes the AnalyzeAndAuditChain using the model and auditor configured for this service.
+        The output of each step is checkpointed against the job, so that a retried job does not invoke the model again for completed steps.
+        returns:
+            AnalyzeAndAuditChain: The chain to execute.
+        """
+        # Set the job parameters - Validates the job parameters using the serializer class provided fallback to UMLDiagramSerializer
+        self._validate_and_set_job_parameters(self.chain_input.get_job_parameters())
+        # Retrieve the analysis context of the features that are generated, diagrams of the other features were copied
+        self.chain_input.set_analysis_context(self.retrieve_analysis_context(self.chain_input.get_job_id()))
+        
+        # Initialize Models
+        model = self.model_factory.get_model(self.model_provider, self.model_name)
+        auditor = self.auditor_factory.get_auditor(self.model_provider, self.auditor_name)
+        
+        return AnalyzeAndAuditChain(model, auditor, self.chain_input, self.prompt_builder, checkpoint_service=self.checkpoint_service)
+
+    def _to_diagram_creation_error(self, job_id:str, e:Exception) -> Exception:
+        """
+        Maps errors raised while generating a diagram to an UMLDiagramCreationError.
+        ModelCircuitOpenError is raised as is, so that consumers can hold the job until the circuit closes.
+        args:
+            job_id (str): The job ID.
+            e (Exception): The error raised while generating the diagram.
+        returns:
+            UMLDiagramCreationError: The exception to raise.
+        """
+        if isinstance(e, ModelCircuitOpenError):
+            logger.warning(f"Model unavailable while processing request: {job_id}: {str(e)}")
+            return e
+        if isinstance(e, ModelInitializationError):
             logger.error(f"Failed to initialize Model {str(e)}")
-            raise UMLDiagramCreationError(f"Failed to create class diagram for job_id: {job_id}: {str(e)}")
-        except ValidationError as e:
+            return UMLDiagramCreationError(f"Failed to create class diagram for job_id: {job_id}: {str(e)}")
+        if isinstance(e, ValidationError):
             logger.error(f"Failed to validate job_parameters: {str(e)}")
-            raise UMLDiagramCreationError(f"Invalid job parameters provided for for job_id: {job_id}: {str(e)}")
-        except ModelAnalysisError as e:
+            return UMLDiagramCreationError(f"Invalid job parameters provided for for job_id: {job_id}: {str(e)}")
+        if isinstance(e, ModelAnalysisError):
             logger.error(f"Failed to analyze prompt: {str(e)}")
-            raise UMLDiagramCreationError(f"Encountered errors while processing request: {job_id}: {str(e)}")
-        except AnalyzeAndAuditChainException as e:
+            return UMLDiagramCreationError(f"Encountered errors while processing request: {job_id}: {str(e)}")
+        if isinstance(e, AnalyzeAndAuditChainException):
             logger.error(f"Failed to execute chain: {str(e)}")
-            raise UMLDiagramCreationError(f"Encountered errors while processing request: {job_id}: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unhandled exception encountered: {job_id}: {str(e)}")
-            raise UMLDiagramCreationError(f"Unhandled exception encountered: {job_id}: {str(e)}")
+            return UMLDiagramCreationError(f"Encountered errors while processing request: {job_id}: {str(e)}")
+        logger.error(f"Unhandled exception encountered: {job_id}: {str(e)}")
+        return UMLDiagramCreationError(f"Unhandled exception encountered: {job_id}: {str(e)}")
     
     def _validate_and_set_job_parameters(self, job_parameters: dict):
         """
         Set the job parameters for the chain input.
         Attempts to validate the job parameters using the primary serializer class provided (Create diagrams from previous diagram output).
         If the primary serializer is not valid, it falls back to the UMLDiagramSerializer (Create diagrams from UserStories).
+        Each serializer validates the job parameters once (see JobParametersValidator), job parameters that were already validated are not validated again.
         
         args:
             job_parameters: dict - The job parameters to set.
+        raises:
+            ValidationError: If the job parameters are not valid for either serializer.
         """
+        if job_parameters is not None and job_parameters is self._validated_job_parameters:
+            logger.debug("Job parameters have already been validated")
+            return
+
         # Validate using the primary serializer class provided
-        primary_serializer = self.serializer_class(data=job_parameters)
+        validated_job_parameters, primary_errors = self.job_parameters_validator.validate(self.serializer_class, job_parameters)
         
-        if primary_serializer.is_valid():
+        if primary_errors is None:
             logger.debug("Primary serializer is valid")
-            validated_job_parameters = primary_serializer.validated_data
-            self.chain_input.set_job_parameters(validated_job_parameters)
+            self._set_validated_job_parameters(validated_job_parameters)
             return  # Exit early if primary serializer is valid
         
         # Validate using the UMLDiagramSerializer as a fallback
-        fallback_serializer = UMLDiagramSerializer(data=job_parameters)
+        validated_job_parameters, fallback_errors = self.job_parameters_validator.validate(UMLDiagramSerializer, job_parameters)
         
-        if fallback_serializer.is_valid():
+        if fallback_errors is None:
             logger.debug("UMLDiagramSerializer is valid")
-            validated_job_parameters = fallback_serializer.validated_data
-            self.chain_input.set_job_parameters(validated_job_parameters)
+            self._set_validated_job_parameters(validated_job_parameters)
         else:
             # Raise a validation error if neither serializer is valid
-            primary_serializer.is_valid()  # Ensure .is_valid() is called to generate .errors
             raise ValidationError({
-                'primary_serializer_errors': primary_serializer.errors,
-                'fallback_serializer_errors': fallback_serializer.errors
+                'primary_serializer_errors': primary_errors,
+                'fallback_serializer_errors': fallback_errors
             })
+
+    def _set_validated_job_parameters(self, validated_job_parameters:dict):
+        self.chain_input.set_job_parameters(validated_job_parameters)
+        self._validated_job_parameters = validated_job_parameters
     
-    def retrieve_job_parameters(self, job_id):
+    def retrieve_analysis_context(self, job_id) -> dict:
+        """
+        Retrieves the analysis context of the chain, invoked when the chain is built.
+        args:
+            job_id (str): The job ID to use.
+        returns:
+            dict: The analysis context. Default is the analysis context of the chain input.
+        """
+        return self.chain_input.get_analysis_context()
+
+    def retrieve_bypass_cache(self, job_id, job_context:JobContext = None) -> bool:
+        """
+        Returns True if the job was submitted with bypass_cache, LLM responses for the job will not be served from the cache.
+        
+        Args:
+            job_id (str): The job ID.
+            job_context (JobContext): The loaded job, the job is queried if no context is provided.
+        Returns:
+            bool: The bypass_cache flag of the job, False if the job does not exist.
+        """
+        if job_context is not None and job_context.matches(job_id):
+            return job_context.bypass_cache
+        return bool(Job.objects.filter(job_id=job_id).values_list('bypass_cache', flat=True).first())
+
+    def retrieve_job_parameters(self, job_id, job_context:JobContext = None):
         """
         Retrieve job parameters and ensure they are in dictionary format.
         
         Args:
             job_id (str): The job ID.
+            job_context (JobContext): The loaded job, the job is queried if no context is provided.
 
         Returns:
             dict: The job parameters as a dictionary.
@@ -144,18 +272,6 @@ class BaseDiagramService(ABC):
             JobNotFoundException: If the job with the specified ID is not found.
             ValidationError: If the job parameters cannot be decoded from JSON.
         """
-        try:
-            job = Job.objects.get(job_id=job_id)
-            job_parameters_str = job.parameters
-        except Job.DoesNotExist:
-            raise JobNotFoundException(f"Job with ID {job_id} not found.")
-        
-        if isinstance(job_parameters_str, dict):
-            return job_parameters_str  # Already a dictionary, no need to deserialize
-        
-        try:
-            job_parameters = json.loads(job_parameters_str)
-        except json.JSONDecodeError as e:
-            raise ValidationError(f"Failed to decode job parameters: {str(e)}")
-        
-        return job_parameters
\ No newline at end of file
+        if job_context is None or not job_context.matches(job_id):
+            job_context = JobContext.load(job_id)
+        return job_context.get_job_parameters()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from diagrams.serializers.UMLDiagramSerializer import UMLDiagramSerializer
+from diagrams.services.JobParametersValidator import JobParametersValidator
+
+class Command(BaseCommand):
+    """
+    Measures the time taken to validate job parameters using the UMLDiagramSerializer, compared to the compiled JobParametersValidator.
+    Job parameters are generated with the number of user stories provided, 10 user stories are grouped per sub feature and 5 sub features per feature.
+    e.g., python manage.py benchmark_job_parameters_validation --stories 10 100 1000 5000 --iterations 5
+    """
+    help = "Benchmarks the UMLDiagramSerializer against the compiled JobParametersValidator for job parameters of increasing size."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stories", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Number of user stories per job. Default is 10 100 1000 5000.")
+        parser.add_argument("--iterations", type=int, default=5, help="Number of validations per size. Default is 5.")
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        validator = JobParametersValidator()
+
+        self.stdout.write(f"{'stories':>8}{'serializer (ms)':>18}{'compiled (ms)':>16}{'speedup':>10}")
+        for story_count in options["stories"]:
+            job_parameters = self.create_job_parameters(story_count)
+            serializer = self._time_per_call(lambda: UMLDiagramSerializer(data=job_parameters).is_valid(raise_exception=True), iterations)
+            compiled = self._time_per_call(lambda: validator.validate(UMLDiagramSerializer, job_parameters), iterations)
+            speedup = serializer / compiled if compiled else float("inf")
+            self.stdout.write(f"{story_count:>8}{serializer:>18.2f}{compiled:>16.2f}{speedup:>9.1f}x")
+
+    @staticmethod
+    def create_job_parameters(story_count:int) -> dict:
+        """
+        Returns job parameters in the UMLDiagramSerializer format containing the number of user stories provided.
+        """
+        job_parameters = {}
+        for index in range(story_count):
+            feature = f"Feature {index // 50}"
+            sub_feature = f"Sub Feature {index // 10}"
+            job_parameters.setdefault(feature, {}).setdefault(sub_feature, {})[f"STORY-{index}"] = {
+                "id": f"STORY-{index}",
+                "requirement": f"As a user I want to complete task {index} so that my work is recorded",
+                "services_to_use": ["AWS Lambda", "Amazon S3"],
+                "acceptance_criteria": f"Task {index} is persisted and visible in the activity history",
+                "additional_information": "",
+            }
+        return {
+            "features": list(job_parameters),
+            "sub_features": [sub_feature for sub_features in job_parameters.values() for sub_feature in sub_features],
+            "job_parameters": job_parameters,
+        }
+
+    @staticmethod
+    def _time_per_call(function, iterations:int) -> float:
+        """
+        Returns the mean duration of a call in milliseconds.
+        """
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        return (time.perf_counter() - start) / iterations * 1000
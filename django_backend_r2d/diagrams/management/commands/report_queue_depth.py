@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from diagrams.services.DiagramTaskRouter import DiagramTaskRouter
+
+class Command(BaseCommand):
+    """
+    Reports the number of messages waiting in the default queue and in the queue of each diagram job type and model (see R2D_TASK_ROUTING).
+    e.g., python manage.py report_queue_depth
+          python manage.py report_queue_depth --queues diagrams.class_diagram.gpt-4-turbo --non-empty
+    """
+    help = "Reports the number of messages waiting in each Celery queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queues", nargs="+", default=None, help="Queues to report. Default is the default queue and every diagram queue.")
+        parser.add_argument("--non-empty", action="store_true", help="Only report queues with waiting messages.")
+
+    def handle(self, *args, **options):
+        depths = DiagramTaskRouter.get_queue_depths(options["queues"])
+        width = max(len(queue_name) for queue_name in depths)
+        for queue_name, depth in depths.items():
+            if depth or not options["non_empty"]:
+                self.stdout.write(f"{queue_name:<{width}}  {depth}")
+        self.stdout.write(f"{sum(depths.values())} messages waiting in {len(depths)} queues")
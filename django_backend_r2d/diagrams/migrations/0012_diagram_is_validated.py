@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0011_alter_sequencediagram_feature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classdiagram',
+            name='is_validated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='erdiagram',
+            name='is_validated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='sequencediagram',
+            name='is_validated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -16,6 +16,7 @@ class ClassDiagram(models.Model):
     classes: list - The classes in the diagram
     helper_classes: list - The views, controllers and/or interface classes in the diagram
     is_audited: bool - Determines if the diagram has been audited
+    is_validated: bool - Determines if the diagram passed the MermaidValidator without being audited
     created_timestamp: datetime - The timestamp when the class diagram was created
     last_updated_timestamp: datetime - The timestamp when the class diagram was last updated
     """
@@ -27,6 +28,7 @@ class ClassDiagram(models.Model):
     classes = models.JSONField()  
     helper_classes = models.JSONField()
     is_audited = models.BooleanField(default=False) # Determines if the diagram has been audited
+    is_validated = models.BooleanField(default=False) # Determines if the diagram passed the MermaidValidator without being audited
     created_timestamp = models.DateTimeField(auto_now_add=True)
     last_updated_timestamp = models.DateTimeField(auto_now=True)
 
@@ -43,6 +45,7 @@ class ERDiagram(models.Model):
     description: str - The description of the ER diagram
     entities: list - The ER in the diagram
     is_audited: bool - Determines if the diagram has been audited
+    is_validated: bool - Determines if the diagram passed the MermaidValidator without being audited
     created_timestamp: datetime - The timestamp when the ER diagram was created
     last_updated_timestamp: datetime - The timestamp when the ER diagram was last updated
     """
@@ -53,6 +56,7 @@ class ERDiagram(models.Model):
     description = models.TextField()
     entities = models.JSONField()  
     is_audited = models.BooleanField(default=False) # Determines if the diagram has been audited
+    is_validated = models.BooleanField(default=False) # Determines if the diagram passed the MermaidValidator without being audited
     created_timestamp = models.DateTimeField(auto_now_add=True)
     last_updated_timestamp = models.DateTimeField(auto_now=True)
 
@@ -69,6 +73,7 @@ class SequenceDiagram(models.Model):
     description: str - The description of the interactions and messages in the diagram.
     actors: list - The actors in the diagram.
     is_audited: bool - Determines if the diagram has been audited.
+    is_validated: bool - Determines if the diagram passed the MermaidValidator without being audited.
     created_timestamp: datetime - The timestamp when the sequence diagram was created.
     last_updated_timestamp: datetime - The timestamp when the sequence diagram was last updated.
     """
@@ -79,6 +84,7 @@ class SequenceDiagram(models.Model):
     description = models.TextField()
     actors = models.JSONField()  # JSONField to store list of actors
     is_audited = models.BooleanField(default=False)
+    is_validated = models.BooleanField(default=False)
     created_timestamp = models.DateTimeField(auto_now_add=True)
     last_updated_timestamp = models.DateTimeField(auto_now=True)
 
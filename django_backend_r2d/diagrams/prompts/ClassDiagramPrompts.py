@@ -1,15 +1,13 @@
 from model_manager.interfaces.BasePromptTemplate import BasePromptTemplate
-from langchain.prompts import PromptTemplate
+from model_manager.services.PromptTemplateRegistry import PromptTemplateRegistry
 
+@PromptTemplateRegistry.register
 class ClassDiagramPromptTemplate(BasePromptTemplate):
     """
     Prompt used to generate a class diagram based on job_parameters.
     Returns a prompt (str) for generating a class diagram based on the job parameters.
     """    
-    @staticmethod
-    def get_prompt(job_parameters: dict, context: dict = None) -> str:
-        if context is None:
-            template = r"""
+    TEMPLATE = r"""
             You are a systems design expert. Your task is to create comprehensive and detailed class diagrams based on the given user stories.
 
             Here are the user stories grouped by features:
@@ -67,14 +65,8 @@ class ClassDiagramPromptTemplate(BasePromptTemplate):
             classO .. classP : Link(Dashed)
             
             """
-            prompt = PromptTemplate(
-                input_variables=["job_parameters"],
-                template=template
-            )  
-            return prompt.format(job_parameters=job_parameters)
-        else:
-            # For prompts where context is provided
-            template = r"""
+
+    CONTEXT_TEMPLATE = r"""
             You are a systems design expert. Your task is to create comprehensive and detailed class diagrams based on the given user stories.
 
             Here are the user stories grouped by features:
@@ -132,21 +124,20 @@ class ClassDiagramPromptTemplate(BasePromptTemplate):
             Lastly, here is some additional context:
             {context}
             """
-            prompt = PromptTemplate(
-                input_variables=["job_parameters", "context"],
-                template=template
-            )
-            
-            return prompt.format(job_parameters=job_parameters, context=context)
+
+    @staticmethod
+    def get_prompt(job_parameters: dict, context: dict = None) -> str:
+        if context is None:
+            return PromptTemplateRegistry.render(ClassDiagramPromptTemplate, has_context=False, job_parameters=job_parameters)
+        return PromptTemplateRegistry.render(ClassDiagramPromptTemplate, has_context=True, job_parameters=job_parameters, context=context)
 
 
+@PromptTemplateRegistry.register
 class AuditClassDiagramPromptTemplate(BasePromptTemplate):
     """
     Prompt used to Audit the class diagrams generated. 
     """
-    @staticmethod
-    def get_prompt(result: dict, context: dict) -> str:
-        template = r"""
+    TEMPLATE = r"""
             You are a systems design auditor. Your task is to audit the class diagrams generated that have been grouped based on features.
 
             Here are the class diagrams that need to be audited:
@@ -196,8 +187,8 @@ class AuditClassDiagramPromptTemplate(BasePromptTemplate):
             Here are the audit criteria that must be met:
             {context}
             """
-        prompt = PromptTemplate(
-            input_variables=["result", "context"],
-            template=template
-        )
-        return prompt.format(result=result, context=context)
+
+    @staticmethod
+    def get_prompt(result: dict, context: dict) -> str:
+        # Audit criteria are always rendered into the template, even when no criteria are provided
+        return PromptTemplateRegistry.render(AuditClassDiagramPromptTemplate, has_context=False, result=result, context=context)
@@ -1,15 +1,13 @@
 from model_manager.interfaces.BasePromptTemplate import BasePromptTemplate
-from langchain.prompts import PromptTemplate
+from model_manager.services.PromptTemplateRegistry import PromptTemplateRegistry
 
+@PromptTemplateRegistry.register
 class ERDiagramPromptTemplate(BasePromptTemplate):
     """
     Prompt used to generate an ER diagram based on job_parameters.
     Returns a prompt (str) for generating a class diagram based on the job parameters.
     """    
-    @staticmethod
-    def get_prompt(job_parameters: dict, context: dict = None) -> str:
-        if context is None:
-            template = r"""
+    TEMPLATE = r"""
             You are a database design expert, your task is to create comprehensive and detailed entity-relationship diagrams. 
             
             You will be provided with job parameters that can be either: 
@@ -50,16 +48,8 @@ class ERDiagramPromptTemplate(BasePromptTemplate):
                 }}
                 CUSTOMER ||--o{{ ORDER : places
             """
-            # Create the prompt template without context
-            prompt = PromptTemplate(
-                input_variables=["job_parameters"],
-                template=template
-            )
-            
-            return prompt.format(job_parameters=job_parameters)
-        else: 
-            # Create the prompt template with context
-            template = r"""
+
+    CONTEXT_TEMPLATE = r"""
             You are a database design expert, your task is to create comprehensive and detailed entity-relationship (ER) diagrams. 
             
             You will be provided with job parameters that can be either: 
@@ -106,21 +96,20 @@ class ERDiagramPromptTemplate(BasePromptTemplate):
             Here are some additional context for the job:
             {context}
             """
-            prompt = PromptTemplate(
-                input_variables=["job_parameters", "context"],
-                template=template
-            )
-            
-            return prompt.format(job_parameters=job_parameters, context=context)
+
+    @staticmethod
+    def get_prompt(job_parameters: dict, context: dict = None) -> str:
+        if context is None:
+            return PromptTemplateRegistry.render(ERDiagramPromptTemplate, has_context=False, job_parameters=job_parameters)
+        return PromptTemplateRegistry.render(ERDiagramPromptTemplate, has_context=True, job_parameters=job_parameters, context=context)
 
 
+@PromptTemplateRegistry.register
 class AuditERDiagramPromptTemplate(BasePromptTemplate):
     """
     Prompt used to Audit the ER diagrams generated. 
     """
-    @staticmethod
-    def get_prompt(result: dict, context: dict) -> str:
-        template = r"""
+    TEMPLATE = r"""
         You are a database design auditor. Your task is to audit the provided entity-relationship (ER) diagram that has been grouped based on features.
 
         Here are the ER diagrams that need to be audited:
@@ -156,8 +145,8 @@ class AuditERDiagramPromptTemplate(BasePromptTemplate):
             ENTITY5 |o--o{{ ENTITY6 : Yet Another Relationship Description
             ENTITY7 }}--|{{ ENTITY8 : One More Relationship Description
         """
-        prompt = PromptTemplate(
-            input_variables=["result", "context"],
-            template=template
-        )
-        return prompt.format(result=result, context=context)
+
+    @staticmethod
+    def get_prompt(result: dict, context: dict) -> str:
+        # Audit criteria are always rendered into the template, even when no criteria are provided
+        return PromptTemplateRegistry.render(AuditERDiagramPromptTemplate, has_context=False, result=result, context=context)
@@ -1,15 +1,13 @@
 from model_manager.interfaces.BasePromptTemplate import BasePromptTemplate
-from langchain.prompts import PromptTemplate
+from model_manager.services.PromptTemplateRegistry import PromptTemplateRegistry
 
+@PromptTemplateRegistry.register
 class SequenceDiagramPromptTemplate(BasePromptTemplate):
     """
     Prompt used to generate a sequence diagram based on job_parameters.
     Returns a prompt (str) for generating a sequence diagram based on the job parameters.
     """
-    @staticmethod
-    def get_prompt(job_parameters: dict, context: dict = None) -> str:
-        if context is None:
-            template = r"""
+    TEMPLATE = r"""
                 You are a systems design expert. Your task is to create comprehensive and detailed sequence diagrams based on the given input.
 
                 You will be provided with classes and entities and a summary of what each class/entity does. You need to create sequence diagrams based on the interactions between these classes and entities.
@@ -53,15 +51,8 @@ class SequenceDiagramPromptTemplate(BasePromptTemplate):
 
                 Use this syntax to generate the required sequence diagrams:
                 """
-            prompt = PromptTemplate(
-                input_variables=["job_parameters"],
-                template=template
-            )
-            
-            return prompt.format(job_parameters=job_parameters)
-        else:
-            # For prompts where context is provided
-            template = r"""
+
+    CONTEXT_TEMPLATE = r"""
                 You are a systems design expert. Your task is to create comprehensive and detailed sequence diagrams based on the given input.
 
                 You will be provided with classes and entities and a summary of what each class/entity does. You need to create sequence diagrams based on the interactions between these classes and entities.
@@ -108,20 +99,20 @@ class SequenceDiagramPromptTemplate(BasePromptTemplate):
 
                 Your output should contain one or more sequence diagrams. 
                 """
-            prompt = PromptTemplate(
-                input_variables=["job_parameters", "context"],
-                template=template
-            )
-            
-            return prompt.format(job_parameters=job_parameters, context=context)
 
+    @staticmethod
+    def get_prompt(job_parameters: dict, context: dict = None) -> str:
+        if context is None:
+            return PromptTemplateRegistry.render(SequenceDiagramPromptTemplate, has_context=False, job_parameters=job_parameters)
+        return PromptTemplateRegistry.render(SequenceDiagramPromptTemplate, has_context=True, job_parameters=job_parameters, context=context)
+
+
+@PromptTemplateRegistry.register
 class AuditSequenceDiagramPromptTemplate(BasePromptTemplate):
     """
     Prompt used to audit the sequence diagrams generated.
     """
-    @staticmethod
-    def get_prompt(result: dict, context: dict) -> str:
-        template = r"""
+    TEMPLATE = r"""
             You are a systems design auditor. Your task is to audit the sequence diagrams generated based on the given inputs.
 
             Here are the sequence diagrams that need to be audited:
@@ -173,8 +164,8 @@ class AuditSequenceDiagramPromptTemplate(BasePromptTemplate):
 
             Your output should contain multiple sequence diagrams that have been audited and improved.
             """
-        prompt = PromptTemplate(
-            input_variables=["result", "context"],
-            template=template
-        )
-        return prompt.format(result=result, context=context)
\ No newline at end of file
+
+    @staticmethod
+    def get_prompt(result: dict, context: dict) -> str:
+        # Audit criteria are always rendered into the template, even when no criteria are provided
+        return PromptTemplateRegistry.render(AuditSequenceDiagramPromptTemplate, has_context=False, result=result, context=context)
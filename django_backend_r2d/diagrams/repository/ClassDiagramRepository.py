@@ -2,14 +2,19 @@ from diagrams.models import ClassDiagram
 from diagrams.serializers.ClassDiagramSerializer import ClassDiagramSerializer  
 from diagrams.services.DiagramExceptions import ClassDiagramSavingError
 from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 from diagrams.interfaces.BaseDiagramRepository import BaseDiagramRepository
+from model_manager.services.MermaidParser import CLASS_DIAGRAM
 
 import logging 
 # Initialize the logger
 logger = logging.getLogger('application_logging')
 
 class ClassDiagramRepository(BaseDiagramRepository):
-    def save_diagram(self, job_id:str, chain_response: dict) -> list[dict]:
+    diagram_model = ClassDiagram
+
+    def insert_diagrams(self, job_id:str, chain_response: dict) -> list[dict]:
         """
         Iterate through the chain_response and save the class diagrams.
         
@@ -38,11 +43,15 @@ class ClassDiagramRepository(BaseDiagramRepository):
                     "description": diagram["description"],
                     "classes": diagram["classes"],
                     "helper_classes": diagram["helper_classes"], # Correct field name
-                    "is_audited": chain_response[model].get("is_audited")
+                    "is_audited": chain_response[model].get("is_audited"),
+                    "is_validated": bool(diagram.get("is_validated"))
                 }
+                # Repair syntax faults of the diagram and list the names found in the diagram
+                diagram = self.repair_diagram(diagram, CLASS_DIAGRAM, "classes", helper_field="helper_classes")
                 try:
-                    # Save the diagram 
-                    saved_diagram = self.save(diagram)
+                    # Save the diagram within a savepoint, a failed insert does not roll back the transaction of save_diagram
+                    with transaction.atomic():
+                        saved_diagram = self.save(diagram)
                     saved_diagrams.append(saved_diagram)
                 except ClassDiagramSavingError as e:
                     # If one diagram fails to save, log the error and continue to the next diagram
@@ -91,9 +100,10 @@ class ClassDiagramRepository(BaseDiagramRepository):
             list - The class diagrams for the job_id. 
         """
         try:
-            class_diagrams = ClassDiagram.objects.filter(job_id=job_id).values()
+            # Evaluated once, logging the queryset would query the diagrams again
+            class_diagrams = list(ClassDiagram.objects.filter(job_id=job_id).values())
             logger.debug(f"Retrieved class diagrams by job_id: {class_diagrams}")
-            return list(class_diagrams)
+            return class_diagrams
         except Exception as e:
             logger.error(f"Error while retrieving class diagrams by job_id: {str(e)}")
             raise ClassDiagramRetrievalError("An error occurred while retrieving the class diagrams.")
@@ -107,9 +117,10 @@ class ClassDiagramRepository(BaseDiagramRepository):
             list - The class diagrams for the job_id. 
         """
         try:
-            class_diagrams = ClassDiagram.objects.filter(job_id=job_id, is_audited=True).values()
+            # Evaluated once, logging the queryset would query the diagrams again
+            class_diagrams = list(ClassDiagram.objects.filter(Q(is_audited=True) | Q(is_validated=True), job_id=job_id).values())
             logger.debug(f"Retrieved class diagrams by job_id: {class_diagrams}")
-            return list(class_diagrams)
+            return class_diagrams
         except Exception as e:
             logger.error(f"Error while retrieving class diagrams by job_id: {str(e)}")
             raise ClassDiagramRetrievalError("An error occurred while retrieving the class diagrams.")
\ No newline at end of file
@@ -2,7 +2,10 @@ from diagrams.models import ERDiagram
 from diagrams.serializers.ERDiagramSerializer import ERDiagramSerializer  
 from diagrams.services.DiagramExceptions import ERDiagramRetrievalError, ERDiagramSavingError
 from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 from diagrams.interfaces.BaseDiagramRepository import BaseDiagramRepository
+from model_manager.services.MermaidParser import ER_DIAGRAM
 
 import logging 
 # Initialize the logger
@@ -12,7 +15,9 @@ class ERDiagramRepository(BaseDiagramRepository):
     """
     Repository class for saving and retrieving ER diagrams.
     """
-    def save_diagram(self, job_id:str, chain_response: dict) -> list[dict]:
+    diagram_model = ERDiagram
+
+    def insert_diagrams(self, job_id:str, chain_response: dict) -> list[dict]:
         """
         Iterate through the chain_response and save the er diagrams.
         
@@ -42,11 +47,15 @@ class ERDiagramRepository(BaseDiagramRepository):
                     "diagram": diagram["diagram"],
                     "description": diagram["description"],
                     "entities": diagram["entities"],
-                    "is_audited": chain_response[model].get("is_audited")
+                    "is_audited": chain_response[model].get("is_audited"),
+                    "is_validated": bool(diagram.get("is_validated"))
                 }
+                # Repair syntax faults of the diagram and list the names found in the diagram
+                diagram = self.repair_diagram(diagram, ER_DIAGRAM, "entities")
                 try:
-                    # Save the diagram 
-                    saved_diagram = self.save(diagram)
+                    # Save the diagram within a savepoint, a failed insert does not roll back the transaction of save_diagram
+                    with transaction.atomic():
+                        saved_diagram = self.save(diagram)
                     saved_diagrams.append(saved_diagram)
                 except ERDiagramSavingError as e:
                     # If one diagram fails to save, log the error and continue to the next diagram
@@ -110,7 +119,7 @@ class ERDiagramRepository(BaseDiagramRepository):
             list - The er diagrams for the job_id. 
         """
         try:
-            er_diagrams = ERDiagram.objects.filter(job_id=job_id, is_audited=True).values()
+            er_diagrams = ERDiagram.objects.filter(Q(is_audited=True) | Q(is_validated=True), job_id=job_id).values()
             return list(er_diagrams)
         except Exception as e:
             logger.error(f"Error while retrieving class diagrams by job_id: {str(e)}")
@@ -2,7 +2,10 @@ from diagrams.models import SequenceDiagram
 from diagrams.serializers.SequenceDiagramSerializer import SequenceDiagramSerializer  
 from diagrams.services.DiagramExceptions import SequenceDiagramSavingError, SequenceDiagramRetrievalError
 from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 from diagrams.interfaces.BaseDiagramRepository import BaseDiagramRepository
+from model_manager.services.MermaidParser import SEQUENCE_DIAGRAM
 
 import logging
 # Initialize the logger
@@ -12,7 +15,9 @@ class SequenceDiagramRepository(BaseDiagramRepository):
     """
     Repository class for saving and retrieving sequence diagrams.
     """
-    def save_diagram(self, job_id:str, chain_response: dict) -> list[dict]:
+    diagram_model = SequenceDiagram
+
+    def insert_diagrams(self, job_id:str, chain_response: dict) -> list[dict]:
         """
         Iterate through the chain_response and save the sequence diagrams.
         
@@ -42,11 +47,15 @@ class SequenceDiagramRepository(BaseDiagramRepository):
                     "diagram": diagram["diagram"],
                     "description": diagram["description"],
                     "actors": diagram["actors"],
-                    "is_audited": chain_response[model].get("is_audited")
+                    "is_audited": chain_response[model].get("is_audited"),
+                    "is_validated": bool(diagram.get("is_validated"))
                 }
+                # Repair syntax faults of the diagram and list the names found in the diagram
+                diagram = self.repair_diagram(diagram, SEQUENCE_DIAGRAM, "actors")
                 try:
-                    # Save the diagram 
-                    saved_diagram = self.save(diagram)
+                    # Save the diagram within a savepoint, a failed insert does not roll back the transaction of save_diagram
+                    with transaction.atomic():
+                        saved_diagram = self.save(diagram)
                     saved_diagrams.append(saved_diagram)
                 except SequenceDiagramSavingError as e:
                     # If one diagram fails to save, log the error and continue to the next diagram
@@ -54,6 +63,14 @@ class SequenceDiagramRepository(BaseDiagramRepository):
                     failed_to_save_count += 1
                     failed_to_save_diagrams.append(diagram)
                     continue 
+
+        # Logging summary of results
+        if failed_to_save_diagrams:
+            logger.error(f"Failed to save {len(failed_to_save_diagrams)} sequence diagrams.")
+            logger.error(f"Failed diagrams: {failed_to_save_diagrams}")
+
+        logger.debug(f"Diagrams saved: {saved_diagrams}.")
+        return saved_diagrams
                 
     def save(self, data: dict) -> dict:
         """
@@ -102,7 +119,7 @@ class SequenceDiagramRepository(BaseDiagramRepository):
             list - The sequence diagrams for the job_id. 
         """
         try:
-            sequence_diagrams = SequenceDiagram.objects.filter(job_id=job_id, is_audited=True).values()
+            sequence_diagrams = SequenceDiagram.objects.filter(Q(is_audited=True) | Q(is_validated=True), job_id=job_id).values()
             return list(sequence_diagrams)
         except Exception as e:
             logger.error(f"Error while retrieving sequence diagrams by job_id: {str(e)}")
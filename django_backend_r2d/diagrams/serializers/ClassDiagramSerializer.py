@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from diagrams.models import ClassDiagram
 from model_manager.models import ModelName
+from jobs.services.JobLookupCache import JobLookupCache
 
 class ClassDiagramSerializer(serializers.ModelSerializer):
     """
@@ -14,29 +15,30 @@ class ClassDiagramSerializer(serializers.ModelSerializer):
         classes: list - The classes of the class diagram.
         helper_classes: list - The helper classes of the class diagram.
         is_audited: bool - Whether the class diagram has
+        is_validated: bool - Whether the diagram passed the MermaidValidator without being audited
     This serializer should match the response schema. 
     """
     model_name = serializers.CharField(write_only=True)  
     
     class Meta:
         model = ClassDiagram
-        fields = ['job', 'model_name', 'feature', 'diagram', 'description', "helper_classes",'classes', 'is_audited', 'created_timestamp', 'last_updated_timestamp']
+        fields = ['job', 'model_name', 'feature', 'diagram', 'description', "helper_classes",'classes', 'is_audited', 'is_validated', 'created_timestamp', 'last_updated_timestamp']
 
     def create(self, validated_data):
         model_name = validated_data.pop('model_name')
-        validated_data['model'] = ModelName.objects.get(name=model_name)
+        validated_data['model'] = JobLookupCache.get_model_name(str(model_name))
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
         model_name = validated_data.pop('model_name', None)
         if model_name:
-            model_name = ModelName.objects.get(name=model_name)
+            model_name = JobLookupCache.get_model_name(str(model_name))
             instance.model = model_name  # Use correct field name
         return super().update(instance, validated_data)
 
     def validate_model_name(self, value):
         try:
-            model_name_instance = ModelName.objects.get(name=value)
+            model_name_instance = JobLookupCache.get_model_name(value)
         except ModelName.DoesNotExist:
             raise serializers.ValidationError("Model name is invalid.")
         return model_name_instance
\ No newline at end of file
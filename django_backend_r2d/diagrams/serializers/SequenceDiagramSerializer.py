@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from diagrams.models import SequenceDiagram
 from model_manager.models import ModelName
+from jobs.services.JobLookupCache import JobLookupCache
 
 class SequenceDiagramSerializer(serializers.ModelSerializer):
     """
@@ -13,29 +14,30 @@ class SequenceDiagramSerializer(serializers.ModelSerializer):
         description: str - The description of the sequence diagram.
         actors: list - The entities of the sequence diagram.
         is_audited: bool - Whether the sequence diagram has been audited
+        is_validated: bool - Whether the diagram passed the MermaidValidator without being audited
     This serializer should match the response schema. 
     """
     model_name = serializers.CharField(write_only=True)  
     
     class Meta:
         model = SequenceDiagram
-        fields = ['job', 'model_name', 'feature', 'diagram', 'description', 'actors', 'is_audited', 'created_timestamp', 'last_updated_timestamp']
+        fields = ['job', 'model_name', 'feature', 'diagram', 'description', 'actors', 'is_audited', 'is_validated', 'created_timestamp', 'last_updated_timestamp']
 
     def create(self, validated_data):
         model_name = validated_data.pop('model_name')
-        validated_data['model'] = ModelName.objects.get(name=model_name)
+        validated_data['model'] = JobLookupCache.get_model_name(str(model_name))
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
         model_name = validated_data.pop('model_name', None)
         if model_name:
-            model_name = ModelName.objects.get(name=model_name)
+            model_name = JobLookupCache.get_model_name(str(model_name))
             instance.model = model_name  # Use correct field name
         return super().update(instance, validated_data)
 
     def validate_model_name(self, value):
         try:
-            model_name_instance = ModelName.objects.get(name=value)
+            model_name_instance = JobLookupCache.get_model_name(value)
         except ModelName.DoesNotExist:
             raise serializers.ValidationError("Model name is invalid.")
         return model_name_instance
\ No newline at end of file
@@ -3,6 +3,9 @@ from model_manager.constants import ModelProvider # Contains the ModelProvider a
 from model_manager.chains.AnalyzeAndAuditChainPromptBuilder import AnalyzeAndAuditChainPromptBuilder
 from diagrams.chain_inputs.ClassDiagramAuditAnalyzeChainInputs import ClassDiagramAuditAnalyzeChainInputs
 from diagrams.interfaces.BaseDiagramService import BaseDiagramService
+from diagrams.services.SemanticReuseService import SemanticReuseService
+from diagrams.repository.ClassDiagramRepository import ClassDiagramRepository
+from jobs.services.JobContext import JobContext
 from diagrams.serializers.UMLDiagramSerializer import UMLDiagramSerializer
 from jobs.services.JobService import JobService
 from jobs.services.JobExceptions import JobNotFoundException
@@ -22,21 +25,26 @@ class ClassDiagramService(BaseDiagramService):
         model_name (Enum): The model name to use.
         auditor_name (Enum): The auditor name to use.
         job_id (str): The job ID to use.
+        job_context (JobContext): The loaded job, the job is loaded from the job_id if no context is provided.
         
     override the retrieve_job_parameters, retrieve_analysis_context and retrieve_audit_criteria functions to customize the ER diagram chain.
     """
-    def __init__(self, model_provider:ModelProvider, model_name: Enum, auditor_name:Enum, job_id:str):
+    def __init__(self, model_provider:ModelProvider, model_name: Enum, auditor_name:Enum, job_id:str, job_context:JobContext = None):
+        # Load the job once, the job parameters and bypass_cache are read from the context
+        job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
         # Retrieve the job parameters, analysis context and audit criteria
-        job_parameters = self.retrieve_job_parameters(job_id)
-        analysis_context = self.retrieve_analysis_context(job_id)
+        job_parameters = self.retrieve_job_parameters(job_id, job_context)
+        bypass_cache = self.retrieve_bypass_cache(job_id, job_context)
+        # The analysis context is retrieved when the chain is built, once the diagrams of unchanged features are copied
         audit_criteria = self.retrieve_audit_criteria(job_id)
 
         # Initialize the chain input, prompt builder and serializer class
-        chain_input = ClassDiagramAuditAnalyzeChainInputs(job_id=job_id, job_parameters=job_parameters, analysis_context=analysis_context, audit_criteria=audit_criteria)
+        chain_input = ClassDiagramAuditAnalyzeChainInputs(job_id=job_id, job_parameters=job_parameters, audit_criteria=audit_criteria, bypass_cache=bypass_cache)
         prompt_builder = AnalyzeAndAuditChainPromptBuilder() # Prompt builder for the Analyze and Audit chain
         serializer_class = UMLDiagramSerializer # Pass the primary serializer class to use
     
         super().__init__(model_provider, model_name, auditor_name, chain_input, prompt_builder, serializer_class)
+        self.job_context = job_context
 
     def retrieve_analysis_context(self, job_id) -> dict:
         """
@@ -47,11 +55,20 @@ class ClassDiagramService(BaseDiagramService):
         returns:
             dict: The analysis context for the class diagram chain.
         
-        Use job_id to retrieve user stories, additional information and pass them into embeddings service to retrieve the analysis context.
+        The audited class diagrams of similar features of the user's previous jobs are passed as context for the features that are generated,
+        similarity is computed from the vectors of the user stories by the embeddings service, see SemanticReuseService.get_similar_diagrams.
+        """
+        return SemanticReuseService.to_analysis_context(self.get_similar_diagrams(), self.chain_input.get_job_parameters())
 
-        Placeholder for now, but in the future this can be replaced with a call to the embeddings service.
+    def retrieve_similar_diagrams(self, job_id) -> dict:
+        """
+        Retrieves the audited class diagrams of similar features of the user's previous class diagram jobs.
+        args:
+            job_id (str): The job ID to use.
+        returns:
+            dict: The similar diagrams of each feature, see SemanticReuseService.get_similar_diagrams.
         """
-        return {} 
+        return SemanticReuseService().get_similar_diagrams(job_id, ClassDiagramRepository(), self.job_context)
        
     def retrieve_audit_criteria(self, job_id) -> dict:
         """
@@ -46,4 +46,14 @@ class SequenceDiagramSignalError(Exception):
 class DiagramCreationSignalError(Exception):
     def __init__(self, message="Error occurred in Signal"):
         self.error_message = f"DiagramCreationSignalError: {message}"
-        super().__init__(self.error_message)
\ No newline at end of file
+        super().__init__(self.error_message)
+
+class DiagramPipelineError(Exception):
+    def __init__(self, message="Error occurred in DiagramPipeline"):
+        self.error_message = f"DiagramPipelineError: {message}"
+        super().__init__(self.error_message)
+
+class PipelineStageTaskError(Exception):
+    def __init__(self, message="Error occurred in PipelineStageTask"):
+        self.error_message = f"PipelineStageTaskError: {message}"
+        super().__init__(self.error_message)
@@ -0,0 +1,59 @@
+from django.conf import settings
+
+from jobs.constants import ValidJobTypes
+from jobs.models import Job
+from model_manager.models import ModelName
+from diagrams.tasks import generate_class_diagram_task, generate_er_diagram_task, generate_sequence_diagram_task, generate_diagram_async_task
+from diagrams.services.PipelineEngine import PipelineEngine
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class DiagramJobDispatcher:
+    """
+    Submits the Celery task or pipeline that processes a submitted diagram job.
+    Called by the JobQueue signal (see diagrams/signals.py), or by the JobSubmissionService once the job is committed if R2D_ORCHESTRATION_MODE is direct.
+
+    Jobs submitted by a user start a diagram pipeline (see R2D_DIAGRAM_PIPELINE), other jobs are processed by the task of their job type,
+    or by the asyncio consumer runner if R2D_ASYNC_DIAGRAM_CONSUMERS is enabled.
+
+    functions:
+        dispatch: Submits the pipeline or the task that processes the job.
+    """
+    job_types = (ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value, ValidJobTypes.SEQUENCE_DIAGRAM.value)
+    tasks = {
+        ValidJobTypes.CLASS_DIAGRAM.value: generate_class_diagram_task,
+        ValidJobTypes.ER_DIAGRAM.value: generate_er_diagram_task,
+        ValidJobTypes.SEQUENCE_DIAGRAM.value: generate_sequence_diagram_task,
+    }
+
+    def __init__(self, pipeline_engine:PipelineEngine = None):
+        self.pipeline_engine = pipeline_engine or PipelineEngine()
+
+    def dispatch(self, job:Job, model:ModelName = None):
+        """
+        Submits the pipeline started by the job, or the task that processes it.
+        args:
+            job (Job): The submitted job.
+            model (ModelName): The model that processes the job, defaults to the model of the job.
+        raises:
+            ValueError: If the job type is not a diagram job type.
+            DiagramPipelineError: If the pipeline is not valid.
+        """
+        if self.pipeline_engine.is_pipeline_root(job):
+            # Stages of the pipeline are submitted as a Celery canvas, the jobs of the stages are created by the engine
+            self.pipeline_engine.start(str(job.job_id))
+            return
+
+        if job.job_type not in self.job_types:
+            raise ValueError(f"Unsupported job_type: {job.job_type}")
+
+        model = model or job.model
+        task_kwargs = {"model_provider": model.provider, "model_name": model.name, "auditor_name": model.name, "job_id": job.job_id}
+        if settings.R2D_ASYNC_DIAGRAM_CONSUMERS:
+            # Generate the diagram using the asyncio consumer runner
+            generate_diagram_async_task.delay(job_type=job.job_type, **task_kwargs)
+        else:
+            # Generate the diagram using the models defined in the JobQueue
+            self.tasks[job.job_type].delay(**task_kwargs)
+        logger.debug(f"Dispatched {job.job_type} job {job.job_id}")
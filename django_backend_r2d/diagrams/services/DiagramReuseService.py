@@ -0,0 +1,148 @@
+import json
+from typing import Optional
+from django.conf import settings
+
+from jobs.models import Job
+from jobs.services.JobContext import JobContext
+from model_manager.models import ModelName
+from diagrams.interfaces.BaseDiagramRepository import BaseDiagramRepository
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class DiagramReuseService:
+    """
+    Copies the diagrams of features whose user stories did not change from the previous job of the user,
+    so that a resubmitted job only sends the features that were edited through the chain.
+
+    A diagram of a previous job is reused if the previous job has the same type and model, was submitted by the same user,
+    and the hash of every feature of the diagram is unchanged (see Job.feature_hashes). Child jobs inherit the hashes of their parent job,
+    so ER and sequence diagrams of unchanged features are also reused once the class diagrams are handed off by create_next_record.
+    Jobs submitted with bypass_cache are always generated in full.
+    Diagrams of similar features of other jobs are copied by the SemanticReuseService.
+
+    Copied diagrams are returned in the chain response format, under the keys of get_result_key.
+
+    functions:
+        get_reusable_diagrams: Returns the diagrams that can be copied from a previous job, and the features that need to be generated.
+        restrict_job_parameters: Returns the job parameters limited to the features provided.
+        to_chain_response: Returns copied diagrams in the chain response format.
+        get_result_key: Returns the chain response key of copied diagrams.
+        get_features: Returns the features of job parameters.
+        get_diagram_features: Returns the features of a diagram.
+    """
+    def get_reusable_diagrams(self, job_id:str, repository:BaseDiagramRepository, job_context:JobContext = None) -> tuple[dict, Optional[list[str]]]:
+        """
+        Finds the most recent job of the user with diagrams for unchanged features.
+        args:
+            job_id (str): The job ID.
+            repository (BaseDiagramRepository): The repository of the diagrams of the job e.g., ClassDiagramRepository
+            job_context (JobContext): The loaded job, the job is queried if no context is provided.
+        returns:
+            tuple: The reused diagrams in the chain response format accepted by BaseDiagramRepository.save_diagram e.g.,
+                   {"reused_audited_results:gpt-4-turbo": {"model_name": "gpt-4-turbo", "is_audited": True, "diagrams": [...]}},
+                   and the features that need to be generated. The features are None if no diagrams can be reused.
+        """
+        if not getattr(settings, "R2D_INCREMENTAL_REGENERATION", True):
+            return {}, None
+        try:
+            job = self._get_job(job_id, job_context)
+            if job is None or job['bypass_cache'] or not job['feature_hashes']:
+                return {}, None
+
+            candidates = (Job.objects.filter(user_id=job['user_id'], job_type=job['job_type'], model_id=job['model_id'],
+                                             created_timestamp__lt=job['created_timestamp'], feature_hashes__isnull=False)
+                          .exclude(job_id=job_id).order_by('-created_timestamp')
+                          .values_list('job_id', 'feature_hashes')[:getattr(settings, "R2D_REUSE_CANDIDATE_JOBS", 10)])
+            for candidate_id, candidate_hashes in candidates:
+                unchanged = {feature for feature, feature_hash in job['feature_hashes'].items() if (candidate_hashes or {}).get(feature) == feature_hash}
+                if not unchanged:
+                    continue
+                diagrams = [diagram for diagram in repository.get_by_id(str(candidate_id)) if self.get_diagram_features(diagram) and self.get_diagram_features(diagram) <= unchanged]
+                if not diagrams:
+                    continue
+
+                reused_features = {feature for diagram in diagrams for feature in self.get_diagram_features(diagram)}
+                features_to_generate = [feature for feature in self.get_features(job['parameters']) if feature not in reused_features]
+                logger.info(f"Reusing {len(diagrams)} diagrams of {sorted(reused_features)} from job {candidate_id} for job {job_id}, generating {features_to_generate}")
+                return self.to_chain_response(diagrams), features_to_generate
+        except Exception as e:
+            # The job is generated in full if previous diagrams cannot be retrieved
+            logger.warning(f"Unable to retrieve reusable diagrams for job {job_id}: {str(e)}")
+        return {}, None
+
+    @classmethod
+    def restrict_job_parameters(cls, job_parameters:dict, features:list[str]) -> dict:
+        """
+        Returns the job parameters limited to the features provided.
+        User stories of other features are removed, for job parameters that are not grouped by feature e.g., the parameters of ER diagram jobs,
+        only the list of features is limited and the classes, entities and descriptions are kept as context.
+        """
+        features = set(features)
+        stories_by_feature = job_parameters.get("job_parameters")
+        if not isinstance(stories_by_feature, dict):
+            return {**job_parameters, "features": [feature for feature in job_parameters.get("features", []) if feature in features]}
+
+        restricted = {feature: sub_features for feature, sub_features in stories_by_feature.items() if feature in features}
+        sub_features = {sub_feature for feature_sub_features in restricted.values() if isinstance(feature_sub_features, dict) for sub_feature in feature_sub_features}
+        return {
+            **job_parameters,
+            "features": [feature for feature in job_parameters.get("features", []) if feature in features] or list(restricted),
+            "sub_features": [sub_feature for sub_feature in job_parameters.get("sub_features", []) if sub_feature in sub_features] or sorted(sub_features),
+            "job_parameters": restricted,
+        }
+
+    @classmethod
+    def to_chain_response(cls, diagrams:list[dict], source:str = "reused") -> dict:
+        """
+        Groups the copied diagrams by audit status and model, so that they are saved with the model and audit status of the original diagrams.
+        args:
+            diagrams (list[dict]): The diagrams returned by the repository, with their model_id and is_audited fields.
+            source (str): Where the diagrams are copied from, see get_result_key.
+        returns:
+            dict: The diagrams in the chain response format accepted by BaseDiagramRepository.save_diagram.
+        """
+        model_names = dict(ModelName.objects.filter(pk__in={diagram["model_id"] for diagram in diagrams}).values_list('pk', 'name'))
+        chain_response = {}
+        for diagram in diagrams:
+            model_name = model_names.get(diagram["model_id"])
+            chain_response.setdefault(cls.get_result_key(source, model_name, diagram["is_audited"]),
+                                      {"model_name": model_name, "is_audited": diagram["is_audited"], "diagrams": []})["diagrams"].append(diagram)
+        return chain_response
+
+    @staticmethod
+    def get_result_key(source:str, model_name:str, is_audited:bool) -> str:
+        """
+        Returns the chain response key of copied diagrams, "<source>_<audited|analysis>_results:<model name>" e.g., reused_audited_results:gpt-4-turbo.
+        The repositories save every key of the chain response, keys are unique per source so that diagrams copied from a previous job (reused)
+        and from similar features (similar) do not overwrite each other or the analysis_results and audited_results of the chain.
+        args:
+            source (str): Where the diagrams are copied from e.g., reused or similar.
+            model_name (str): The name of the model that generated the diagrams.
+            is_audited (bool): True if the diagrams were audited.
+        """
+        return f"{source}_{'audited' if is_audited else 'analysis'}_results:{model_name}"
+
+    @staticmethod
+    def get_features(parameters) -> list[str]:
+        """
+        Returns the features of the job parameters, the features of user stories or the features listed by child jobs.
+        """
+        if isinstance(parameters, str):
+            parameters = json.loads(parameters)
+        if isinstance(parameters.get("job_parameters"), dict):
+            return list(parameters["job_parameters"])
+        return list(dict.fromkeys(parameters.get("features") or []))
+
+    @staticmethod
+    def get_diagram_features(diagram:dict) -> set:
+        features = diagram.get("feature")
+        return set(features) if isinstance(features, list) else {features} if features else set()
+
+    @staticmethod
+    def _get_job(job_id:str, job_context:JobContext = None) -> Optional[dict]:
+        fields = ('user_id', 'job_type', 'model_id', 'parameters', 'feature_hashes', 'bypass_cache', 'created_timestamp')
+        if job_context is not None and job_context.matches(job_id):
+            return {field: getattr(job_context.job, field) for field in fields}
+        return Job.objects.filter(job_id=job_id).values(*fields).first()
@@ -0,0 +1,100 @@
+from typing import Optional
+from celery import current_app
+from django.conf import settings
+from kombu.exceptions import ChannelError
+
+from jobs.constants import ValidJobTypes, JOB_PRIORITIES, DEFAULT_JOB_PRIORITY
+from jobs.models import Job
+from model_manager.models import ModelName
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class DiagramTaskRouter:
+    """
+    Routes the Celery tasks of diagram jobs to a queue per job type and model when R2D_TASK_ROUTING is enabled,
+    so that a flood of one job type or model does not delay the others, and worker pools can be sized for each model.
+    e.g., diagrams.class_diagram.gpt-4-turbo, diagrams.sequence_diagram.gpt-4-turbo
+
+    Tasks are prioritized by the role of the user who submitted the job (see jobs/constants.py JOB_PRIORITIES),
+    tasks of premium users are consumed before the tasks waiting in the same queue. Other tasks are sent to the default queue.
+    Registered using CELERY_TASK_ROUTES, Celery calls route_task when a task or a signature of a canvas is sent.
+
+    functions:
+        route: Returns the queue and priority of a task, None if the task is not routed.
+        get_queue_name: Returns the queue of a job type and model.
+        get_queue_names: Returns the default queue and the queue of each diagram job type and model.
+        get_queue_depths: Returns the number of messages waiting in each queue.
+    """
+    queue_prefix = "diagrams"
+    job_types = (ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value, ValidJobTypes.SEQUENCE_DIAGRAM.value)
+    # Job type processed by each routed task, None if the job type is taken from the task arguments or the job
+    tasks = {
+        "diagrams.tasks.generate_class_diagram_task": ValidJobTypes.CLASS_DIAGRAM.value,
+        "diagrams.tasks.generate_er_diagram_task": ValidJobTypes.ER_DIAGRAM.value,
+        "diagrams.tasks.generate_sequence_diagram_task": ValidJobTypes.SEQUENCE_DIAGRAM.value,
+        "diagrams.tasks.generate_diagram_async_task": None, # job_type
+        "diagrams.tasks.run_pipeline_stage_task": None, # stage
+        "diagrams.tasks.complete_pipeline_task": None, # job type of the submitted job
+    }
+
+    def route(self, name:str, kwargs:dict) -> Optional[dict]:
+        """
+        Returns the queue and priority of a diagram task, None if routing is disabled or the task does not process a job.
+        args:
+            name (str): The name of the task e.g., diagrams.tasks.generate_class_diagram_task
+            kwargs (dict): The keyword arguments of the task, including the job_id or root_job_id.
+        returns:
+            dict: The routing options e.g., {"queue": "diagrams.class_diagram.gpt-4-turbo", "priority": 0}
+        """
+        if not getattr(settings, "R2D_TASK_ROUTING", False) or name not in self.tasks:
+            return None
+        job_id = kwargs.get("job_id") or kwargs.get("root_job_id")
+        job = Job.objects.filter(job_id=job_id).values("job_type", "model__name", "user__role").first() if job_id else None
+        if job is None:
+            logger.warning(f"Unable to route {name}, job {job_id} does not exist")
+            return None
+
+        job_type = self.tasks[name] or kwargs.get("stage") or kwargs.get("job_type") or job["job_type"]
+        model_name = kwargs.get("model_name") or job["model__name"]
+        return {"queue": self.get_queue_name(job_type, str(model_name)), "priority": JOB_PRIORITIES.get(job["user__role"], DEFAULT_JOB_PRIORITY)}
+
+    @classmethod
+    def get_queue_name(cls, job_type:str, model_name:str) -> str:
+        return f"{cls.queue_prefix}.{job_type}.{model_name}"
+
+    @classmethod
+    def get_queue_names(cls) -> list[str]:
+        """
+        Returns the default queue followed by the queue of each diagram job type and model.
+        """
+        model_names = ModelName.objects.values_list("name", flat=True)
+        return [current_app.conf.task_default_queue] + [cls.get_queue_name(job_type, model_name) for model_name in model_names for job_type in cls.job_types]
+
+    @classmethod
+    def get_queue_depths(cls, queue_names:list[str] = None) -> dict:
+        """
+        Returns the number of messages waiting in each queue, including the messages of every priority.
+        args:
+            queue_names (list[str]): The queues to inspect, defaults to get_queue_names.
+        returns:
+            dict: The number of messages by queue e.g., {"celery": 0, "diagrams.class_diagram.gpt-4-turbo": 12}
+        """
+        depths = {}
+        with current_app.connection_for_read() as connection:
+            channel = connection.default_channel
+            for queue_name in queue_names or cls.get_queue_names():
+                try:
+                    depths[queue_name] = channel.queue_declare(queue=queue_name, passive=True).message_count
+                except ChannelError:
+                    # Queues are removed by the broker once they are empty
+                    depths[queue_name] = 0
+        return depths
+
+_router = DiagramTaskRouter()
+
+def route_task(name, args, kwargs, options, task=None, **kw) -> Optional[dict]:
+    """
+    Celery router, see CELERY_TASK_ROUTES and DiagramTaskRouter.route
+    """
+    return _router.route(name, kwargs or {})
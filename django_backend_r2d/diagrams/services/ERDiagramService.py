@@ -3,6 +3,9 @@ from model_manager.constants import ModelProvider # Contains the ModelProvider a
 from model_manager.chains.AnalyzeAndAuditChainPromptBuilder import AnalyzeAndAuditChainPromptBuilder
 from diagrams.chain_inputs.ERDiagramAuditAnalyzeChainInputs import ERDiagramAuditAnalyzeChainInputs
 from diagrams.interfaces.BaseDiagramService import BaseDiagramService
+from diagrams.services.SemanticReuseService import SemanticReuseService
+from diagrams.repository.ERDiagramRepository import ERDiagramRepository
+from jobs.services.JobContext import JobContext
 from diagrams.serializers.CreateERDiagramSerializer import CreateERDiagramSerializer
 from jobs.services.JobService import JobService
 from jobs.models import Job
@@ -24,23 +27,28 @@ class ERDiagramService(BaseDiagramService):
         model_name (Enum): The model name to use.
         auditor_name (Enum): The auditor name to use.
         job_id (str): The job ID to use.
+        job_context (JobContext): The loaded job, the job is loaded from the job_id if no context is provided.
         Serializer_class (class): The serializer class to use. Default is CreateERDiagramSerializer.
             > Pass in UMLDiagramSerializer, If creating ER diagrams directly from User Stories.
     
     override the retrieve_job_parameters, retrieve_analysis_context and retrieve_audit_criteria functions to customize the ER diagram chain.
     """
-    def __init__(self, model_provider:ModelProvider, model_name: Enum, auditor_name:Enum, job_id:str, serializer_class=CreateERDiagramSerializer):
+    def __init__(self, model_provider:ModelProvider, model_name: Enum, auditor_name:Enum, job_id:str, serializer_class=CreateERDiagramSerializer, job_context:JobContext = None):
+        # Load the job once, the job parameters and bypass_cache are read from the context
+        job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
         # Retrieve the job parameters, analysis context and audit criteria
-        job_parameters = self.retrieve_job_parameters(job_id)
-        analysis_context = self.retrieve_analysis_context(job_id)
+        job_parameters = self.retrieve_job_parameters(job_id, job_context)
+        bypass_cache = self.retrieve_bypass_cache(job_id, job_context)
+        # The analysis context is retrieved when the chain is built, once the diagrams of unchanged features are copied
         audit_criteria = self.retrieve_audit_criteria(job_id)
 
         # Initialize the chain input, prompt builder and serializer class
-        chain_input = ERDiagramAuditAnalyzeChainInputs(job_id=job_id, job_parameters=job_parameters, analysis_context=analysis_context, audit_criteria=audit_criteria)
+        chain_input = ERDiagramAuditAnalyzeChainInputs(job_id=job_id, job_parameters=job_parameters, audit_criteria=audit_criteria, bypass_cache=bypass_cache)
         prompt_builder = AnalyzeAndAuditChainPromptBuilder() # Prompt builder for the Analyze and Audit chain
         serializer_class = serializer_class # Pass the primary serializer class to use
     
         super().__init__(model_provider, model_name, auditor_name, chain_input, prompt_builder, serializer_class)
+        self.job_context = job_context
   
     def retrieve_analysis_context(self, job_id) -> dict:
         """
@@ -52,10 +60,20 @@ class ERDiagramService(BaseDiagramService):
         returns:
             dict: The analysis context for the er diagram chain.
         
-        Use job_id to retrieve user stories, additional information and pass them into embeddings service to retrieve the analysis context.
-        
+        ER diagram jobs created from user stories receive the audited ER diagrams of similar features of the user's previous jobs as context,
+        see SemanticReuseService.get_similar_diagrams. Jobs created from class diagrams have no user stories and no context.
+        """
+        return SemanticReuseService.to_analysis_context(self.get_similar_diagrams(), self.chain_input.get_job_parameters())
+
+    def retrieve_similar_diagrams(self, job_id) -> dict:
+        """
+        Retrieves the audited ER diagrams of similar features of the user's previous ER diagram jobs.
+        args:
+            job_id (str): The job ID to use.
+        returns:
+            dict: The similar diagrams of each feature, see SemanticReuseService.get_similar_diagrams.
         """
-        return {}
+        return SemanticReuseService().get_similar_diagrams(job_id, ERDiagramRepository(), self.job_context)
         
     def retrieve_audit_criteria(self, job_id) -> dict:
         """
@@ -0,0 +1,92 @@
+from typing import Annotated, Optional
+from typing_extensions import NotRequired, TypedDict
+from django.conf import settings
+from pydantic import ConfigDict, StringConstraints, TypeAdapter, ValidationError as PydanticValidationError
+
+from diagrams.serializers.UMLDiagramSerializer import UMLDiagramSerializer
+from diagrams.serializers.CreateERDiagramSerializer import CreateERDiagramSerializer
+from diagrams.serializers.CreateSequenceDiagramSerializer import CreateSequenceDiagramSerializer
+
+import logging
+logger = logging.getLogger('application_logging')
+
+# Equivalent of a DRF CharField, values are trimmed and blank values are rejected.
+# Null characters are rejected by DRF, \x1c-\x1f are trimmed by str.strip but not by pydantic, values containing them are validated by the serializer.
+CHAR_FIELD_PATTERN = r"^[^\x00\x1c-\x1f]*$"
+CharField = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, pattern=CHAR_FIELD_PATTERN)]
+BlankableCharField = Annotated[str, StringConstraints(strip_whitespace=True, pattern=CHAR_FIELD_PATTERN)]
+
+# Only JSON types are accepted, values that DRF would coerce e.g., numbers as strings are validated by the serializer
+STRICT = ConfigDict(strict=True)
+
+class UserStoryParameters(TypedDict):
+    __pydantic_config__ = STRICT
+    id: CharField
+    requirement: CharField
+    services_to_use: list[BlankableCharField]
+    acceptance_criteria: CharField
+    additional_information: BlankableCharField
+
+class UMLDiagramParameters(TypedDict):
+    __pydantic_config__ = STRICT
+    features: list[CharField]
+    sub_features: list[CharField]
+    job_parameters: dict[str, dict[str, dict[str, UserStoryParameters]]]
+
+class CreateERDiagramParameters(TypedDict):
+    __pydantic_config__ = STRICT
+    features: list[CharField]
+    descriptions: list[CharField]
+    classes: list[CharField]
+
+class CreateSequenceDiagramParameters(TypedDict):
+    __pydantic_config__ = STRICT
+    features: list[CharField]
+    entities: list[CharField]
+    entity_descriptions: list[CharField]
+    classes: NotRequired[Optional[list[CharField]]]
+    class_descriptions: NotRequired[Optional[list[CharField]]]
+    helper_classes: NotRequired[Optional[list[CharField]]]
+
+class JobParametersValidator:
+    """
+    Validates job parameters using compiled pydantic validators equivalent to the diagram serializers, and falls back to the serializer
+    for payloads the compiled validator does not accept.
+
+    DRF validates job parameters field by field in Python, which takes noticeable CPU for jobs with thousands of user stories.
+    The validators are compiled once and validate the whole payload in pydantic-core. They only accept JSON types,
+    so every payload they accept is valid for the serializer and produces the same validated data.
+    Payloads they reject e.g., invalid user stories or numbers used as strings, are validated by the serializer,
+    so errors have exactly the structure returned by serializer.errors.
+
+    Set R2D_FAST_PARAMETER_VALIDATION to false to always validate with the serializers.
+
+    functions:
+        validate: Returns the validated job parameters, or the errors of the serializer.
+    """
+    validators = {
+        UMLDiagramSerializer: TypeAdapter(UMLDiagramParameters),
+        CreateERDiagramSerializer: TypeAdapter(CreateERDiagramParameters),
+        CreateSequenceDiagramSerializer: TypeAdapter(CreateSequenceDiagramParameters),
+    }
+
+    def validate(self, serializer_class, job_parameters) -> tuple[Optional[dict], Optional[dict]]:
+        """
+        Validates the job parameters against the serializer class.
+        args:
+            serializer_class: The serializer class e.g., UMLDiagramSerializer
+            job_parameters (dict): The job parameters to validate.
+        returns:
+            tuple: The validated job parameters and None if the job parameters are valid, otherwise None and the errors of the serializer.
+        """
+        validator = self.validators.get(serializer_class) if getattr(settings, "R2D_FAST_PARAMETER_VALIDATION", True) else None
+        if validator is not None:
+            try:
+                return validator.validate_python(job_parameters), None
+            except PydanticValidationError:
+                logger.debug(f"Job parameters rejected by the compiled validator, validating with {serializer_class.__name__}")
+
+        serializer = serializer_class(data=job_parameters)
+        if serializer.is_valid():
+            return serializer.validated_data, None
+        return None, serializer.errors
@@ -0,0 +1,319 @@
+import json
+from copy import deepcopy
+from typing import Optional
+from uuid import uuid4
+from django.conf import settings
+
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobQueue
+from jobs.services.JobService import JobService
+from jobs.services.JobQueueService import JobQueueService
+from jobs.services.JobContext import JobContext
+from jobs.services.JobSubmissionService import JobSubmissionService
+from diagrams.constants import DIAGRAM_PIPELINES, PIPELINE_STAGE_INPUTS, STAGE_ARTIFACT_FIELDS
+from diagrams.consumers.AsyncDiagramConsumerRunner import AsyncDiagramConsumerRunner
+from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
+from diagrams.consumers.ERDiagramConsumer import ERDiagramConsumer
+from diagrams.repository.ClassDiagramRepository import ClassDiagramRepository
+from diagrams.repository.ERDiagramRepository import ERDiagramRepository
+from diagrams.services.DiagramConsumerExceptions import DiagramPipelineError
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class PipelineEngine:
+    """
+    Runs the stages of a diagram pipeline as a Celery canvas, replacing the serial hand-off of create_next_record.
+
+    A pipeline lists its stages and the stages each one depends on (see diagrams/constants.py DIAGRAM_PIPELINES) and is stored on the submitted job.
+    Stages are grouped into levels, stages of the same level run concurrently in a Celery group, and the next level waits for all of them (a chord),
+    so the wall-clock time of a submission is the longest path through the pipeline rather than the sum of its stages.
+
+    The submitted job is processed by the stage matching its job type, the other stages create a child job of the submitted job
+    whose parameters are the user stories, or the diagrams of the stages it depends on.
+    A stage whose job queue entry is Completed is not processed again, so a failed pipeline can be resumed.
+
+    If R2D_ORCHESTRATION_MODE is direct, each stage returns a compact artifact of its audited diagrams and Celery passes the artifacts to the next level,
+    the job parameters of a stage are built from the artifacts of its dependencies instead of reading their diagrams from the database.
+
+    functions:
+        is_pipeline_root: Returns True if the job starts a pipeline.
+        get_pipeline: Returns the definition of a pipeline.
+        get_levels: Groups the stages of a pipeline into levels that run concurrently.
+        build: Builds the Celery canvas of a pipeline.
+        start: Stores the pipeline on the job and submits its canvas.
+        run_stage: Processes a stage of the pipeline.
+        collect_artifacts: Returns the stage artifacts passed to a stage by the previous level.
+        complete_pipeline: Marks the submitted job as Completed.
+        fail_pipeline: Marks the submitted job as Error Failed to Process.
+    """
+    repositories = {
+        ValidJobTypes.CLASS_DIAGRAM.value: ClassDiagramRepository,
+        ValidJobTypes.ER_DIAGRAM.value: ERDiagramRepository,
+    }
+
+    def __init__(self, job_service:JobService = None, job_queue_service:JobQueueService = None):
+        self.job_service = job_service or JobService()
+        self.job_queue_service = job_queue_service or JobQueueService()
+
+    @staticmethod
+    def get_pipeline(name:str) -> dict:
+        """
+        Returns a copy of the definition of the pipeline.
+        raises:
+            DiagramPipelineError: If the pipeline does not exist.
+        """
+        if name not in DIAGRAM_PIPELINES:
+            raise DiagramPipelineError(f"Unknown pipeline {name}, expected one of {list(DIAGRAM_PIPELINES)}")
+        return deepcopy(DIAGRAM_PIPELINES[name])
+
+    def is_pipeline_root(self, job:Job) -> bool:
+        """
+        Returns True if the job starts a pipeline, i.e., it was submitted by a user and its job type is a stage without dependencies.
+        Jobs are processed individually if R2D_DIAGRAM_PIPELINE is none.
+        """
+        pipeline_name = getattr(settings, "R2D_DIAGRAM_PIPELINE", "none")
+        if pipeline_name == "none" or job.parent_job_id is not None:
+            return False
+        pipeline = job.pipeline or self.get_pipeline(pipeline_name)
+        return any(stage["stage"] == job.job_type and not stage["depends_on"] for stage in pipeline["stages"])
+
+    def get_levels(self, pipeline:dict) -> list[list[str]]:
+        """
+        Groups the stages into levels, each stage is placed in the level after the last of its dependencies.
+        e.g., [["class_diagram", "er_diagram"], ["sequence_diagram"]]
+        raises:
+            DiagramPipelineError: If the pipeline has unknown or unsupported stages, or its dependencies contain a cycle.
+        """
+        stages = {stage["stage"]: set(stage.get("depends_on", [])) for stage in pipeline.get("stages", [])}
+        if not stages:
+            raise DiagramPipelineError(f"Pipeline {pipeline.get('name')} has no stages")
+        for stage, depends_on in stages.items():
+            if stage not in PIPELINE_STAGE_INPUTS:
+                raise DiagramPipelineError(f"Unsupported stage {stage}")
+            if depends_on - set(stages):
+                raise DiagramPipelineError(f"Stage {stage} depends on stages that are not in the pipeline: {sorted(depends_on - set(stages))}")
+            if depends_on not in PIPELINE_STAGE_INPUTS[stage]:
+                raise DiagramPipelineError(f"Stage {stage} cannot be generated from {sorted(depends_on)}")
+
+        levels, completed = [], set()
+        while len(completed) < len(stages):
+            level = [stage for stage, depends_on in stages.items() if stage not in completed and depends_on <= completed]
+            if not level:
+                raise DiagramPipelineError(f"Pipeline {pipeline.get('name')} contains a cycle")
+            levels.append(level)
+            completed.update(level)
+        return levels
+
+    def build(self, root_job_id:str, pipeline:dict, resume:bool=False):
+        """
+        Builds the canvas of the pipeline, a chain of levels where each level with more than one stage is a group.
+        A group followed by another step is executed as a chord, the next level starts once every stage of the group completes.
+        The results of a level are passed to the next level if R2D_ORCHESTRATION_MODE is direct, otherwise the signatures are immutable.
+        args:
+            root_job_id (str): The job ID of the submitted job.
+            pipeline (dict): The pipeline definition.
+            resume (bool): Set to True to resume failed stages from their last completed step.
+        returns:
+            celery.canvas.Signature: The canvas of the pipeline.
+        """
+        # Imported here as the tasks module imports the PipelineEngine
+        from celery import chain, group
+        from diagrams.tasks import run_pipeline_stage_task, complete_pipeline_task
+
+        immutable = not JobSubmissionService.is_direct()
+        steps = []
+        for level in self.get_levels(pipeline):
+            signatures = [run_pipeline_stage_task.signature(kwargs={"root_job_id": str(root_job_id), "stage": stage, "resume": resume}, immutable=immutable)
+                          for stage in level]
+            steps.append(group(signatures) if len(signatures) > 1 else signatures[0])
+        steps.append(complete_pipeline_task.signature(kwargs={"root_job_id": str(root_job_id)}, immutable=immutable))
+        return chain(*steps)
+
+    def start(self, root_job_id:str, resume:bool=False) -> str:
+        """
+        Stores the pipeline on the submitted job and submits its canvas, resumed jobs keep the pipeline they were started with.
+        args:
+            root_job_id (str): The job ID of the submitted job.
+            resume (bool): Set to True to resume failed stages from their last completed step.
+        returns:
+            str: The ID of the Celery result of the pipeline.
+        raises:
+            DiagramPipelineError: If the pipeline is not valid.
+        """
+        job = Job.objects.get(job_id=root_job_id)
+        pipeline = job.pipeline or self.get_pipeline(getattr(settings, "R2D_DIAGRAM_PIPELINE", "none"))
+        if job.pipeline is None:
+            Job.objects.filter(job_id=root_job_id).update(pipeline=pipeline)
+
+        result = self.build(root_job_id, pipeline, resume).apply_async()
+        logger.info(f"Started {pipeline['name']} pipeline for - {root_job_id} with stages {self.get_levels(pipeline)}")
+        return result.id
+
+    def run_stage(self, root_job_id:str, stage:str, resume:bool=False, artifacts:dict=None) -> dict:
+        """
+        Processes a stage of the pipeline, the job of the stage is created from its dependencies if it does not exist.
+        args:
+            root_job_id (str): The job ID of the submitted job.
+            stage (str): The stage to process e.g., er_diagram
+            resume (bool): Set to True to resume the stage from the last completed step of the chain.
+            artifacts (dict): The artifacts of the completed stages by stage, passed by the previous level if R2D_ORCHESTRATION_MODE is direct.
+        returns:
+            dict: The stage and the job ID that processed it e.g., {"stage": "er_diagram", "job_id": "..."}
+                  The audited diagrams of the stage are included if artifacts are passed e.g., {"stage": "er_diagram", "job_id": "...", "diagrams": [...]}
+        raises:
+            DiagramPipelineError: If the stage is not part of the pipeline.
+            ModelCircuitOpenError: If the circuit of the model is open, the job of the stage is held in the Queued state.
+            See the diagram consumers for the errors raised while processing the stage.
+        """
+        root_context = JobContext.load(root_job_id)
+        root_job = root_context.job
+        stage_definition = next((definition for definition in (root_job.pipeline or {}).get("stages", []) if definition["stage"] == stage), None)
+        if stage_definition is None:
+            raise DiagramPipelineError(f"Stage {stage} is not part of the pipeline of job {root_job_id}")
+
+        job_id = self._get_or_create_stage_job(root_job, stage, stage_definition["depends_on"], artifacts)
+        if self._is_stage_completed(job_id):
+            logger.info(f"Skipping {stage} stage of {root_job_id}, job {job_id} has already been completed")
+            if artifacts is None:
+                return {"stage": stage, "job_id": str(job_id)}
+            return self._build_artifact(stage, job_id, self._get_stage_diagrams(stage, job_id))
+
+        model = root_job.model
+        if settings.R2D_ASYNC_DIAGRAM_CONSUMERS:
+            diagrams = AsyncDiagramConsumerRunner.run(job_type=stage, model_provider=model.provider, model_name=model.name, auditor_name=model.name,
+                                                      job_id=job_id, resume=resume, hand_off=False)
+        else:
+            consumer = AsyncDiagramConsumerRunner.consumers[stage](model_provider=model.provider, model_name=model.name, auditor_name=model.name, job_id=job_id,
+                                                                   job_context=root_context if root_context.matches(job_id) else None)
+            diagrams = consumer.resume_record(job_id) if resume else consumer.process_record(job_id)
+
+        if str(job_id) == str(root_job_id) and Job.objects.filter(job_id=root_job_id, job_status__name=ValidJobStatus.COMPLETED.value).exists():
+            # The submitted job is Processing until every stage of the pipeline has been completed, unless a concurrent stage failed
+            self.job_service.update_status_by_id(root_job_id, ValidJobStatus.PROCESSING.value)
+        logger.info(f"Completed {stage} stage of {root_job_id} - {job_id}")
+        if artifacts is None:
+            return {"stage": stage, "job_id": str(job_id)}
+        return self._build_artifact(stage, job_id, diagrams)
+
+    @staticmethod
+    def collect_artifacts(results) -> dict:
+        """
+        Returns the stage artifacts by stage from the results of the previous level.
+        A stage returns the artifacts it received followed by its own artifact, a group returns the list of the results of its stages.
+        args:
+            results: The results passed by Celery e.g., ([{"stage": "class_diagram", ...}], ) or ([[{"stage": "class_diagram", ...}], [...]], )
+        returns:
+            dict: The artifacts by stage e.g., {"class_diagram": {"stage": "class_diagram", "job_id": "...", "diagrams": [...]}}
+        """
+        artifacts = {}
+        pending = list(results)
+        while pending:
+            result = pending.pop(0)
+            if isinstance(result, (list, tuple)):
+                pending[:0] = result
+            elif isinstance(result, dict) and "stage" in result:
+                artifacts[result["stage"]] = result
+        return artifacts
+
+    def complete_pipeline(self, root_job_id:str, artifacts:dict=None):
+        """
+        Marks the submitted job as Completed once every stage has been completed.
+        The job and number of diagrams of each stage are logged if the artifacts of the stages are passed.
+        """
+        self.job_service.update_status_by_id(root_job_id, ValidJobStatus.COMPLETED.value)
+        self.job_service.update_job_description(root_job_id, "Job Completed")
+        stages = ", ".join(f"{stage} ({artifact['job_id']}, {len(artifact.get('diagrams', []))} diagrams)" for stage, artifact in (artifacts or {}).items())
+        logger.info(f"Completed pipeline for - {root_job_id}" + (f": {stages}" if stages else ""))
+
+    def fail_pipeline(self, root_job_id:str, stage:str, error:Exception):
+        """
+        Marks the submitted job as Error Failed to Process, the stages that depend on the failed stage are not executed.
+        The pipeline can be resumed using resume_diagram_job.
+        """
+        logger.error(f"{stage} stage of pipeline {root_job_id} failed: {error}")
+        try:
+            self.job_service.update_status_by_id(root_job_id, ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+            self.job_service.update_job_description(root_job_id, f"Failed to generate {stage}")
+        except Exception as e:
+            logger.error(f"Unable to mark pipeline {root_job_id} as failed: {e}")
+
+    def _get_or_create_stage_job(self, root_job:Job, stage:str, depends_on:list[str], artifacts:dict=None) -> str:
+        """
+        Returns the job that processes the stage, the submitted job processes the stage matching its job type.
+        Jobs of other stages are created as children of the submitted job, in the Queued state so that the JobQueue signal does not submit them again.
+        """
+        if stage == root_job.job_type:
+            return str(root_job.job_id)
+        existing_job_id = Job.objects.filter(parent_job_id=root_job.job_id, job_type=stage).values_list('job_id', flat=True).first()
+        if existing_job_id is not None:
+            return str(existing_job_id)
+
+        job = self.job_service.save_job(root_job.user, {
+            'job_id': str(uuid4()),
+            'parent_job': str(root_job.job_id),
+            'parameters': json.dumps(self._build_stage_parameters(root_job, stage, depends_on, artifacts)),
+            'job_type': stage,
+            'job_status': ValidJobStatus.QUEUED.value,
+            'job_details': f"{stage} job created by {root_job.job_id}",
+            'model_name': root_job.model.name,
+            'bypass_cache': root_job.bypass_cache, # Stage jobs inherit the cache preference of the submitted job
+            'feature_hashes': root_job.feature_hashes,
+        })
+        self.job_queue_service.enqueue(job)
+        logger.debug(f"Created {stage} job {job.job_id} for pipeline {root_job.job_id}")
+        return str(job.job_id)
+
+    def _build_stage_parameters(self, root_job:Job, stage:str, depends_on:list[str], artifacts:dict=None) -> dict:
+        """
+        Returns the job parameters of a stage, the user stories of the submitted job for stages without dependencies,
+        otherwise the audited diagrams of the stages it depends on are aggregated using the hand-off of the diagram consumers.
+        The diagrams of a dependency are taken from its artifact if it was passed, otherwise they are read from the database.
+        """
+        if not depends_on:
+            return root_job.parameters if isinstance(root_job.parameters, dict) else json.loads(root_job.parameters)
+
+        diagrams = {}
+        for dependency in depends_on:
+            if artifacts and dependency in artifacts:
+                diagrams[dependency] = artifacts[dependency].get("diagrams", [])
+                continue
+            dependency_job_id = self._get_stage_job_id(root_job, dependency)
+            diagrams[dependency] = self._get_stage_diagrams(dependency, dependency_job_id) if dependency_job_id else []
+
+        if stage == ValidJobTypes.ER_DIAGRAM.value:
+            return ClassDiagramConsumer.build_next_job_parameters(diagrams[ValidJobTypes.CLASS_DIAGRAM.value])
+        return ERDiagramConsumer.build_next_job_parameters(diagrams.get(ValidJobTypes.ER_DIAGRAM.value, []),
+                                                           diagrams.get(ValidJobTypes.CLASS_DIAGRAM.value, []))
+
+    def _get_stage_diagrams(self, stage:str, job_id:str) -> list[dict]:
+        """
+        Returns the audited diagrams of a stage from the database, stages without a repository have no dependent stages.
+        """
+        return self.repositories[stage]().get_audited_jobs_by_id(job_id) if stage in self.repositories else []
+
+    @staticmethod
+    def _build_artifact(stage:str, job_id:str, diagrams:Optional[list[dict]]) -> dict:
+        """
+        Returns the artifact of a stage, the fields of its audited diagrams used by the stages that depend on it (see STAGE_ARTIFACT_FIELDS).
+        """
+        fields = STAGE_ARTIFACT_FIELDS.get(stage, ())
+        return {
+            "stage": stage,
+            "job_id": str(job_id),
+            "diagrams": [{field: diagram[field] for field in fields if field in diagram} for diagram in diagrams or [] if fields and (diagram.get("is_audited") or diagram.get("is_validated"))],
+        }
+
+    @staticmethod
+    def _get_stage_job_id(root_job:Job, stage:str) -> Optional[str]:
+        if stage == root_job.job_type:
+            return str(root_job.job_id)
+        job_id = Job.objects.filter(parent_job_id=root_job.job_id, job_type=stage).values_list('job_id', flat=True).first()
+        return str(job_id) if job_id else None
+
+    @staticmethod
+    def _is_stage_completed(job_id:str) -> bool:
+        """
+        Returns True if the job queue entry of the stage is Completed, the submitted job is Processing until the pipeline completes.
+        """
+        return JobQueue.objects.filter(job_id=job_id, status__name=ValidJobStatus.COMPLETED.value).exists()
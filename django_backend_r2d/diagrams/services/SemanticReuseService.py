@@ -0,0 +1,113 @@
+from typing import Optional
+from django.conf import settings
+
+from jobs.services.JobContext import JobContext
+from embeddings.services.EmbeddingService import EmbeddingService
+from diagrams.interfaces.BaseDiagramRepository import BaseDiagramRepository
+from diagrams.services.DiagramReuseService import DiagramReuseService
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class SemanticReuseService:
+    """
+    Compares the features of a job with the features of the user's previous jobs using the vectors of their user stories (see EmbeddingService),
+    used for features that were edited or submitted in another job and cannot be reused by the DiagramReuseService.
+    Audited diagrams of near-identical features (R2D_SEMANTIC_REUSE_THRESHOLD) are copied,
+    audited diagrams of similar features (R2D_SEMANTIC_CONTEXT_THRESHOLD) are added to the analysis context of the features that are generated.
+    Disabled unless R2D_SEMANTIC_REUSE_ENABLED is set.
+
+    functions:
+        get_similar_diagrams: Returns the audited diagrams of the most similar features of previous jobs.
+        get_near_duplicate_diagrams: Returns the similar diagrams that can be copied, and the features that need to be generated.
+        to_analysis_context: Returns the similar diagrams of the features of the job parameters as analysis context.
+    """
+    def __init__(self, embedding_service:EmbeddingService = None):
+        self.embedding_service = embedding_service or EmbeddingService()
+
+    def get_similar_diagrams(self, job_id:str, repository:BaseDiagramRepository, job_context:JobContext = None) -> dict[str, list[dict]]:
+        """
+        Finds the audited diagrams of the features of previous jobs of the user that are most similar to the features of the job.
+        Only diagrams generated for a single feature are returned, so that they can be copied or used as context for that feature.
+        args:
+            job_id (str): The job ID.
+            repository (BaseDiagramRepository): The repository of the diagrams of the job e.g., ClassDiagramRepository
+            job_context (JobContext): The loaded job, the job is loaded if no context is provided.
+        returns:
+            dict: The similar features of each feature with their audited diagrams, most similar first e.g.,
+                  {"Checkout": [{"job_id": "<uuid>", "feature": "Checkout", "similarity": 0.97, "diagrams": [...]}]}
+        """
+        if not getattr(settings, "R2D_SEMANTIC_REUSE_ENABLED", False):
+            return {}
+        try:
+            job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
+            if job_context.bypass_cache:
+                return {}
+            similar_diagrams, diagrams_by_job = {}, {}
+            for feature, matches in self.embedding_service.find_similar_features(job_context).items():
+                for match in matches:
+                    if match["job_id"] not in diagrams_by_job:
+                        diagrams_by_job[match["job_id"]] = repository.get_audited_jobs_by_id(match["job_id"])
+                    diagrams = [diagram for diagram in diagrams_by_job[match["job_id"]] if DiagramReuseService.get_diagram_features(diagram) == {match["feature"]}]
+                    if diagrams:
+                        similar_diagrams.setdefault(feature, []).append({**match, "diagrams": diagrams})
+            return similar_diagrams
+        except Exception as e:
+            # Diagrams are generated without similar diagrams if the embeddings cannot be retrieved
+            logger.warning(f"Unable to retrieve similar diagrams for job {job_id}: {str(e)}")
+            return {}
+
+    def get_near_duplicate_diagrams(self, job_id:str, similar_diagrams:dict, features:Optional[list[str]], job_context:JobContext = None) -> tuple[dict, Optional[list[str]]]:
+        """
+        Copies the audited diagrams of features whose similarity is above R2D_SEMANTIC_REUSE_THRESHOLD, the diagrams are saved under the feature of the job.
+        args:
+            job_id (str): The job ID.
+            similar_diagrams (dict): The similar diagrams of the job, see get_similar_diagrams.
+            features (list[str]): The features that need to be generated, all features of the job if None.
+            job_context (JobContext): The loaded job, the job is loaded if no context is provided.
+        returns:
+            tuple: The copied diagrams in the chain response format accepted by BaseDiagramRepository.save_diagram,
+                   and the features that still need to be generated. The features provided are returned if no diagrams are copied.
+        """
+        if not similar_diagrams or not getattr(settings, "R2D_INCREMENTAL_REGENERATION", True):
+            return {}, features
+        threshold = getattr(settings, "R2D_SEMANTIC_REUSE_THRESHOLD", 0.98)
+        candidate_features = features
+        if candidate_features is None:
+            job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
+            candidate_features = DiagramReuseService.get_features(job_context.job.parameters)
+
+        diagrams, reused_features = [], []
+        for feature in candidate_features:
+            match = next((match for match in similar_diagrams.get(feature, []) if match["similarity"] >= threshold), None)
+            if match is None:
+                continue
+            logger.info(f"Reusing {len(match['diagrams'])} diagrams of {match['feature']} from job {match['job_id']} for {feature} of job {job_id}, similarity {match['similarity']}")
+            diagrams.extend({**diagram, "feature": [feature] if isinstance(diagram["feature"], list) else feature} for diagram in match["diagrams"])
+            reused_features.append(feature)
+        if not diagrams:
+            return {}, features
+        return DiagramReuseService.to_chain_response(diagrams, "similar"), [feature for feature in candidate_features if feature not in reused_features]
+
+    @staticmethod
+    def to_analysis_context(similar_diagrams:dict, job_parameters:dict) -> dict:
+        """
+        Returns the similar diagrams of the features of the job parameters as analysis context, empty if no feature has similar diagrams.
+        args:
+            similar_diagrams (dict): The similar diagrams of the job, see get_similar_diagrams.
+            job_parameters (dict): The job parameters sent through the chain.
+        returns:
+            dict: e.g., {"similar_audited_diagrams": [{"feature": "Checkout", "similar_feature": "Checkout", "similarity": 0.87, "diagram": ..., "description": ...}]}
+        """
+        if not similar_diagrams:
+            return {}
+        context = [{"feature": feature, "similar_feature": match["feature"], "similarity": match["similarity"],
+                    "diagram": diagram["diagram"], "description": diagram["description"]}
+                   for feature in DiagramReuseService.get_features(job_parameters) for match in similar_diagrams.get(feature, []) for diagram in match["diagrams"]]
+        if not context:
+            return {}
+        return {
+            "instructions": "Audited diagrams previously generated for similar features, reuse their design where it satisfies the user stories.",
+            "similar_audited_diagrams": context,
+        }
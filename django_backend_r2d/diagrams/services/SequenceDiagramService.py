@@ -3,6 +3,7 @@ from model_manager.constants import ModelProvider # Contains the ModelProvider a
 from model_manager.chains.AnalyzeAndAuditChainPromptBuilder import AnalyzeAndAuditChainPromptBuilder
 from diagrams.chain_inputs.SequenceDiagramAuditAnalyzeChainInputs import SequenceDiagramAuditAnalyzeChainInputs
 from diagrams.interfaces.BaseDiagramService import BaseDiagramService
+from jobs.services.JobContext import JobContext
 
 from diagrams.serializers.CreateSequenceDiagramSerializer import CreateSequenceDiagramSerializer
 from jobs.services.JobService import JobService
@@ -25,24 +26,29 @@ class SequenceDiagramService(BaseDiagramService):
         model_name (Enum): The model name to use.
         auditor_name (Enum): The auditor name to use.
         job_id (str): The job ID to use.
+        job_context (JobContext): The loaded job, the job is loaded from the job_id if no context is provided.
         Serializer_class (class): The serializer class to use. 
             > Default is CreateSequenceDiagramSerializer.
             > Pass in UMLDiagramSerializer, If creating ER diagrams directly from User Stories.
     
     override the retrieve_job_parameters, retrieve_analysis_context and retrieve_audit_criteria functions to customize the sequence diagram chain.
     """
-    def __init__(self, model_provider:ModelProvider, model_name: Enum, auditor_name:Enum, job_id:str, serializer_class=CreateSequenceDiagramSerializer):
+    def __init__(self, model_provider:ModelProvider, model_name: Enum, auditor_name:Enum, job_id:str, serializer_class=CreateSequenceDiagramSerializer, job_context:JobContext = None):
+        # Load the job once, the job parameters and bypass_cache are read from the context
+        job_context = job_context if job_context is not None and job_context.matches(job_id) else JobContext.load(job_id)
         # Retrieve the job parameters, analysis context and audit criteria
-        job_parameters = self.retrieve_job_parameters(job_id)
+        job_parameters = self.retrieve_job_parameters(job_id, job_context)
+        bypass_cache = self.retrieve_bypass_cache(job_id, job_context)
         analysis_context = self.retrieve_analysis_context(job_id)
         audit_criteria = self.retrieve_audit_criteria(job_id)
 
         # Initialize the chain input, prompt builder and serializer class
-        chain_input = SequenceDiagramAuditAnalyzeChainInputs(job_id=job_id, job_parameters=job_parameters, analysis_context=analysis_context, audit_criteria=audit_criteria)
+        chain_input = SequenceDiagramAuditAnalyzeChainInputs(job_id=job_id, job_parameters=job_parameters, analysis_context=analysis_context, audit_criteria=audit_criteria, bypass_cache=bypass_cache)
         prompt_builder = AnalyzeAndAuditChainPromptBuilder() # Prompt builder for the Analyze and Audit chain
         serializer_class = serializer_class # Pass the primary serializer class to use
     
         super().__init__(model_provider, model_name, auditor_name, chain_input, prompt_builder, serializer_class)
+        self.job_context = job_context
   
     def retrieve_analysis_context(self, job_id) -> dict:
         """
@@ -1,21 +1,27 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-# Import the Celery tasks to trigger 
-from diagrams.tasks import generate_class_diagram_task, generate_er_diagram_task, generate_sequence_diagram_task
-from diagrams.services.DiagramConsumerExceptions import ClassDiagramTaskError, ERDiagramTaskError, SequenceDiagramTaskError, DiagramCreationSignalError
-from jobs.models import JobQueue
+from diagrams.services.DiagramConsumerExceptions import ClassDiagramTaskError, ERDiagramTaskError, SequenceDiagramTaskError, DiagramCreationSignalError, DiagramPipelineError
+from diagrams.services.DiagramJobDispatcher import DiagramJobDispatcher
+from jobs.models import Job, JobQueue
 from jobs.constants import ValidJobTypes
+from jobs.services.JobSubmissionService import JobSubmissionService
 from model_manager.models import ModelName
 import logging
 logger = logging.getLogger('application_logging')
 
+# Submits the Celery tasks of diagram jobs, also registered with the JobSubmissionService for R2D_ORCHESTRATION_MODE direct
+diagram_job_dispatcher = DiagramJobDispatcher()
+JobSubmissionService.register_dispatcher(DiagramJobDispatcher.job_types, diagram_job_dispatcher.dispatch)
+
 """
 When a JobQueue entry is created with Submitted Status:
 1. Check if the job_status is Submitted
 
 If the job_status is submitted:
-1. Check for job type and trigger the appropriate diagram generation task
+1. Start the diagram pipeline if the job is submitted by a user (see R2D_DIAGRAM_PIPELINE)
+2. Otherwise check for job type and trigger the appropriate diagram generation task
+Jobs are dispatched by the JobSubmissionService instead if R2D_ORCHESTRATION_MODE is direct
 """
 
 @receiver(post_save, sender=JobQueue)
@@ -36,6 +42,10 @@ def trigger_diagram_creation(sender, instance, created, **kwargs):
     if not created or instance.status.code != 3:
         return
     
+    if JobSubmissionService.is_direct():
+        # Jobs are dispatched by the JobSubmissionService once the transaction commits
+        return
+    
     logger.info(f"Generating {instance.job_type} diagram for Job {instance.job_id}.")
     
     try:
@@ -46,33 +56,10 @@ def trigger_diagram_creation(sender, instance, created, **kwargs):
         if instance.job_type == ValidJobTypes.USER_STORY.value:
             # Add user story generation task here
             pass
-        
-        elif instance.job_type == ValidJobTypes.CLASS_DIAGRAM.value:
-            # Generate class diagram using the models defined in the JobQueue
-            generate_class_diagram_task.delay(
-                model_provider=model_information.provider,
-                model_name=model_information.name,
-                auditor_name=model_information.name,
-                job_id=job_id,
-            )
-            
-        elif instance.job_type == ValidJobTypes.ER_DIAGRAM.value:
-            # Generate ER diagram using the models defined in the JobQueue
-            generate_er_diagram_task.delay(
-                model_provider=model_information.provider,
-                model_name=model_information.name,
-                auditor_name=model_information.name,
-                job_id=job_id,
-            )
-           
-        elif instance.job_type == ValidJobTypes.SEQUENCE_DIAGRAM.value:
-            # Generate sequence diagram using the models defined in the JobQueue
-            generate_sequence_diagram_task.delay(
-                model_provider=model_information.provider,
-                model_name=model_information.name,
-                auditor_name=model_information.name,
-                job_id=job_id,
-            )
+
+        elif instance.job_type in DiagramJobDispatcher.job_types:
+            # Start the pipeline of the job, or trigger the task of its job type using the models defined in the JobQueue
+            diagram_job_dispatcher.dispatch(Job.objects.get(job_id=job_id), model_information)
             
         else:
             logger.error(f"Invalid job_type: {instance.job_type} for Job {instance.job_id}.", stack_info=True)
@@ -80,7 +67,7 @@ def trigger_diagram_creation(sender, instance, created, **kwargs):
     except ModelName.DoesNotExist:
         logger.error(f"Model information for Job {instance.job_id} does not exist.", stack_info=True)
         raise DiagramCreationSignalError(f"Model information: {instance.model_id} not valid for Job: {instance.job_id}")
-    except (ClassDiagramTaskError, ERDiagramTaskError, SequenceDiagramTaskError) as e:
+    except (ClassDiagramTaskError, ERDiagramTaskError, SequenceDiagramTaskError, DiagramPipelineError) as e:
         logger.error(f"Error generating diagram for Job {instance.job_id}: {str(e)}", stack_info=True)
         raise DiagramCreationSignalError(f"Error occurred in trigger_diagram_creation_signal {instance.job_id}: {str(e)}")
     except Exception as e:
@@ -1,21 +1,202 @@
+import inspect
+import math
+import random
 from enum import Enum
+from contextlib import ExitStack, contextmanager
+from functools import partial, wraps
 from celery import shared_task
+from django.conf import settings
 from model_manager.constants import ModelProvider
+from model_manager.services.ModelExceptions import ModelCircuitOpenError
 from framework.consumers.BaseConsumerExceptions import BaseConsumerException
 from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobQueue
+from jobs.services.JobExceptions import JobNotFoundException, InvalidJobStatus
+from jobs.services.JobSubmissionService import JobSubmissionService
+from jobs.services.JobLeaseManager import JobLeaseManager
+from jobs.services.JobRetryPolicy import JobRetryPolicy
+from jobs.services.JobService import JobService
+from jobs.services.JobQueueService import JobQueueService
 
 from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
 from diagrams.consumers.ERDiagramConsumer import ERDiagramConsumer
 from diagrams.consumers.SequenceDiagramConsumer import SequenceDiagramConsumer
-from diagrams.services.DiagramConsumerExceptions import ClassDiagramConsumerError, ClassDiagramTaskError, ERDiagramConsumerError, ERDiagramTaskError, SequenceDiagramConsumerError, SequenceDiagramTaskError
+from diagrams.consumers.AsyncDiagramConsumerRunner import AsyncDiagramConsumerRunner
+from diagrams.services.DiagramConsumerExceptions import ClassDiagramConsumerError, ClassDiagramTaskError, ERDiagramConsumerError, ERDiagramTaskError, SequenceDiagramConsumerError, SequenceDiagramTaskError, PipelineStageTaskError
+from diagrams.services.PipelineEngine import PipelineEngine
 
 
 import logging
 logger = logging.getLogger('application_logging')
 
+def get_retry_countdown(error:ModelCircuitOpenError) -> float:
+    """
+    Returns the seconds to wait before a task held by an open circuit is retried.
+    Jitter spreads out the jobs that were held by the same circuit, so they do not all retry at the same time.
+    """
+    countdown = max(1, math.ceil(error.retry_after))
+    return countdown + random.uniform(0, min(countdown, 30))
+
+def retry_when_circuit_closes(task, error:ModelCircuitOpenError, **task_kwargs) -> str:
+    """
+    Schedules the task to run again once the circuit of the model may have recovered, the job is held in the Queued state until then.
+    args:
+        task: The Celery task to schedule e.g., generate_class_diagram_task
+        error (ModelCircuitOpenError): The error raised by the circuit breaker.
+        **task_kwargs: The keyword arguments of the task, including the job_id.
+    returns:
+        job_id (str): The job ID of the held job.
+    """
+    countdown = get_retry_countdown(error)
+    logger.info(f"Retrying {task.name} for - {task_kwargs['job_id']} in {countdown:.0f} seconds, {error.error_message}")
+    task.apply_async(kwargs=task_kwargs, countdown=countdown)
+    return task_kwargs["job_id"]
+
+def retry_on_transient_error(task, error:Exception, stage:str, **task_kwargs) -> bool:
+    """
+    Records the failed attempt of the job, and schedules the task to resume the job if the error is transient and the job has attempts left, see JobRetryPolicy.
+    The job is held in the Queued state until it is retried, steps of the chain completed by the failed attempt are restored from their checkpoints.
+    args:
+        task: The Celery task to schedule e.g., generate_class_diagram_task
+        error (Exception): The error raised while processing the job.
+        stage (str): The job type processed by the task e.g., class_diagram
+        **task_kwargs: The keyword arguments of the task, including the job_id.
+    returns:
+        bool: True if the task was scheduled, False if the job failed.
+    """
+    job_id = task_kwargs["job_id"]
+    countdown = JobRetryPolicy().record_failure(job_id, stage, error)
+    if countdown is None:
+        return False
+    if not is_job_completed(job_id):
+        # Completed jobs that failed to hand off keep their status, the retry only creates the next job, see hold_job_lease
+        job_service = JobService()
+        job_service.update_status_by_id(job_id, ValidJobStatus.QUEUED.value)
+        JobQueueService().update_status(job_id, ValidJobStatus.QUEUED.value)
+        job_service.update_job_description(job_id, f"Retrying in {countdown:.0f} seconds after a transient error")
+    task.apply_async(kwargs={**task_kwargs, "resume": True}, countdown=countdown)
+    return True
+
+def is_job_completed(job_id:str) -> bool:
+    """
+    Returns True if the JobQueue record of the job has been marked as Completed by its consumer.
+    """
+    return JobQueue.objects.filter(job_id=job_id, status__name=ValidJobStatus.COMPLETED.value).exists()
+
+def is_hand_off_pending(job_id:str, stage:str) -> bool:
+    """
+    Returns True if the job has been completed but the task failed before handing off to the next stage,
+    i.e., the next job was not created or, for the last stage, the parent jobs were not marked as Completed.
+    Jobs of a diagram pipeline are handed off by the PipelineEngine.
+    args:
+        job_id (str): The job ID.
+        stage (str): The job type processed by the task e.g., class_diagram
+    """
+    job = Job.objects.filter(job_id=job_id).values('pipeline', 'parent_job_id', 'parent_job__pipeline', 'parent_job__job_status__name').first()
+    if job is None or job['pipeline'] or job['parent_job__pipeline']:
+        return False
+    if stage == ValidJobTypes.SEQUENCE_DIAGRAM.value:
+        return job['parent_job_id'] is not None and job['parent_job__job_status__name'] != ValidJobStatus.COMPLETED.value
+    return not Job.objects.filter(parent_job_id=job_id).exists()
+
+@contextmanager
+def hold_job_lease(job_id:str, stage:str):
+    """
+    Holds the lease of the job and stage until the block exits, see JobLeaseManager.
+    args:
+        job_id (str): The job ID.
+        stage (str): The job type processed by the task e.g., class_diagram
+    yields:
+        tuple[bool, bool]: Whether the job should be processed, False if another task holds the lease of the job or the job has already been
+                           completed and handed off, and whether the job must be resumed, True if the job has been completed but not handed off.
+                           Resuming a completed job returns its saved diagrams, so that the task only creates the next job, see is_hand_off_pending.
+    """
+    with JobLeaseManager().hold(job_id, stage) as acquired:
+        if not acquired:
+            logger.info(f"Skipping {stage} for - {job_id}, the job is being processed by another task")
+            yield False, False
+        elif is_job_completed(job_id):
+            if is_hand_off_pending(job_id, stage):
+                logger.info(f"Handing off {stage} for - {job_id}, the job has been completed but the next job was not created")
+                yield True, True
+            else:
+                logger.info(f"Skipping {stage} for - {job_id}, the job has already been completed")
+                yield False, False
+        else:
+            yield True, False
+
+def with_job_lease(job_type:str = None):
+    """
+    Runs a diagram task while holding the lease of its job, see hold_job_lease.
+    Duplicates of the task, e.g., a redelivered message or a job submitted twice, return the job ID without processing the job
+    if another task holds the lease of the job or the job has already been completed and handed off.
+    Completed jobs that were not handed off are resumed, so that the next job is created without processing the job again.
+    args:
+        job_type (str): The job type processed by the task, the job_type argument of the task is used if None.
+    """
+    def decorator(task_function):
+        task_signature = inspect.signature(task_function)
+
+        @wraps(task_function)
+        def wrapper(*args, **kwargs):
+            arguments = task_signature.bind(*args, **kwargs)
+            job_id, stage = str(arguments.arguments["job_id"]), job_type or arguments.arguments["job_type"]
+            with hold_job_lease(job_id, stage) as (process, resume):
+                if not process:
+                    return job_id
+                if resume:
+                    arguments.arguments["resume"] = True
+                return task_function(*arguments.args, **arguments.kwargs)
+        return wrapper
+    return decorator
+
+def resume_diagram_job(job_id:str) -> str:
+    """
+    Submits the task that resumes a diagram job that failed to process, e.g., after a transient auditor error.
+    The job restarts from the last completed step of the chain, the analysis is not requested from the model again if it was checkpointed.
+    args:
+        job_id (str): The job ID.
+    raises:
+        JobNotFoundException: If the job does not exist.
+        InvalidJobStatus: If the job is not a diagram job or has not failed to process.
+        DiagramPipelineError: If the pipeline stored on the job is not valid.
+    returns:
+        job_id (str): The job ID of the resumed job.
+    """
+    job = Job.objects.select_related('job_status', 'model').filter(job_id=job_id).first()
+    if job is None:
+        raise JobNotFoundException(f"Job with id {job_id} does not exist")
+    if job.job_status.name != ValidJobStatus.ERROR_FAILED_TO_PROCESS.value:
+        raise InvalidJobStatus(f"Only jobs with status {ValidJobStatus.ERROR_FAILED_TO_PROCESS.value} can be resumed, job {job_id} is {job.job_status.name}")
+
+    # Jobs of a diagram pipeline are resumed from the submitted job, stages that were completed are skipped
+    pipeline_job = job if job.pipeline else job.parent_job if job.parent_job_id and job.parent_job.pipeline else None
+    if pipeline_job is not None:
+        logger.info(f"Resuming {pipeline_job.pipeline['name']} pipeline for - {pipeline_job.job_id}")
+        PipelineEngine().start(str(pipeline_job.job_id), resume=True)
+        return str(job.job_id)
+
+    task_kwargs = {"model_provider": job.model.provider, "model_name": job.model.name, "auditor_name": job.model.name,
+                   "job_id": str(job.job_id), "resume": True}
+    tasks = {
+        ValidJobTypes.CLASS_DIAGRAM.value: generate_class_diagram_task,
+        ValidJobTypes.ER_DIAGRAM.value: generate_er_diagram_task,
+        ValidJobTypes.SEQUENCE_DIAGRAM.value: generate_sequence_diagram_task,
+    }
+    if job.job_type not in tasks:
+        raise InvalidJobStatus(f"Job {job_id} of type {job.job_type} cannot be resumed")
+
+    logger.info(f"Resuming {job.job_type} for - {job_id}")
+    if settings.R2D_ASYNC_DIAGRAM_CONSUMERS:
+        generate_diagram_async_task.delay(job_type=job.job_type, **task_kwargs)
+    else:
+        tasks[job.job_type].delay(**task_kwargs)
+    return str(job.job_id)
+
 @shared_task
+@with_job_lease(ValidJobTypes.CLASS_DIAGRAM.value)
 def generate_class_diagram_task(model_provider:ModelProvider, model_name:Enum, 
-                                             auditor_name:Enum, job_id:str) -> str:
+                                             auditor_name:Enum, job_id:str, resume:bool=False) -> str:
     """
     Celery task to generate class diagrams from user stories.
     args:
@@ -23,12 +204,15 @@ def generate_class_diagram_task(model_provider:ModelProvider, model_name:Enum,
         model_name (str or Enum): The model name.
         auditor_name (str or Enum): The auditor name.
         job_id (str): The job ID.
+        resume (bool): Set to True to resume the job from the last completed step of the chain, see BaseConsumer.resume_record.
     raises:
         ClassDiagramTaskError if an error occurs.
     returns:
         job_id (str): The job ID of the next job record.
         Creates a new job record with parent_id as the job_id, status as 'Submitted' and type as 'er_diagram'.
         This allows for event-driven architecture, where er-diagrams are created after class diagrams are created.
+        If the circuit of the model is open the job is held in the Queued state and the task is retried, the held job ID is returned.
+        If the job failed with a transient error and has attempts left, it is held in the Queued state and resumed after a backoff, see JobRetryPolicy.
     """
     logger.debug(f"Generating class diagram for - {job_id}")
     try:    
@@ -36,19 +220,26 @@ def generate_class_diagram_task(model_provider:ModelProvider, model_name:Enum,
         consumer = ClassDiagramConsumer(model_provider=model_provider, model_name=model_name, 
                                         auditor_name=auditor_name, job_id=job_id)
         # Process the record 
-        class_diagrams = consumer.process_record(job_id)  
+        class_diagrams = consumer.resume_record(job_id) if resume else consumer.process_record(job_id)
         logger.info(f"Successfully created class diagram for - {job_id}")
         
         # Create a new job record with parent_id as the job_id, status as 'Submitted' and type as 'er_diagram'
         job_id = consumer.create_next_record(parent_id=job_id, class_diagrams=class_diagrams, 
                                           job_type=ValidJobTypes.ER_DIAGRAM.value, job_status=ValidJobStatus.SUBMITTED.value)
         return job_id
+    except ModelCircuitOpenError as e:
+        return retry_when_circuit_closes(generate_class_diagram_task, e, model_provider=model_provider, model_name=model_name,
+                                         auditor_name=auditor_name, job_id=job_id, resume=resume)
     except (BaseConsumerException, ClassDiagramConsumerError) as e:
         logger.error(f"Error generating class diagram for - {job_id}")
+        if retry_on_transient_error(generate_class_diagram_task, e, ValidJobTypes.CLASS_DIAGRAM.value, model_provider=model_provider,
+                                    model_name=model_name, auditor_name=auditor_name, job_id=job_id):
+            return job_id
         raise ClassDiagramTaskError(f"Error generating class diagram for - {job_id} - {str(e)}")
 
 @shared_task
-def generate_er_diagram_task(model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str) -> str:
+@with_job_lease(ValidJobTypes.ER_DIAGRAM.value)
+def generate_er_diagram_task(model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str, resume:bool=False) -> str:
     """
     Celery task to generate er diagrams
     args:
@@ -56,12 +247,15 @@ def generate_er_diagram_task(model_provider:ModelProvider, model_name:Enum, audi
         model_name (str or Enum): The model name.
         auditor_name (str or Enum): The auditor name.
         job_id (str): The job ID.
+        resume (bool): Set to True to resume the job from the last completed step of the chain, see BaseConsumer.resume_record.
     raises:
         ERDiagramTaskError if an error occurs.
     returns:
         job_id (str): The job ID of the next job record.
         Creates a new job record with parent_id as the job_id, status as 'Submitted' and type as 'sequence_diagram'.
         This allows for event-driven architecture, where sequence-diagrams are created after er diagrams are created.
+        If the circuit of the model is open the job is held in the Queued state and the task is retried, the held job ID is returned.
+        If the job failed with a transient error and has attempts left, it is held in the Queued state and resumed after a backoff, see JobRetryPolicy.
     """
     logger.debug(f"Generating er diagram for - {job_id}")
     try:    
@@ -69,7 +263,7 @@ def generate_er_diagram_task(model_provider:ModelProvider, model_name:Enum, audi
         consumer = ERDiagramConsumer(model_provider=model_provider, model_name=model_name, 
                                         auditor_name=auditor_name, job_id=job_id)
         # Process the record 
-        er_diagrams = consumer.process_record(job_id)  
+        er_diagrams = consumer.resume_record(job_id) if resume else consumer.process_record(job_id)
         logger.info(f"Successfully created er diagram for - {job_id}")
         
         # Create a new job record with parent_id as the job_id, status as 'Submitted' and type as 'er_diagram'
@@ -77,12 +271,19 @@ def generate_er_diagram_task(model_provider:ModelProvider, model_name:Enum, audi
                                           job_type=ValidJobTypes.SEQUENCE_DIAGRAM.value, job_status=ValidJobStatus.SUBMITTED.value)
         return job_id
     
+    except ModelCircuitOpenError as e:
+        return retry_when_circuit_closes(generate_er_diagram_task, e, model_provider=model_provider, model_name=model_name,
+                                         auditor_name=auditor_name, job_id=job_id, resume=resume)
     except (BaseConsumerException, ERDiagramConsumerError) as e:
         logger.error(f"Error generating ER diagram for - {job_id}")
+        if retry_on_transient_error(generate_er_diagram_task, e, ValidJobTypes.ER_DIAGRAM.value, model_provider=model_provider,
+                                    model_name=model_name, auditor_name=auditor_name, job_id=job_id):
+            return job_id
         raise ERDiagramTaskError(f"Error generating ER diagram for - {job_id} - {str(e)}")
 
 @shared_task
-def generate_sequence_diagram_task(model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str) -> str:
+@with_job_lease(ValidJobTypes.SEQUENCE_DIAGRAM.value)
+def generate_sequence_diagram_task(model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str, resume:bool=False) -> str:
     """
     Celery task to generate sequence diagrams
     args:
@@ -90,11 +291,14 @@ def generate_sequence_diagram_task(model_provider:ModelProvider, model_name:Enum
         model_name (str or Enum): The model name.
         auditor_name (str or Enum): The auditor name.
         job_id (str): The job ID.
+        resume (bool): Set to True to resume the job from the last completed step of the chain, see BaseConsumer.resume_record.
     raises:
         SequenceDiagramTaskError if an error occurs.
     returns:
         Sequence diagram job_id (str): The job ID of the sequence diagram job.
         No new job created after sequence diagram creation.
+        If the circuit of the model is open the job is held in the Queued state and the task is retried.
+        If the job failed with a transient error and has attempts left, it is held in the Queued state and resumed after a backoff, see JobRetryPolicy.
     """
     logger.debug(f"Generating sequence diagram for - {job_id}")
     try:    
@@ -102,7 +306,7 @@ def generate_sequence_diagram_task(model_provider:ModelProvider, model_name:Enum
         consumer = SequenceDiagramConsumer(model_provider=model_provider, model_name=model_name, 
                                         auditor_name=auditor_name, job_id=job_id)
         # Process the record 
-        sequence_diagrams = consumer.process_record(job_id)  
+        sequence_diagrams = consumer.resume_record(job_id) if resume else consumer.process_record(job_id)
         logger.info(f"Successfully created er diagram for - {job_id}")
         
         # No new jobs will be created after sequence diagram creation
@@ -110,6 +314,124 @@ def generate_sequence_diagram_task(model_provider:ModelProvider, model_name:Enum
         consumer.complete_all_jobs(job_id) 
         return job_id # Return the job id for sequence diagram job as no new jobs will be created
     
-    except (BaseConsumerException, SequenceDiagramConsumer) as e:
-        logger.error(f"Error generating ER diagram for - {job_id}")
-        raise ERDiagramTaskError(f"Error generating ER diagram for - {job_id} - {str(e)}")
+    except ModelCircuitOpenError as e:
+        return retry_when_circuit_closes(generate_sequence_diagram_task, e, model_provider=model_provider, model_name=model_name,
+                                         auditor_name=auditor_name, job_id=job_id, resume=resume)
+    except (BaseConsumerException, SequenceDiagramConsumerError) as e:
+        logger.error(f"Error generating sequence diagram for - {job_id}")
+        if retry_on_transient_error(generate_sequence_diagram_task, e, ValidJobTypes.SEQUENCE_DIAGRAM.value, model_provider=model_provider,
+                                    model_name=model_name, auditor_name=auditor_name, job_id=job_id):
+            return job_id
+        raise SequenceDiagramTaskError(f"Error generating sequence diagram for - {job_id} - {str(e)}")
+
+def handle_async_diagram_error(task_kwargs:dict, error:Exception):
+    """
+    Handles the error of a job processed in the background by the asyncio consumer runner, the job has already been updated by its consumer.
+    The job is retried once the circuit of the model may have recovered, or after a backoff if the error is transient.
+    args:
+        task_kwargs (dict): The keyword arguments of generate_diagram_async_task.
+        error (Exception): The error raised while processing the job.
+    """
+    if isinstance(error, ModelCircuitOpenError):
+        retry_when_circuit_closes(generate_diagram_async_task, error, **task_kwargs)
+        return
+    retry_kwargs = {key: value for key, value in task_kwargs.items() if key != "resume"}
+    if not retry_on_transient_error(generate_diagram_async_task, error, task_kwargs["job_type"], **retry_kwargs):
+        logger.error(f"Failed to generate {task_kwargs['job_type']} for - {task_kwargs['job_id']}: {error}")
+
+@shared_task
+def generate_diagram_async_task(job_type:str, model_provider:ModelProvider, model_name:Enum, auditor_name:Enum, job_id:str, resume:bool=False) -> str:
+    """
+    Celery task to generate diagrams using the asyncio consumer runner.
+    The job is submitted to the event loop shared by all tasks executed by the worker process, and the task returns without waiting
+    for the job to complete, so a worker accepts up to R2D_ASYNC_MAX_IN_FLIGHT_JOBS jobs regardless of the size of its pool.
+    The lease of the job is held until the job completes, see hold_job_lease.
+    args:
+        job_type (str): The job type e.g., class_diagram, er_diagram, sequence_diagram
+        model_provider (str or Enum): The model provider.
+        model_name (str or Enum): The model name.
+        auditor_name (str or Enum): The auditor name.
+        job_id (str): The job ID.
+        resume (bool): Set to True to resume the job from the last completed step of the chain, see BaseConsumer.resume_record.
+    returns:
+        job_id (str): The job ID of the submitted job.
+        The next job record is created once the job completes, see AsyncDiagramConsumerRunner.arun.
+        If the circuit of the model is open the job is held in the Queued state and the task is retried, see handle_async_diagram_error.
+        If the job failed with a transient error and has attempts left, it is held in the Queued state and resumed after a backoff, see JobRetryPolicy.
+    """
+    logger.debug(f"Generating {job_type} asynchronously for - {job_id}")
+    job_id = str(job_id)
+    task_kwargs = {"job_type": job_type, "model_provider": model_provider, "model_name": model_name, "auditor_name": auditor_name,
+                   "job_id": job_id, "resume": resume}
+    lease = ExitStack()
+    process, resume_completed = lease.enter_context(hold_job_lease(job_id, job_type))
+    if not process:
+        lease.close()
+        return job_id
+    if resume_completed:
+        task_kwargs["resume"] = True
+    try:
+        # The lease is released by the event loop once the job completes or fails
+        AsyncDiagramConsumerRunner.submit(**task_kwargs, on_error=partial(handle_async_diagram_error, task_kwargs), on_exit=lease.close)
+    except Exception:
+        lease.close()
+        raise
+    return job_id
+
+@shared_task(bind=True)
+def run_pipeline_stage_task(self, *previous_results, root_job_id:str, stage:str, resume:bool=False) -> dict | list[dict]:
+    """
+    Celery task to process a stage of a diagram pipeline, see PipelineEngine.
+    Stages of the same level are executed concurrently in a group, the next level is executed once every stage of the group completes.
+    args:
+        *previous_results: The results of the previous level, passed by Celery if R2D_ORCHESTRATION_MODE is direct.
+        root_job_id (str): The job ID of the submitted job.
+        stage (str): The stage to process e.g., er_diagram
+        resume (bool): Set to True to resume the stage from the last completed step of the chain.
+    raises:
+        PipelineStageTaskError if an error occurs, the submitted job is marked as Error Failed to Process and the remaining stages are not executed.
+        Stages that failed with a transient error are resumed in place after a backoff until the attempts of the stage are exhausted, see JobRetryPolicy.
+    returns:
+        dict: The stage and the job ID that processed it.
+        list[dict]: The artifacts of the previous stages followed by the artifact of the stage if R2D_ORCHESTRATION_MODE is direct.
+        If the circuit of the model is open the stage is retried in place, so that the rest of the pipeline waits for it.
+        If the stage is being processed by another task, e.g., a redelivered message, the task is retried until the stage is completed.
+    """
+    logger.debug(f"Running {stage} stage of pipeline {root_job_id}")
+    lease_manager = JobLeaseManager()
+    with lease_manager.hold(root_job_id, stage) as acquired:
+        if not acquired:
+            # Completed stages are skipped once the lease is released, the task returns the result of the completed stage
+            logger.info(f"Retrying {stage} stage of pipeline {root_job_id}, the stage is being processed by another task")
+            raise self.retry(countdown=lease_manager.heartbeat_interval, max_retries=None)
+        try:
+            if not JobSubmissionService.is_direct():
+                return PipelineEngine().run_stage(root_job_id=root_job_id, stage=stage, resume=resume)
+            # Artifacts of every completed stage are passed on, a stage may depend on a stage that is more than one level before it
+            artifacts = PipelineEngine.collect_artifacts(previous_results)
+            return [*artifacts.values(), PipelineEngine().run_stage(root_job_id=root_job_id, stage=stage, resume=resume, artifacts=artifacts)]
+        except ModelCircuitOpenError as e:
+            # Retrying the task keeps its place in the group, a new task would not be awaited by the chord
+            countdown = get_retry_countdown(e)
+            logger.info(f"Retrying {stage} stage of pipeline {root_job_id} in {countdown:.0f} seconds, {e.error_message}")
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+        except Exception as e:
+            countdown = JobRetryPolicy().record_failure(root_job_id, stage, e)
+            if countdown is not None:
+                # The stage is resumed in place, steps of the chain completed by the failed attempt are restored from their checkpoints
+                raise self.retry(exc=e, countdown=countdown, max_retries=None, kwargs={**self.request.kwargs, "resume": True})
+            PipelineEngine().fail_pipeline(root_job_id, stage, e)
+            raise PipelineStageTaskError(f"Error generating {stage} for pipeline {root_job_id} - {str(e)}")
+
+@shared_task
+def complete_pipeline_task(*previous_results, root_job_id:str) -> str:
+    """
+    Celery task executed once every stage of a diagram pipeline completes, marks the submitted job as Completed.
+    args:
+        *previous_results: The artifacts of the stages, passed by Celery if R2D_ORCHESTRATION_MODE is direct.
+        root_job_id (str): The job ID of the submitted job.
+    returns:
+        job_id (str): The job ID of the submitted job.
+    """
+    PipelineEngine().complete_pipeline(root_job_id, PipelineEngine.collect_artifacts(previous_results))
+    return root_job_id
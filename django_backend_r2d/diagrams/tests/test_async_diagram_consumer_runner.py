@@ -0,0 +1,106 @@
+import asyncio
+import inspect
+import threading
+import time
+from django.test import TestCase, override_settings
+from diagrams.consumers.AsyncDiagramConsumerRunner import AsyncDiagramConsumerRunner
+from framework.utils.DatabaseExecutor import DatabaseExecutor
+from jobs.constants import ValidJobTypes
+import logging
+
+class SlowConsumer:
+    """
+    Consumer that waits for an LLM call that takes 0.3 seconds, jobs whose ID starts with fail raise an error.
+    """
+    completed = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def aprocess_record(self, job_id:str) -> list[dict]:
+        await asyncio.sleep(0.3)
+        if job_id.startswith("fail"):
+            raise ValueError("Simulated consumer failure")
+        return []
+
+    def complete_all_jobs(self, job_id:str):
+        SlowConsumer.completed.append(job_id)
+
+@override_settings(R2D_ASYNC_MAX_IN_FLIGHT_JOBS=4, R2D_ASYNC_DATABASE_THREADS=4)
+class AsyncDiagramConsumerRunnerTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        AsyncDiagramConsumerRunner.reset()
+        DatabaseExecutor.reset()
+        self.consumer = AsyncDiagramConsumerRunner.consumers[ValidJobTypes.SEQUENCE_DIAGRAM.value]
+        AsyncDiagramConsumerRunner.consumers[ValidJobTypes.SEQUENCE_DIAGRAM.value] = SlowConsumer
+        SlowConsumer.completed = []
+
+    def tearDown(self):
+        AsyncDiagramConsumerRunner.consumers[ValidJobTypes.SEQUENCE_DIAGRAM.value] = self.consumer
+        AsyncDiagramConsumerRunner.reset()
+        DatabaseExecutor.reset()
+
+    def test_submitted_jobs_are_multiplexed(self):
+        """
+        Test that submit returns without waiting for the job, waits once R2D_ASYNC_MAX_IN_FLIGHT_JOBS jobs are in-flight,
+        and passes the errors of failed jobs to on_error.
+        """
+        errors, exits = [], []
+        job_ids = ["fail-1", *[f"job-{index}" for index in range(7)]]
+        start = time.perf_counter()
+        futures = [AsyncDiagramConsumerRunner.submit(job_type=ValidJobTypes.SEQUENCE_DIAGRAM.value, model_provider="fake", model_name="fake-diagram-model",
+                                                     auditor_name="fake-diagram-model", job_id=job_id, on_error=errors.append,
+                                                     on_exit=lambda job_id=job_id: exits.append(job_id))
+                   for job_id in job_ids[:4]]
+        # The first 4 jobs are accepted by a single thread without waiting for them
+        self.assertLess(time.perf_counter() - start, 0.25)
+        futures += [AsyncDiagramConsumerRunner.submit(job_type=ValidJobTypes.SEQUENCE_DIAGRAM.value, model_provider="fake", model_name="fake-diagram-model",
+                                                      auditor_name="fake-diagram-model", job_id=job_id, on_error=errors.append,
+                                                      on_exit=lambda job_id=job_id: exits.append(job_id))
+                    for job_id in job_ids[4:]]
+        results = [future.result(timeout=5) for future in futures]
+        elapsed = time.perf_counter() - start
+
+        # 8 jobs of 0.3 seconds are processed 4 at a time
+        self.assertGreaterEqual(elapsed, 0.55)
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(results, [None, *job_ids[1:]])
+        self.assertEqual(sorted(SlowConsumer.completed), sorted(job_ids[1:]))
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertEqual(sorted(exits), sorted(job_ids))
+
+    def test_database_calls_run_concurrently(self):
+        """
+        Test that the database calls of coroutines are executed on several threads instead of a single thread.
+        """
+        def query():
+            time.sleep(0.2)
+            return threading.current_thread().name
+
+        async def run_queries():
+            return await asyncio.gather(*(DatabaseExecutor.run(query) for _ in range(4)))
+
+        start = time.perf_counter()
+        thread_names = asyncio.run(run_queries())
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(len(set(thread_names)), 4)
+        self.assertTrue(all(name.startswith("r2d-database") for name in thread_names))
@@ -0,0 +1,176 @@
+import inspect
+import json
+from uuid import uuid4
+from celery import chord
+from django.test import TestCase, override_settings
+from diagrams.constants import DIAGRAM_PIPELINES, DiagramPipelines
+from diagrams.models import ClassDiagram, ERDiagram, SequenceDiagram
+from diagrams.services.DiagramConsumerExceptions import DiagramPipelineError
+from diagrams.services.PipelineEngine import PipelineEngine
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobQueue, JobStatus
+from jobs.services.JobService import JobService
+from model_manager.models import ModelName
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+JOB_PARAMETERS = {
+    "features": ["Logging Framework"],
+    "sub_features": ["Log Handlers"],
+    "job_parameters": {"Logging Framework": {"Log Handlers": {"LOG-1": {
+        "id": "LOG-1",
+        "requirement": "As a developer I want to write logs to multiple handlers so that logs are persisted",
+        "services_to_use": [],
+        "acceptance_criteria": "Logs are written to every handler",
+        "additional_information": "",
+    }}}},
+}
+
+@override_settings(R2D_DIAGRAM_PIPELINE=DiagramPipelines.PARALLEL.value, R2D_AUDIT_POLICY="always", R2D_CIRCUIT_BREAKER_BACKEND="disabled",
+                   R2D_RATE_LIMIT_BACKEND="disabled", R2D_INCREMENTAL_REGENERATION=False, R2D_ASYNC_DIAGRAM_CONSUMERS=False, R2D_FAKE_LLM_CONFIG={})
+class DiagramPipelineTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='pipelineuser', password='testpassword', email='pipeline@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.engine = PipelineEngine()
+
+    def create_job(self, job_type:str = ValidJobTypes.CLASS_DIAGRAM.value) -> Job:
+        # Submitted jobs are enqueued, the JobQueue signal stores the pipeline on the job and submits its canvas
+        return Job.objects.create(
+            job_id=str(uuid4()),
+            user=self.user,
+            job_status=JobStatus.objects.get(name=ValidJobStatus.SUBMITTED.value),
+            model=ModelName.objects.get(name="fake-diagram-model"),
+            job_details="Pipeline job",
+            job_type=job_type,
+            tokens=100,
+            parameters=JOB_PARAMETERS,
+        )
+
+    def run_pipeline(self, job:Job):
+        """
+        Runs every level of the pipeline in order, as the chord of the Celery canvas would.
+        """
+        job.refresh_from_db()
+        for level in self.engine.get_levels(job.pipeline):
+            for stage in level:
+                self.engine.run_stage(str(job.job_id), stage)
+        self.engine.complete_pipeline(str(job.job_id))
+
+    def test_levels(self):
+        """
+        Test that stages without dependencies share the first level, and dependent stages fan in on the next level.
+        """
+        self.assertEqual(self.engine.get_levels(DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value]),
+                         [[ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value], [ValidJobTypes.SEQUENCE_DIAGRAM.value]])
+        self.assertEqual(self.engine.get_levels(DIAGRAM_PIPELINES[DiagramPipelines.SERIAL.value]),
+                         [[ValidJobTypes.CLASS_DIAGRAM.value], [ValidJobTypes.ER_DIAGRAM.value], [ValidJobTypes.SEQUENCE_DIAGRAM.value]])
+
+    def test_invalid_pipelines(self):
+        """
+        Test that pipelines with cycles, missing stages or dependencies that cannot be used as inputs are rejected.
+        """
+        invalid_pipelines = [
+            {"name": "cycle", "stages": [{"stage": ValidJobTypes.CLASS_DIAGRAM.value, "depends_on": []},
+                                         {"stage": ValidJobTypes.ER_DIAGRAM.value, "depends_on": [ValidJobTypes.SEQUENCE_DIAGRAM.value]},
+                                         {"stage": ValidJobTypes.SEQUENCE_DIAGRAM.value, "depends_on": [ValidJobTypes.ER_DIAGRAM.value]}]},
+            {"name": "missing", "stages": [{"stage": ValidJobTypes.SEQUENCE_DIAGRAM.value, "depends_on": [ValidJobTypes.ER_DIAGRAM.value]}]},
+            {"name": "unsupported", "stages": [{"stage": ValidJobTypes.CLASS_DIAGRAM.value, "depends_on": [ValidJobTypes.ER_DIAGRAM.value]},
+                                               {"stage": ValidJobTypes.ER_DIAGRAM.value, "depends_on": []}]},
+            {"name": "empty", "stages": []},
+        ]
+        for pipeline in invalid_pipelines:
+            with self.assertRaises(DiagramPipelineError):
+                self.engine.get_levels(pipeline)
+        with self.assertRaises(DiagramPipelineError):
+            self.engine.get_pipeline("unknown")
+
+    def test_canvas(self):
+        """
+        Test that stages of the same level are grouped, and the pipeline is completed after the last level.
+        """
+        job = self.create_job()
+        canvas = self.engine.build(str(job.job_id), DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value])
+        # A group followed by another task is upgraded to a chord, its body runs once every task of the group completes
+        self.assertIsInstance(canvas, chord)
+        self.assertEqual(sorted(signature.kwargs["stage"] for signature in canvas.tasks),
+                         [ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value])
+        sequence_stage, completion = canvas.body.tasks
+        self.assertEqual(sequence_stage.kwargs["stage"], ValidJobTypes.SEQUENCE_DIAGRAM.value)
+        self.assertEqual(completion.task, "diagrams.tasks.complete_pipeline_task")
+
+    def test_submitted_job_starts_pipeline(self):
+        """
+        Test that the pipeline is stored on submitted jobs, and that jobs created by a pipeline or other job types do not start one.
+        """
+        job = self.create_job()
+        job.refresh_from_db()
+        self.assertEqual(job.pipeline, DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value])
+        self.assertFalse(self.engine.is_pipeline_root(Job(job_type=ValidJobTypes.SEQUENCE_DIAGRAM.value)))
+        self.assertFalse(self.engine.is_pipeline_root(Job(job_type=ValidJobTypes.ER_DIAGRAM.value, parent_job=job)))
+        with self.settings(R2D_DIAGRAM_PIPELINE="none"):
+            self.assertFalse(self.engine.is_pipeline_root(Job(job_type=ValidJobTypes.CLASS_DIAGRAM.value)))
+
+    def test_parallel_pipeline(self):
+        """
+        Test that every stage creates a child of the submitted job, the sequence diagrams are generated once both class and ER diagrams exist.
+        """
+        job = self.create_job()
+        self.run_pipeline(job)
+
+        children = {child.job_type: child for child in Job.objects.filter(parent_job=job)}
+        self.assertEqual(set(children), {ValidJobTypes.ER_DIAGRAM.value, ValidJobTypes.SEQUENCE_DIAGRAM.value})
+        self.assertTrue(ClassDiagram.objects.filter(job_id=job.job_id, is_audited=True).exists())
+        self.assertTrue(ERDiagram.objects.filter(job_id=children[ValidJobTypes.ER_DIAGRAM.value].job_id, is_audited=True).exists())
+        self.assertTrue(SequenceDiagram.objects.filter(job_id=children[ValidJobTypes.SEQUENCE_DIAGRAM.value].job_id, is_audited=True).exists())
+
+        # ER diagrams are generated from the user stories, sequence diagrams from the class and ER diagrams
+        self.assertEqual(json.loads(children[ValidJobTypes.ER_DIAGRAM.value].parameters), JOB_PARAMETERS)
+        sequence_parameters = json.loads(children[ValidJobTypes.SEQUENCE_DIAGRAM.value].parameters)
+        self.assertTrue(sequence_parameters["entities"] and sequence_parameters["classes"])
+
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.COMPLETED.value)
+        self.assertEqual(len(JobService().get_child_jobs(str(job.job_id))), 3)
+
+    def test_completed_stages_are_skipped(self):
+        """
+        Test that stages whose job was completed are not processed again when the pipeline is resumed.
+        """
+        job = self.create_job()
+        self.run_pipeline(job)
+        diagram_count = ClassDiagram.objects.filter(job_id=job.job_id).count()
+
+        result = self.engine.run_stage(str(job.job_id), ValidJobTypes.CLASS_DIAGRAM.value, resume=True)
+        self.assertEqual(result, {"stage": ValidJobTypes.CLASS_DIAGRAM.value, "job_id": str(job.job_id)})
+        self.assertEqual(ClassDiagram.objects.filter(job_id=job.job_id).count(), diagram_count)
+        self.assertEqual(Job.objects.filter(parent_job=job).count(), 2)
+
+    def test_failed_stage_fails_pipeline(self):
+        """
+        Test that the submitted job is marked as Error Failed to Process when a stage fails.
+        """
+        job = self.create_job()
+        self.engine.fail_pipeline(str(job.job_id), ValidJobTypes.ER_DIAGRAM.value, Exception("Simulated failure"))
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+        self.assertTrue(JobQueue.objects.filter(job_id=job.job_id).exists())
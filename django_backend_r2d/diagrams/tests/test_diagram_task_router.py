@@ -0,0 +1,90 @@
+import inspect
+import re
+from io import StringIO
+from uuid import uuid4
+from celery import current_app
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from diagrams.services.DiagramTaskRouter import DiagramTaskRouter, route_task
+from diagrams.tasks import generate_sequence_diagram_task
+from jobs.constants import ValidJobStatus, ValidJobTypes, JOB_PRIORITIES
+from jobs.models import Job, JobStatus
+from model_manager.models import ModelName
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+@override_settings(R2D_TASK_ROUTING=True)
+class DiagramTaskRouterTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='routeruser', password='testpassword', email='router@example.com')
+        cls.premium_user = User.objects.create_user(username='premiumuser', password='testpassword', email='premium@example.com', role='PREMIUM_USER')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def create_job(self, user, job_type:str = ValidJobTypes.CLASS_DIAGRAM.value) -> Job:
+        return Job.objects.create(job_id=str(uuid4()), user=user, job_status=JobStatus.objects.get(name=ValidJobStatus.PROCESSING.value),
+                                  model=ModelName.objects.get(name="fake-diagram-model"), job_details="Routed job", job_type=job_type,
+                                  tokens=100, parameters={"features": ["Login"]})
+
+    def test_routes(self):
+        """
+        Test that diagram tasks are routed to the queue of their job type and model, and prioritized by the role of the user.
+        """
+        job, premium_job = self.create_job(self.user), self.create_job(self.premium_user)
+        task_kwargs = {"model_provider": "fake", "model_name": "fake-diagram-model", "auditor_name": "fake-diagram-model"}
+        self.assertEqual(route_task("diagrams.tasks.generate_class_diagram_task", (), {**task_kwargs, "job_id": job.job_id}, {}),
+                         {"queue": "diagrams.class_diagram.fake-diagram-model", "priority": JOB_PRIORITIES["NORMAL_USER"]})
+        self.assertEqual(route_task("diagrams.tasks.generate_diagram_async_task", (), {**task_kwargs, "job_id": premium_job.job_id, "job_type": ValidJobTypes.ER_DIAGRAM.value}, {}),
+                         {"queue": "diagrams.er_diagram.fake-diagram-model", "priority": JOB_PRIORITIES["PREMIUM_USER"]})
+        self.assertLess(JOB_PRIORITIES["PREMIUM_USER"], JOB_PRIORITIES["NORMAL_USER"])
+
+        # Stages of a pipeline are routed using the model of the submitted job
+        self.assertEqual(route_task("diagrams.tasks.run_pipeline_stage_task", (), {"root_job_id": str(job.job_id), "stage": ValidJobTypes.SEQUENCE_DIAGRAM.value}, {})["queue"],
+                         "diagrams.sequence_diagram.fake-diagram-model")
+        self.assertEqual(route_task("diagrams.tasks.complete_pipeline_task", (), {"root_job_id": str(job.job_id)}, {})["queue"],
+                         "diagrams.class_diagram.fake-diagram-model")
+
+        # Other tasks, unknown jobs and disabled routing use the default queue
+        self.assertIsNone(route_task("embeddings.tasks.index_embeddings_task", (), {}, {}))
+        self.assertIsNone(route_task("diagrams.tasks.generate_class_diagram_task", (), {**task_kwargs, "job_id": str(uuid4())}, {}))
+        with self.settings(R2D_TASK_ROUTING=False):
+            self.assertIsNone(route_task("diagrams.tasks.generate_class_diagram_task", (), {**task_kwargs, "job_id": job.job_id}, {}))
+
+    def test_queue_depths(self):
+        """
+        Test that sent tasks wait in the queue of their job type and model, and that the depth of each queue is reported.
+        """
+        queue_name = DiagramTaskRouter.get_queue_name(ValidJobTypes.SEQUENCE_DIAGRAM.value, "fake-diagram-model")
+        self.assertIn(queue_name, DiagramTaskRouter.get_queue_names())
+        job = self.create_job(self.premium_user, ValidJobTypes.SEQUENCE_DIAGRAM.value)
+        try:
+            for _ in range(2):
+                generate_sequence_diagram_task.delay(model_provider="fake", model_name="fake-diagram-model", auditor_name="fake-diagram-model", job_id=str(job.job_id))
+            self.assertEqual(DiagramTaskRouter.get_queue_depths([queue_name, "diagrams.unknown"]), {queue_name: 2, "diagrams.unknown": 0})
+            with current_app.connection_for_read() as connection:
+                self.assertEqual(connection.default_channel.basic_get(queue_name).properties["priority"], JOB_PRIORITIES["PREMIUM_USER"])
+
+            output = StringIO()
+            call_command("report_queue_depth", "--non-empty", stdout=output)
+            # The message read by basic_get was consumed
+            self.assertRegex(output.getvalue(), rf"{re.escape(queue_name)}\s+1\n")
+            self.assertNotIn(DiagramTaskRouter.get_queue_name(ValidJobTypes.CLASS_DIAGRAM.value, "fake-diagram-model"), output.getvalue())
+        finally:
+            with current_app.connection_for_write() as connection:
+                connection.default_channel.queue_purge(queue_name)
@@ -0,0 +1,132 @@
+import inspect
+import json
+from uuid import uuid4
+from django.test import TestCase, override_settings
+from diagrams.constants import DIAGRAM_PIPELINES, DiagramPipelines, STAGE_ARTIFACT_FIELDS
+from diagrams.services.PipelineEngine import PipelineEngine
+from diagrams.tasks import run_pipeline_stage_task, complete_pipeline_task
+from jobs.constants import OrchestrationMode, ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobQueue, JobStatus
+from jobs.services.JobService import JobService
+from model_manager.models import ModelName
+from diagrams.tests.test_diagram_pipeline import JOB_PARAMETERS
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+@override_settings(R2D_ORCHESTRATION_MODE=OrchestrationMode.DIRECT.value, R2D_DIAGRAM_PIPELINE=DiagramPipelines.PARALLEL.value, R2D_AUDIT_POLICY="always",
+                   R2D_CIRCUIT_BREAKER_BACKEND="disabled", R2D_RATE_LIMIT_BACKEND="disabled", R2D_INCREMENTAL_REGENERATION=False,
+                   R2D_ASYNC_DIAGRAM_CONSUMERS=False, R2D_FAKE_LLM_CONFIG={})
+class DirectOrchestrationTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='directuser', password='testpassword', email='direct@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.engine = PipelineEngine()
+        self.job_service = JobService()
+
+    def submit_job(self, job_status:str = ValidJobStatus.SUBMITTED.value, job_id:str = None) -> Job:
+        # Jobs are dispatched once the transaction commits, TestCase only runs the callbacks that are captured
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.job_service.save_job(self.user, {
+                'job_id': job_id or str(uuid4()),
+                'parameters': json.dumps(JOB_PARAMETERS),
+                'job_type': ValidJobTypes.CLASS_DIAGRAM.value,
+                'job_status': job_status,
+                'job_details': "Direct orchestration job",
+                'model_name': "fake-diagram-model",
+            })
+
+    def run_stage(self, job:Job, stage:str, *previous_results) -> list[dict]:
+        return run_pipeline_stage_task.apply(args=previous_results, kwargs={"root_job_id": str(job.job_id), "stage": stage}).get()
+
+    def test_jobs_are_submitted_by_the_job_service(self):
+        """
+        Test that the signals do not enqueue jobs, and that the JobService enqueues a job and starts its pipeline when it is submitted.
+        """
+        job = Job.objects.create(job_id=str(uuid4()), user=self.user, job_status=JobStatus.objects.get(name=ValidJobStatus.SUBMITTED.value),
+                                 model=ModelName.objects.get(name="fake-diagram-model"), job_details="Direct orchestration job",
+                                 job_type=ValidJobTypes.CLASS_DIAGRAM.value, tokens=100, parameters=JOB_PARAMETERS)
+        self.assertFalse(JobQueue.objects.filter(job_id=job.job_id).exists())
+
+        job = self.submit_job(ValidJobStatus.DRAFT.value)
+        self.assertFalse(JobQueue.objects.filter(job_id=job.job_id).exists())
+        job = self.submit_job(job_id=str(job.job_id))
+        self.assertEqual(JobQueue.objects.get(job_id=job.job_id).status.name, ValidJobStatus.SUBMITTED.value)
+        job.refresh_from_db()
+        self.assertEqual(job.pipeline, DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value])
+
+        # Saving a job that has already been submitted does not submit it again
+        self.submit_job(job_id=str(job.job_id))
+        self.assertEqual(JobQueue.objects.filter(job_id=job.job_id).count(), 1)
+
+    def test_failed_dispatch(self):
+        """
+        Test that a job whose pipeline cannot be started is marked as Error Failed to Submit.
+        """
+        with self.settings(R2D_DIAGRAM_PIPELINE="unknown"):
+            job = self.submit_job()
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.ERROR_FAILED_TO_SUBMIT.value)
+        self.assertEqual(JobQueue.objects.get(job_id=job.job_id).status.name, ValidJobStatus.ERROR_FAILED_TO_SUBMIT.value)
+
+    def test_canvas_passes_results(self):
+        """
+        Test that the results of each level are passed to the next level, and the immutable signatures are kept for the signals mode.
+        """
+        job_id = str(uuid4())
+        canvas = self.engine.build(job_id, DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value])
+        signatures = [*canvas.tasks, *canvas.body.tasks]
+        self.assertEqual(len(signatures), 4)
+        self.assertFalse(any(signature.immutable for signature in signatures))
+
+        with self.settings(R2D_ORCHESTRATION_MODE=OrchestrationMode.SIGNALS.value):
+            canvas = self.engine.build(job_id, DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value])
+        self.assertTrue(all(signature.immutable for signature in [*canvas.tasks, *canvas.body.tasks]))
+
+    def test_stages_hand_off_artifacts(self):
+        """
+        Test that each stage returns the compact artifacts of its audited diagrams, and that dependent stages are created from the artifacts.
+        """
+        job = self.submit_job()
+        class_results = self.run_stage(job, ValidJobTypes.CLASS_DIAGRAM.value)
+        er_results = self.run_stage(job, ValidJobTypes.ER_DIAGRAM.value)
+        class_artifact, er_artifact = class_results[0], er_results[0]
+        self.assertEqual((class_artifact["stage"], class_artifact["job_id"]), (ValidJobTypes.CLASS_DIAGRAM.value, str(job.job_id)))
+        self.assertTrue(class_artifact["diagrams"])
+        for artifact in (class_artifact, er_artifact):
+            self.assertTrue(all(set(diagram) <= set(STAGE_ARTIFACT_FIELDS[artifact["stage"]]) for diagram in artifact["diagrams"]))
+
+        # Completed stages are skipped, their artifact is read from the database
+        self.assertEqual(self.run_stage(job, ValidJobTypes.CLASS_DIAGRAM.value), class_results)
+
+        # The sequence diagram job is created from the artifacts it receives rather than the saved diagrams
+        class_artifact["diagrams"] = [{"feature": ["Logging Framework"], "classes": ["ArtifactHandler"], "description": "Handlers",
+                                       "helper_classes": [], "is_audited": True}]
+        sequence_results = self.run_stage(job, ValidJobTypes.SEQUENCE_DIAGRAM.value, [class_results, er_results])
+        self.assertEqual([artifact["stage"] for artifact in sequence_results],
+                         [ValidJobTypes.CLASS_DIAGRAM.value, ValidJobTypes.ER_DIAGRAM.value, ValidJobTypes.SEQUENCE_DIAGRAM.value])
+        sequence_job = Job.objects.get(parent_job_id=job.job_id, job_type=ValidJobTypes.SEQUENCE_DIAGRAM.value)
+        self.assertEqual(json.loads(sequence_job.parameters)["classes"], ["ArtifactHandler"])
+        self.assertEqual(sequence_results[-1], {"stage": ValidJobTypes.SEQUENCE_DIAGRAM.value, "job_id": str(sequence_job.job_id), "diagrams": []})
+
+        self.assertEqual(complete_pipeline_task.apply(args=(sequence_results,), kwargs={"root_job_id": str(job.job_id)}).get(), str(job.job_id))
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.COMPLETED.value)
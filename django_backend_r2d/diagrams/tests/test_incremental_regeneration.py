@@ -0,0 +1,229 @@
+import inspect
+import json
+from uuid import uuid4
+from django.test import TestCase, override_settings
+from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
+from diagrams.models import ClassDiagram
+from diagrams.repository.ClassDiagramRepository import ClassDiagramRepository
+from diagrams.services.DiagramReuseService import DiagramReuseService
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job
+from jobs.services.JobFeatureHasher import JobFeatureHasher
+from jobs.services.JobService import JobService
+from model_manager.interfaces.BaseModel import BaseModel
+from model_manager.interfaces.BaseAuditor import BaseAuditor
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+def create_story(story_id:str, requirement:str) -> dict:
+    return {"id": story_id, "requirement": requirement, "services_to_use": [], "acceptance_criteria": "Accepted", "additional_information": ""}
+
+def create_parameters(checkout_requirement:str = "As a shopper I want to pay for my cart") -> dict:
+    return {
+        "features": ["Checkout", "Invoicing"],
+        "sub_features": ["Payments", "Invoices"],
+        "job_parameters": {
+            "Checkout": {"Payments": {"CHK-1": create_story("CHK-1", checkout_requirement)}},
+            "Invoicing": {"Invoices": {"INV-1": create_story("INV-1", "As an accountant I want to email invoices")}},
+        },
+    }
+
+def create_diagrams(features:list[str]) -> dict:
+    return {"diagrams": [{
+        "feature": [feature],
+        "diagram": f"classDiagram\n    class {feature}Service\n    class {feature}Record\n    {feature}Service --> {feature}Record : creates",
+        "description": f"{feature} service",
+        "classes": [f"{feature}Service", f"{feature}Record"],
+        "helper_classes": [],
+    } for feature in features]}
+
+class FeatureModel(BaseModel):
+    """
+    Model that returns a class diagram for each feature found in the prompt, and records its prompts.
+    """
+    def __init__(self):
+        super().__init__(model_name="gpt-4-turbo")
+        self.prompts = []
+
+    def analyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        self.prompts.append(prompt)
+        # Stories of each feature are identified by their id in the prompt
+        return create_diagrams([feature for feature, story_id in (("Checkout", "CHK-1"), ("Invoicing", "INV-1")) if story_id in prompt])
+
+class FeatureAuditor(BaseAuditor):
+    """
+    Auditor that returns the class diagrams of the features found in the analysis.
+    """
+    def __init__(self):
+        super().__init__(model_name="gpt-4-turbo")
+
+    def audit(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        return create_diagrams([feature for feature in ("Checkout", "Invoicing") if f"{feature}Service" in prompt])
+
+class StubFactory:
+    """
+    Model and auditor factory returning the configured instance.
+    """
+    def __init__(self, instance):
+        self.instance = instance
+
+    def get_model(self, model_provider, model_name):
+        return self.instance
+
+    def get_auditor(self, model_provider, auditor_name):
+        return self.instance
+
+@override_settings(R2D_AUDIT_POLICY="always", R2D_CIRCUIT_BREAKER_BACKEND="disabled", R2D_INCREMENTAL_REGENERATION=True)
+class IncrementalRegenerationTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='incrementaluser', password='testpassword', email='incremental@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.job_service = JobService()
+        self.model = FeatureModel()
+
+    def save_job(self, parameters:dict, bypass_cache:bool = False) -> Job:
+        return self.job_service.save_job(self.user, {
+            "job_id": str(uuid4()),
+            "job_status": ValidJobStatus.SUBMITTED.value,
+            "job_details": "Incremental regeneration",
+            "parameters": parameters,
+            "job_type": ValidJobTypes.CLASS_DIAGRAM.value,
+            "model_name": "gpt-4-turbo",
+            "bypass_cache": bypass_cache,
+        })
+
+    def process(self, job:Job) -> list[dict]:
+        consumer = ClassDiagramConsumer(model_provider="openai", model_name="gpt-4-turbo", auditor_name="gpt-4-turbo", job_id=job.job_id)
+        consumer.diagram_service.model_factory = StubFactory(self.model)
+        consumer.diagram_service.auditor_factory = StubFactory(FeatureAuditor())
+        return consumer.process_record(job.job_id)
+
+    def test_feature_hashes(self):
+        """
+        Test that the hash of a feature only changes when its user stories change, and that jobs are saved with their feature hashes.
+        """
+        hasher = JobFeatureHasher()
+        hashes = hasher.hash_features(create_parameters())
+        self.assertEqual(set(hashes), {"Checkout", "Invoicing"})
+        self.assertEqual(hasher.hash_features(json.dumps(create_parameters())), hashes)
+
+        edited = hasher.hash_features(create_parameters("As a shopper I want to pay with a gift card"))
+        self.assertNotEqual(edited["Checkout"], hashes["Checkout"])
+        self.assertEqual(edited["Invoicing"], hashes["Invoicing"])
+        self.assertEqual(hasher.hash_features({"features": ["Checkout"], "classes": []}), {})
+        self.assertEqual(self.save_job(create_parameters()).feature_hashes, hashes)
+
+    def test_only_changed_features_are_generated(self):
+        """
+        Test that diagrams of unchanged features are copied from the previous job, and only the edited feature is sent to the model.
+        """
+        previous_job = self.save_job(create_parameters())
+        self.assertEqual(len(self.process(previous_job)), 4)
+
+        job = self.save_job(create_parameters("As a shopper I want to pay with a gift card"))
+        diagrams = self.process(job)
+
+        self.assertEqual(len(self.model.prompts), 2)
+        self.assertIn("CHK-1", self.model.prompts[1])
+        self.assertNotIn("INV-1", self.model.prompts[1])
+        saved = ClassDiagram.objects.filter(job_id=job.job_id)
+        self.assertEqual(len(diagrams), 4)
+        self.assertEqual(sorted((diagram.feature[0], diagram.is_audited) for diagram in saved),
+                         [("Checkout", False), ("Checkout", True), ("Invoicing", False), ("Invoicing", True)])
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.COMPLETED.value)
+
+    def test_unchanged_job_is_not_generated(self):
+        """
+        Test that a resubmitted job without changes is completed from the diagrams of the previous job without invoking the model.
+        """
+        self.process(self.save_job(create_parameters()))
+        job = self.save_job(create_parameters())
+        diagrams = self.process(job)
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertEqual(len(diagrams), 4)
+        self.assertEqual(ClassDiagram.objects.filter(job_id=job.job_id, is_audited=True).count(), 2)
+
+    def test_bypass_cache_generates_all_features(self):
+        """
+        Test that jobs submitted with bypass_cache are generated in full.
+        """
+        self.process(self.save_job(create_parameters()))
+        self.process(self.save_job(create_parameters(), bypass_cache=True))
+        self.assertEqual(len(self.model.prompts), 2)
+        self.assertIn("INV-1", self.model.prompts[1])
+
+    def test_child_jobs_inherit_feature_hashes(self):
+        """
+        Test that the job created by create_next_record inherits the feature hashes, so that downstream diagrams can be reused.
+        """
+        job = self.save_job(create_parameters())
+        consumer = ClassDiagramConsumer(model_provider="openai", model_name="gpt-4-turbo", auditor_name="gpt-4-turbo", job_id=job.job_id)
+        consumer.diagram_service.model_factory = StubFactory(self.model)
+        consumer.diagram_service.auditor_factory = StubFactory(FeatureAuditor())
+        diagrams = consumer.process_record(job.job_id)
+        child_job_id = consumer.create_next_record(parent_id=str(job.job_id), class_diagrams=diagrams, job_status=ValidJobStatus.DRAFT.value)
+        self.assertEqual(Job.objects.get(job_id=child_job_id).feature_hashes, job.feature_hashes)
+
+    @override_settings(R2D_AUDIT_POLICY="skip_valid")
+    def test_validated_diagrams_are_handed_off(self):
+        """
+        Test that diagrams that passed the validator and were not audited are handed off to the next job and reused by later jobs.
+        """
+        job = self.save_job(create_parameters())
+        consumer = ClassDiagramConsumer(model_provider="openai", model_name="gpt-4-turbo", auditor_name="gpt-4-turbo", job_id=job.job_id)
+        consumer.diagram_service.model_factory = StubFactory(self.model)
+        consumer.diagram_service.auditor_factory = StubFactory(FeatureAuditor())
+        diagrams = consumer.process_record(job.job_id)
+        self.assertEqual([(diagram["is_audited"], diagram["is_validated"]) for diagram in diagrams], [(False, True), (False, True)])
+        self.assertEqual(len(ClassDiagramRepository().get_audited_jobs_by_id(str(job.job_id))), 2)
+
+        child_job_id = consumer.create_next_record(parent_id=str(job.job_id), class_diagrams=ClassDiagramRepository().get_by_id(str(job.job_id)),
+                                                   job_status=ValidJobStatus.DRAFT.value)
+        child_parameters = json.loads(Job.objects.get(job_id=child_job_id).parameters)
+        self.assertEqual(sorted(child_parameters["features"]), ["Checkout", "Invoicing"])
+        self.assertEqual(sorted(child_parameters["classes"]), ["CheckoutRecord", "CheckoutService", "InvoicingRecord", "InvoicingService"])
+
+        # The validated diagrams are reused by a job with the same user stories
+        self.process(self.save_job(create_parameters()))
+        self.assertEqual(len(self.model.prompts), 1)
+
+    def test_restrict_job_parameters(self):
+        """
+        Test that user stories of other features are removed, and only the features of child job parameters are limited.
+        """
+        restricted = DiagramReuseService.restrict_job_parameters(create_parameters(), ["Invoicing"])
+        self.assertEqual(restricted["features"], ["Invoicing"])
+        self.assertEqual(restricted["sub_features"], ["Invoices"])
+        self.assertEqual(list(restricted["job_parameters"]), ["Invoicing"])
+
+        child_parameters = {"features": ["Checkout", "Invoicing"], "classes": ["CheckoutService"], "descriptions": ["Checkout service"]}
+        self.assertEqual(DiagramReuseService.restrict_job_parameters(child_parameters, ["Checkout"]),
+                         {**child_parameters, "features": ["Checkout"]})
+
+    def test_result_keys(self):
+        """
+        Test that copied diagrams are keyed by source, audit status and model, and do not overwrite the results of the chain.
+        """
+        self.assertEqual(DiagramReuseService.get_result_key("reused", "gpt-4-turbo", True), "reused_audited_results:gpt-4-turbo")
+        self.assertEqual(DiagramReuseService.get_result_key("similar", "gpt-4-turbo", False), "similar_analysis_results:gpt-4-turbo")
+        self.assertNotIn(DiagramReuseService.get_result_key("reused", "gpt-4-turbo", True), ("analysis_results", "audited_results"))
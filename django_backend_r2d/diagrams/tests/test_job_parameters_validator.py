@@ -0,0 +1,170 @@
+import inspect
+import json
+from collections import OrderedDict
+from copy import deepcopy
+from uuid import uuid4
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from diagrams.management.commands.benchmark_job_parameters_validation import Command as BenchmarkCommand
+from diagrams.serializers.UMLDiagramSerializer import UMLDiagramSerializer
+from diagrams.serializers.CreateERDiagramSerializer import CreateERDiagramSerializer
+from diagrams.serializers.CreateSequenceDiagramSerializer import CreateSequenceDiagramSerializer
+from diagrams.services.ClassDiagramService import ClassDiagramService
+from diagrams.services.JobParametersValidator import JobParametersValidator
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobStatus
+from model_manager.models import ModelName
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+class CountingValidator(JobParametersValidator):
+    """
+    Validator that counts the number of validations.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def validate(self, serializer_class, job_parameters):
+        self.calls.append(serializer_class)
+        return super().validate(serializer_class, job_parameters)
+
+class JobParametersValidatorTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='validatoruser', password='testpassword', email='validator@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.validator = JobParametersValidator()
+        self.job_parameters = BenchmarkCommand.create_job_parameters(20)
+
+    def get_story(self, job_parameters:dict) -> dict:
+        return job_parameters["job_parameters"]["Feature 0"]["Sub Feature 0"]["STORY-0"]
+
+    def assertMatchesSerializer(self, serializer_class, job_parameters):
+        """
+        Asserts that the validator returns the validated data or errors of the serializer.
+        """
+        serializer = serializer_class(data=deepcopy(job_parameters))
+        validated_data, errors = self.validator.validate(serializer_class, deepcopy(job_parameters))
+        if serializer.is_valid():
+            self.assertIsNone(errors)
+            self.assertEqual(json.dumps(validated_data), json.dumps(serializer.validated_data))
+        else:
+            self.assertIsNone(validated_data)
+            self.assertEqual(errors, serializer.errors)
+
+    def test_valid_job_parameters(self):
+        """
+        Test that valid job parameters are validated by the compiled validator, and values are trimmed as by the serializer.
+        """
+        story = self.get_story(self.job_parameters)
+        story["requirement"] = "  As a user I want to be trimmed \n"
+        story["services_to_use"] = ["", " Amazon S3 "]
+        story["unknown_field"] = "Ignored"
+        self.assertMatchesSerializer(UMLDiagramSerializer, self.job_parameters)
+
+        validated_data, _ = self.validator.validate(UMLDiagramSerializer, self.job_parameters)
+        validated_story = self.get_story(validated_data)
+        self.assertEqual(validated_story["requirement"], "As a user I want to be trimmed")
+        self.assertNotIn("unknown_field", validated_story)
+
+    def test_invalid_job_parameters_have_serializer_errors(self):
+        """
+        Test that invalid job parameters return the same error structure as the serializer.
+        """
+        blank = deepcopy(self.job_parameters)
+        self.get_story(blank)["requirement"] = "   "
+        missing = deepcopy(self.job_parameters)
+        del self.get_story(missing)["acceptance_criteria"]
+        not_a_dict = deepcopy(self.job_parameters)
+        not_a_dict["job_parameters"]["Feature 0"] = ["STORY-0"]
+        null_character = deepcopy(self.job_parameters)
+        self.get_story(null_character)["id"] = "STORY\x00"
+        for job_parameters in (blank, missing, not_a_dict, null_character, {"features": "Feature 0"}, []):
+            self.assertMatchesSerializer(UMLDiagramSerializer, job_parameters)
+            self.assertIsNotNone(self.validator.validate(UMLDiagramSerializer, job_parameters)[1])
+
+    def test_values_coerced_by_the_serializer(self):
+        """
+        Test that payloads outside the compiled validator e.g., numbers as strings, are validated by the serializer.
+        """
+        story = self.get_story(self.job_parameters)
+        story["id"] = 42
+        story["additional_information"] = "\x1cSeparated\x1f"
+        self.assertMatchesSerializer(UMLDiagramSerializer, self.job_parameters)
+        validated_data, _ = self.validator.validate(UMLDiagramSerializer, self.job_parameters)
+        self.assertEqual(self.get_story(validated_data)["id"], "42")
+
+    def test_child_job_parameters(self):
+        """
+        Test that the parameters of ER and sequence diagram jobs match the serializers, including optional and null fields.
+        """
+        er_parameters = {"features": ["Checkout"], "descriptions": ["Checkout service"], "classes": ["CheckoutService"], "helper_classes": []}
+        sequence_parameters = {"features": ["Checkout"], "entities": ["ORDER"], "entity_descriptions": ["Orders"], "classes": None}
+        for serializer_class, job_parameters in ((CreateERDiagramSerializer, er_parameters), (CreateSequenceDiagramSerializer, sequence_parameters),
+                                                 (CreateSequenceDiagramSerializer, {**sequence_parameters, "entities": [""]}),
+                                                 (CreateERDiagramSerializer, self.job_parameters)):
+            self.assertMatchesSerializer(serializer_class, job_parameters)
+        validated_data, _ = self.validator.validate(CreateSequenceDiagramSerializer, sequence_parameters)
+        self.assertIsNone(validated_data["classes"])
+        self.assertNotIn("helper_classes", validated_data)
+
+    def test_large_job_parameters(self):
+        """
+        Test that the compiled validator matches the serializer for job parameters with 1000 user stories.
+        """
+        self.assertMatchesSerializer(UMLDiagramSerializer, BenchmarkCommand.create_job_parameters(1000))
+
+    @override_settings(R2D_FAST_PARAMETER_VALIDATION=False)
+    def test_disabled(self):
+        """
+        Test that job parameters are validated by the serializer when the compiled validators are disabled.
+        """
+        validated_data, errors = self.validator.validate(UMLDiagramSerializer, self.job_parameters)
+        self.assertIsNone(errors)
+        # Validated data of serializers is an OrderedDict, the compiled validators return dictionaries
+        self.assertIsInstance(validated_data, OrderedDict)
+        self.assertMatchesSerializer(UMLDiagramSerializer, self.job_parameters)
+
+    def test_validated_job_parameters_are_cached(self):
+        """
+        Test that the diagram service validates job parameters once per serializer, and does not validate them again when the chain is rebuilt.
+        """
+        job = Job.objects.create(job_id=str(uuid4()), user=self.user, job_status=JobStatus.objects.get(name=ValidJobStatus.DRAFT.value),
+                                 model=ModelName.objects.get(name="fake-diagram-model"), job_details="Validation", job_type=ValidJobTypes.CLASS_DIAGRAM.value,
+                                 tokens=100, parameters=self.job_parameters)
+        service = ClassDiagramService(model_provider="fake", model_name="fake-diagram-model", auditor_name="fake-diagram-model", job_id=job.job_id)
+        service.job_parameters_validator = CountingValidator()
+        service._validate_and_set_job_parameters(service.chain_input.get_job_parameters())
+        service._validate_and_set_job_parameters(service.chain_input.get_job_parameters())
+        self.assertEqual(service.job_parameters_validator.calls, [UMLDiagramSerializer])
+
+        # Restricted job parameters are validated again
+        service.restrict_to_features(["Feature 0"])
+        service._validate_and_set_job_parameters(service.chain_input.get_job_parameters())
+        self.assertEqual(len(service.job_parameters_validator.calls), 2)
+
+        # Invalid job parameters are validated once by each serializer, and raise the errors of both serializers
+        service.job_parameters_validator = CountingValidator()
+        service.serializer_class = CreateERDiagramSerializer
+        with self.assertRaises(ValidationError) as context:
+            service._validate_and_set_job_parameters({"features": ["Feature 0"]})
+        self.assertEqual(service.job_parameters_validator.calls, [CreateERDiagramSerializer, UMLDiagramSerializer])
+        self.assertEqual(set(context.exception.detail), {"primary_serializer_errors", "fallback_serializer_errors"})
@@ -0,0 +1,200 @@
+import inspect
+import numpy as np
+from uuid import uuid4
+from django.test import TestCase, override_settings
+from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
+from diagrams.models import ClassDiagram
+from diagrams.repository.ClassDiagramRepository import ClassDiagramRepository
+from diagrams.services.SemanticReuseService import SemanticReuseService
+from embeddings.models import FeatureEmbedding
+from embeddings.services.EmbeddingService import EmbeddingService
+from embeddings.services.TextVectorizer import TextVectorizer
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job
+from jobs.services.JobContext import JobContext
+from jobs.services.JobService import JobService
+from model_manager.interfaces.BaseModel import BaseModel
+from model_manager.interfaces.BaseAuditor import BaseAuditor
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+CHECKOUT_REQUIREMENT = "As a shopper I want to pay for my cart with a credit card so that my order is placed"
+INVOICING_REQUIREMENT = "As an accountant I want to email invoices to customers"
+
+def create_story(story_id:str, requirement:str, acceptance_criteria:str) -> dict:
+    return {"id": story_id, "requirement": requirement, "services_to_use": [], "acceptance_criteria": acceptance_criteria, "additional_information": ""}
+
+def create_parameters(checkout_id:str = "CHK-1", checkout_requirement:str = CHECKOUT_REQUIREMENT, invoicing_requirement:str = INVOICING_REQUIREMENT) -> dict:
+    return {
+        "features": ["Checkout", "Invoicing"],
+        "sub_features": ["Payments", "Invoices"],
+        "job_parameters": {
+            "Checkout": {"Payments": {checkout_id: create_story(checkout_id, checkout_requirement, "Payment is captured and the order is confirmed by email")}},
+            "Invoicing": {"Invoices": {"INV-1": create_story("INV-1", invoicing_requirement, "Invoices are sent as PDF")}},
+        },
+    }
+
+class StoryModel(BaseModel):
+    """
+    Model that returns a class diagram for each feature whose user stories are found in the prompt, and records its prompts.
+    """
+    def __init__(self):
+        super().__init__(model_name="gpt-4-turbo")
+        self.prompts = []
+
+    def analyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        self.prompts.append(prompt)
+        return self.create_diagrams([feature for feature, story_prefix in (("Checkout", "CHK-"), ("Invoicing", "INV-")) if story_prefix in prompt])
+
+
+    @staticmethod
+    def create_diagrams(features:list[str]) -> dict:
+        return {"diagrams": [{
+            "feature": [feature],
+            "diagram": f"classDiagram\n    class {feature}Service\n    class {feature}Record\n    {feature}Service --> {feature}Record : creates",
+            "description": f"{feature} service",
+            "classes": [f"{feature}Service", f"{feature}Record"],
+            "helper_classes": [],
+        } for feature in features]}
+
+class StoryAuditor(BaseAuditor):
+    """
+    Auditor that returns the class diagrams of the features found in the analysis.
+    """
+    def __init__(self):
+        super().__init__(model_name="gpt-4-turbo")
+
+    def audit(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        return StoryModel.create_diagrams([feature for feature in ("Checkout", "Invoicing") if f"{feature}Service" in prompt])
+
+class StubFactory:
+    """
+    Model and auditor factory returning the configured instance.
+    """
+    def __init__(self, instance):
+        self.instance = instance
+
+    def get_model(self, model_provider, model_name):
+        return self.instance
+
+    def get_auditor(self, model_provider, auditor_name):
+        return self.instance
+
+@override_settings(R2D_AUDIT_POLICY="always", R2D_CIRCUIT_BREAKER_BACKEND="disabled", R2D_INCREMENTAL_REGENERATION=True, R2D_SEMANTIC_REUSE_ENABLED=True,
+                   R2D_SEMANTIC_REUSE_THRESHOLD=0.98, R2D_SEMANTIC_CONTEXT_THRESHOLD=0.8)
+class SemanticReuseTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='semanticuser', password='testpassword', email='semantic@example.com')
+        cls.other_user = User.objects.create_user(username='semanticother', password='testpassword', email='semanticother@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.job_service = JobService()
+        self.model = StoryModel()
+
+    def save_job(self, parameters:dict, user=None, bypass_cache:bool = False) -> Job:
+        return self.job_service.save_job(user or self.user, {
+            "job_id": str(uuid4()),
+            "job_status": ValidJobStatus.SUBMITTED.value,
+            "job_details": "Semantic reuse",
+            "parameters": parameters,
+            "job_type": ValidJobTypes.CLASS_DIAGRAM.value,
+            "model_name": "gpt-4-turbo",
+            "bypass_cache": bypass_cache,
+        })
+
+    def process(self, job:Job) -> list[dict]:
+        consumer = ClassDiagramConsumer(model_provider="openai", model_name="gpt-4-turbo", auditor_name="gpt-4-turbo", job_id=job.job_id)
+        consumer.diagram_service.model_factory = StubFactory(self.model)
+        consumer.diagram_service.auditor_factory = StubFactory(StoryAuditor())
+        return consumer.process_record(job.job_id)
+
+    def test_vectors(self):
+        """
+        Test that vectors are normalized and deterministic, rewording and punctuation do not change them, and edited or unrelated stories are less similar.
+        """
+        vectorizer = TextVectorizer(dimensions=512)
+        matrix = vectorizer.transform([CHECKOUT_REQUIREMENT, f"  {CHECKOUT_REQUIREMENT.upper()}.", CHECKOUT_REQUIREMENT.replace("credit", "gift"), INVOICING_REQUIREMENT, ""])
+        self.assertEqual(matrix.shape, (5, 512))
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_array_equal(matrix, vectorizer.transform([CHECKOUT_REQUIREMENT, f"  {CHECKOUT_REQUIREMENT.upper()}.", CHECKOUT_REQUIREMENT.replace("credit", "gift"), INVOICING_REQUIREMENT, ""]))
+        similarities = matrix @ matrix[0]
+        self.assertAlmostEqual(float(similarities[1]), 1.0, places=5)
+        self.assertLess(similarities[2], 0.98)
+        self.assertLess(similarities[3], 0.5)
+        self.assertFalse(matrix[4].any())
+
+    def test_job_is_embedded_once(self):
+        """
+        Test that the vectors of every feature and user story are stored when the job is first embedded, and read back afterwards.
+        """
+        job_context = JobContext.load(self.save_job(create_parameters()).job_id)
+        service = EmbeddingService()
+        vectors = service.embed_job(job_context)
+        self.assertEqual(set(vectors), {"Checkout", "Invoicing"})
+        self.assertEqual(sorted(FeatureEmbedding.objects.filter(job_id=job_context.job_id).values_list("feature", "story_id")),
+                         [("Checkout", ""), ("Checkout", "CHK-1"), ("Invoicing", ""), ("Invoicing", "INV-1")])
+        with self.assertNumQueries(1):
+            stored = service.embed_job(job_context)
+        np.testing.assert_array_equal(stored["Checkout"], vectors["Checkout"])
+        self.assertEqual(service.embed_job(JobContext.load(self.save_job({"features": ["Checkout"], "classes": []}).job_id)), {})
+
+    def test_near_identical_features_are_copied(self):
+        """
+        Test that the audited diagrams of a near-identical feature are copied, and the diagrams of a similar feature are added as context.
+        """
+        self.process(self.save_job(create_parameters()))
+        # The Checkout story is resubmitted under another ID, the Invoicing story is edited
+        job = self.save_job(create_parameters(checkout_id="CHK-9", checkout_requirement=f"{CHECKOUT_REQUIREMENT}.",
+                                              invoicing_requirement="As an accountant I want to email monthly invoices to customers"))
+        self.process(job)
+
+        self.assertEqual(len(self.model.prompts), 2)
+        self.assertIn("INV-1", self.model.prompts[1])
+        self.assertNotIn("CHK-9", self.model.prompts[1])
+        self.assertIn("similar_audited_diagrams", self.model.prompts[1])
+        self.assertIn("InvoicingService", self.model.prompts[1])
+        self.assertNotIn("CheckoutService", self.model.prompts[1])
+        copied = ClassDiagram.objects.get(job_id=job.job_id, feature=["Checkout"])
+        self.assertTrue(copied.is_audited)
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.COMPLETED.value)
+
+    def test_similar_diagrams_of_other_users_are_not_used(self):
+        """
+        Test that features are only compared with completed jobs of the same user.
+        """
+        self.process(self.save_job(create_parameters(), user=self.other_user))
+        self.save_job(create_parameters()) # Not processed
+        job = self.save_job(create_parameters(checkout_id="CHK-9"))
+        self.assertEqual(EmbeddingService().find_similar_features(JobContext.load(job.job_id)), {})
+
+    def test_disabled_and_bypass_cache(self):
+        """
+        Test that no similar diagrams are retrieved for jobs submitted with bypass_cache, or when semantic reuse is disabled.
+        """
+        self.process(self.save_job(create_parameters()))
+        reuse_service = SemanticReuseService()
+        job = self.save_job(create_parameters(checkout_id="CHK-9"))
+        self.assertEqual(set(reuse_service.get_similar_diagrams(str(job.job_id), ClassDiagramRepository())), {"Checkout", "Invoicing"})
+        bypass_job = self.save_job(create_parameters(checkout_id="CHK-9"), bypass_cache=True)
+        self.assertEqual(reuse_service.get_similar_diagrams(str(bypass_job.job_id), ClassDiagramRepository()), {})
+        with self.settings(R2D_SEMANTIC_REUSE_ENABLED=False):
+            self.assertEqual(reuse_service.get_similar_diagrams(str(job.job_id), ClassDiagramRepository()), {})
@@ -1,7 +1,8 @@
 from django.urls import path
-from diagrams.views import RetrieveAllDiagramsView, RetrieveOneDiagramView
+from diagrams.views import RetrieveAllDiagramsView, RetrieveOneDiagramView, ResumeDiagramJobView
 
 urlpatterns = [
     path('retrieve-diagrams/', RetrieveAllDiagramsView.as_view(), name='retrieve_all_diagrams'),
-    path('retrieve-one-diagram/', RetrieveOneDiagramView.as_view(), name='retrieve_one_diagram')
+    path('retrieve-one-diagram/', RetrieveOneDiagramView.as_view(), name='retrieve_one_diagram'),
+    path('resume-job/', ResumeDiagramJobView.as_view(), name='resume_diagram_job')
 ]
@@ -5,6 +5,9 @@ from rest_framework import status
 from framework.responses.SyncAPIReturnObject import SyncAPIReturnObject
 from framework.views.BaseView import BaseView
 from diagrams.services.DiagramRetrievalService import DiagramRetrievalService
+from diagrams.tasks import resume_diagram_job
+from jobs.services.JobService import JobService
+from jobs.services.JobExceptions import JobNotFoundException
 
 # Initialize logging class and retrieve the custom user model
 import logging
@@ -15,6 +18,7 @@ User = get_user_model()
 
 # Initialize the diagram retrieval service
 diagram_retrieval_service = DiagramRetrievalService() 
+job_service = JobService()
 
 class RetrieveAllDiagramsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -64,4 +68,29 @@ class RetrieveOneDiagramView(APIView):
             message= f"Retrieved diagram for {job_id} successfully.",
             success=True,
             status_code=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+class ResumeDiagramJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @BaseView.handle_exceptions
+    def post(self, request):
+        """
+        Resumes a diagram job of the authenticated user that failed to process.
+        The job restarts from the last completed step, e.g., only the audit is retried if the analysis completed.
+        The payload should contain a job_id.
+        """
+        user = request.user
+        job_id = request.data.get('job_id')
+        logger.info("api/diagrams/resume-job/ invoked")
+        
+        if not job_id or not job_service.has_access_to_job(user, job_id):
+            raise JobNotFoundException(f"Job with id {job_id} does not exist for user {user.id}.")
+        resume_diagram_job(job_id)
+        
+        return SyncAPIReturnObject(
+            data={'job_id': job_id},
+            message= f"Resumed job {job_id} successfully.",
+            success=True,
+            status_code=status.HTTP_200_OK
+        )
@@ -1,6 +1,8 @@
 from __future__ import absolute_import, unicode_literals
 import os
+import time
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 from django.conf import settings
 from application_logging.services.application_logging_config import setup_logging
 import logging
@@ -21,4 +23,88 @@ app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
 setup_logging() # Set up the application logging framework for entire django project 
 logger = logging.getLogger('application_logging')
-# logger.debug("Celery application initialized and ready to serve tasks.")
\ No newline at end of file
+# logger.debug("Celery application initialized and ready to serve tasks.")
+
+@worker_init.connect
+def register_worker_process_warm_up(**kwargs):
+    """
+    Connects warm_up_worker_process once the Django fixup of Celery has connected its own worker_process_init receiver,
+    which closes the database connections inherited from the parent process, so that the connection opened by the warm-up is kept.
+    """
+    worker_process_init.connect(warm_up_worker_process, weak=False, dispatch_uid="warm_up_worker_process")
+
+def warm_up_worker_process(**kwargs) -> dict:
+    """
+    Prepares each worker process before it receives its first task, so that the first job processed by the worker
+    is not slower than the following jobs. Disabled using R2D_WORKER_WARM_UP.
+    - imports: Imports the diagram tasks, consumers and LangChain.
+    - lookups: Loads the JobStatus and ModelName rows into the JobLookupCache, opening the database connection of the process.
+    - templates: Compiles the prompt templates registered by the diagram prompts and computes their static token counts, loading the tokenizer.
+    - clients: Creates the model and auditor clients of R2D_WORKER_WARM_UP_MODELS, pooled by the ModelClientRegistry.
+    A step that fails is logged and skipped, the process lazily completes it when it processes its first task.
+    returns:
+        dict: The seconds spent on each step e.g., {"imports": 1.52, "lookups": 0.02, "templates": 0.41, "clients": 0.18}
+    """
+    if not getattr(settings, "R2D_WORKER_WARM_UP", True):
+        return {}
+
+    timings = {}
+    for step, warm_up in (("imports", _import_task_modules), ("lookups", _warm_up_lookups),
+                          ("templates", _warm_up_prompt_templates), ("clients", _warm_up_model_clients)):
+        start = time.perf_counter()
+        try:
+            result = warm_up()
+            logger.debug(f"Worker process {os.getpid()} warmed up {step}: {result}")
+        except Exception as e:
+            logger.warning(f"Worker process {os.getpid()} was unable to warm up {step}: {e}")
+        timings[step] = round(time.perf_counter() - start, 3)
+    logger.info(f"Worker process {os.getpid()} warmed up in {sum(timings.values()):.2f} seconds {timings}")
+    return timings
+
+def _import_task_modules() -> int:
+    import diagrams.tasks, diagrams.consumers.AsyncDiagramConsumerRunner, model_manager.llms.GPTModel, model_manager.auditors.GPTAuditor
+    return len(app.tasks)
+
+def _warm_up_lookups() -> int:
+    from jobs.services.JobLookupCache import JobLookupCache
+    return JobLookupCache.warm_up()
+
+def _warm_up_prompt_templates() -> int:
+    """
+    Compiles the prompt templates registered by the diagram prompts and computes their static token counts,
+    so that the first job processed by the worker does not pay for loading the tokenizer.
+    """
+    from model_manager.services.PromptTemplateRegistry import PromptTemplateRegistry
+    import diagrams.prompts.ClassDiagramPrompts, diagrams.prompts.ERDiagramPrompts, diagrams.prompts.SequenceDiagramPrompts # Registers the diagram prompt templates
+    return PromptTemplateRegistry.warm_up()
+
+def _warm_up_model_clients() -> list[str]:
+    """
+    Creates the model and auditor clients of R2D_WORKER_WARM_UP_MODELS, models that cannot be initialized e.g., embedding models are skipped.
+    returns:
+        list[str]: The models whose clients were created.
+    """
+    from framework.factories.ModelFactory import ModelFactory
+    from framework.factories.AuditorFactory import AuditorFactory
+    from jobs.services.JobLookupCache import JobLookupCache
+    from model_manager.models import ModelName
+    model_names = getattr(settings, "R2D_WORKER_WARM_UP_MODELS", None) or ModelName.objects.values_list("name", flat=True)
+    warmed_up = []
+    for model_name in model_names:
+        try:
+            model = JobLookupCache.get_model_name(model_name)
+            ModelFactory.get_model(model.provider, model.name)
+            AuditorFactory.get_auditor(model.provider, model.name)
+            warmed_up.append(model.name)
+        except Exception as e:
+            logger.debug(f"Skipped the clients of {model_name}: {e}")
+    return warmed_up
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_worker_process(**kwargs):
+    """
+    Writes the model usage rows buffered by the worker process before it exits.
+    """
+    from model_manager.services.ModelUsageRecorder import ModelUsageRecorder
+    ModelUsageRecorder.flush()
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import json
 from datetime import timedelta
 import subprocess
 import logging
@@ -112,9 +113,45 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('POSTGRES_R2D_HOST'),
         'PORT': os.environ.get('POSTGRES_DB_PORT'),
+        # Seconds a connection is reused, 0 closes the connection after each request or task
+        # Set for Celery workers so that the connection opened by the worker warm-up is reused by its tasks
+        'CONN_MAX_AGE': int(os.getenv('R2D_DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# llm_responses stores LLM responses keyed by a hash of (model_name, prompt, response_schema), see model_manager/services/LLMResponseCache.py
+# Uses Postgres by default (requires python manage.py createcachetable), set R2D_LLM_CACHE_BACKEND=redis to use Redis instead.
+# Redis does not enforce MAX_ENTRIES, configure maxmemory with an allkeys-lru policy to bound the cache size.
+R2D_LLM_CACHE_ENABLED = os.getenv("R2D_LLM_CACHE_ENABLED", "true").lower() == "true"
+R2D_LLM_CACHE_TTL = int(os.getenv("R2D_LLM_CACHE_TTL", 60 * 60 * 24 * 7)) # Seconds before a cached response expires
+R2D_LLM_CACHE_MAX_ENTRIES = int(os.getenv("R2D_LLM_CACHE_MAX_ENTRIES", 10000))
+R2D_LLM_CACHE_LOCK_TIMEOUT = int(os.getenv("R2D_LLM_CACHE_LOCK_TIMEOUT", 150)) # Seconds before the lock of a crashed in-flight request expires, renewed while the request runs
+
+if os.getenv("R2D_LLM_CACHE_BACKEND", "database").lower() == "redis":
+    LLM_RESPONSE_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("R2D_LLM_CACHE_REDIS_URL", "redis://redis:6379/1"),
+        'TIMEOUT': R2D_LLM_CACHE_TTL,
+        'KEY_PREFIX': 'r2d_llm',
+    }
+else:
+    LLM_RESPONSE_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'r2d_llm_response_cache',
+        'TIMEOUT': R2D_LLM_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': R2D_LLM_CACHE_MAX_ENTRIES, 'CULL_FREQUENCY': 4},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'llm_responses': LLM_RESPONSE_CACHE,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -231,4 +268,115 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
-
+# Messages of a Redis queue are consumed by priority, 0 being the highest priority (see jobs/constants.py JOB_PRIORITIES)
+CELERY_BROKER_TRANSPORT_OPTIONS = {'priority_steps': list(range(10)), 'sep': ':', 'queue_order_strategy': 'priority'}
+CELERY_TASK_ROUTES = ('diagrams.services.DiagramTaskRouter.route_task',)
+
+# Diagram tasks are routed to a queue per job type and model e.g., diagrams.class_diagram.gpt-4-turbo, and prioritized by the role of the user
+# Workers subscribe to the queues they process, and the default queue e.g., celery -A django_backend_r2d worker -Q celery,diagrams.class_diagram.gpt-4-turbo
+# The number of messages waiting in each queue is reported by python manage.py report_queue_depth (see diagrams/services/DiagramTaskRouter.py)
+R2D_TASK_ROUTING = os.getenv("R2D_TASK_ROUTING", "false").lower() == "true"
+
+# Each prefork worker process imports the diagram consumers, loads the JobStatus and ModelName rows, compiles the prompt templates
+# and creates the model clients before it receives its first task (see django_backend_r2d/celery_config.py warm_up_worker_process)
+# R2D_WORKER_WARM_UP_MODELS: comma separated models whose clients are created e.g., gpt-4-turbo,fake-diagram-model, defaults to every model
+R2D_WORKER_WARM_UP = os.getenv("R2D_WORKER_WARM_UP", "true").lower() == "true"
+R2D_WORKER_WARM_UP_MODELS = [model_name.strip() for model_name in os.getenv("R2D_WORKER_WARM_UP_MODELS", "").split(",") if model_name.strip()]
+
+# Route diagram jobs through the asyncio consumer runner (diagrams/consumers/AsyncDiagramConsumerRunner.py)
+# Tasks submit jobs to the event loop of the worker process without waiting for them, each process processes up to R2D_ASYNC_MAX_IN_FLIGHT_JOBS jobs
+# e.g., celery -A django_backend_r2d worker --pool=threads --concurrency=4 processes up to 100 jobs per worker
+# Database calls of the in-flight jobs are executed on R2D_ASYNC_DATABASE_THREADS threads (see framework/utils/DatabaseExecutor.py)
+R2D_ASYNC_DIAGRAM_CONSUMERS = os.getenv("R2D_ASYNC_DIAGRAM_CONSUMERS", "false").lower() == "true"
+R2D_ASYNC_MAX_IN_FLIGHT_JOBS = int(os.getenv("R2D_ASYNC_MAX_IN_FLIGHT_JOBS", 100))
+R2D_ASYNC_DATABASE_THREADS = int(os.getenv("R2D_ASYNC_DATABASE_THREADS", 8))
+
+# Maximum number of job parameter shards analyzed concurrently by the AnalyzeAndAuditChain
+R2D_MAX_CONCURRENT_SHARDS = int(os.getenv("R2D_MAX_CONCURRENT_SHARDS", 8))
+
+# Configuration of the fake model provider (ModelName fake-diagram-model, provider fake) used to load test the diagram pipeline without invoking an LLM
+# JSON e.g., {"latency_distribution": "lognormal", "latency_mean": 8, "latency_stddev": 3, "error_rate": 0.01, "items_per_diagram": 5}
+# See model_manager/services/FakeResponseGenerator.py for the supported options
+R2D_FAKE_LLM_CONFIG = json.loads(os.getenv("R2D_FAKE_LLM_CONFIG", "{}"))
+
+# Requests and tokens per minute budget of each model, shared by every Celery worker (see model_manager/services/ModelRateLimiter.py)
+# R2D_RATE_LIMIT_BACKEND: redis (shared by all workers), local (per process) or disabled
+# R2D_MODEL_RATE_LIMITS overrides the limits in model_manager/constants.py e.g., {"gpt-4-turbo": {"requests_per_minute": 5000, "tokens_per_minute": 600000}}
+R2D_RATE_LIMIT_BACKEND = os.getenv("R2D_RATE_LIMIT_BACKEND", "redis").lower()
+R2D_RATE_LIMIT_REDIS_URL = os.getenv("R2D_RATE_LIMIT_REDIS_URL", "redis://redis:6379/2")
+R2D_RATE_LIMIT_MAX_WAIT = int(os.getenv("R2D_RATE_LIMIT_MAX_WAIT", 300)) # Seconds a request waits for the budget before failing
+R2D_MODEL_RATE_LIMITS = json.loads(os.getenv("R2D_MODEL_RATE_LIMITS", "{}"))
+
+# Circuit breaker per model provider and model, shared by every Celery worker (see model_manager/services/ModelCircuitBreaker.py)
+# R2D_CIRCUIT_BREAKER_BACKEND: redis (shared by all workers), local (per process) or disabled
+# While a circuit is open jobs are held in the Queued state and their tasks are retried after the recovery timeout
+R2D_CIRCUIT_BREAKER_BACKEND = os.getenv("R2D_CIRCUIT_BREAKER_BACKEND", "redis").lower()
+R2D_CIRCUIT_BREAKER_REDIS_URL = os.getenv("R2D_CIRCUIT_BREAKER_REDIS_URL", R2D_RATE_LIMIT_REDIS_URL)
+R2D_CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("R2D_CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)) # Consecutive provider failures before the circuit opens
+R2D_CIRCUIT_BREAKER_FAILURE_WINDOW = int(os.getenv("R2D_CIRCUIT_BREAKER_FAILURE_WINDOW", 60)) # Seconds without failures before the failure count is reset
+R2D_CIRCUIT_BREAKER_RECOVERY_TIMEOUT = int(os.getenv("R2D_CIRCUIT_BREAKER_RECOVERY_TIMEOUT", 60)) # Seconds the circuit stays open before a probe request is allowed
+R2D_CIRCUIT_BREAKER_PROBE_TIMEOUT = int(os.getenv("R2D_CIRCUIT_BREAKER_PROBE_TIMEOUT", 120)) # Seconds before an unfinished probe is abandoned
+
+# Lease per job and stage held by the task that processes it, duplicate tasks exit early (see jobs/services/JobLeaseManager.py)
+# R2D_JOB_LEASE_BACKEND: database (shared by all workers), redis (shared by all workers), local (per process) or disabled
+R2D_JOB_LEASE_BACKEND = os.getenv("R2D_JOB_LEASE_BACKEND", "database").lower()
+R2D_JOB_LEASE_REDIS_URL = os.getenv("R2D_JOB_LEASE_REDIS_URL", R2D_RATE_LIMIT_REDIS_URL)
+R2D_JOB_LEASE_TTL = int(os.getenv("R2D_JOB_LEASE_TTL", 120)) # Seconds before the lease of a worker that stopped renewing it expires, renewed every R2D_JOB_LEASE_TTL / 3 seconds
+
+# Retries of diagram jobs that failed with a transient error e.g., rate limited, timed out or unable to reach the provider (see jobs/services/JobRetryPolicy.py)
+# Jobs are retried after a jittered exponential backoff of R2D_JOB_RETRY_BACKOFF_BASE * 2^(attempt - 1) seconds, capped at R2D_JOB_RETRY_BACKOFF_MAX
+R2D_JOB_MAX_ATTEMPTS = int(os.getenv("R2D_JOB_MAX_ATTEMPTS", 4)) # Attempts of a job (or stage of a pipeline) before it fails, including the first attempt
+R2D_JOB_RETRY_BACKOFF_BASE = float(os.getenv("R2D_JOB_RETRY_BACKOFF_BASE", 5))
+R2D_JOB_RETRY_BACKOFF_MAX = float(os.getenv("R2D_JOB_RETRY_BACKOFF_MAX", 300))
+
+# Ledger of the tokens, latency and retries of every LLM call (see model_manager/services/ModelUsageRecorder.py)
+# Rows are written in batches of R2D_MODEL_USAGE_BATCH_SIZE, or R2D_MODEL_USAGE_FLUSH_INTERVAL seconds after the last write
+R2D_MODEL_USAGE_ENABLED = os.getenv("R2D_MODEL_USAGE_ENABLED", "true").lower() == "true"
+R2D_MODEL_USAGE_BATCH_SIZE = int(os.getenv("R2D_MODEL_USAGE_BATCH_SIZE", 100))
+R2D_MODEL_USAGE_FLUSH_INTERVAL = int(os.getenv("R2D_MODEL_USAGE_FLUSH_INTERVAL", 10))
+
+# Diagrams audited by the AnalyzeAndAuditChain, diagrams are checked locally by the MermaidValidator (see model_manager/constants.py AuditPolicy)
+# always: every response is audited, skip_valid: responses whose diagrams all pass are not audited, flagged: only diagrams that fail are audited
+# Diagrams that are not audited are saved with is_audited False, those that passed the MermaidValidator are saved with is_validated True and are passed to dependent stages
+R2D_AUDIT_POLICY = os.getenv("R2D_AUDIT_POLICY", "always").lower()
+
+# Diagrams are parsed by the MermaidParser before they are saved, syntax faults are repaired and the listed names are replaced by the names in the diagram
+R2D_MERMAID_AUTO_REPAIR = os.getenv("R2D_MERMAID_AUTO_REPAIR", "true").lower() == "true"
+
+# Diagrams of features whose user stories did not change are copied from the user's previous job (see diagrams/services/DiagramReuseService.py)
+# R2D_REUSE_CANDIDATE_JOBS is the number of the user's most recent jobs searched for reusable diagrams
+R2D_INCREMENTAL_REGENERATION = os.getenv("R2D_INCREMENTAL_REGENERATION", "true").lower() == "true"
+R2D_REUSE_CANDIDATE_JOBS = int(os.getenv("R2D_REUSE_CANDIDATE_JOBS", 10))
+
+# Features are compared with the features of the user's previous jobs using vectors of their user stories (see diagrams/services/SemanticReuseService.py), disabled by default
+# Audited diagrams of features above R2D_SEMANTIC_REUSE_THRESHOLD are copied, diagrams above R2D_SEMANTIC_CONTEXT_THRESHOLD are added to the analysis context
+# R2D_EMBEDDING_CANDIDATES is the number of the user's most recent feature vectors compared with each job
+R2D_SEMANTIC_REUSE_ENABLED = os.getenv("R2D_SEMANTIC_REUSE_ENABLED", "false").lower() == "true"
+R2D_SEMANTIC_REUSE_THRESHOLD = float(os.getenv("R2D_SEMANTIC_REUSE_THRESHOLD", 0.98))
+R2D_SEMANTIC_CONTEXT_THRESHOLD = float(os.getenv("R2D_SEMANTIC_CONTEXT_THRESHOLD", 0.8))
+R2D_SEMANTIC_CONTEXT_DIAGRAMS = int(os.getenv("R2D_SEMANTIC_CONTEXT_DIAGRAMS", 2))
+R2D_EMBEDDING_DIMENSIONS = int(os.getenv("R2D_EMBEDDING_DIMENSIONS", 2048))
+R2D_EMBEDDING_CANDIDATES = int(os.getenv("R2D_EMBEDDING_CANDIDATES", 500))
+
+# Vectors are appended to a memory-mapped index shared by the worker processes (see embeddings/services/VectorIndex.py)
+# Rebuild with python manage.py rebuild_vector_index, the IVF layer is trained when the index holds R2D_VECTOR_INDEX_IVF_MIN_VECTORS vectors
+R2D_VECTOR_INDEX_ENABLED = os.getenv("R2D_VECTOR_INDEX_ENABLED", "true").lower() == "true"
+R2D_VECTOR_INDEX_DIR = os.getenv("R2D_VECTOR_INDEX_DIR", os.path.join(BASE_DIR, "vector_index"))
+R2D_VECTOR_INDEX_BATCH_SIZE = int(os.getenv("R2D_VECTOR_INDEX_BATCH_SIZE", 1000))
+R2D_VECTOR_INDEX_OVERSAMPLE = int(os.getenv("R2D_VECTOR_INDEX_OVERSAMPLE", 4))
+R2D_VECTOR_INDEX_IVF_LISTS = int(os.getenv("R2D_VECTOR_INDEX_IVF_LISTS", 256))
+R2D_VECTOR_INDEX_IVF_MIN_VECTORS = int(os.getenv("R2D_VECTOR_INDEX_IVF_MIN_VECTORS", 100000))
+R2D_VECTOR_INDEX_IVF_PROBES = int(os.getenv("R2D_VECTOR_INDEX_IVF_PROBES", 8))
+
+# Stages executed for a submitted diagram job (see diagrams/constants.py DIAGRAM_PIPELINES and diagrams/services/PipelineEngine.py)
+# parallel: class and ER diagrams are generated concurrently, serial: class -> ER -> sequence diagrams
+# none (default): each job creates the next job when it completes, and the next job is submitted by the JobQueue signal
+R2D_DIAGRAM_PIPELINE = os.getenv("R2D_DIAGRAM_PIPELINE", "none").lower()
+
+# How jobs are submitted and pipeline stages are handed off (see jobs/constants.py OrchestrationMode)
+# signals: the Job and JobQueue post_save signals submit jobs, and each stage reads the diagrams of its dependencies from the database
+# direct: the JobService submits jobs once the transaction commits, and stages pass their diagrams to the next stage through the Celery canvas
+R2D_ORCHESTRATION_MODE = os.getenv("R2D_ORCHESTRATION_MODE", "signals").lower()
+
+# Job parameters are validated by compiled pydantic models before falling back to the DRF serializers (see diagrams/services/JobParametersValidator.py)
+R2D_FAST_PARAMETER_VALIDATION = os.getenv("R2D_FAST_PARAMETER_VALIDATION", "true").lower() == "true"
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from embeddings.services.EmbeddingService import EmbeddingService
+
+class Command(BaseCommand):
+    """
+    Rebuilds the memory-mapped vector index from the FeatureEmbedding table, and marks every vector as indexed.
+    The new index is written next to the active index and replaces it atomically, vectors are not appended while the index is rebuilt.
+    Rebuild after changing R2D_EMBEDDING_DIMENSIONS, or to train the IVF layer once the index has grown.
+    e.g., python manage.py rebuild_vector_index --ivf-lists 512
+    """
+    help = "Rebuilds the memory-mapped vector index of the embeddings app."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ivf-lists", type=int, default=None,
+                            help="Number of IVF lists, 0 disables the IVF layer. Default is R2D_VECTOR_INDEX_IVF_LISTS once the index holds R2D_VECTOR_INDEX_IVF_MIN_VECTORS vectors.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Number of vectors read and written at a time. Default is R2D_VECTOR_INDEX_BATCH_SIZE.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = EmbeddingService().rebuild_index(ivf_lists=options["ivf_lists"], batch_size=options["batch_size"])
+        self.stdout.write(f"Indexed {count} vectors in {time.perf_counter() - start:.2f} seconds")
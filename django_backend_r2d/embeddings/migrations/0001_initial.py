@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('jobs', '0025_job_pipeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.TextField()),
+                ('story_id', models.CharField(blank=True, default='', max_length=255)),
+                ('dimensions', models.PositiveIntegerField()),
+                ('vector', models.BinaryField()),
+                ('created_timestamp', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embeddings', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'Feature Embedding',
+                'verbose_name_plural': 'Feature Embeddings',
+                'indexes': [models.Index(fields=['job', 'story_id'], name='embeddings__job_id_3f9170_idx')],
+            },
+        ),
+    ]
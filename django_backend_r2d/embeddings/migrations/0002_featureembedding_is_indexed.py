@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embeddings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='featureembedding',
+            name='is_indexed',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
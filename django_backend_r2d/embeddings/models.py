@@ -1,3 +1,28 @@
 from django.db import models
+from jobs.models import Job
 
-# Create your models here.
+class FeatureEmbedding(models.Model):
+    """
+    Stores the vector of a feature of a job, or of a user story of the feature, computed by the EmbeddingService.
+    Vectors are used to find audited diagrams of near-identical features submitted in previous jobs of the user.
+    job | feature | story_id | dimensions | vector
+    <uuid> | Checkout | | 2048 | <float32 bytes>
+    <uuid> | Checkout | CHK-1 | 2048 | <float32 bytes>
+    Feature vectors have a blank story_id, vectors are L2 normalized float32 arrays stored as bytes.
+    is_indexed is set once the vector is appended to the memory-mapped VectorIndex, vectors that are not indexed yet are compared from the table.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='embeddings')
+    feature = models.TextField()
+    story_id = models.CharField(max_length=255, blank=True, default="")
+    dimensions = models.PositiveIntegerField()
+    vector = models.BinaryField()
+    is_indexed = models.BooleanField(default=False, db_index=True)
+    created_timestamp = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Job Id: {self.job_id}, Feature: {self.feature}, Story: {self.story_id or '-'}"
+
+    class Meta:
+        verbose_name = "Feature Embedding"
+        verbose_name_plural = "Feature Embeddings"
+        indexes = [models.Index(fields=["job", "story_id"])]
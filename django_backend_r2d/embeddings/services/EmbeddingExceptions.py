@@ -0,0 +1,9 @@
+class VectorIndexError(Exception):
+    def __init__(self, message="Vector index error"):
+        self.error_message = f"VectorIndexError: {message}"
+        super().__init__(self.error_message)
+
+class VectorIndexingTaskError(Exception):
+    def __init__(self, message="Failed to add embeddings to the vector index"):
+        self.error_message = f"VectorIndexingTaskError: {message}"
+        super().__init__(self.error_message)
@@ -0,0 +1,279 @@
+import json
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from embeddings.models import FeatureEmbedding
+from embeddings.services.TextVectorizer import TextVectorizer
+from embeddings.services.VectorIndex import VectorIndex
+from jobs.constants import ValidJobStatus
+from jobs.services.JobContext import JobContext
+
+import logging
+logger = logging.getLogger('application_logging')
+
+# Fields of a user story used to compute its vector, story IDs are excluded as they change between submissions
+STORY_FIELDS = ("requirement", "acceptance_criteria", "additional_information", "services_to_use")
+
+class EmbeddingService:
+    """
+    Computes and stores the vectors of the features and user stories of a job, and finds the most similar features of previous jobs.
+
+    Vectors are computed offline by the TextVectorizer when a job is first embedded and stored in the FeatureEmbedding table,
+    then appended to the memory-mapped VectorIndex in batches by the index_embeddings_task.
+    Indexed vectors are searched in the VectorIndex, vectors that are not indexed yet (or all vectors if R2D_VECTOR_INDEX_ENABLED is False)
+    are loaded from the table into a NumPy matrix and compared with the features of the job in a single matrix product.
+    Candidates are the features of completed jobs of the same user and job type, so that user stories are never shared between users.
+
+    Only job parameters grouped by feature (see UMLDiagramSerializer) have vectors.
+
+    args:
+        vectorizer (TextVectorizer): The vectorizer to use. Default is a TextVectorizer with R2D_EMBEDDING_DIMENSIONS dimensions.
+        vector_index (VectorIndex): The vector index to use. Default is the VectorIndex of R2D_VECTOR_INDEX_DIR.
+    functions:
+        embed_job: Returns the vectors of the features of the job, vectors are computed and stored once per job.
+        find_similar_features: Returns the features of previous jobs whose similarity is above the threshold.
+        index_pending_embeddings: Appends the vectors that are not indexed yet to the VectorIndex.
+        rebuild_index: Writes a new generation of the VectorIndex containing every vector.
+        get_texts: Returns the text of each feature and user story of the job parameters.
+    """
+    def __init__(self, vectorizer:TextVectorizer = None, vector_index:VectorIndex = None):
+        self.vectorizer = vectorizer or TextVectorizer(getattr(settings, "R2D_EMBEDDING_DIMENSIONS", 2048))
+        self.vector_index = vector_index
+
+    def embed_job(self, job_context:JobContext) -> dict[str, np.ndarray]:
+        """
+        Returns the vectors of the features of the job, the vectors of the features and user stories are stored on first use.
+        args:
+            job_context (JobContext): The job to embed.
+        returns:
+            dict: The vector of each feature e.g., {"Checkout": array([...], dtype=float32)}, empty if the job has no user stories.
+        """
+        stored = (FeatureEmbedding.objects.filter(job_id=job_context.job_id, story_id="", dimensions=self.vectorizer.dimensions)
+                  .values_list("feature", "vector"))
+        vectors = {feature: self._from_bytes(vector) for feature, vector in stored}
+        if vectors:
+            return vectors
+
+        texts = self.get_texts(job_context.get_job_parameters())
+        if not texts:
+            return {}
+        keys = [(feature, "") for feature in texts] + [(feature, story_id) for feature, text in texts.items() for story_id in text["stories"]]
+        matrix = self.vectorizer.transform([texts[feature]["text"] if not story_id else texts[feature]["stories"][story_id] for feature, story_id in keys])
+        FeatureEmbedding.objects.bulk_create([
+            FeatureEmbedding(job_id=job_context.job_id, feature=feature, story_id=story_id, dimensions=self.vectorizer.dimensions, vector=vector.tobytes())
+            for (feature, story_id), vector in zip(keys, matrix)
+        ])
+        logger.debug(f"Stored the vectors of {len(texts)} features and {len(keys) - len(texts)} user stories of job {job_context.job_id}")
+        if getattr(settings, "R2D_VECTOR_INDEX_ENABLED", True):
+            transaction.on_commit(self._schedule_indexing)
+        return {feature: matrix[row] for row, feature in enumerate(texts)}
+
+    def find_similar_features(self, job_context:JobContext, features:list[str] = None, threshold:float = None, limit:int = None) -> dict[str, list[dict]]:
+        """
+        Finds the most similar features of previous jobs of the user for each feature of the job.
+        args:
+            job_context (JobContext): The job.
+            features (list[str]): The features to search for, all features of the job if None.
+            threshold (float): The minimum cosine similarity. Default is R2D_SEMANTIC_CONTEXT_THRESHOLD.
+            limit (int): The maximum number of similar features returned per feature. Default is R2D_SEMANTIC_CONTEXT_DIAGRAMS.
+        returns:
+            dict: The similar features of each feature, most similar first, features without similar features are omitted e.g.,
+                  {"Checkout": [{"job_id": "<uuid>", "feature": "Checkout", "similarity": 0.97}]}
+        """
+        threshold = getattr(settings, "R2D_SEMANTIC_CONTEXT_THRESHOLD", 0.8) if threshold is None else threshold
+        limit = getattr(settings, "R2D_SEMANTIC_CONTEXT_DIAGRAMS", 2) if limit is None else limit
+        vectors = self.embed_job(job_context)
+        if features is not None:
+            features = set(features)
+            vectors = {feature: vector for feature, vector in vectors.items() if feature in features}
+        if not vectors:
+            return {}
+
+        queries = np.vstack(list(vectors.values()))
+        vector_index = self._get_index()
+        if vector_index is not None:
+            # Vectors appended to the index are searched in the mapped files, the vectors that are not indexed yet are compared from the table
+            oversample = getattr(settings, "R2D_VECTOR_INDEX_OVERSAMPLE", 4)
+            indexed = vector_index.search(queries, k=limit * oversample, user_id=job_context.job.user_id, job_type=job_context.job.job_type,
+                                          exclude_job_id=job_context.job_id, threshold=threshold)
+            results = [indexed_matches + pending for indexed_matches, pending in zip(indexed, self._search_table(job_context, queries, threshold, is_indexed=False))]
+        else:
+            results = self._search_table(job_context, queries, threshold)
+        if not any(results):
+            return {}
+
+        # Jobs may have been deleted or restarted since they were indexed, only features of completed jobs are returned
+        candidates = {pk: (job_id, feature) for pk, job_id, feature in FeatureEmbedding.objects.filter(
+            pk__in={embedding_id for matches in results for embedding_id, _ in matches},
+            job__job_status__name=ValidJobStatus.COMPLETED.value).values_list("pk", "job_id", "feature")}
+        similar_features = {}
+        for feature, matches in zip(vectors, results):
+            selected, seen = [], set()
+            # Ids increase with time, the most recent job of equally similar features is returned first
+            for embedding_id, similarity in sorted(matches, key=lambda match: (-match[1], -match[0])):
+                if len(selected) >= limit:
+                    break
+                if embedding_id not in candidates or candidates[embedding_id][1] in seen:
+                    continue # Only the most similar job of a resubmitted feature is returned
+                candidate_job_id, candidate_feature = candidates[embedding_id]
+                seen.add(candidate_feature)
+                selected.append({"job_id": str(candidate_job_id), "feature": candidate_feature, "similarity": round(similarity, 4)})
+            if selected:
+                similar_features[feature] = selected
+        return similar_features
+
+    def index_pending_embeddings(self, batch_size:int = None) -> int:
+        """
+        Appends the vectors that are not indexed yet to the VectorIndex, in batches of R2D_VECTOR_INDEX_BATCH_SIZE vectors.
+        Vectors already present in the index e.g., after an append whose rows were not marked as indexed, are not appended again.
+        args:
+            batch_size (int): The number of vectors read and appended at a time.
+        returns:
+            int: The number of vectors appended.
+        """
+        batch_size = batch_size or getattr(settings, "R2D_VECTOR_INDEX_BATCH_SIZE", 1000)
+        vector_index = self.vector_index or VectorIndex()
+        appended = 0
+        with vector_index.lock():
+            if vector_index.get_dimensions() not in (None, self.vectorizer.dimensions):
+                logger.warning(f"The vector index has {vector_index.get_dimensions()} dimensions, rebuild the index to use {self.vectorizer.dimensions} dimensions")
+                return 0
+            indexed_ids = vector_index.get_embedding_ids()
+            while True:
+                rows = list(FeatureEmbedding.objects.filter(is_indexed=False, dimensions=self.vectorizer.dimensions).order_by("pk")
+                            .values_list("pk", "job_id", "job__user_id", "job__job_type", "story_id", "vector")[:batch_size])
+                if not rows:
+                    break
+                new_rows = [row for row, is_indexed in zip(rows, np.isin([row[0] for row in rows], indexed_ids)) if not is_indexed]
+                if new_rows:
+                    appended += vector_index.add(*self._to_index_rows(new_rows))
+                FeatureEmbedding.objects.filter(pk__in=[row[0] for row in rows]).update(is_indexed=True)
+        logger.info(f"Appended {appended} vectors to the vector index")
+        return appended
+
+    def rebuild_index(self, ivf_lists:int = None, batch_size:int = None) -> int:
+        """
+        Writes a new generation of the VectorIndex containing every vector, and marks the vectors as indexed.
+        The IVF layer is trained if the index contains at least R2D_VECTOR_INDEX_IVF_MIN_VECTORS vectors.
+        args:
+            ivf_lists (int): The number of IVF lists, 0 disables the IVF layer. Default is R2D_VECTOR_INDEX_IVF_LISTS.
+            batch_size (int): The number of vectors read and written at a time.
+        returns:
+            int: The number of vectors in the index.
+        """
+        batch_size = batch_size or getattr(settings, "R2D_VECTOR_INDEX_BATCH_SIZE", 1000)
+        embeddings = FeatureEmbedding.objects.filter(dimensions=self.vectorizer.dimensions)
+        if ivf_lists is None:
+            ivf_lists = getattr(settings, "R2D_VECTOR_INDEX_IVF_LISTS", 256) if embeddings.count() >= getattr(settings, "R2D_VECTOR_INDEX_IVF_MIN_VECTORS", 100000) else 0
+        indexed_pks = []
+
+        def batches():
+            last_pk = 0
+            while True:
+                rows = list(embeddings.filter(pk__gt=last_pk).order_by("pk")
+                            .values_list("pk", "job_id", "job__user_id", "job__job_type", "story_id", "vector")[:batch_size])
+                if not rows:
+                    return
+                last_pk = rows[-1][0]
+                indexed_pks.append([row[0] for row in rows])
+                yield self._to_index_rows(rows)
+
+        vector_index = self.vector_index or VectorIndex()
+        with vector_index.lock():
+            count = vector_index.build(batches(), self.vectorizer.dimensions, ivf_lists=ivf_lists)
+            for pks in indexed_pks:
+                FeatureEmbedding.objects.filter(pk__in=pks).update(is_indexed=True)
+        return count
+
+    def _get_index(self):
+        """
+        Returns the VectorIndex if it is enabled and contains vectors of the dimensions of the vectorizer, None otherwise.
+        """
+        if not getattr(settings, "R2D_VECTOR_INDEX_ENABLED", True):
+            return None
+        vector_index = self.vector_index or VectorIndex()
+        try:
+            dimensions = vector_index.get_dimensions()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unable to read the vector index, comparing vectors from the table: {e}")
+            return None
+        return vector_index if dimensions == self.vectorizer.dimensions else None
+
+    def _search_table(self, job_context:JobContext, queries:np.ndarray, threshold:float, is_indexed:bool = None) -> list[list[tuple[int, float]]]:
+        """
+        Compares the queries with the feature vectors of the user's completed jobs stored in the table, limited to the R2D_EMBEDDING_CANDIDATES most recent vectors.
+        returns:
+            list: The (FeatureEmbedding id, similarity) of the vectors above the threshold, for each query.
+        """
+        filters = {"job__user_id": job_context.job.user_id, "job__job_type": job_context.job.job_type, "job__job_status__name": ValidJobStatus.COMPLETED.value,
+                   "story_id": "", "dimensions": self.vectorizer.dimensions}
+        if is_indexed is not None:
+            filters["is_indexed"] = is_indexed
+        candidates = list(FeatureEmbedding.objects.filter(**filters).exclude(job_id=job_context.job_id).order_by("-pk")
+                          .values_list("pk", "vector")[:getattr(settings, "R2D_EMBEDDING_CANDIDATES", 500)])
+        if not candidates:
+            return [[] for _ in queries]
+        # Rows are L2 normalized, the product is the cosine similarity of every feature of the job with every candidate
+        similarities = queries @ np.vstack([self._from_bytes(vector) for _, vector in candidates]).T
+        return [[(candidates[index][0], float(row[index])) for index in np.flatnonzero(row >= threshold)] for row in similarities]
+
+    def _to_index_rows(self, rows:list[tuple]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the id map rows and vectors of (pk, job_id, user_id, job_type, story_id, vector) rows.
+        """
+        ids = VectorIndex.to_id_map((pk, job_id, user_id, job_type, bool(story_id)) for pk, job_id, user_id, job_type, story_id, _ in rows)
+        return ids, np.vstack([self._from_bytes(row[-1]) for row in rows])
+
+    @staticmethod
+    def _schedule_indexing():
+        """
+        Submits the task that appends the new vectors to the VectorIndex, vectors are compared from the table until they are indexed.
+        """
+        from embeddings.tasks import index_embeddings_task
+        try:
+            index_embeddings_task.delay()
+        except Exception as e:
+            logger.warning(f"Unable to submit the vector indexing task: {e}")
+
+    @staticmethod
+    def get_texts(parameters) -> dict[str, dict]:
+        """
+        Returns the text of each feature and user story of the job parameters.
+        The text of a feature contains the feature, its sub features and the text of its user stories.
+        args:
+            parameters (dict or str): The job parameters, parameters stored as a JSON string are decoded.
+        returns:
+            dict: e.g., {"Checkout": {"text": "Checkout Payments As a shopper...", "stories": {"CHK-1": "As a shopper..."}}},
+                  empty if the parameters are not grouped by feature.
+        """
+        if isinstance(parameters, str):
+            try:
+                parameters = json.loads(parameters)
+            except json.JSONDecodeError:
+                return {}
+        stories_by_feature = parameters.get("job_parameters") if isinstance(parameters, dict) else None
+        if not isinstance(stories_by_feature, dict):
+            return {}
+
+        texts = {}
+        for feature, sub_features in stories_by_feature.items():
+            if not isinstance(sub_features, dict):
+                continue
+            stories = {}
+            for sub_feature_stories in sub_features.values():
+                for story_id, story in (sub_feature_stories.items() if isinstance(sub_feature_stories, dict) else []):
+                    if isinstance(story, dict):
+                        stories[str(story_id)] = " ".join(EmbeddingService._to_text(story.get(field)) for field in STORY_FIELDS)
+            texts[feature] = {"text": " ".join([feature, *sub_features, *stories.values()]), "stories": stories}
+        return texts
+
+    @staticmethod
+    def _to_text(value) -> str:
+        if isinstance(value, list):
+            return " ".join(str(item) for item in value)
+        return str(value) if value is not None else ""
+
+    @staticmethod
+    def _from_bytes(vector) -> np.ndarray:
+        return np.frombuffer(bytes(vector), dtype=np.float32)
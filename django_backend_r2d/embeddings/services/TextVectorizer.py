@@ -0,0 +1,63 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+
+# Words and numbers, text is lower cased before it is tokenized
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+class TextVectorizer:
+    """
+    Computes vectors of texts offline using the hashing trick, no vocabulary or model needs to be downloaded or fitted.
+
+    Words and pairs of adjacent words are hashed into a fixed number of dimensions, weighted by 1 + log(count) and L2 normalized,
+    so that the dot product of two vectors is their cosine similarity. Hashes are computed with blake2b instead of hash(),
+    which is salted per process, so that vectors stored by one worker can be compared with vectors computed by another.
+
+    args:
+        dimensions (int): The number of dimensions of the vectors. Default is 2048.
+    functions:
+        transform: Returns the vectors of the texts as a float32 NumPy matrix, one row per text.
+    """
+    def __init__(self, dimensions:int = 2048):
+        self.dimensions = dimensions
+
+    def transform(self, texts:list[str]) -> np.ndarray:
+        """
+        Returns the vectors of the texts.
+        args:
+            texts (list[str]): The texts to vectorize.
+        returns:
+            np.ndarray: A (len(texts), dimensions) float32 matrix of L2 normalized vectors, texts without words have a zero vector.
+        """
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(self._get_terms(text))
+            if not counts:
+                continue
+            buckets = [self._bucket(term, self.dimensions) for term in counts]
+            indices = np.fromiter((index for index, _ in buckets), dtype=np.int64, count=len(buckets))
+            weights = np.fromiter((sign * (1 + math.log(count)) for (_, sign), count in zip(buckets, counts.values())), dtype=np.float32, count=len(buckets))
+            # Terms hashed to the same dimension are summed
+            np.add.at(matrix[row], indices, weights)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    @staticmethod
+    def _get_terms(text:str) -> list[str]:
+        """
+        Returns the words of the text followed by the pairs of adjacent words.
+        """
+        words = TOKEN_PATTERN.findall(text.lower())
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _bucket(term:str, dimensions:int) -> tuple[int, int]:
+        """
+        Returns the dimension and sign of the term, signs reduce the bias of terms hashed to the same dimension.
+        """
+        digest = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+        return digest % dimensions, 1 if digest >> 63 else -1
@@ -0,0 +1,352 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Optional
+import numpy as np
+from django.conf import settings
+
+from embeddings.services.EmbeddingExceptions import VectorIndexError
+
+import logging
+logger = logging.getLogger('application_logging')
+
+# Row of the id map, the n-th row describes the n-th vector of the vectors file
+# list_id is the IVF list of the vector, -1 if the generation has no IVF layer
+ID_MAP_DTYPE = np.dtype([
+    ("embedding_id", "<i8"),
+    ("job_id", "S16"),
+    ("user_id", "<i8"),
+    ("job_type", "S32"),
+    ("is_story", "?"),
+    ("list_id", "<i4"),
+])
+
+VECTORS_FILE = "vectors.f32"
+ID_MAP_FILE = "ids.bin"
+CENTROIDS_FILE = "centroids.npy"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+
+class VectorIndex:
+    """
+    Append-only index of float32 vectors stored in memory-mapped files, searched with NumPy.
+
+    Each generation of the index is a directory containing:
+        vectors.f32: The vectors, one row of dimensions float32 values per vector.
+        ids.bin: The id map, one ID_MAP_DTYPE row per vector (FeatureEmbedding id, job, user, job type, IVF list).
+        centroids.npy: The centroids of the IVF lists, only written by build when the index is large enough.
+        meta.json: The dimensions of the vectors.
+    The CURRENT file names the active generation. build writes a new generation and replaces CURRENT atomically,
+    processes that mapped the previous generation keep reading it until they remap.
+
+    Files are mapped read-only, so the pages are shared through the page cache by every worker process instead of being copied.
+    Vectors are appended under an exclusive file lock, vectors are written before the id map and readers only map the rows present in both files.
+
+    Search filters the id map by user, job type and job, then scores the remaining vectors with a matrix product.
+    With an IVF layer, only the vectors of the nprobe lists whose centroids are closest to the query are scored.
+
+    args:
+        directory (str): The directory of the index. Default is R2D_VECTOR_INDEX_DIR.
+    functions:
+        count: Returns the number of vectors in the index.
+        lock: Holds the exclusive lock used to append to or rebuild the index.
+        add: Appends vectors and their id map rows.
+        search: Returns the top-k most similar vectors of each query.
+        build: Writes a new generation of the index and makes it the active generation.
+    """
+    # Mapped generations of the process, keyed by generation directory
+    _mappings = {}
+    _mappings_lock = threading.Lock()
+
+    def __init__(self, directory:str = None):
+        self.directory = str(directory or getattr(settings, "R2D_VECTOR_INDEX_DIR"))
+
+    def get_generation(self) -> Optional[str]:
+        """
+        Returns the directory of the active generation, None if the index was never built.
+        """
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as current:
+                name = current.read().strip()
+        except FileNotFoundError:
+            return None
+        return os.path.join(self.directory, name) if name else None
+
+    def get_dimensions(self) -> Optional[int]:
+        """
+        Returns the dimensions of the vectors of the active generation, None if the index was never built.
+        """
+        generation = self.get_generation()
+        if generation is None:
+            return None
+        with open(os.path.join(generation, META_FILE)) as meta:
+            return json.load(meta)["dimensions"]
+
+    def count(self) -> int:
+        """
+        Returns the number of vectors in the active generation.
+        """
+        mapping = self._map()
+        return 0 if mapping is None else len(mapping["ids"])
+
+    def get_embedding_ids(self) -> np.ndarray:
+        """
+        Returns the FeatureEmbedding ids of the vectors in the index.
+        """
+        mapping = self._map()
+        return np.empty(0, dtype=np.int64) if mapping is None else np.asarray(mapping["ids"]["embedding_id"])
+
+    @contextmanager
+    def lock(self):
+        """
+        Holds the exclusive lock of the index, appends and rebuilds are serialized across processes.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield self
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(self, ids:np.ndarray, vectors:np.ndarray) -> int:
+        """
+        Appends the vectors to the active generation, a generation is created if the index was never built.
+        Must be invoked while holding the lock. The IVF list of each vector is the list of its closest centroid.
+        args:
+            ids (np.ndarray): The id map rows of the vectors, see ID_MAP_DTYPE and to_id_map.
+            vectors (np.ndarray): The L2 normalized vectors, one row per id map row.
+        returns:
+            int: The number of vectors appended.
+        raises:
+            VectorIndexError: If the vectors do not have the dimensions of the index.
+        """
+        if len(ids) == 0:
+            return 0
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        generation = self.get_generation() or self._create_generation(vectors.shape[1])
+        dimensions = self.get_dimensions()
+        if vectors.ndim != 2 or vectors.shape[1] != dimensions or len(vectors) != len(ids):
+            raise VectorIndexError(f"Expected {len(ids)} vectors of {dimensions} dimensions, received an array of shape {vectors.shape}")
+
+        ids = np.array(ids, dtype=ID_MAP_DTYPE)
+        centroids = self._load_centroids(generation)
+        ids["list_id"] = self.assign_lists(vectors, centroids) if centroids is not None else -1
+        self._append_rows(generation, dimensions, ids, vectors)
+        return len(ids)
+
+    def search(self, queries:np.ndarray, k:int, user_id:int = None, job_type:str = None, is_story:bool = False,
+               exclude_job_id:str = None, threshold:float = None, nprobe:int = None) -> list[list[tuple[int, float]]]:
+        """
+        Returns the k most similar vectors of each query, most similar first.
+        args:
+            queries (np.ndarray): The L2 normalized queries, one row per query.
+            k (int): The maximum number of vectors returned per query.
+            user_id (int): Only vectors of jobs of the user are returned.
+            job_type (str): Only vectors of jobs of the job type are returned.
+            is_story (bool): Returns the vectors of user stories if True, the vectors of features otherwise.
+            exclude_job_id (str): Vectors of the job are not returned.
+            threshold (float): The minimum cosine similarity.
+            nprobe (int): The number of IVF lists searched. Default is R2D_VECTOR_INDEX_IVF_PROBES.
+        returns:
+            list: The (FeatureEmbedding id, similarity) of the most similar vectors of each query.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        mapping = self._map()
+        if mapping is None or len(mapping["ids"]) == 0 or k <= 0:
+            return [[] for _ in queries]
+        if queries.shape[1] != mapping["vectors"].shape[1]:
+            raise VectorIndexError(f"Expected queries of {mapping['vectors'].shape[1]} dimensions, received {queries.shape[1]}")
+
+        ids = mapping["ids"]
+        embedding_ids = ids["embedding_id"]
+        mask = ids["is_story"] == is_story
+        if user_id is not None:
+            mask &= ids["user_id"] == user_id
+        if job_type is not None:
+            mask &= ids["job_type"] == job_type.encode("utf-8")
+        if exclude_job_id is not None:
+            mask &= ids["job_id"] != uuid.UUID(str(exclude_job_id)).bytes
+
+        centroids = mapping["centroids"]
+        if centroids is None:
+            # Every query is scored against the same rows, using a single matrix product
+            rows = np.flatnonzero(mask)
+            similarities = queries @ mapping["vectors"][rows].T
+            return [self._top_k(embedding_ids, rows, row_similarities, k, threshold) for row_similarities in similarities]
+
+        nprobe = min(len(centroids), nprobe or getattr(settings, "R2D_VECTOR_INDEX_IVF_PROBES", 8))
+        results = []
+        for query, probes in zip(queries, np.argsort(-(queries @ centroids.T), axis=1)[:, :nprobe]):
+            # Vectors appended before the IVF layer was trained have no list and are always searched
+            rows = np.flatnonzero(mask & (np.isin(ids["list_id"], probes) | (ids["list_id"] < 0)))
+            results.append(self._top_k(embedding_ids, rows, mapping["vectors"][rows] @ query, k, threshold))
+        return results
+
+    def build(self, batches:Iterable[tuple[np.ndarray, np.ndarray]], dimensions:int, ivf_lists:int = 0) -> int:
+        """
+        Writes a new generation of the index from the batches of id map rows and vectors, and makes it the active generation.
+        Must be invoked while holding the lock. Previous generations are deleted once the new generation is active.
+        args:
+            batches (Iterable): The (id map rows, vectors) to write, see to_id_map.
+            dimensions (int): The dimensions of the vectors.
+            ivf_lists (int): The number of IVF lists, the IVF layer is not trained if 0 or if the index has fewer vectors than lists.
+        returns:
+            int: The number of vectors in the new generation.
+        """
+        generation = self._create_generation(dimensions, activate=False)
+        count = 0
+        for ids, vectors in batches:
+            ids = np.array(ids, dtype=ID_MAP_DTYPE)
+            ids["list_id"] = -1
+            self._append_rows(generation, dimensions, ids, np.ascontiguousarray(vectors, dtype=np.float32))
+            count += len(ids)
+
+        if ivf_lists and count >= ivf_lists:
+            vectors = np.memmap(os.path.join(generation, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dimensions))
+            ids = np.memmap(os.path.join(generation, ID_MAP_FILE), dtype=ID_MAP_DTYPE, mode="r+", shape=(count,))
+            centroids = self.train_ivf(vectors, ivf_lists)
+            for start in range(0, count, 65536):
+                ids["list_id"][start:start + 65536] = self.assign_lists(vectors[start:start + 65536], centroids)
+            ids.flush()
+            del vectors, ids
+            np.save(os.path.join(generation, CENTROIDS_FILE), centroids)
+
+        previous = self.get_generation()
+        self._activate(generation)
+        if previous is not None and previous != generation:
+            # Processes that mapped the previous generation keep their mapping until they remap, the files are released once unmapped
+            shutil.rmtree(previous, ignore_errors=True)
+        logger.info(f"Built vector index {generation} with {count} vectors{f' in {ivf_lists} IVF lists' if ivf_lists and count >= ivf_lists else ''}")
+        return count
+
+    @staticmethod
+    def to_id_map(rows:Iterable[tuple]) -> np.ndarray:
+        """
+        Returns the id map rows of (FeatureEmbedding id, job ID, user ID, job type, is story) tuples.
+        """
+        return np.array([(embedding_id, uuid.UUID(str(job_id)).bytes, user_id or 0, (job_type or "").encode("utf-8"), bool(is_story), -1)
+                         for embedding_id, job_id, user_id, job_type, is_story in rows], dtype=ID_MAP_DTYPE)
+
+    @staticmethod
+    def train_ivf(vectors:np.ndarray, lists:int, iterations:int = 10, sample_size:int = 50000, seed:int = 0) -> np.ndarray:
+        """
+        Trains the centroids of the IVF lists using spherical k-means on a sample of the vectors.
+        returns:
+            np.ndarray: The L2 normalized centroids, one row per list.
+        """
+        random = np.random.default_rng(seed)
+        sample_rows = np.sort(random.choice(len(vectors), size=min(len(vectors), sample_size), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+        centroids = sample[random.choice(len(sample), size=lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(lists):
+                members = sample[assignments == list_id]
+                # Empty lists are reseeded with a random vector of the sample
+                centroid = members.sum(axis=0) if len(members) else sample[random.integers(len(sample))]
+                norm = np.linalg.norm(centroid)
+                centroids[list_id] = centroid / norm if norm > 0 else centroid
+        return centroids
+
+    @staticmethod
+    def assign_lists(vectors:np.ndarray, centroids:np.ndarray) -> np.ndarray:
+        """
+        Returns the IVF list of each vector, the list whose centroid is the most similar.
+        """
+        return np.argmax(np.asarray(vectors, dtype=np.float32) @ centroids.T, axis=1).astype(np.int32)
+
+    @staticmethod
+    def _top_k(embedding_ids:np.ndarray, rows:np.ndarray, similarities:np.ndarray, k:int, threshold:float = None) -> list[tuple[int, float]]:
+        """
+        Returns the (FeatureEmbedding id, similarity) of the rows with the k highest similarities above the threshold.
+        """
+        if threshold is not None:
+            above = similarities >= threshold
+            rows, similarities = rows[above], similarities[above]
+        if len(rows) > k:
+            top = np.argpartition(-similarities, k - 1)[:k]
+            rows, similarities = rows[top], similarities[top]
+        order = np.argsort(-similarities, kind="stable")
+        return [(int(embedding_ids[row]), float(similarity)) for row, similarity in zip(rows[order], similarities[order])]
+
+    def _map(self) -> Optional[dict]:
+        """
+        Maps the rows of the active generation written to both files, mappings are reused until the generation changes or grows.
+        """
+        generation = self.get_generation()
+        if generation is None:
+            return None
+        try:
+            dimensions = self.get_dimensions()
+            rows = self._count_rows(generation, dimensions)
+        except FileNotFoundError:
+            return None # The generation was replaced by a rebuild
+        with self._mappings_lock:
+            mapping = self._mappings.get(generation)
+            if mapping is None or mapping["rows"] != rows:
+                mapping = {
+                    "rows": rows,
+                    "vectors": np.memmap(os.path.join(generation, VECTORS_FILE), dtype=np.float32, mode="r", shape=(rows, dimensions)) if rows else np.empty((0, dimensions), dtype=np.float32),
+                    "ids": np.memmap(os.path.join(generation, ID_MAP_FILE), dtype=ID_MAP_DTYPE, mode="r", shape=(rows,)) if rows else np.empty(0, dtype=ID_MAP_DTYPE),
+                    "centroids": self._load_centroids(generation),
+                }
+                # Mappings of previous generations are released
+                self._mappings = {key: value for key, value in self._mappings.items() if not key.startswith(self.directory)}
+                self._mappings[generation] = mapping
+        return mapping
+
+    def _create_generation(self, dimensions:int, activate:bool = True) -> str:
+        generation = os.path.join(self.directory, f"generation-{uuid.uuid4().hex}")
+        os.makedirs(generation)
+        with open(os.path.join(generation, META_FILE), "w") as meta:
+            json.dump({"dimensions": int(dimensions)}, meta)
+        for name in (VECTORS_FILE, ID_MAP_FILE):
+            open(os.path.join(generation, name), "wb").close()
+        if activate:
+            self._activate(generation)
+        return generation
+
+    def _activate(self, generation:str):
+        """
+        Replaces the CURRENT file atomically, so that readers see either the previous or the new generation.
+        """
+        path = os.path.join(self.directory, CURRENT_FILE)
+        with open(f"{path}.tmp", "w") as current:
+            current.write(os.path.basename(generation))
+            current.flush()
+            os.fsync(current.fileno())
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _count_rows(generation:str, dimensions:int) -> int:
+        """
+        Returns the number of rows written to both the vectors file and the id map.
+        """
+        return min(os.path.getsize(os.path.join(generation, VECTORS_FILE)) // (dimensions * 4),
+                   os.path.getsize(os.path.join(generation, ID_MAP_FILE)) // ID_MAP_DTYPE.itemsize)
+
+    @classmethod
+    def _append_rows(cls, generation:str, dimensions:int, ids:np.ndarray, vectors:np.ndarray):
+        """
+        Appends the vectors, then their id map rows. Rows left by an append that failed part way are truncated first,
+        so that the n-th row of the id map always describes the n-th vector.
+        """
+        rows = cls._count_rows(generation, dimensions)
+        for name, row_size, data in ((VECTORS_FILE, dimensions * 4, vectors), (ID_MAP_FILE, ID_MAP_DTYPE.itemsize, ids)):
+            with open(os.path.join(generation, name), "r+b") as file:
+                file.truncate(rows * row_size)
+                file.seek(rows * row_size)
+                file.write(data.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+
+    @staticmethod
+    def _load_centroids(generation:str) -> Optional[np.ndarray]:
+        path = os.path.join(generation, CENTROIDS_FILE)
+        return np.load(path) if os.path.exists(path) else None
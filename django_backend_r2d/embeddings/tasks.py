@@ -0,0 +1,22 @@
+from celery import shared_task
+from embeddings.services.EmbeddingService import EmbeddingService
+from embeddings.services.EmbeddingExceptions import VectorIndexingTaskError
+
+import logging
+logger = logging.getLogger('application_logging')
+
+@shared_task
+def index_embeddings_task() -> int:
+    """
+    Celery task that appends the vectors that are not indexed yet to the vector index, in batches of R2D_VECTOR_INDEX_BATCH_SIZE vectors.
+    Submitted once the vectors of a job are stored, tasks submitted while another task is appending wait for the lock and append the remaining vectors.
+    returns:
+        int: The number of vectors appended.
+    raises:
+        VectorIndexingTaskError: If the vectors cannot be appended, they are compared from the table until the next task or rebuild.
+    """
+    try:
+        return EmbeddingService().index_pending_embeddings()
+    except Exception as e:
+        logger.error(f"Error encountered while indexing embeddings: {e}")
+        raise VectorIndexingTaskError(f"Error encountered while indexing embeddings: {e}")
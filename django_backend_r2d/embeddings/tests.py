@@ -1,3 +1,178 @@
-from django.test import TestCase
+import inspect
+import os
+import shutil
+import tempfile
+import numpy as np
+from io import StringIO
+from uuid import uuid4
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from embeddings.models import FeatureEmbedding
+from embeddings.services.EmbeddingService import EmbeddingService
+from embeddings.services.VectorIndex import VectorIndex, VECTORS_FILE
+from embeddings.tasks import index_embeddings_task
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobStatus
+from jobs.services.JobContext import JobContext
+from model_manager.models import ModelName
+import logging
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+def create_parameters(feature:str, requirement:str) -> dict:
+    return {
+        "features": [feature],
+        "sub_features": ["Main"],
+        "job_parameters": {feature: {"Main": {"STORY-1": {"id": "STORY-1", "requirement": requirement, "services_to_use": [],
+                                                          "acceptance_criteria": "Accepted", "additional_information": ""}}}},
+    }
+
+class VectorIndexTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='indexuser', password='testpassword', email='index@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="vector-index-")
+        self.index = VectorIndex(self.directory)
+        self.random = np.random.default_rng(7)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_vectors(self, count:int, dimensions:int = 32) -> np.ndarray:
+        vectors = self.random.normal(size=(count, dimensions)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def create_ids(self, count:int, user_id:int = 1, job_type:str = ValidJobTypes.CLASS_DIAGRAM.value, job_id:str = None, start:int = 1) -> np.ndarray:
+        return VectorIndex.to_id_map((start + row, job_id or uuid4(), user_id, job_type, False) for row in range(count))
+
+    def create_job(self, parameters:dict, status:str = ValidJobStatus.COMPLETED.value) -> Job:
+        return Job.objects.create(job_id=str(uuid4()), user=self.user, job_status=JobStatus.objects.get(name=status),
+                                  model=ModelName.objects.get(name="fake-diagram-model"), job_details="Vector index", job_type=ValidJobTypes.CLASS_DIAGRAM.value,
+                                  tokens=100, parameters=parameters)
+
+    def test_search(self):
+        """
+        Test that the top-k vectors are returned most similar first, and that vectors are filtered by user, job type, job and threshold.
+        """
+        vectors = self.create_vectors(100)
+        excluded_job_id = str(uuid4())
+        with self.index.lock():
+            self.index.add(self.create_ids(50), vectors[:50])
+            self.index.add(self.create_ids(25, user_id=2, start=51), vectors[50:75])
+            self.index.add(self.create_ids(25, job_type=ValidJobTypes.ER_DIAGRAM.value, job_id=excluded_job_id, start=76), vectors[75:])
+        self.assertEqual(self.index.count(), 100)
+
+        results = self.index.search(vectors[[3, 60]], k=5)
+        self.assertEqual([len(matches) for matches in results], [5, 5])
+        self.assertEqual((results[0][0][0], results[1][0][0]), (4, 61))
+        self.assertAlmostEqual(results[0][0][1], 1.0, places=5)
+        self.assertEqual([similarity for _, similarity in results[0]], sorted((similarity for _, similarity in results[0]), reverse=True))
+
+        self.assertTrue(all(not 50 < embedding_id <= 75 for embedding_id, _ in self.index.search(vectors[60], k=10, user_id=1)[0]))
+        self.assertTrue(all(embedding_id > 75 for embedding_id, _ in self.index.search(vectors[3], k=10, job_type=ValidJobTypes.ER_DIAGRAM.value)[0]))
+        self.assertTrue(all(embedding_id <= 75 for embedding_id, _ in self.index.search(vectors[80], k=10, exclude_job_id=excluded_job_id)[0]))
+        self.assertEqual(self.index.search(vectors[3], k=10, threshold=0.99)[0], [(4, results[0][0][1])])
+        self.assertEqual(self.index.search(vectors[3], k=10, is_story=True)[0], [])
+
+    def test_appends_are_visible_and_partial_rows_are_truncated(self):
+        """
+        Test that vectors appended after the index was mapped are searched, and that rows left by a failed append are discarded.
+        """
+        vectors = self.create_vectors(20)
+        with self.index.lock():
+            self.index.add(self.create_ids(10), vectors[:10])
+        self.assertEqual(self.index.count(), 10)
+
+        # A vector written without its id map row, e.g., by a worker that crashed during an append
+        with open(os.path.join(self.index.get_generation(), VECTORS_FILE), "ab") as vectors_file:
+            vectors_file.write(vectors[19].tobytes())
+        self.assertEqual(VectorIndex(self.directory).count(), 10)
+
+        with self.index.lock():
+            self.index.add(self.create_ids(10, start=11), vectors[10:])
+        self.assertEqual(self.index.count(), 20)
+        self.assertEqual(self.index.search(vectors[15], k=1)[0][0][0], 16)
+        self.assertEqual(self.index.search(vectors[19], k=1)[0][0][0], 20)
+
+    def test_build_with_ivf(self):
+        """
+        Test that a rebuilt index replaces the previous generation, and that the IVF layer returns the same nearest vectors as an exhaustive search.
+        """
+        with self.index.lock():
+            self.index.add(self.create_ids(5), self.create_vectors(5))
+        previous_generation = self.index.get_generation()
+
+        # Vectors close to 8 cluster centers
+        centers = self.create_vectors(8)
+        vectors = np.repeat(centers, 50, axis=0) + self.random.normal(scale=0.05, size=(400, 32)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ids = self.create_ids(400)
+        with self.index.lock():
+            count = self.index.build([(ids[:200], vectors[:200]), (ids[200:], vectors[200:])], dimensions=32, ivf_lists=8)
+        self.assertEqual(count, 400)
+        self.assertNotEqual(self.index.get_generation(), previous_generation)
+        self.assertFalse(os.path.exists(previous_generation))
+
+        queries = vectors[[0, 120, 399]]
+        exhaustive = [[embedding_id for embedding_id, _ in matches] for matches in VectorIndex(self.directory).search(queries, k=5, nprobe=8)]
+        probed = [[embedding_id for embedding_id, _ in matches] for matches in self.index.search(queries, k=5, nprobe=4)]
+        self.assertEqual(probed, exhaustive)
+
+        # Vectors appended after the IVF layer was trained are assigned to the list of their closest centroid
+        with self.index.lock():
+            self.index.add(self.create_ids(1, start=401), vectors[[0]])
+        self.assertIn(401, [embedding_id for embedding_id, _ in self.index.search(vectors[0], k=2, nprobe=1)[0]])
+
+    def test_embeddings_are_indexed(self):
+        """
+        Test that pending vectors are appended once, and similar features are found from both indexed and pending vectors of completed jobs.
+        """
+        service = EmbeddingService(vector_index=self.index)
+        previous_job = self.create_job(create_parameters("Checkout", "As a shopper I want to pay for my cart with a credit card"))
+        service.embed_job(JobContext(previous_job))
+        self.assertEqual(service.index_pending_embeddings(), 2)
+        self.assertEqual(service.index_pending_embeddings(), 0)
+        self.assertFalse(FeatureEmbedding.objects.filter(is_indexed=False).exists())
+
+        pending_job = self.create_job(create_parameters("Payments", "As a shopper I want to pay for my cart with a credit card"))
+        service.embed_job(JobContext(pending_job))
+        self.create_job(create_parameters("Checkout", "As a shopper I want to pay for my cart with a credit card"), status=ValidJobStatus.PROCESSING.value)
+
+        job = self.create_job(create_parameters("Checkout", "As a shopper I want to pay for my cart with a credit card"), status=ValidJobStatus.SUBMITTED.value)
+        similar_features = service.find_similar_features(JobContext(job), threshold=0.5, limit=5)
+        self.assertEqual({(match["job_id"], match["feature"]) for match in similar_features["Checkout"]},
+                         {(str(previous_job.job_id), "Checkout"), (str(pending_job.job_id), "Payments")})
+        with self.settings(R2D_VECTOR_INDEX_ENABLED=False):
+            self.assertEqual(service.find_similar_features(JobContext(job), threshold=0.5, limit=5), similar_features)
+
+    def test_task_and_rebuild_command(self):
+        """
+        Test that the indexing task appends the pending vectors, and that the rebuild command indexes every vector.
+        """
+        service = EmbeddingService()
+        for feature in ("Checkout", "Invoicing"):
+            service.embed_job(JobContext(self.create_job(create_parameters(feature, f"As a user I want to use {feature}"))))
+        with override_settings(R2D_VECTOR_INDEX_DIR=self.directory):
+            self.assertEqual(index_embeddings_task.apply().get(), 4)
+            output = StringIO()
+            call_command("rebuild_vector_index", "--ivf-lists", "0", "--batch-size", "3", stdout=output)
+        self.assertIn("Indexed 4 vectors", output.getvalue())
+        self.assertEqual(sorted(self.index.get_embedding_ids().tolist()), sorted(FeatureEmbedding.objects.values_list("pk", flat=True)))
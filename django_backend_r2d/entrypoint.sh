@@ -28,6 +28,7 @@ fi
 echo "Applying migrations..."
 python manage.py makemigrations
 python manage.py migrate
+python manage.py createcachetable
 
 # Start the Django development server
 exec "$@"
\ No newline at end of file
@@ -1,19 +1,27 @@
 from abc import ABC, abstractmethod
+from enum import Enum
 import json 
 
 from jobs.interfaces.JobQueueInterface import JobQueueInterface
 from jobs.interfaces.JobServiceInterface import JobServiceInterface
 from jobs.services.JobService import JobService
 from jobs.services.JobQueueService import JobQueueService
+from jobs.services.JobCheckpointService import JobCheckpointService
+from jobs.services.JobContext import JobContext
 from jobs.services.JobExceptions import JobUpdateException, JobNotFoundException, InvalidJobStatus, UpdateJobQueueException, JobCreationException
 from jobs.serializers.UpdateJobStatusSerializer import UpdateJobStatusSerializer
 from jobs.models import Job
 from jobs.constants import ValidJobStatus
 from uuid import uuid4
 from framework.consumers.BaseConsumerExceptions import BaseConsumerException, BaseConsumerInitializationException
+from framework.utils.DatabaseExecutor import DatabaseExecutor
 from diagrams.services.DiagramExceptions import UMLDiagramCreationError
 from diagrams.interfaces.BaseDiagramRepository import BaseDiagramRepository
 from diagrams.interfaces.BaseDiagramService import BaseDiagramService
+from diagrams.services.DiagramReuseService import DiagramReuseService
+from diagrams.services.SemanticReuseService import SemanticReuseService
+from model_manager.services.ModelCircuitBreaker import ModelCircuitBreaker
+from model_manager.services.ModelExceptions import ModelCircuitOpenError
 
 from django.contrib.auth import get_user_model
 User = get_user_model() # Use custom User model instead of Django default user model
@@ -29,6 +37,10 @@ class BaseConsumer(ABC):
     - Update the status of a job.
     - Update the status of a job in the job queue.
     - Handle errors by updating job and job queue statuses to Error Failed to Process.
+    - Hold jobs in the Queued state while the circuit of the model is open, instead of failing them.
+    - Resume jobs that failed or were interrupted from the last completed step of the chain.
+    - Copy the diagrams of features whose user stories did not change from the previous job, only the edited features are generated.
+    - Copy the audited diagrams of near-identical features of previous jobs, found using the vectors of their user stories.
     
     args:
         consumer_name (str): The name of the consumer.
@@ -38,12 +50,15 @@ class BaseConsumer(ABC):
         job_queue_service (JobQueueInterface): The job queue service to use. Uses JobQueueService by default.
         diagram_service: The diagram service to use.
         repository: The repository to use.
+        circuit_breaker (ModelCircuitBreaker): The circuit breaker checked before a job is processed. Default is ModelCircuitBreaker.
+        job_context (JobContext): The job loaded by the consumer, defaults to the context of the diagram service.
     raises:
         BaseConsumerException: if error encountered while updating the job status or job queue status.
     """
     def __init__(self, consumer_name: str, diagram_service:BaseDiagramService, 
                  repository:BaseDiagramRepository, job_service:JobServiceInterface = JobService(), 
-                 job_queue_service:JobQueueInterface = JobQueueService()):
+                 job_queue_service:JobQueueInterface = JobQueueService(), circuit_breaker:ModelCircuitBreaker = None,
+                 job_context:JobContext = None):
         # Defines the list of valid consumers
         """
         args:
@@ -52,6 +67,8 @@ class BaseConsumer(ABC):
             repository (BaseDiagramRepository): The repository to use.
             job_service (JobServiceInterface): The job service to use. Uses JobService by default.
             job_queue_service (JobQueueInterface): The job queue service to use. Uses JobQueueService by default.
+            circuit_breaker (ModelCircuitBreaker): The circuit breaker checked before a job is processed. Default is ModelCircuitBreaker.
+            job_context (JobContext): The job loaded by the consumer, defaults to the context of the diagram service.
         raises:
             BaseConsumerInitializationException: if invalid job service or job queue service provided.
             BaseConsumerInitializationException: if invalid consumer name provided.
@@ -70,6 +87,12 @@ class BaseConsumer(ABC):
         self.job_queue_service = job_queue_service
         self.diagram_service = diagram_service
         self.repository = repository 
+        self.circuit_breaker = circuit_breaker or ModelCircuitBreaker()
+        self.checkpoint_service = JobCheckpointService()
+        self.reuse_service = DiagramReuseService()
+        self.semantic_reuse_service = SemanticReuseService()
+        # The job is loaded once and shared with the diagram service, see JobContext
+        self.job_context = job_context or getattr(diagram_service, "job_context", None)
         self.diagrams = []  # Stores the saved diagrams
         
     def process_record(self, job_id) -> list[dict]:
@@ -82,6 +105,7 @@ class BaseConsumer(ABC):
             job_id (str): The job ID.
         raises:
             BaseConsumerException: If error encountered while updating the job status or job queue status.
+            ModelCircuitOpenError: If the circuit of the model is open, the job is held in the Queued state.
             Concrete ConsumerException: If error encountered while creating diagrams
         
         returns:
@@ -89,36 +113,175 @@ class BaseConsumer(ABC):
             Updates the job status and job queue status to Processing or Error Failed to Process.
         """
         try:
-            logger.debug(f"Creating diagram for - {job_id}")
-            # Update the job status and job queue status to Processing
-            self.update_job_status(job_id, ValidJobStatus.PROCESSING.value)
-            self.update_job_queue_status(job_id, ValidJobStatus.PROCESSING.value)
+            reused_response, generate_required = self._start_record(job_id)
 
             # Generate the diagram using the diagram service
-            chain_response = self.diagram_service.generate_diagram()
+            chain_response = self.diagram_service.generate_diagram() if generate_required else {}
             
-            # Save the diagrams using the diagram repository
-            self.diagrams = self.repository.save_diagram(job_id, chain_response)
+            # Save the diagrams and update the job status and job queue status to Completed
+            self._save_and_complete(job_id, {**chain_response, **reused_response})
             
-            # Update the job status and job queue status to Completed
-            self.update_job_status(job_id, ValidJobStatus.COMPLETED.value)
-            self.update_job_queue_status(job_id, ValidJobStatus.COMPLETED.value)
-            self.job_service.update_job_description(job_id, f"Job Completed")
+            return self.diagrams
+        except Exception as e:
+            raise self._handle_record_error(job_id, e)
+    
+    async def aprocess_record(self, job_id) -> list[dict]:
+        """
+        Asynchronous variant of process_record, the diagram service is awaited so that many records can be processed 
+        concurrently by a single event loop. Database calls are executed on the thread pool of the DatabaseExecutor.
+        
+        args: 
+            job_id (str): The job ID.
+        raises:
+            BaseConsumerException: If error encountered while updating the job status or job queue status.
+            ModelCircuitOpenError: If the circuit of the model is open, the job is held in the Queued state.
+            Concrete ConsumerException: If error encountered while creating diagrams
+        returns:
+            List: List of dictionaries containing the diagrams that were saved.
+        """
+        try:
+            reused_response, generate_required = await DatabaseExecutor.run(self._start_record, job_id)
+
+            # Generate the diagram using the diagram service, the event loop is free while waiting for the LLM
+            chain_response = await self.diagram_service.agenerate_diagram() if generate_required else {}
             
+            await DatabaseExecutor.run(self._save_and_complete, job_id, {**chain_response, **reused_response})
             return self.diagrams
-        except BaseConsumerException as e:
-            logger.error(f"Error processing record: {e}")
-            self.handle_error(job_id)
-            raise BaseConsumerException(f"Error processing record: {e}")
-        except UMLDiagramCreationError as e:
-            self.handle_error(job_id)
-            logger.error(f"Error creating class diagram: {e}")
-            raise self.get_specific_error(f"Error encountered while creating diagram: {e}")
         except Exception as e:
+            raise await DatabaseExecutor.run(self._handle_record_error, job_id, e)
+
+    def resume_record(self, job_id) -> list[dict]:
+        """
+        Resumes a job that failed or was interrupted, e.g., the auditor timed out after the analysis completed.
+        Steps of the chain completed by a previous attempt are restored from their checkpoints instead of invoking the model again.
+        Completed jobs are not processed again, their saved diagrams are returned so that the task can create the next job
+        if the previous attempt failed after the job was completed.
+        
+        args: 
+            job_id (str): The job ID.
+        raises:
+            Concrete ConsumerException: If the job does not exist.
+            See process_record for the errors raised while processing the job.
+        returns:
+            List: List of dictionaries containing the diagrams that were saved.
+        """
+        if self._ensure_resumable(job_id):
+            return self.repository.get_by_id(job_id)
+        return self.process_record(job_id)
+
+    async def aresume_record(self, job_id) -> list[dict]:
+        """
+        Asynchronous variant of resume_record.
+        """
+        if await DatabaseExecutor.run(self._ensure_resumable, job_id):
+            return await DatabaseExecutor.run(self.repository.get_by_id, job_id)
+        return await self.aprocess_record(job_id)
+
+    def _ensure_resumable(self, job_id:str) -> bool:
+        """
+        Raises the consumer specific error if the job does not exist.
+        returns:
+            bool: True if the job has already been completed, completed jobs are not processed again.
+        """
+        job_status = Job.objects.filter(job_id=job_id).values_list('job_status__name', flat=True).first()
+        if job_status is None:
+            raise self.get_specific_error(f"Unable to resume job {job_id}, the job does not exist")
+        if job_status == ValidJobStatus.COMPLETED.value:
+            logger.info(f"Job {job_id} has already been completed, returning its saved diagrams")
+            return True
+        completed_steps = self.checkpoint_service.get_completed_steps(job_id)
+        logger.info(f"Resuming job {job_id} from status {job_status}, completed steps: {completed_steps or 'none'}")
+        return False
+
+    def _ensure_model_available(self):
+        """
+        Raises ModelCircuitOpenError if the circuit of the model used by the diagram service is open.
+        Checked before the job is marked as Processing, the half-open probe is claimed by the first LLM call.
+        """
+        model_provider = getattr(self.diagram_service, "model_provider", None)
+        model_name = getattr(self.diagram_service, "model_name", None)
+        if model_provider is None or model_name is None:
+            return
+        model_provider = model_provider.value if isinstance(model_provider, Enum) else model_provider
+        model_name = model_name.value if isinstance(model_name, Enum) else model_name
+        retry_after = self.circuit_breaker.get_retry_after(model_provider, model_name)
+        if retry_after > 0:
+            raise ModelCircuitOpenError(f"Circuit for {model_provider}:{model_name} is open, retry after {retry_after:.0f} seconds",
+                                        provider=model_provider, model_name=model_name, retry_after=retry_after)
+
+    def _start_record(self, job_id:str) -> tuple[dict, bool]:
+        """
+        Steps of process_record and aprocess_record executed before the diagrams are generated.
+        Jobs are not started while the model is unavailable, the job status and job queue status are updated to Processing,
+        and the diagrams of unchanged features are copied from the previous job.
+        returns:
+            tuple: The reused diagrams in the chain response format, and True if the diagram service needs to generate diagrams.
+        """
+        logger.debug(f"Creating diagram for - {job_id}")
+        self._ensure_model_available()
+        self._mark_as_processing(job_id)
+        return self._reuse_unchanged_diagrams(job_id)
+
+    def _handle_record_error(self, job_id:str, error:Exception) -> Exception:
+        """
+        Updates the job after process_record or aprocess_record failed, and returns the exception to raise.
+        Jobs held by an open circuit are held in the Queued state, other jobs are updated to Error Failed to Process.
+        args:
+            job_id (str): The job ID.
+            error (Exception): The error raised while processing the job.
+        returns:
+            Exception: The ModelCircuitOpenError, a BaseConsumerException or the consumer specific error.
+        """
+        if isinstance(error, ModelCircuitOpenError):
+            self.hold_job(job_id, error)
+            return error
+        if isinstance(error, BaseConsumerException):
+            logger.error(f"Error processing record: {error}")
             self.handle_error(job_id)
-            logger.error(f"Unhandled Error processing record: {e}")
-            raise self.get_specific_error(f"Error encountered while creating diagram: {e}")
-    
+            return BaseConsumerException(f"Error processing record: {error}")
+        self.handle_error(job_id)
+        if isinstance(error, UMLDiagramCreationError):
+            logger.error(f"Error creating class diagram: {error}")
+        else:
+            logger.error(f"Unhandled Error processing record: {error}")
+        return self.get_specific_error(f"Error encountered while creating diagram: {error}")
+
+    def _mark_as_processing(self, job_id:str):
+        """
+        Update the job status and job queue status to Processing
+        """
+        self.update_job_status(job_id, ValidJobStatus.PROCESSING.value)
+        self.update_job_queue_status(job_id, ValidJobStatus.PROCESSING.value)
+
+    def _reuse_unchanged_diagrams(self, job_id:str) -> tuple[dict, bool]:
+        """
+        Copies the diagrams of features whose user stories did not change from the previous job of the user, 
+        then the audited diagrams of near-identical features of previous jobs, see DiagramReuseService and SemanticReuseService.
+        The diagram service is limited to the remaining features.
+        returns:
+            tuple: The reused diagrams in the chain response format, and True if the diagram service needs to generate diagrams.
+        """
+        reused_response, features_to_generate = self.reuse_service.get_reusable_diagrams(job_id, self.repository, self.job_context)
+        similar_response, features_to_generate = self.semantic_reuse_service.get_near_duplicate_diagrams(
+            job_id, self.diagram_service.get_similar_diagrams(), features_to_generate, self.job_context)
+        reused_response = {**reused_response, **similar_response}
+        if features_to_generate is None:
+            return {}, True
+        if features_to_generate:
+            self.diagram_service.restrict_to_features(features_to_generate)
+        return reused_response, bool(features_to_generate)
+
+    def _save_and_complete(self, job_id:str, chain_response:dict):
+        """
+        Saves the diagrams using the diagram repository, then updates the job status and job queue status to Completed.
+        The checkpoints of the job are deleted once the job is completed.
+        """
+        self.diagrams = self.repository.save_diagram(job_id, chain_response)
+        self.update_job_status(job_id, ValidJobStatus.COMPLETED.value)
+        self.update_job_queue_status(job_id, ValidJobStatus.COMPLETED.value)
+        self.job_service.update_job_description(job_id, f"Job Completed")
+        self.checkpoint_service.clear_checkpoints(job_id)
+
     @abstractmethod
     def get_specific_error(self, message: str):
         """
@@ -156,16 +319,10 @@ class BaseConsumer(ABC):
             Job: The created job record.
         """
         
-        # Retrieve user and model for the associated parent job
-        parent_job = self.job_service.get_job_by_id(parent_job_id)
-        logger.debug(f"fetched parent job {parent_job} for creating new job")
-       
-        # Extract necessary fields from serialized data
-        user_id = parent_job['user']
-        model_name = parent_job['model_name']
-
-        # Retrieve the actual user instance
-        user = User.objects.get(id=user_id)
+        # Retrieve user and model for the associated parent job, the job processed by this consumer is already loaded
+        parent_context = self.job_context if self.job_context is not None and self.job_context.matches(parent_job_id) else JobContext.load(parent_job_id)
+        user = parent_context.user
+        logger.debug(f"fetched parent job {parent_job_id} for creating new job")
         
         new_job_data = {
             'job_id': str(uuid4()),
@@ -175,7 +332,9 @@ class BaseConsumer(ABC):
             'job_type': job_type,
             'job_status': job_status,
             'job_details': f"{job_type} job created by {parent_job_id}",
-            'model_name': model_name
+            'model_name': parent_context.model.name,
+            'bypass_cache': parent_context.bypass_cache, # Child jobs inherit the parent's cache preference
+            'feature_hashes': parent_context.feature_hashes # Child jobs inherit the hashes of the user stories of the parent
         }
         try:
             # Try to save the a new job record
@@ -261,6 +420,20 @@ class BaseConsumer(ABC):
         except Exception as e:
             raise BaseConsumerException(f"Unhandled exception occurred while trying to update job queue status to Error Failed to Process: {str(e)}")
 
+    def hold_job(self, job_id:str, error:ModelCircuitOpenError):
+        """
+        Holds the job in the Queued state while the circuit of the model is open, the task is retried once the circuit may have recovered.
+        args:
+            job_id (str): The job ID.
+            error (ModelCircuitOpenError): The error raised by the circuit breaker.
+        raises:
+            BaseConsumerException: If error encountered while updating the job status or job queue status.
+        """
+        logger.warning(f"Holding job {job_id} for {error.retry_after:.0f} seconds: {error.error_message}")
+        self.update_job_status(job_id, ValidJobStatus.QUEUED.value)
+        self.update_job_queue_status(job_id, ValidJobStatus.QUEUED.value)
+        self.job_service.update_job_description(job_id, f"Waiting for {error.provider}:{error.model_name} to recover")
+
     def complete_all_jobs(self, job_id:str):
         """
         The final consumer should invoke this function. 
@@ -1,8 +1,11 @@
 import os
 from framework.factories.interfaces.BaseAuditorFactory import BaseAuditorFactory
-from model_manager.constants import ModelProvider, OpenAIModels
+from django.conf import settings
+from model_manager.constants import ModelProvider, OpenAIModels, FakeModels
 from model_manager.auditors.GPTAuditor import GPTAuditor
+from model_manager.auditors.FakeAuditor import FakeAuditor
 from model_manager.services.ModelExceptions import *
+from model_manager.services.ModelClientRegistry import ModelClientRegistry
 import logging
 from enum import Enum
 
@@ -14,8 +17,9 @@ class AuditorFactory(BaseAuditorFactory):
     def get_auditor(provider: ModelProvider, model_name: Enum):
         """
         Returns a model instance based on the provider and model name.
+        Auditor instances are pooled per worker process by the ModelClientRegistry, repeated calls return the same instance.
         @params: provider: ModelProvider or str
-        @params: model_name: OpenAIModels or str
+        @params: model_name: OpenAIModels, FakeModels or str
         Raises AuditorInitializationError if the model cannot be initialized.
         """
         try:
@@ -25,7 +29,10 @@ class AuditorFactory(BaseAuditorFactory):
                 
             # Convert model_name to enum if it's a string (Added for backward compatibility)
             if isinstance(model_name, str):
-                model_name_enum = OpenAIModels[model_name.upper().replace("-", "_").replace(".","_")]
+                if provider == ModelProvider.FAKE:
+                    model_name_enum = FakeModels(model_name.lower())
+                else:
+                    model_name_enum = OpenAIModels[model_name.upper().replace("-", "_").replace(".","_")]
             else:
                 model_name_enum = model_name
                 
@@ -33,12 +40,22 @@ class AuditorFactory(BaseAuditorFactory):
             if provider == ModelProvider.OPEN_AI and model_name_enum in OpenAIModels:
                 logger.debug(f"Initializing auditor {model_name} from OpenAI.")    
                 model_api_key = AuditorFactory._get_api_key("R2D_OPENAI_API_TOKEN")
-                # Create the gpt model using the OpenAI API key and the model name
                 max_tokens = 4096 # Default max tokens
-                return GPTAuditor(openai_api_key=model_api_key, model_name=model_name, temperature=0.5, max_tokens=max_tokens, timeout=30, max_retries=3)
+                client_kwargs = {"temperature": 0.5, "max_tokens": max_tokens, "timeout": 30, "max_retries": 3}
+                # Reuse the gpt auditor (and its connection pool) if it has already been created by this worker process
+                return ModelClientRegistry.get_or_create(
+                    provider=provider.value, model_name=model_name_enum.value, client_type="auditor", client_kwargs=client_kwargs,
+                    create_client=lambda: GPTAuditor(openai_api_key=model_api_key, model_name=model_name, **client_kwargs))
+            elif provider == ModelProvider.FAKE and model_name_enum in FakeModels:
+                # Fake auditors return generated responses without invoking an LLM, used to load test the diagram pipeline
+                logger.debug(f"Initializing fake auditor {model_name}.")
+                client_kwargs = dict(getattr(settings, "R2D_FAKE_LLM_CONFIG", {}))
+                return ModelClientRegistry.get_or_create(
+                    provider=provider.value, model_name=model_name_enum.value, client_type="auditor", client_kwargs=client_kwargs,
+                    create_client=lambda: FakeAuditor(model_name=model_name_enum.value, **client_kwargs))
             else:
                 raise ModelNotFoundException(f"No valid model found for {model_name}.")
-        except (ModelAPIKeyError, ModelNotFoundException, ModelProviderNotFoundException, InvalidModelType, ValueError, AttributeError, KeyError) as e:
+        except (ModelAPIKeyError, TypeError, ModelNotFoundException, ModelProviderNotFoundException, InvalidModelType, ValueError, AttributeError, KeyError) as e:
             raise AuditorInitializationError(f"Model cannot be initialized to audit results: {e}")
         
     @staticmethod
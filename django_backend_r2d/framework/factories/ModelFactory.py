@@ -1,8 +1,11 @@
 import os
 from framework.factories.interfaces.BaseModelFactory import BaseModelFactory
-from model_manager.constants import ModelProvider, OpenAIModels
+from django.conf import settings
+from model_manager.constants import ModelProvider, OpenAIModels, FakeModels
 from model_manager.llms.GPTModel import GPTModel
+from model_manager.llms.FakeModel import FakeModel
 from model_manager.services.ModelExceptions import *
+from model_manager.services.ModelClientRegistry import ModelClientRegistry
 import logging
 
 # R2D Logger module
@@ -13,8 +16,9 @@ class ModelFactory(BaseModelFactory):
     def get_model(provider, model_name):
         """
         Returns a model instance based on the provider and model name.
+        Model instances are pooled per worker process by the ModelClientRegistry, repeated calls return the same instance.
         @params: provider: ModelProvider or str
-        @params: model_name: OpenAIModels or str
+        @params: model_name: OpenAIModels, FakeModels or str
         Raises ModelInitializationError if the model cannot be initialized.
         """
         try:
@@ -24,7 +28,10 @@ class ModelFactory(BaseModelFactory):
                 
             # Convert model_name to enum if it's a string
             if isinstance(model_name, str):
-                model_name_enum = OpenAIModels[model_name.upper().replace("-", "_").replace(".", "_")]
+                if provider == ModelProvider.FAKE:
+                    model_name_enum = FakeModels(model_name.lower())
+                else:
+                    model_name_enum = OpenAIModels[model_name.upper().replace("-", "_").replace(".", "_")]
             else:
                 model_name_enum = model_name
             
@@ -32,11 +39,21 @@ class ModelFactory(BaseModelFactory):
             if provider == ModelProvider.OPEN_AI and model_name_enum in OpenAIModels:
                 logger.debug(f"Initializing model {model_name} from OpenAI.")    
                 model_api_key = ModelFactory._get_api_key("R2D_OPENAI_API_TOKEN")
-                # Create the gpt model using the OpenAI API key and the model name
-                return GPTModel(openai_api_key=model_api_key,model_name=model_name_enum.value, temperature=0.5, max_tokens=4096, timeout=30, max_retries=3)
+                client_kwargs = {"temperature": 0.5, "max_tokens": 4096, "timeout": 30, "max_retries": 3}
+                # Reuse the gpt model (and its connection pool) if it has already been created by this worker process
+                return ModelClientRegistry.get_or_create(
+                    provider=provider.value, model_name=model_name_enum.value, client_type="model", client_kwargs=client_kwargs,
+                    create_client=lambda: GPTModel(openai_api_key=model_api_key, model_name=model_name_enum.value, **client_kwargs))
+            elif provider == ModelProvider.FAKE and model_name_enum in FakeModels:
+                # Fake models return generated responses without invoking an LLM, used to load test the diagram pipeline
+                logger.debug(f"Initializing fake model {model_name}.")
+                client_kwargs = dict(getattr(settings, "R2D_FAKE_LLM_CONFIG", {}))
+                return ModelClientRegistry.get_or_create(
+                    provider=provider.value, model_name=model_name_enum.value, client_type="model", client_kwargs=client_kwargs,
+                    create_client=lambda: FakeModel(model_name=model_name_enum.value, **client_kwargs))
             else:
                 raise ModelNotFoundException(f"No valid model found for {model_name}.")
-        except (ModelAPIKeyError, ModelNotFoundException, ModelProviderNotFoundException, ValueError, AttributeError, KeyError) as e:
+        except (ModelAPIKeyError, TypeError, ModelNotFoundException, ModelProviderNotFoundException, ValueError, AttributeError, KeyError) as e:
             raise ModelInitializationError(f"Model could not be initialized. {str(e)}")
 
     @staticmethod
@@ -1,9 +1,11 @@
 import inspect
 from django.test import TestCase
 from framework.factories.ModelFactory import ModelFactory
+from framework.factories.AuditorFactory import AuditorFactory
 from model_manager.constants import ModelProvider, OpenAIModels
 from model_manager.llms.GPTModel import GPTModel
 from model_manager.services.ModelExceptions import ModelInitializationError
+from model_manager.services.ModelClientRegistry import ModelClientRegistry
 import logging 
 
 class ModelFactoryTestCases(TestCase):
@@ -63,4 +65,38 @@ class ModelFactoryTestCases(TestCase):
 
     def test_create_from_string(self):
         model = ModelFactory.get_model("openai", "gpt-4-turbo")
-        self.assertIsInstance(model, GPTModel)
\ No newline at end of file
+        self.assertIsInstance(model, GPTModel)
+
+    def test_models_are_reused(self):
+        """
+        Test factory returns the pooled model instance for repeated calls with the same provider and model.
+        """
+        ModelClientRegistry.reset()
+        model = ModelFactory.get_model(ModelProvider.OPEN_AI, OpenAIModels.GPT_4_TURBO)
+        same_model = ModelFactory.get_model("openai", "gpt-4-turbo")
+        other_model = ModelFactory.get_model(ModelProvider.OPEN_AI, OpenAIModels.GPT_3_5_TURBO)
+        self.assertIs(model, same_model)
+        self.assertIsNot(model, other_model)
+        stats = ModelClientRegistry.get_stats()
+        self.assertEqual(stats["created"], 2)
+        self.assertEqual(stats["reused"], 1)
+        self.assertEqual(stats["active_clients"], 2)
+
+    def test_models_and_auditors_are_pooled_separately(self):
+        """
+        Test models and auditors for the same model name are distinct pooled instances.
+        """
+        ModelClientRegistry.reset()
+        model = ModelFactory.get_model(ModelProvider.OPEN_AI, OpenAIModels.GPT_4_TURBO)
+        auditor = AuditorFactory.get_auditor(ModelProvider.OPEN_AI, OpenAIModels.GPT_4_TURBO)
+        self.assertIsNot(model, auditor)
+        self.assertIs(auditor, AuditorFactory.get_auditor("openai", "gpt-4-turbo"))
+
+    def test_reset_discards_pooled_models(self):
+        """
+        Test a reset registry (e.g., after fork) creates new model instances.
+        """
+        model = ModelFactory.get_model(ModelProvider.OPEN_AI, OpenAIModels.GPT_4_TURBO)
+        ModelClientRegistry.reset()
+        self.assertIsNot(model, ModelFactory.get_model(ModelProvider.OPEN_AI, OpenAIModels.GPT_4_TURBO))
+        self.assertEqual(ModelClientRegistry.get_stats()["created"], 1)
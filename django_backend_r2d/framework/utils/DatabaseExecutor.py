@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class DatabaseExecutor:
+    """
+    Per worker process thread pool that runs the database calls of coroutines e.g., the asynchronous consumers and chains.
+
+    sync_to_async runs every call on the same thread by default (thread_sensitive=True), so the database calls of every job
+    in-flight on the event loop would be processed one at a time. Calls are instead run on R2D_ASYNC_DATABASE_THREADS threads,
+    each thread uses its own database connection which is closed before and after each call if it has expired (see CONN_MAX_AGE).
+
+    The executor is fork safe, the threads of a parent process are discarded in the child process.
+
+    functions:
+        run: Awaits the function on the database thread pool.
+        reset: Shuts down the thread pool of the current process.
+    """
+    _lock = threading.Lock()
+    _executor = None
+    _pid = None
+
+    @classmethod
+    async def run(cls, function:Callable, *args, **kwargs):
+        """
+        Awaits the function on the database thread pool.
+        args:
+            function (Callable): The function that queries the database.
+            *args, **kwargs: The arguments of the function.
+        returns:
+            The value returned by the function.
+        """
+        return await sync_to_async(cls._with_connection_cleanup(function), thread_sensitive=False, executor=cls._get_executor())(*args, **kwargs)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            if cls._executor is not None and cls._pid == os.getpid():
+                cls._executor.shutdown(wait=False)
+            cls._executor = None
+            cls._pid = None
+
+    @staticmethod
+    def _with_connection_cleanup(function:Callable) -> Callable:
+        """
+        Closes the connection of the thread before and after the call if it has expired or is unusable, as Django does for each request.
+        """
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            close_old_connections()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                close_old_connections()
+        return wrapper
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool of the current process, created on first use and after fork.
+        """
+        with cls._lock:
+            if cls._executor is None or cls._pid != os.getpid():
+                max_workers = getattr(settings, "R2D_ASYNC_DATABASE_THREADS", 8)
+                cls._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="r2d-database")
+                cls._pid = os.getpid()
+                logger.debug(f"Started {max_workers} database threads for process {cls._pid}")
+            return cls._executor
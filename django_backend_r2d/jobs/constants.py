@@ -40,3 +40,44 @@ class ValidJobTypes(Enum):
     SEQUENCE_DIAGRAM = "sequence_diagram"
     STATE_DIAGRAM = "state_diagram"
 
+
+class OrchestrationMode(Enum):
+    """
+    Modes used to submit jobs and to hand off the stages of a diagram pipeline, see R2D_ORCHESTRATION_MODE.
+
+    Enum Key | Value
+    SIGNALS  | signals
+    DIRECT   | direct
+
+    SIGNALS: Saving a Submitted job adds it to the JobQueue (Job post_save), and the JobQueue post_save submits its Celery task.
+    DIRECT: Jobs are submitted by the JobService once the transaction commits, the stages of a pipeline are chained in the Celery canvas
+            and each stage passes a compact artifact of its diagrams to the stages that depend on it. Job and JobQueue rows only record state.
+    """
+    SIGNALS = "signals"
+    DIRECT = "direct"
+
+class ErrorCategory(Enum):
+    """
+    Categories of the errors raised while processing a job, see jobs/services/JobRetryPolicy.py
+
+    Enum Key  | Value
+    TRANSIENT | transient
+    PERMANENT | permanent
+
+    TRANSIENT: The provider was rate limited, timed out or could not be reached, the job is retried after a backoff.
+    PERMANENT: Any other error e.g., a response that does not match the response schema, the job fails without being retried.
+    """
+    TRANSIENT = "transient"
+    PERMANENT = "permanent"
+
+"""
+Priority of the Celery tasks of a job by the role of the user who submitted it, used when R2D_TASK_ROUTING is enabled.
+Redis consumes the messages of a queue with the lowest priority first (0 - 9), see CELERY_BROKER_TRANSPORT_OPTIONS.
+"""
+JOB_PRIORITIES = {
+    "PREMIUM_USER": 0,
+    "IT_ADMINISTRATOR": 0,
+    "ROOT": 0,
+    "NORMAL_USER": 5,
+}
+DEFAULT_JOB_PRIORITY = 5
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_alter_jobhistory_previous_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='bypass_cache',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_job_bypass_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='prompt_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
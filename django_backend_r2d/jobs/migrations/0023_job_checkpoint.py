@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0022_job_prompt_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step', models.CharField(max_length=20)),
+                ('shard_key', models.CharField(max_length=64)),
+                ('output', models.JSONField()),
+                ('created_timestamp', models.DateTimeField(auto_now_add=True)),
+                ('last_updated_timestamp', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'Job Checkpoint',
+                'verbose_name_plural': 'Job Checkpoints',
+                'unique_together': {('job', 'step', 'shard_key')},
+            },
+        ),
+    ]
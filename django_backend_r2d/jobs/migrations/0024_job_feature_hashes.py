@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0023_job_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='feature_hashes',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0024_job_feature_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='pipeline',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
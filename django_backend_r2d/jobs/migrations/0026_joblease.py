@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0025_job_pipeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField()),
+                ('stage', models.CharField(max_length=50)),
+                ('owner', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Job Lease',
+                'verbose_name_plural': 'Job Leases',
+                'unique_together': {('job_id', 'stage')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0026_joblease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=50)),
+                ('attempt', models.PositiveIntegerField()),
+                ('error_category', models.CharField(max_length=20)),
+                ('error_message', models.TextField()),
+                ('retry_countdown', models.FloatField(blank=True, null=True)),
+                ('created_timestamp', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'Job Attempt',
+                'verbose_name_plural': 'Job Attempts',
+                'ordering': ('created_timestamp',),
+            },
+        ),
+    ]
@@ -45,13 +45,18 @@ class Job(models.Model):
         user: User who uploaded the job
         job_status: Status of the job - Draft, Queued, Submission Error, Processing, Job Aborted, Completed, Processing Error
         job_details: Details of the job 
-        tokens: Number of tokens in parameters 
+        tokens: Number of tokens in parameters, counted using the tokenizer of the model
+        prompt_tokens: Estimated number of prompt tokens sent to the model, including the prompt template and response schema
         parameters: Parameters that are sent to LLM for processing
         created_timestamp: Timestamp when the job was created
         last_updated_timestamp: Timestamp when the job was last updated
         parent_job: link to the parent job if the job is a child job, else None
         job_type: Type of the job e.g., user_story, class_diagram, er_diagram, sequence_diagram, state_diagram
         model: ModelName object that the job is associated with
+        bypass_cache: If True, LLM responses are not served from or stored in the LLM response cache, inherited by child jobs
+        feature_hashes: Hash of the user stories of each feature e.g., {"Login": "9f86d0..."}, inherited by child jobs.
+                        Diagrams of unchanged features are copied from the previous job instead of being generated again.
+        pipeline: The stages of the diagram pipeline started by the job and their dependencies, None for jobs created by a pipeline
     """
     
     JOB_TYPES = (
@@ -65,6 +70,7 @@ class Job(models.Model):
     job_status = models.ForeignKey(JobStatus, to_field='code', on_delete=models.PROTECT)
     job_details = models.TextField(max_length=100)
     tokens = models.IntegerField()
+    prompt_tokens = models.IntegerField(null=True, blank=True)
     parameters = models.JSONField()
     job_type = models.CharField(max_length=50, choices=JOB_TYPES)
     model = models.ForeignKey(ModelName, on_delete=models.PROTECT)
@@ -72,6 +78,9 @@ class Job(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_timestamp = models.DateTimeField(auto_now_add=True)
     last_updated_timestamp = models.DateTimeField(auto_now=True)
+    bypass_cache = models.BooleanField(default=False)
+    feature_hashes = models.JSONField(null=True, blank=True)
+    pipeline = models.JSONField(null=True, blank=True)
     
     def __str__(self):
         return f"Job Id: {self.job_id}\nCreated By:{self.user}\nStatus:{self.job_status}\nCreated on:{self.created_timestamp}\nUpdated on:{self.last_updated_timestamp}"
@@ -134,3 +143,87 @@ class JobHistory(models.Model):
 
     def __str__(self):
         return f"Job Id: {self.job.job_id}, Status: {self.status}, Updated on: {self.updated_timestamp}"
+
+class JobCheckpoint(models.Model):
+    """
+    JobCheckpoint table stores the output of each completed step of the chain that processes a job.
+    A job that is retried or resumed restarts from the last completed step instead of invoking the model again.
+    Checkpoints are deleted once the diagrams of the job are saved.
+
+    attributes:
+        job: Job object that the checkpoint belongs to
+        step: Step of the chain e.g., analysis, audit
+        shard_key: Hash of the job parameters (or shard of the job parameters) and models used by the step
+        output: Output of the step e.g., the analysis_results of the model
+        created_timestamp: Timestamp when the checkpoint was created
+        last_updated_timestamp: Timestamp when the checkpoint was last updated
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='checkpoints')
+    step = models.CharField(max_length=20)
+    shard_key = models.CharField(max_length=64)
+    output = models.JSONField()
+    created_timestamp = models.DateTimeField(auto_now_add=True)
+    last_updated_timestamp = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Job Checkpoint"
+        verbose_name_plural = "Job Checkpoints"
+        unique_together = ('job', 'step', 'shard_key')
+
+    def __str__(self):
+        return f"Job Id: {self.job_id}, Step: {self.step}, Shard: {self.shard_key[:8]}"
+
+class JobLease(models.Model):
+    """
+    JobLease table stores the lease held by the Celery task that processes a stage of a job, see jobs/services/JobLeaseManager.py
+    A task acquires the lease if no lease exists for the job and stage or the lease has expired, the holder renews the lease with a heartbeat
+    and deletes it once the task exits. Duplicate tasks of the job and stage exit early while the lease is held.
+
+    attributes:
+        job_id: Job ID of the job, a job submitted by a user for the stages of its pipeline
+        stage: Job type processed by the task e.g., class_diagram
+        owner: Token of the task holding the lease
+        expires_at: Timestamp when the lease expires unless it is renewed
+    """
+    job_id = models.UUIDField()
+    stage = models.CharField(max_length=50)
+    owner = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Job Lease"
+        verbose_name_plural = "Job Leases"
+        unique_together = ('job_id', 'stage')
+
+    def __str__(self):
+        return f"Job Id: {self.job_id}, Stage: {self.stage}, Expires at: {self.expires_at}"
+
+class JobAttempt(models.Model):
+    """
+    JobAttempt table stores the history of the failed attempts to process a job, see jobs/services/JobRetryPolicy.py
+    Jobs that failed with a transient error are retried until the number of attempts of the job reaches R2D_JOB_MAX_ATTEMPTS.
+
+    attributes:
+        job: Job object that failed to process, a job submitted by a user for the stages of its pipeline
+        stage: Job type processed by the attempt e.g., class_diagram
+        attempt: Number of the attempt of the job and stage, starting at 1
+        error_category: Category of the error raised by the attempt e.g., transient, permanent
+        error_message: Error raised by the attempt
+        retry_countdown: Seconds before the job was retried, null if the job was not retried
+        created_timestamp: Timestamp when the attempt failed
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='attempts')
+    stage = models.CharField(max_length=50)
+    attempt = models.PositiveIntegerField()
+    error_category = models.CharField(max_length=20)
+    error_message = models.TextField()
+    retry_countdown = models.FloatField(null=True, blank=True)
+    created_timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Job Attempt"
+        verbose_name_plural = "Job Attempts"
+        ordering = ('created_timestamp',)
+
+    def __str__(self):
+        return f"Job Id: {self.job_id}, Stage: {self.stage}, Attempt: {self.attempt}, Error: {self.error_category}"
@@ -1,8 +1,12 @@
 from rest_framework import serializers
-from jobs.models import Job, JobStatus
-from model_manager.models import ModelName
+from jobs.models import Job
+from model_manager.services.TokenCounter import TokenCounter
+from jobs.services.JobFeatureHasher import JobFeatureHasher
+from jobs.services.JobLookupCache import JobLookupCache
 import json
-import re
+
+import logging
+logger = logging.getLogger("application_logging")
 
 class JobSerializer(serializers.ModelSerializer):
     """
@@ -17,11 +21,15 @@ class JobSerializer(serializers.ModelSerializer):
         job_type: Type of the job e.g., user_story, class_diagram, er_diagram, sequence_diagram, state_diagram
         parent_job: link to the parent job if the job is a child job, else None
         model: ModelName object that the job is associated with
+        bypass_cache: Set to True to bypass the LLM response cache (Optional)
+        feature_hashes: Hash of the user stories of each feature (Optional), child jobs inherit the hashes of their parent job
     
     Computes:
         job_status: The status of the job
         model_name: The name of the model associated with the
-        tokens: Number of tokens in parameters, if key is not present, will calculate the number of tokens present in parameters.
+        tokens: Number of tokens in parameters, if key is not present, will count the tokens in parameters using the tokenizer of the model.
+        prompt_tokens: Estimated number of prompt tokens sent to the model, including the prompt template and response schema.
+        feature_hashes: Hash of the user stories of each feature, if not provided will be computed from the parameters.
     """
     # Define a SlugRelatedField for the job_status field
     job_status = serializers.CharField(write_only=True)
@@ -29,9 +37,11 @@ class JobSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Job
-        fields = ["job_id", "user", "job_status", "job_details", "tokens", "parameters", "job_type", "parent_job", "model_name"]
+        fields = ["job_id", "user", "job_status", "job_details", "tokens", "prompt_tokens", "parameters", "job_type", "parent_job", "model_name", "bypass_cache", "feature_hashes"]
         extra_kwargs = {
             'tokens': {'required': False, 'allow_null': True},
+            'prompt_tokens': {'read_only': True},
+            'feature_hashes': {'required': False, 'allow_null': True},
         }
              
     def create(self, validated_data):
@@ -41,26 +51,53 @@ class JobSerializer(serializers.ModelSerializer):
         model_name = validated_data.pop('model_name')
         job_status = validated_data.pop('job_status')
        
-        validated_data['job_status'] = JobStatus.objects.get(name=job_status)
-        validated_data['model'] = ModelName.objects.get(name=model_name)
+        validated_data['job_status'] = JobLookupCache.get_job_status(job_status)
+        validated_data['model'] = JobLookupCache.get_model_name(model_name)
         
+        parameters = validated_data.get('parameters', {})
         if 'tokens' not in validated_data or validated_data['tokens'] is None:
-            parameters = validated_data.get('parameters', {})
-            validated_data['tokens'] = self.compute_tokens(parameters)
+            validated_data['tokens'] = self.compute_tokens(parameters, model_name)
+        validated_data['prompt_tokens'] = self.compute_prompt_tokens(validated_data.get('job_type'), parameters, model_name)
+        if not validated_data.get('feature_hashes'):
+            validated_data['feature_hashes'] = self.compute_feature_hashes(parameters)
         
         return super().create(validated_data)
     
-    def compute_tokens(self, parameters):
+    def compute_tokens(self, parameters, model_name:str=None):
         """
         Compute the number of tokens in the parameters, including nested JSON structures.
+        Tokens are counted using the tokenizer of the model, counts are cached by the hash of the parameters.
         """
-        # Convert the JSON to a string
-        json_string = json.dumps(parameters)
-        
-        # Count the words in the string
-        token_count = len(re.findall(r'\w+', json_string))
+        return TokenCounter(model_name).count_parameters(parameters)
+
+    def compute_feature_hashes(self, parameters):
+        """
+        Compute the hash of the user stories of each feature, None if the parameters are not grouped by feature.
+        """
+        return JobFeatureHasher().hash_features(parameters) or None
+
+    def compute_prompt_tokens(self, job_type:str, parameters, model_name:str=None):
+        """
+        Estimate the number of prompt tokens sent to the model, the parameters are rendered using the prompt template of the job type.
+        Returns None if the job type is not processed by an analyze and audit chain or the prompt cannot be rendered.
+        """
+        # Imported here as the chain inputs depend on the JobService
+        from diagrams.chain_inputs.ChainInputRegistry import get_chain_input_class
         
-        return token_count 
+        chain_input_class = get_chain_input_class(job_type)
+        if chain_input_class is None:
+            return None
+        try:
+            # Parameters of child jobs are stored as a JSON string, they are decoded before being rendered into the prompt
+            if isinstance(parameters, str):
+                parameters = json.loads(parameters)
+            chain_input = chain_input_class(job_id=None, job_parameters=parameters)
+            return TokenCounter(model_name).estimate_prompt_tokens(
+                chain_input.get_model_prompt_template(), parameters, chain_input.get_model_response_schema(), chain_input.get_analysis_context())
+        except Exception as e:
+            logger.warning(f"Unable to estimate prompt tokens for {job_type} job: {e}")
+            return None
+
     def update(self, instance, validated_data):
         # Retrieve the model_name and job_status from the validated data
         # If tokens are not present, compute the number of tokens in the parameters
@@ -68,13 +105,17 @@ class JobSerializer(serializers.ModelSerializer):
         job_status = validated_data.pop('job_status', None)
         
         if model_name:
-            instance.model = ModelName.objects.get(name=model_name)
+            instance.model = JobLookupCache.get_model_name(model_name)
         if job_status:
-            instance.job_status = JobStatus.objects.get(name=job_status)
+            instance.job_status = JobLookupCache.get_job_status(job_status)
             
+        parameters = validated_data.get('parameters', instance.parameters)
         if 'tokens' not in validated_data or validated_data['tokens'] is None:
-            parameters = validated_data.get('parameters', instance.parameters)
-            validated_data['tokens'] = self.compute_tokens(parameters)
+            validated_data['tokens'] = self.compute_tokens(parameters, instance.model.name)
+        validated_data['prompt_tokens'] = self.compute_prompt_tokens(validated_data.get('job_type', instance.job_type), parameters, instance.model.name)
+        if not validated_data.get('feature_hashes'):
+            # Stories may have been edited, hashes are recomputed unless provided
+            validated_data['feature_hashes'] = self.compute_feature_hashes(parameters) or instance.feature_hashes
             
         return super().update(instance, validated_data)
     
@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from jobs.models import JobQueue, JobStatus
+from jobs.models import JobQueue
 from jobs.constants import ValidJobStatus
+from jobs.services.JobLookupCache import JobLookupCache
 
 class UpdateJobQueueStatusSerializer(serializers.Serializer):
     """
@@ -35,7 +36,7 @@ class UpdateJobQueueStatusSerializer(serializers.Serializer):
         Valid job status: Submitted, Processing, Error Failed to Process, Job Aborted, Completed
         """
         if job_status in [status.value for status in ValidJobStatus]:
-            return JobStatus.objects.get(name=job_status)
+            return JobLookupCache.get_job_status(job_status)
         raise serializers.ValidationError(f"Invalid job status provided - {job_status}", code='invalid_job_status')
 
     def validate_consumer(self, consumer: str):
@@ -0,0 +1,76 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError
+
+from jobs.models import JobCheckpoint
+
+import logging
+logger = logging.getLogger("application_logging") # Instantiate logger class
+
+class JobCheckpointService:
+    """
+    Stores the output of each completed step of the chain that processes a job, so that a retried or resumed job
+    restarts from the last completed step instead of invoking the model again.
+
+    Checkpointing is best effort, errors are logged and never fail the job.
+
+    functions:
+        get_checkpoint: Returns the output of a completed step.
+        save_checkpoint: Stores the output of a completed step.
+        get_completed_steps: Returns the steps completed for a job.
+        clear_checkpoints: Deletes the checkpoints of a job.
+    """
+    def get_checkpoint(self, job_id:str, step:str, shard_key:str):
+        """
+        Returns the output of the step, or None if the step has not been completed.
+        args:
+            job_id (str): The job ID.
+            step (str): The step of the chain e.g., analysis
+            shard_key (str): Hash of the job parameters and models used by the step.
+        """
+        try:
+            return JobCheckpoint.objects.filter(job_id=job_id, step=step, shard_key=shard_key).values_list('output', flat=True).first()
+        except (DatabaseError, DjangoValidationError, ValueError) as e:
+            logger.warning(f"Unable to retrieve {step} checkpoint for job {job_id}: {str(e)}")
+            return None
+
+    def save_checkpoint(self, job_id:str, step:str, shard_key:str, output) -> bool:
+        """
+        Stores the output of the step, replacing the previous output of the same step.
+        args:
+            job_id (str): The job ID.
+            step (str): The step of the chain e.g., analysis
+            shard_key (str): Hash of the job parameters and models used by the step.
+            output (dict or str): The JSON serializable output of the step.
+        returns:
+            bool: True if the checkpoint was stored.
+        """
+        try:
+            JobCheckpoint.objects.update_or_create(job_id=job_id, step=step, shard_key=shard_key, defaults={'output': output})
+            logger.debug(f"Saved {step} checkpoint for job {job_id}")
+            return True
+        except (DatabaseError, DjangoValidationError, ValueError, TypeError) as e:
+            logger.warning(f"Unable to save {step} checkpoint for job {job_id}: {str(e)}")
+            return False
+
+    def get_completed_steps(self, job_id:str) -> list[str]:
+        """
+        Returns the distinct steps with a checkpoint for the job e.g., ["analysis"]
+        """
+        try:
+            return sorted(set(JobCheckpoint.objects.filter(job_id=job_id).values_list('step', flat=True)))
+        except (DatabaseError, DjangoValidationError, ValueError) as e:
+            logger.warning(f"Unable to retrieve checkpoints for job {job_id}: {str(e)}")
+            return []
+
+    def clear_checkpoints(self, job_id:str) -> int:
+        """
+        Deletes the checkpoints of the job, invoked once the diagrams of the job are saved.
+        returns:
+            int: The number of checkpoints deleted.
+        """
+        try:
+            deleted, _ = JobCheckpoint.objects.filter(job_id=job_id).delete()
+            return deleted
+        except (DatabaseError, DjangoValidationError, ValueError) as e:
+            logger.warning(f"Unable to delete checkpoints for job {job_id}: {str(e)}")
+            return 0
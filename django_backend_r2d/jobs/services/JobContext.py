@@ -0,0 +1,87 @@
+import json
+from rest_framework.exceptions import ValidationError
+
+from jobs.models import Job
+from jobs.services.JobExceptions import JobNotFoundException
+
+import logging
+logger = logging.getLogger("application_logging") # Instantiate logger class
+
+class JobContext:
+    """
+    The job processed by a diagram service and consumer, loaded once with its user, model, status and parent job.
+
+    Diagram services, consumers and create_next_record read the job from the context instead of querying the Job table again,
+    so that initializing a consumer issues a single query for the job.
+    The context is a snapshot of the job when it was loaded, status updates are written through the JobService.
+
+    functions:
+        load: Loads the job and its related records in a single query.
+        get_job_parameters: Returns the job parameters as a dictionary.
+    """
+    def __init__(self, job:Job):
+        self.job = job
+        self._job_parameters = None
+
+    @classmethod
+    def load(cls, job_id:str) -> "JobContext":
+        """
+        Loads the job with its user, model, job status and parent job in a single query.
+        args:
+            job_id (str): The job ID.
+        returns:
+            JobContext: The context of the job.
+        raises:
+            JobNotFoundException: If the job does not exist.
+        """
+        job = Job.objects.select_related('user', 'model', 'job_status', 'parent_job').filter(job_id=job_id).first()
+        if job is None:
+            raise JobNotFoundException(f"Job with ID {job_id} not found.")
+        return cls(job)
+
+    @property
+    def job_id(self) -> str:
+        return str(self.job.job_id)
+
+    @property
+    def user(self):
+        return self.job.user
+
+    @property
+    def model(self):
+        return self.job.model
+
+    @property
+    def parent_job(self):
+        return self.job.parent_job
+
+    @property
+    def bypass_cache(self) -> bool:
+        return bool(self.job.bypass_cache)
+
+    @property
+    def feature_hashes(self):
+        return self.job.feature_hashes
+
+    def matches(self, job_id) -> bool:
+        """
+        Returns True if the context holds the job provided.
+        """
+        return job_id is not None and self.job_id == str(job_id)
+
+    def get_job_parameters(self) -> dict:
+        """
+        Returns the job parameters as a dictionary, parameters stored as a JSON string are decoded once.
+        raises:
+            ValidationError: If the job parameters cannot be decoded from JSON.
+        """
+        if self._job_parameters is None:
+            parameters = self.job.parameters
+            if isinstance(parameters, dict):
+                self._job_parameters = parameters
+            else:
+                try:
+                    self._job_parameters = json.loads(parameters)
+                except json.JSONDecodeError as e:
+                    raise ValidationError(f"Failed to decode job parameters: {str(e)}")
+        return self._job_parameters
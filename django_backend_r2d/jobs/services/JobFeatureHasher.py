@@ -0,0 +1,43 @@
+import hashlib
+import json
+
+import logging
+logger = logging.getLogger("application_logging") # Instantiate logger class
+
+class JobFeatureHasher:
+    """
+    Computes a content hash of the user stories of each feature of a job.
+    Hashes are compared when a job is resubmitted, diagrams of features whose hash did not change are copied from the previous job.
+
+    Job parameters are expected to be in the UMLDiagramSerializer format:
+    {"features": [...], "sub_features": [...], "job_parameters": {feature: {sub_feature: {story_id: story}}}}
+    Job parameters in any other format e.g., the parameters of child jobs, have no feature hashes.
+
+    functions:
+        hash_features: Returns the hash of each feature of the job parameters.
+    """
+    def hash_features(self, parameters) -> dict:
+        """
+        Returns the hash of the user stories of each feature, keys are sorted so the hash does not depend on the order of the stories.
+        args:
+            parameters (dict or str): The job parameters, parameters stored as a JSON string are decoded.
+        returns:
+            dict: The hash of each feature e.g., {"Login": "9f86d0..."}, empty if the parameters are not grouped by feature.
+        """
+        if isinstance(parameters, str):
+            try:
+                parameters = json.loads(parameters)
+            except json.JSONDecodeError:
+                return {}
+        stories_by_feature = parameters.get("job_parameters") if isinstance(parameters, dict) else None
+        if not isinstance(stories_by_feature, dict):
+            return {}
+        try:
+            return {feature: self._hash(sub_features) for feature, sub_features in stories_by_feature.items()}
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Unable to hash the features of the job parameters: {e}")
+            return {}
+
+    @staticmethod
+    def _hash(value) -> str:
+        return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
@@ -0,0 +1,246 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from uuid import uuid4
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, transaction, connections
+from django.utils import timezone
+
+from jobs.models import JobLease
+
+import logging
+logger = logging.getLogger('application_logging')
+
+"""
+Renews the lease if it is held by the owner.
+KEYS[1]: lease, ARGV[1]: owner, ARGV[2]: time to live in milliseconds
+Returns 1 if the lease was renewed.
+"""
+LEASE_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+"""
+Deletes the lease if it is held by the owner.
+KEYS[1]: lease, ARGV[1]: owner
+"""
+LEASE_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class DatabaseLeaseStore:
+    """
+    Leases stored in the JobLease table, shared by every worker process that connects to the same database.
+    A lease is acquired by inserting its row, or by taking over an expired row using a conditional update,
+    so that only one task acquires a lease even if several tasks attempt to acquire it at the same time.
+    """
+    def acquire(self, job_id:str, stage:str, owner:str, ttl:float) -> bool:
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl)
+        if JobLease.objects.filter(job_id=job_id, stage=stage, expires_at__lte=now).update(owner=owner, expires_at=expires_at):
+            return True
+        try:
+            with transaction.atomic():
+                JobLease.objects.create(job_id=job_id, stage=stage, owner=owner, expires_at=expires_at)
+            return True
+        except IntegrityError:
+            return False
+
+    def renew(self, job_id:str, stage:str, owner:str, ttl:float) -> bool:
+        return JobLease.objects.filter(job_id=job_id, stage=stage, owner=owner).update(expires_at=timezone.now() + timedelta(seconds=ttl)) > 0
+
+    def release(self, job_id:str, stage:str, owner:str):
+        JobLease.objects.filter(job_id=job_id, stage=stage, owner=owner).delete()
+
+class RedisLeaseStore:
+    """
+    Leases stored in Redis, shared by every worker process that connects to the same Redis database.
+    args:
+        url (str): Redis connection url e.g., redis://redis:6379/2
+    """
+    KEY_PREFIX = "r2d_lease"
+
+    def __init__(self, url:str):
+        self.client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+        self.renew_script = self.client.register_script(LEASE_RENEW_SCRIPT)
+        self.release_script = self.client.register_script(LEASE_RELEASE_SCRIPT)
+
+    def acquire(self, job_id:str, stage:str, owner:str, ttl:float) -> bool:
+        return bool(self.client.set(self._key(job_id, stage), owner, nx=True, px=int(ttl * 1000)))
+
+    def renew(self, job_id:str, stage:str, owner:str, ttl:float) -> bool:
+        return bool(self.renew_script(keys=[self._key(job_id, stage)], args=[owner, int(ttl * 1000)]))
+
+    def release(self, job_id:str, stage:str, owner:str):
+        self.release_script(keys=[self._key(job_id, stage)], args=[owner])
+
+    def _key(self, job_id:str, stage:str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}:{stage}"
+
+class LocalLeaseStore:
+    """
+    Leases stored in memory, only shared by the threads of the current process.
+    Used for local development and tests where duplicate tasks run in the same process.
+    """
+    def __init__(self):
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, job_id:str, stage:str, owner:str, ttl:float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            lease = self._leases.get((job_id, stage))
+            if lease is not None and lease[1] > now:
+                return False
+            self._leases[(job_id, stage)] = (owner, now + ttl)
+            return True
+
+    def renew(self, job_id:str, stage:str, owner:str, ttl:float) -> bool:
+        with self._lock:
+            lease = self._leases.get((job_id, stage))
+            if lease is None or lease[0] != owner:
+                return False
+            self._leases[(job_id, stage)] = (owner, time.monotonic() + ttl)
+            return True
+
+    def release(self, job_id:str, stage:str, owner:str):
+        with self._lock:
+            if self._leases.get((job_id, stage), (None,))[0] == owner:
+                del self._leases[(job_id, stage)]
+
+class JobLeaseManager:
+    """
+    Lease per job and stage held by the Celery task that processes it, so that a task that is retried, redelivered after a worker crash
+    or submitted twice does not run the chain of the job again while another task is processing it.
+
+    The holder renews its lease with a heartbeat every ttl / 3 seconds until the task exits, the lease of a worker that crashed
+    expires after ttl seconds and can then be acquired by a redelivered task.
+
+    The store is configured using R2D_JOB_LEASE_BACKEND - database (default, shared by all workers), redis (shared by all workers),
+    local (per process) or disabled. If Redis is unavailable leases are granted.
+
+    functions:
+        hold: Context manager that acquires the lease and renews it until the block exits, yields True if the lease was acquired.
+        acquire: Acquires the lease, returns the owner token or None if the lease is held by another task.
+        renew: Extends the lease held by the owner.
+        release: Deletes the lease held by the owner.
+        reset: Discards the stores of the current process.
+    """
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, ttl:float = None):
+        self.ttl = ttl or getattr(settings, "R2D_JOB_LEASE_TTL", 120)
+        self.heartbeat_interval = self.ttl / 3
+
+    @contextmanager
+    def hold(self, job_id:str, stage:str):
+        """
+        Acquires the lease of the job and stage, and renews it with a heartbeat until the block exits.
+        args:
+            job_id (str): The job ID.
+            stage (str): The stage processed by the task e.g., class_diagram
+        yields:
+            bool: True if the lease was acquired, False if it is held by another task.
+        """
+        owner = self.acquire(job_id, stage)
+        if owner is None:
+            yield False
+            return
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stage, owner, stop), name=f"lease-{job_id}-{stage}", daemon=True)
+        heartbeat.start()
+        try:
+            yield True
+        finally:
+            stop.set()
+            heartbeat.join()
+            self.release(job_id, stage, owner)
+
+    def acquire(self, job_id:str, stage:str):
+        """
+        returns:
+            str: The owner token of the lease, None if the lease is held by another task.
+        """
+        owner = uuid4().hex
+        store = self._get_store()
+        if store is None:
+            return owner
+        try:
+            if store.acquire(str(job_id), stage, owner, self.ttl):
+                logger.debug(f"Acquired lease of {stage} for - {job_id}")
+                return owner
+            return None
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Job lease unavailable, processing {stage} for - {job_id}: {e}")
+            return owner
+
+    def renew(self, job_id:str, stage:str, owner:str) -> bool:
+        """
+        returns:
+            bool: True if the lease is still held by the owner.
+        """
+        store = self._get_store()
+        if store is None:
+            return True
+        try:
+            return store.renew(str(job_id), stage, owner, self.ttl)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Unable to renew the lease of {stage} for - {job_id}: {e}")
+            return True
+
+    def release(self, job_id:str, stage:str, owner:str):
+        store = self._get_store()
+        if store is None:
+            return
+        try:
+            store.release(str(job_id), stage, owner)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Unable to release the lease of {stage} for - {job_id}, it expires in {self.ttl} seconds: {e}")
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the stores of the current process, local leases are released.
+        """
+        with cls._stores_lock:
+            cls._stores = {}
+
+    def _heartbeat(self, job_id:str, stage:str, owner:str, stop:threading.Event):
+        """
+        Renews the lease until the task exits, runs in a daemon thread with its own database connection.
+        """
+        try:
+            while not stop.wait(self.heartbeat_interval):
+                if not self.renew(job_id, stage, owner):
+                    logger.warning(f"Lost the lease of {stage} for - {job_id}, the job may be processed by another task")
+                    return
+        except Exception as e:
+            logger.error(f"Lease heartbeat of {stage} for - {job_id} failed: {e}")
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def _get_store(cls):
+        """
+        Returns the store configured by R2D_JOB_LEASE_BACKEND, stores are created once per process.
+        """
+        backend_name = getattr(settings, "R2D_JOB_LEASE_BACKEND", "database")
+        if backend_name == "disabled":
+            return None
+        key = (backend_name, getattr(settings, "R2D_JOB_LEASE_REDIS_URL", None))
+        with cls._stores_lock:
+            if key not in cls._stores:
+                stores = {"redis": lambda: RedisLeaseStore(key[1]), "local": LocalLeaseStore}
+                cls._stores[key] = stores.get(backend_name, DatabaseLeaseStore)()
+            return cls._stores[key]
@@ -0,0 +1,87 @@
+import os
+import threading
+
+from jobs.models import JobStatus
+from model_manager.models import ModelName
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class JobLookupCache:
+    """
+    Per process cache of the JobStatus and ModelName rows, the rows are created by migrations and cannot be modified (see their save methods).
+    Jobs look up their status and model by name on every status change, the cached rows are returned without querying the database.
+    The cache is loaded by warm_up when a worker process starts, rows that are not cached are read from the database on first use.
+
+    The cache is fork safe, rows cached by a parent process are discarded in the child process.
+
+    functions:
+        get_job_status: Returns the JobStatus with the name.
+        get_model_name: Returns the ModelName with the name.
+        warm_up: Loads every JobStatus and ModelName row.
+        reset: Discards the cached rows.
+    """
+    _lock = threading.Lock()
+    _job_statuses = {}
+    _model_names = {}
+    _pid = os.getpid()
+
+    @classmethod
+    def get_job_status(cls, name:str) -> JobStatus:
+        """
+        raises:
+            JobStatus.DoesNotExist: If no job status has the name.
+        """
+        cls._ensure_current_process()
+        job_status = cls._job_statuses.get(name)
+        if job_status is None:
+            job_status = JobStatus.objects.get(name=name)
+            with cls._lock:
+                cls._job_statuses[name] = job_status
+        return job_status
+
+    @classmethod
+    def get_model_name(cls, name:str) -> ModelName:
+        """
+        raises:
+            ModelName.DoesNotExist: If no model has the name.
+        """
+        cls._ensure_current_process()
+        model_name = cls._model_names.get(name)
+        if model_name is None:
+            model_name = ModelName.objects.get(name=name)
+            with cls._lock:
+                cls._model_names[name] = model_name
+        return model_name
+
+    @classmethod
+    def warm_up(cls) -> int:
+        """
+        Loads every JobStatus and ModelName row, called when a worker process starts.
+        returns:
+            int: The number of rows cached.
+        """
+        cls._ensure_current_process()
+        job_statuses = {job_status.name: job_status for job_status in JobStatus.objects.all()}
+        model_names = {model_name.name: model_name for model_name in ModelName.objects.all()}
+        with cls._lock:
+            cls._job_statuses.update(job_statuses)
+            cls._model_names.update(model_names)
+        return len(job_statuses) + len(model_names)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._job_statuses = {}
+            cls._model_names = {}
+
+    @classmethod
+    def _ensure_current_process(cls):
+        """
+        Discards the rows cached by the parent process after a fork.
+        """
+        if cls._pid != os.getpid():
+            with cls._lock:
+                cls._job_statuses = {}
+                cls._model_names = {}
+                cls._pid = os.getpid()
@@ -0,0 +1,88 @@
+import random
+from typing import Optional
+
+import openai
+from django.conf import settings
+from django.db import DatabaseError
+
+from jobs.constants import ErrorCategory
+from jobs.models import JobAttempt
+from model_manager.services.ModelExceptions import ModelRateLimitTimeoutError
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class JobRetryPolicy:
+    """
+    Decides whether a diagram job that failed to process is retried, and records every failed attempt of the job in the JobAttempt table.
+
+    Errors are transient if the provider was rate limited, timed out or could not be reached, any other error is permanent.
+    The errors raised by the models are wrapped by the diagram services, consumers and tasks, so the whole chain of the error
+    (__cause__ and __context__) is inspected.
+
+    Jobs that failed with a transient error are retried after a jittered exponential backoff until the job and stage
+    has been attempted R2D_JOB_MAX_ATTEMPTS times, jobs that failed with a permanent error are not retried.
+    args:
+        max_attempts (int): Attempts of a job and stage before it fails, including the first attempt. Default is R2D_JOB_MAX_ATTEMPTS.
+        backoff_base (float): Seconds before the first retry. Default is R2D_JOB_RETRY_BACKOFF_BASE.
+        backoff_max (float): Maximum seconds before a retry. Default is R2D_JOB_RETRY_BACKOFF_MAX.
+    functions:
+        classify: Returns the category of an error.
+        get_countdown: Returns the seconds to wait before an attempt is retried.
+        record_failure: Records the failed attempt, returns the seconds before the job is retried or None if the job fails.
+    """
+    # openai.APITimeoutError is an APIConnectionError
+    TRANSIENT_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError, ModelRateLimitTimeoutError,
+                        TimeoutError, ConnectionError)
+
+    def __init__(self, max_attempts:int = None, backoff_base:float = None, backoff_max:float = None):
+        self.max_attempts = max_attempts or getattr(settings, "R2D_JOB_MAX_ATTEMPTS", 4)
+        self.backoff_base = backoff_base or getattr(settings, "R2D_JOB_RETRY_BACKOFF_BASE", 5)
+        self.backoff_max = backoff_max or getattr(settings, "R2D_JOB_RETRY_BACKOFF_MAX", 300)
+
+    def classify(self, error:Exception) -> ErrorCategory:
+        """
+        Returns TRANSIENT if the error, or an error it was raised from, is a transient error.
+        """
+        seen = set()
+        while error is not None and id(error) not in seen:
+            if isinstance(error, self.TRANSIENT_ERRORS):
+                return ErrorCategory.TRANSIENT
+            seen.add(id(error))
+            error = error.__cause__ or error.__context__
+        return ErrorCategory.PERMANENT
+
+    def get_countdown(self, attempt:int) -> float:
+        """
+        Returns the seconds to wait before the attempt is retried, the backoff doubles with each attempt.
+        Jitter spreads out the jobs that failed at the same time e.g., jobs rate limited by the same model, so they do not all retry at the same time.
+        args:
+            attempt (int): The number of the attempt that failed, starting at 1.
+        """
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(backoff / 2, backoff)
+
+    def record_failure(self, job_id:str, stage:str, error:Exception) -> Optional[float]:
+        """
+        Records the failed attempt of the job and stage, and returns the seconds before the job is retried.
+        args:
+            job_id (str): The job ID, the job submitted by a user for the stages of its pipeline.
+            stage (str): The job type processed by the attempt e.g., class_diagram
+            error (Exception): The error raised by the attempt.
+        returns:
+            float: The seconds before the job is retried, None if the error is permanent or the attempts of the job have been exhausted.
+        """
+        category = self.classify(error)
+        attempt = JobAttempt.objects.filter(job_id=job_id, stage=stage).count() + 1
+        countdown = self.get_countdown(attempt) if category == ErrorCategory.TRANSIENT and attempt < self.max_attempts else None
+        try:
+            JobAttempt.objects.create(job_id=job_id, stage=stage, attempt=attempt, error_category=category.value,
+                                      error_message=str(error), retry_countdown=countdown)
+        except DatabaseError as e:
+            logger.warning(f"Unable to record attempt {attempt} of {stage} for job {job_id}: {str(e)}")
+
+        if countdown is not None:
+            logger.info(f"Attempt {attempt} of {self.max_attempts} of {stage} for job {job_id} failed with a transient error, retrying in {countdown:.0f} seconds")
+        else:
+            logger.warning(f"Attempt {attempt} of {stage} for job {job_id} failed with a {category.value} error, the job is not retried")
+        return countdown
@@ -7,6 +7,8 @@ from jobs.serializers.JobSerializer import JobSerializer
 from jobs.serializers.UpdateJobStatusSerializer import UpdateJobStatusSerializer
 from jobs.serializers.GetJobSerializer import GetJobSerializer
 from jobs.services.JobExceptions import *
+from jobs.services.JobSubmissionService import JobSubmissionService
+from jobs.services.JobLookupCache import JobLookupCache
 from jobs.constants import ValidJobStatus
 
 import logging 
@@ -34,11 +36,13 @@ class JobService(JobServiceInterface):
         """
         job_id = job_data.get('job_id')
         job_data['user'] = user.id  # Add user id to job_data
+        previous_status_code = None
 
         try:
             try:
                 # Try to retrieve the job if it already exists -- Update Case
                 job = Job.objects.get(job_id=job_id, user=user)
+                previous_status_code = job.job_status_id
                 serializer = JobSerializer(job, data=job_data)
             except Job.DoesNotExist:
                 # Create a new job if it does not exist -- Create Case
@@ -48,6 +52,7 @@ class JobService(JobServiceInterface):
                 # Save the job if the serializer is valid
                 job = serializer.save()              
                 logger.debug(f"Job record Successfully saved for user {user.id}")
+                self._submit_if_submitted(job, previous_status_code)
                 return job
             
             # Log and raise validation error if serializer is invalid
@@ -89,9 +94,11 @@ class JobService(JobServiceInterface):
 
         try:
             job = Job.objects.get(job_id=job_id, user=user)
-            job_status_instance = JobStatus.objects.get(name=job_status)
+            previous_status_code = job.job_status_id
+            job_status_instance = JobLookupCache.get_job_status(job_status)
             job.job_status = job_status_instance
             job.save() 
+            self._submit_if_submitted(job, previous_status_code)
             return job
         except Job.DoesNotExist:
             raise JobNotFoundException(f"Job with id {job_id} does not exist for user {user.id}.")
@@ -195,9 +202,11 @@ class JobService(JobServiceInterface):
         try:
             # Retrieve the job and update its job_status
             job = Job.objects.get(job_id=job_id)
-            job_status_instance = JobStatus.objects.get(name=job_status)
+            previous_status_code = job.job_status_id
+            job_status_instance = JobLookupCache.get_job_status(job_status)
             job.job_status = job_status_instance
             job.save() 
+            self._submit_if_submitted(job, previous_status_code)
             return job
         except Job.DoesNotExist:
             raise JobNotFoundException(f"Job with id {job_id} does not exist")
@@ -307,10 +316,9 @@ class JobService(JobServiceInterface):
                 job_meta = (parent.job_id, parent.job_type)
                 jobs.append(job_meta)
 
-                # Retrieve the single child of the current job, if it exists
-                child = Job.objects.filter(parent_job_id=current_job_id).first()
-                if child:
-                    queue.append(child.job_id)  # Add the child job_id to the queue
+                # Retrieve the children of the current job, jobs of a diagram pipeline can have several children
+                children = Job.objects.filter(parent_job_id=current_job_id).order_by('created_timestamp').values_list('job_id', flat=True)
+                queue.extend(children)  # Add the child job_ids to the queue
 
                 # Stop if the limit is reached
                 if len(jobs) >= limit:
@@ -387,4 +395,12 @@ class JobService(JobServiceInterface):
             job.delete()
             return True
         except Job.DoesNotExist:
-            return False
\ No newline at end of file
+            return False
+
+    def _submit_if_submitted(self, job:Job, previous_status_code:int = None):
+        """
+        Submits the job if R2D_ORCHESTRATION_MODE is direct and its status was changed to Submitted,
+        otherwise the job is submitted by the Job and JobQueue signals (see jobs/signals.py).
+        """
+        if JobSubmissionService.is_direct() and job.job_status_id == 3 and previous_status_code != 3:  # Status changed to Submitted
+            JobSubmissionService().submit(job)
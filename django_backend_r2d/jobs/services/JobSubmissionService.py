@@ -0,0 +1,82 @@
+from functools import partial
+from typing import Callable, Iterable
+from django.conf import settings
+from django.db import transaction
+
+from jobs.constants import OrchestrationMode, ValidJobStatus
+from jobs.models import Job, JobQueue, JobStatus
+from jobs.services.JobQueueService import JobQueueService
+
+import logging
+logger = logging.getLogger('application_logging')
+
+class JobSubmissionService:
+    """
+    Submits jobs without the Job and JobQueue signals when R2D_ORCHESTRATION_MODE is direct, see jobs/constants.py OrchestrationMode.
+
+    A submitted job is added to the JobQueue, and the dispatcher registered for its job type is called once the transaction commits,
+    so that workers never read a job that has not been committed. Apps register the dispatchers of their job types when they are ready,
+    e.g., the diagrams app registers the DiagramJobDispatcher. A job that cannot be dispatched is marked as Error Failed to Submit.
+
+    functions:
+        is_direct: Returns True if jobs are submitted by the JobService rather than the signals.
+        register_dispatcher: Registers the function that submits the Celery task of a job type.
+        submit: Adds the job to the JobQueue and dispatches it once the transaction commits.
+        dispatch: Calls the dispatcher registered for the job type of the job.
+    """
+    _dispatchers = {}
+
+    def __init__(self, job_queue_service:JobQueueService = None):
+        self.job_queue_service = job_queue_service or JobQueueService()
+
+    @staticmethod
+    def is_direct() -> bool:
+        return getattr(settings, "R2D_ORCHESTRATION_MODE", OrchestrationMode.SIGNALS.value) == OrchestrationMode.DIRECT.value
+
+    @classmethod
+    def register_dispatcher(cls, job_types:Iterable[str], dispatcher:Callable[[Job], None]):
+        """
+        Registers the dispatcher of the job types, replacing the dispatcher previously registered for them.
+        args:
+            job_types (Iterable[str]): The job types e.g., ["class_diagram", "er_diagram"]
+            dispatcher (Callable[[Job], None]): Submits the Celery task or canvas that processes the job.
+        """
+        for job_type in job_types:
+            cls._dispatchers[job_type] = dispatcher
+
+    def submit(self, job:Job):
+        """
+        Adds the job to the JobQueue, the job is dispatched once the current transaction commits.
+        args:
+            job (Job): The job saved with status Submitted.
+        raises:
+            AddToJobQueueException: If the job could not be added to the JobQueue.
+        """
+        self.job_queue_service.enqueue(job)
+        transaction.on_commit(partial(self.dispatch, job))
+        logger.debug(f"Submitted {job.job_type} job {job.job_id}")
+
+    def dispatch(self, job:Job):
+        """
+        Calls the dispatcher of the job type, the job is marked as Error Failed to Submit if its task could not be submitted.
+        Jobs without a dispatcher, e.g., user stories, remain in the JobQueue.
+        """
+        dispatcher = self._dispatchers.get(job.job_type)
+        if dispatcher is None:
+            logger.info(f"No dispatcher registered for {job.job_type}, job {job.job_id} remains in the JobQueue")
+            return
+        try:
+            dispatcher(job)
+        except Exception as e:
+            logger.error(f"Unable to dispatch {job.job_type} job {job.job_id}: {e}")
+            self._mark_failed_to_submit(job)
+
+    @staticmethod
+    def _mark_failed_to_submit(job:Job):
+        try:
+            status = JobStatus.objects.get(name=ValidJobStatus.ERROR_FAILED_TO_SUBMIT.value)
+            job.job_status = status
+            job.save(update_fields=['job_status', 'last_updated_timestamp'])
+            JobQueue.objects.filter(job_id=job.job_id).update(status=status)
+        except Exception as e:
+            logger.error(f"Unable to mark job {job.job_id} as {ValidJobStatus.ERROR_FAILED_TO_SUBMIT.value}: {e}")
@@ -7,6 +7,7 @@ from jobs.models import Job, JobQueue, JobHistory, JobStatus
 from jobs.services.JobExceptions import *   
 from jobs.services.JobQueueService import JobQueueService
 from jobs.services.JobHistoryService import JobHistoryService
+from jobs.services.JobSubmissionService import JobSubmissionService
 
 # Initialize logging class and retrieve the custom user model
 import logging
@@ -21,6 +22,7 @@ job_queue_service = JobQueueService()
 A Job will be added to JobQueue if:
 1. It is created with status Submitted
 2. It is updated to status Submitted
+Jobs are added to the JobQueue by the JobService instead if R2D_ORCHESTRATION_MODE is direct (see JobSubmissionService)
 """
 # Add Job to JobQueue when a Job is created with status Submitted
 @receiver(post_save, sender=Job)
@@ -29,6 +31,8 @@ def add_to_job_queue_on_create(sender, instance, created, **kwargs):
     When a Job is added to Job table, add it to JobQueue if the status is Submitted.
     Raises AddToJobQueueException if an error occurs.
     """
+    if JobSubmissionService.is_direct():
+        return
     if created and instance.job_status.code == 3:  # Check if the job is created and status is Submitted
         job_queue_service.enqueue(job=instance)
         
@@ -39,6 +43,8 @@ def add_to_job_queue_on_update(sender, instance, **kwargs):
     When a Job is updated to Submitted state, add it to JobQueue.
     Raises AddToJobQueueException if an error occurs.
     """
+    if JobSubmissionService.is_direct():
+        return
     if instance.pk:  # Check if the job already exists (update case)
         try:
             previous = Job.objects.get(pk=instance.pk)
@@ -0,0 +1,276 @@
+import asyncio
+import inspect
+from uuid import uuid4
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
+from diagrams.chain_inputs.ClassDiagramAuditAnalyzeChainInputs import ClassDiagramAuditAnalyzeChainInputs
+from diagrams.models import ClassDiagram
+from diagrams.services.DiagramConsumerExceptions import ClassDiagramConsumerError
+from diagrams.tasks import resume_diagram_job
+from jobs.constants import ValidJobStatus
+from jobs.models import Job, JobCheckpoint, JobStatus
+from jobs.services.JobCheckpointService import JobCheckpointService
+from jobs.services.JobExceptions import InvalidJobStatus
+from model_manager.chains.AnalyzeAndAuditChain import AnalyzeAndAuditChain
+from model_manager.chains.AnalyzeAndAuditChainPromptBuilder import AnalyzeAndAuditChainPromptBuilder
+from model_manager.interfaces.BaseModel import BaseModel
+from model_manager.interfaces.BaseAuditor import BaseAuditor
+from model_manager.models import ModelName
+from model_manager.services.ModelExceptions import AuditorAnalysisError, AnalyzeAndAuditChainException
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+CLASS_DIAGRAM_RESPONSE = {
+    "diagrams": [{
+        "feature": ["Logging Framework"],
+        "diagram": "classDiagram\n    class Logger\n    class LogHandler\n    Logger --> LogHandler : writes",
+        "description": "The logger writes records to its handlers",
+        "classes": ["Logger", "LogHandler"],
+        "helper_classes": [],
+    }]
+}
+
+JOB_PARAMETERS = {
+    "features": ["Logging Framework"],
+    "sub_features": ["Log Handlers"],
+    "job_parameters": {"Logging Framework": {"Log Handlers": {"LOG-1": {
+        "id": "LOG-1",
+        "requirement": "As a developer I want to write logs to multiple handlers so that logs are persisted",
+        "services_to_use": [],
+        "acceptance_criteria": "Logs are written to every handler",
+        "additional_information": "",
+    }}}},
+}
+
+class CountingModel(BaseModel):
+    """
+    Model that counts the number of analyses requested.
+    """
+    def __init__(self):
+        super().__init__(model_name="gpt-4-turbo")
+        self.calls = 0
+
+    def analyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        self.calls += 1
+        return CLASS_DIAGRAM_RESPONSE
+
+    async def aanalyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        return self.analyze(prompt, response_schema, use_cache)
+
+class FlakyAuditor(BaseAuditor):
+    """
+    Auditor that fails the configured number of times before returning the analysis.
+    """
+    def __init__(self, failures:int = 1):
+        super().__init__(model_name="gpt-4-turbo")
+        self.failures = failures
+        self.calls = 0
+
+    def audit(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise AuditorAnalysisError("Simulated auditor timeout")
+        return CLASS_DIAGRAM_RESPONSE
+
+class StubFactory:
+    """
+    Model and auditor factory returning the configured instance.
+    """
+    def __init__(self, instance):
+        self.instance = instance
+
+    def get_model(self, model_provider, model_name):
+        return self.instance
+
+    def get_auditor(self, model_provider, auditor_name):
+        return self.instance
+
+def create_job(user, job_status:str = ValidJobStatus.SUBMITTED.value) -> Job:
+    return Job.objects.create(
+        job_id=str(uuid4()),
+        user=user,
+        job_status=JobStatus.objects.get(name=job_status),
+        model=ModelName.objects.get(name="gpt-4-turbo"),
+        job_details=f"Job {job_status}",
+        job_type="class_diagram",
+        tokens=100,
+        parameters=JOB_PARAMETERS,
+    )
+
+@override_settings(R2D_AUDIT_POLICY="always", R2D_CIRCUIT_BREAKER_BACKEND="disabled")
+class JobCheckpointTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='checkpointuser', password='testpassword', email='checkpoint@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.job = create_job(self.user)
+        self.model = CountingModel()
+        self.auditor = FlakyAuditor(failures=1)
+
+    def create_chain(self) -> AnalyzeAndAuditChain:
+        chain_input = ClassDiagramAuditAnalyzeChainInputs(job_id=str(self.job.job_id), job_parameters=self.job.parameters)
+        return AnalyzeAndAuditChain(self.model, self.auditor, chain_input, AnalyzeAndAuditChainPromptBuilder(),
+                                    checkpoint_service=JobCheckpointService())
+
+    def create_consumer(self) -> ClassDiagramConsumer:
+        consumer = ClassDiagramConsumer(model_provider="openai", model_name="gpt-4-turbo", auditor_name="gpt-4-turbo", job_id=self.job.job_id)
+        consumer.diagram_service.model_factory = StubFactory(self.model)
+        consumer.diagram_service.auditor_factory = StubFactory(self.auditor)
+        return consumer
+
+    def test_failed_audit_resumes_from_analysis(self):
+        """
+        Test that a chain retried after the auditor failed restores the analysis from its checkpoint instead of invoking the model again.
+        """
+        with self.assertRaises(AnalyzeAndAuditChainException):
+            self.create_chain().execute_chain()
+        self.assertEqual(JobCheckpointService().get_completed_steps(self.job.job_id), ["analysis"])
+
+        response = self.create_chain().execute_chain()
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(self.auditor.calls, 2)
+        self.assertEqual(response["audited_results"]["diagrams"], CLASS_DIAGRAM_RESPONSE["diagrams"])
+        self.assertEqual(JobCheckpointService().get_completed_steps(self.job.job_id), ["analysis", "audit"])
+
+        # Completed shards are not processed again
+        self.create_chain().execute_chain()
+        self.assertEqual((self.model.calls, self.auditor.calls), (1, 2))
+
+    def test_checkpoints_are_scoped_to_the_shard(self):
+        """
+        Test that checkpoints are not restored for different job parameters.
+        """
+        with self.assertRaises(AnalyzeAndAuditChainException):
+            self.create_chain().execute_chain()
+        self.job.parameters = {**JOB_PARAMETERS, "features": ["Billing"]}
+        self.create_chain().execute_chain()
+        self.assertEqual(self.model.calls, 2)
+
+    def test_consumer_resume_record(self):
+        """
+        Test that a job that failed during the audit is resumed by the consumer, completed and its checkpoints deleted,
+        and that resuming a completed job returns its saved diagrams without processing it again.
+        """
+        with self.assertRaises(ClassDiagramConsumerError):
+            self.create_consumer().process_record(self.job.job_id)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.job_status.name, ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+
+        diagrams = self.create_consumer().resume_record(self.job.job_id)
+        self.assertEqual(len(diagrams), 2)
+        self.assertEqual(self.model.calls, 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.job_status.name, ValidJobStatus.COMPLETED.value)
+        self.assertEqual(ClassDiagram.objects.filter(job_id=self.job.job_id).count(), 2)
+        self.assertFalse(JobCheckpoint.objects.filter(job_id=self.job.job_id).exists())
+
+        self.assertEqual(len(self.create_consumer().resume_record(self.job.job_id)), 2)
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(ClassDiagram.objects.filter(job_id=self.job.job_id).count(), 2)
+
+    def test_only_failed_jobs_can_be_resumed(self):
+        """
+        Test that resume_diagram_job rejects jobs that have not failed to process.
+        """
+        with self.assertRaises(InvalidJobStatus):
+            resume_diagram_job(self.job.job_id)
+
+@override_settings(R2D_AUDIT_POLICY="always")
+class AsyncJobCheckpointTestCases(TransactionTestCase):
+    # Checkpoints are written by sync_to_async in a worker thread which uses its own database connection
+    serialized_rollback = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def test_async_chain_resumes_from_analysis(self):
+        """
+        Test that the asynchronous chain restores and saves checkpoints.
+        """
+        job = create_job(User.objects.create_user(username='asynccheckpointuser', password='testpassword', email='asynccheckpoint@example.com'))
+        model, auditor = CountingModel(), FlakyAuditor(failures=1)
+        create_chain = lambda: AnalyzeAndAuditChain(model, auditor, ClassDiagramAuditAnalyzeChainInputs(job_id=str(job.job_id), job_parameters=job.parameters),
+                                                    AnalyzeAndAuditChainPromptBuilder(), checkpoint_service=JobCheckpointService())
+        with self.assertRaises(AnalyzeAndAuditChainException):
+            asyncio.run(create_chain().aexecute_chain())
+        asyncio.run(create_chain().aexecute_chain())
+        self.assertEqual((model.calls, auditor.calls), (1, 2))
+        self.assertEqual(JobCheckpointService().get_completed_steps(job.job_id), ["analysis", "audit"])
+
+class ResumeDiagramJobViewTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='resumeuser', password='testpassword', email='resume@example.com')
+        cls.other_user = User.objects.create_user(username='resumeother', password='testpassword', email='resumeother@example.com')
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def authenticated_post(self, user, job_id):
+        access_token = str(RefreshToken.for_user(user).access_token)
+        return self.client.post(reverse('resume_diagram_job'), {"job_id": str(job_id)}, format='json', HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+    def test_failed_job_is_resumed(self):
+        """
+        Test that a job that failed to process is resubmitted by its owner.
+        """
+        job = create_job(self.user, ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+        response = self.authenticated_post(self.user, job.job_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["job_id"], str(job.job_id))
+
+    def test_jobs_of_other_users_cannot_be_resumed(self):
+        """
+        Test that a user cannot resume the jobs of other users.
+        """
+        job = create_job(self.user, ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+        response = self.authenticated_post(self.other_user, job.job_id)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,158 @@
+import inspect
+import json
+from uuid import uuid4
+from django.test import TestCase, override_settings
+from diagrams.consumers.ClassDiagramConsumer import ClassDiagramConsumer
+from diagrams.consumers.ERDiagramConsumer import ERDiagramConsumer
+from diagrams.consumers.SequenceDiagramConsumer import SequenceDiagramConsumer
+from diagrams.services.ClassDiagramService import ClassDiagramService
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobStatus
+from jobs.services.JobContext import JobContext
+from jobs.services.JobExceptions import JobNotFoundException
+from jobs.services.JobLookupCache import JobLookupCache
+from model_manager.models import ModelName
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+JOB_PARAMETERS = {
+    "features": ["Logging Framework"],
+    "sub_features": ["Log Handlers"],
+    "job_parameters": {"Logging Framework": {"Log Handlers": {"LOG-1": {
+        "id": "LOG-1",
+        "requirement": "As a developer I want to write logs to multiple handlers so that logs are persisted",
+        "services_to_use": [],
+        "acceptance_criteria": "Logs are written to every handler",
+        "additional_information": "",
+    }}}},
+}
+
+CLASS_DIAGRAMS = [{
+    "feature": ["Logging Framework"],
+    "diagram": "classDiagram\n    class Logger\n    class LogHandler\n    Logger --> LogHandler : writes",
+    "description": "The logger writes records to its handlers",
+    "classes": ["Logger", "LogHandler"],
+    "helper_classes": [],
+    "is_audited": True,
+}]
+
+ER_DIAGRAMS = [{
+    "feature": ["Logging Framework"],
+    "diagram": "erDiagram\n    LOGGER ||--o{ LOG_HANDLER : writes",
+    "description": "Loggers have many handlers",
+    "entities": ["LOGGER", "LOG_HANDLER"],
+    "is_audited": True,
+}]
+
+CONSUMERS = {
+    ValidJobTypes.CLASS_DIAGRAM.value: ClassDiagramConsumer,
+    ValidJobTypes.ER_DIAGRAM.value: ERDiagramConsumer,
+    ValidJobTypes.SEQUENCE_DIAGRAM.value: SequenceDiagramConsumer,
+}
+
+@override_settings(R2D_DIAGRAM_PIPELINE="none", R2D_CIRCUIT_BREAKER_BACKEND="disabled")
+class JobContextTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='jobcontextuser', password='testpassword', email='jobcontext@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def create_job(self, job_type:str, parameters, parent_job:Job = None) -> Job:
+        return Job.objects.create(
+            job_id=str(uuid4()),
+            user=self.user,
+            job_status=JobStatus.objects.get(name=ValidJobStatus.SUBMITTED.value),
+            model=ModelName.objects.get(name="fake-diagram-model"),
+            job_details="Job context",
+            job_type=job_type,
+            tokens=100,
+            parameters=parameters,
+            parent_job=parent_job,
+        )
+
+    def create_consumer(self, job:Job):
+        return CONSUMERS[job.job_type](model_provider="fake", model_name="fake-diagram-model", auditor_name="fake-diagram-model", job_id=job.job_id)
+
+    def test_load(self):
+        """
+        Test that the job is loaded with its user, model, status and parent job in a single query, and that parameters are decoded once.
+        """
+        parent_job = self.create_job(ValidJobTypes.CLASS_DIAGRAM.value, JOB_PARAMETERS)
+        job = self.create_job(ValidJobTypes.ER_DIAGRAM.value, json.dumps(JOB_PARAMETERS), parent_job=parent_job)
+        with self.assertNumQueries(1):
+            job_context = JobContext.load(job.job_id)
+            self.assertEqual(job_context.user.username, 'jobcontextuser')
+            self.assertEqual(job_context.model.name, "fake-diagram-model")
+            self.assertEqual(job_context.job.job_status.name, ValidJobStatus.SUBMITTED.value)
+            self.assertEqual(str(job_context.parent_job.job_id), str(parent_job.job_id))
+            self.assertEqual(job_context.get_job_parameters(), JOB_PARAMETERS)
+        self.assertIs(job_context.get_job_parameters(), job_context.get_job_parameters())
+        self.assertTrue(job_context.matches(str(job.job_id)))
+        self.assertFalse(job_context.matches(parent_job.job_id))
+        with self.assertRaises(JobNotFoundException):
+            JobContext.load(str(uuid4()))
+
+    def test_consumers_load_the_job_once(self):
+        """
+        Test that initializing the consumer and diagram service of each stage issues a single query for the job.
+        """
+        class_job = self.create_job(ValidJobTypes.CLASS_DIAGRAM.value, JOB_PARAMETERS)
+        er_job = self.create_job(ValidJobTypes.ER_DIAGRAM.value, json.dumps(ClassDiagramConsumer.build_next_job_parameters(CLASS_DIAGRAMS)), parent_job=class_job)
+        sequence_job = self.create_job(ValidJobTypes.SEQUENCE_DIAGRAM.value, json.dumps(ERDiagramConsumer.build_next_job_parameters(ER_DIAGRAMS, CLASS_DIAGRAMS)), parent_job=er_job)
+        for job in (class_job, er_job, sequence_job):
+            with self.assertNumQueries(1):
+                consumer = self.create_consumer(job)
+            self.assertIs(consumer.job_context, consumer.diagram_service.job_context)
+
+    def test_provided_context_is_not_reloaded(self):
+        """
+        Test that a diagram service initialized with the context of its job does not query the job.
+        """
+        job = self.create_job(ValidJobTypes.CLASS_DIAGRAM.value, JOB_PARAMETERS)
+        job_context = JobContext.load(job.job_id)
+        with self.assertNumQueries(0):
+            service = ClassDiagramService(model_provider="fake", model_name="fake-diagram-model", auditor_name="fake-diagram-model",
+                                          job_id=job.job_id, job_context=job_context)
+        self.assertEqual(service.chain_input.get_job_parameters(), JOB_PARAMETERS)
+
+    def test_er_consumer_reads_parent_from_context(self):
+        """
+        Test that the ER diagram consumer retrieves the class diagrams of the parent job without querying the parent job.
+        """
+        class_job = self.create_job(ValidJobTypes.CLASS_DIAGRAM.value, JOB_PARAMETERS)
+        er_job = self.create_job(ValidJobTypes.ER_DIAGRAM.value, json.dumps(ClassDiagramConsumer.build_next_job_parameters(CLASS_DIAGRAMS)), parent_job=class_job)
+        consumer = self.create_consumer(er_job)
+        # Only the class diagrams are queried
+        with self.assertNumQueries(1):
+            self.assertEqual(consumer._retrieve_class_diagrams(str(er_job.job_id)), [])
+
+    def test_create_next_record_query_count(self):
+        """
+        Test that create_next_record issues a fixed number of queries, the parent job and its user are read from the context.
+        """
+        class_job = self.create_job(ValidJobTypes.CLASS_DIAGRAM.value, JOB_PARAMETERS)
+        consumer = self.create_consumer(class_job)
+        # Job statuses and models are loaded when the worker process starts, see JobLookupCache
+        JobLookupCache.warm_up()
+        with self.assertNumQueries(25):
+            child_job_id = consumer.create_next_record(parent_id=str(class_job.job_id), class_diagrams=CLASS_DIAGRAMS, job_status=ValidJobStatus.DRAFT.value)
+        child_job = Job.objects.get(job_id=child_job_id)
+        self.assertEqual(str(child_job.parent_job_id), str(class_job.job_id))
+        self.assertEqual(child_job.model.name, "fake-diagram-model")
+        self.assertEqual(child_job.user, self.user)
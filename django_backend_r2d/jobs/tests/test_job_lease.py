@@ -0,0 +1,154 @@
+import inspect
+import json
+import time
+from datetime import timedelta
+from uuid import uuid4
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from diagrams.models import SequenceDiagram
+from diagrams.repository.ClassDiagramRepository import ClassDiagramRepository
+from diagrams.repository.SequenceDiagramRepository import SequenceDiagramRepository
+from diagrams.tasks import generate_class_diagram_task, generate_sequence_diagram_task
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobLease, JobQueue, JobStatus
+from jobs.services.JobLeaseManager import JobLeaseManager, DatabaseLeaseStore
+from model_manager.models import ModelName
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+SEQUENCE_RESPONSE = {"audited_results": {"model_name": "fake-diagram-model", "is_audited": True, "diagrams": [{
+    "feature": ["Login"], "diagram": "sequenceDiagram\n    User->>API: login\n    API-->>User: token", "description": "Users log in",
+    "actors": ["User", "API"]}]}}
+
+CLASS_RESPONSE = {"audited_results": {"model_name": "fake-diagram-model", "is_audited": True, "diagrams": [{
+    "feature": ["Login"], "diagram": "classDiagram\n    class User\n    class Session\n    User --> Session : creates", "description": "Users create sessions",
+    "classes": ["User", "Session"], "helper_classes": []}]}}
+
+class JobLeaseTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='leaseuser', password='testpassword', email='lease@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        JobLeaseManager.reset()
+
+    def tearDown(self):
+        JobLeaseManager.reset()
+
+    def create_job(self, job_status:str = ValidJobStatus.PROCESSING.value, job_type:str = ValidJobTypes.SEQUENCE_DIAGRAM.value) -> Job:
+        return Job.objects.create(job_id=str(uuid4()), user=self.user, job_status=JobStatus.objects.get(name=job_status),
+                                  model=ModelName.objects.get(name="fake-diagram-model"), job_details="Leased job",
+                                  job_type=job_type, tokens=100, parameters={"features": ["Login"]})
+
+    def test_database_leases(self):
+        """
+        Test that a database lease is only granted to one owner until it is released or expires.
+        """
+        store, job_id, stage = DatabaseLeaseStore(), str(uuid4()), ValidJobTypes.CLASS_DIAGRAM.value
+        self.assertTrue(store.acquire(job_id, stage, "worker-1", 60))
+        self.assertFalse(store.acquire(job_id, stage, "worker-2", 60))
+        # Leases are held per stage of the job
+        self.assertTrue(store.acquire(job_id, ValidJobTypes.ER_DIAGRAM.value, "worker-2", 60))
+        self.assertFalse(store.renew(job_id, stage, "worker-2", 60))
+        self.assertTrue(store.renew(job_id, stage, "worker-1", 60))
+
+        # The lease of a crashed worker is taken over once it expires
+        JobLease.objects.filter(job_id=job_id, stage=stage).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(store.acquire(job_id, stage, "worker-2", 60))
+        self.assertEqual(JobLease.objects.get(job_id=job_id, stage=stage).owner, "worker-2")
+
+        # Only the owner releases the lease
+        store.release(job_id, stage, "worker-1")
+        self.assertTrue(JobLease.objects.filter(job_id=job_id, stage=stage).exists())
+        store.release(job_id, stage, "worker-2")
+        self.assertFalse(JobLease.objects.filter(job_id=job_id, stage=stage).exists())
+
+    @override_settings(R2D_JOB_LEASE_BACKEND="local")
+    def test_heartbeat_renews_the_lease(self):
+        """
+        Test that the lease is renewed while the block runs for longer than its time to live, and released once the block exits.
+        """
+        manager, job_id, stage = JobLeaseManager(ttl=0.3), str(uuid4()), ValidJobTypes.CLASS_DIAGRAM.value
+        with manager.hold(job_id, stage) as acquired:
+            self.assertTrue(acquired)
+            time.sleep(0.6)
+            self.assertIsNone(manager.acquire(job_id, stage))
+            with manager.hold(job_id, stage) as duplicate_acquired:
+                self.assertFalse(duplicate_acquired)
+        self.assertIsNotNone(manager.acquire(job_id, stage))
+
+        # Leases are granted if leases are disabled
+        with self.settings(R2D_JOB_LEASE_BACKEND="disabled"):
+            with manager.hold(job_id, stage) as acquired:
+                self.assertTrue(acquired)
+
+    def test_duplicate_tasks_are_skipped(self):
+        """
+        Test that a diagram task returns without processing the job if its lease is held by another task, or the job has been completed.
+        """
+        job = self.create_job()
+        task_kwargs = {"model_provider": "fake", "model_name": "fake-diagram-model", "auditor_name": "fake-diagram-model", "job_id": str(job.job_id)}
+        owner = JobLeaseManager().acquire(str(job.job_id), ValidJobTypes.SEQUENCE_DIAGRAM.value)
+        self.assertEqual(generate_sequence_diagram_task.apply(kwargs=task_kwargs).get(), str(job.job_id))
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.PROCESSING.value)
+        JobLeaseManager().release(str(job.job_id), ValidJobTypes.SEQUENCE_DIAGRAM.value, owner)
+
+        JobQueue.objects.create(job=job, status=JobStatus.objects.get(name=ValidJobStatus.COMPLETED.value), job_type=job.job_type, model=job.model)
+        self.assertEqual(generate_sequence_diagram_task.apply(kwargs=task_kwargs).get(), str(job.job_id))
+        self.assertFalse(SequenceDiagram.objects.filter(job_id=job.job_id).exists())
+        # The lease is released once the task exits
+        self.assertFalse(JobLease.objects.filter(job_id=job.job_id).exists())
+
+    def test_saving_diagrams_is_idempotent(self):
+        """
+        Test that saving the diagrams of a job again replaces the diagrams saved by a previous attempt,
+        and that the previous diagrams are kept if the diagrams cannot be saved.
+        """
+        job = self.create_job()
+        repository = SequenceDiagramRepository()
+        self.assertEqual(len(repository.save_diagram(job.job_id, SEQUENCE_RESPONSE)), 1)
+        repository.save_diagram(job.job_id, SEQUENCE_RESPONSE)
+        self.assertEqual(SequenceDiagram.objects.filter(job_id=job.job_id).count(), 1)
+
+        malformed_response = {"audited_results": {**SEQUENCE_RESPONSE["audited_results"], "diagrams": [{"feature": ["Login"]}]}}
+        with self.assertRaises(KeyError):
+            repository.save_diagram(job.job_id, malformed_response)
+        self.assertEqual(SequenceDiagram.objects.filter(job_id=job.job_id).count(), 1)
+        self.assertEqual(repository.delete_diagrams(job.job_id), 1)
+
+    def test_completed_jobs_are_handed_off(self):
+        """
+        Test that a task of a job completed without creating the next job creates it from the saved diagrams, without processing the job again.
+        """
+        job = self.create_job(ValidJobStatus.COMPLETED.value, ValidJobTypes.CLASS_DIAGRAM.value)
+        JobQueue.objects.create(job=job, status=JobStatus.objects.get(name=ValidJobStatus.COMPLETED.value), job_type=job.job_type, model=job.model)
+        ClassDiagramRepository().save_diagram(job.job_id, CLASS_RESPONSE)
+        task_kwargs = {"model_provider": "fake", "model_name": "fake-diagram-model", "auditor_name": "fake-diagram-model", "job_id": str(job.job_id)}
+
+        child_job_id = generate_class_diagram_task.apply(kwargs=task_kwargs).get()
+        child_job = Job.objects.get(parent_job_id=job.job_id)
+        self.assertEqual(str(child_job.job_id), str(child_job_id))
+        self.assertEqual(child_job.job_type, ValidJobTypes.ER_DIAGRAM.value)
+        self.assertEqual(json.loads(child_job.parameters)["classes"], ["User", "Session"])
+
+        # Once the next job exists the task is skipped
+        self.assertEqual(generate_class_diagram_task.apply(kwargs=task_kwargs).get(), str(job.job_id))
+        self.assertEqual(Job.objects.filter(parent_job_id=job.job_id).count(), 1)
@@ -0,0 +1,193 @@
+import inspect
+from uuid import uuid4
+import httpx
+import openai
+from django.test import TestCase, override_settings
+from diagrams.constants import DIAGRAM_PIPELINES, DiagramPipelines
+from diagrams.consumers.AsyncDiagramConsumerRunner import AsyncDiagramConsumerRunner
+from diagrams.services.DiagramConsumerExceptions import ClassDiagramConsumerError, PipelineStageTaskError
+from diagrams.services.DiagramExceptions import UMLDiagramCreationError
+from diagrams.tasks import retry_on_transient_error, run_pipeline_stage_task
+from jobs.constants import ErrorCategory, ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobAttempt, JobQueue, JobStatus
+from jobs.services.JobRetryPolicy import JobRetryPolicy
+from model_manager.models import ModelName
+from model_manager.services.ModelExceptions import ModelAnalysisError
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+def raise_consumer_error(error:Exception):
+    """
+    Raises the error wrapped as the diagram services and consumers wrap the errors raised by the models.
+    """
+    try:
+        try:
+            raise error
+        except Exception as e:
+            raise UMLDiagramCreationError(f"Unhandled exception encountered: {str(e)}")
+    except UMLDiagramCreationError as e:
+        raise ClassDiagramConsumerError(f"Error encountered while creating diagram: {e}")
+
+class FailingConsumer:
+    """
+    Consumer that fails the first `failures` attempts with a timeout, then returns no diagrams.
+    """
+    failures = 0
+    attempts = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def process_record(self, job_id:str) -> list[dict]:
+        return self._process(job_id, resume=False)
+
+    def resume_record(self, job_id:str) -> list[dict]:
+        return self._process(job_id, resume=True)
+
+    def _process(self, job_id:str, resume:bool) -> list[dict]:
+        FailingConsumer.attempts.append(resume)
+        if len(FailingConsumer.attempts) <= FailingConsumer.failures:
+            raise_consumer_error(TimeoutError("Request timed out"))
+        return []
+
+class StubTask:
+    """
+    Records the tasks scheduled by retry_on_transient_error.
+    """
+    def __init__(self):
+        self.scheduled = []
+
+    def apply_async(self, kwargs:dict, countdown:float):
+        self.scheduled.append((kwargs, countdown))
+
+@override_settings(R2D_JOB_MAX_ATTEMPTS=3, R2D_JOB_RETRY_BACKOFF_BASE=2, R2D_JOB_RETRY_BACKOFF_MAX=5, R2D_JOB_LEASE_BACKEND="disabled",
+                   R2D_ASYNC_DIAGRAM_CONSUMERS=False)
+class JobRetryPolicyTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='retryuser', password='testpassword', email='retry@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.policy = JobRetryPolicy()
+
+    def create_job(self, job_status:str = ValidJobStatus.PROCESSING.value, pipeline:dict = None) -> Job:
+        return Job.objects.create(job_id=str(uuid4()), user=self.user, job_status=JobStatus.objects.get(name=job_status),
+                                  model=ModelName.objects.get(name="fake-diagram-model"), job_details="Retried job",
+                                  job_type=ValidJobTypes.CLASS_DIAGRAM.value, tokens=100, parameters={"features": ["Login"]}, pipeline=pipeline)
+
+    def get_error(self, error:Exception) -> Exception:
+        try:
+            raise_consumer_error(error)
+        except ClassDiagramConsumerError as e:
+            return e
+
+    def test_classify(self):
+        """
+        Test that rate limits, timeouts and connection errors are transient even if they are wrapped, and other errors are permanent.
+        """
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        transient_errors = [openai.RateLimitError("Rate limit reached", response=httpx.Response(429, request=request), body=None),
+                            openai.APITimeoutError(request=request), openai.APIConnectionError(request=request), ConnectionResetError("Connection reset")]
+        for error in transient_errors:
+            self.assertEqual(self.policy.classify(error), ErrorCategory.TRANSIENT)
+            self.assertEqual(self.policy.classify(self.get_error(error)), ErrorCategory.TRANSIENT)
+
+        permanent_errors = [ModelAnalysisError("Response does not match the schema"), ValueError("Invalid diagram"),
+                            openai.BadRequestError("Invalid request", response=httpx.Response(400, request=request), body=None)]
+        for error in permanent_errors:
+            self.assertEqual(self.policy.classify(self.get_error(error)), ErrorCategory.PERMANENT)
+
+    def test_backoff(self):
+        """
+        Test that the backoff doubles with each attempt up to the maximum, and is jittered.
+        """
+        for attempt, backoff in ((1, 2), (2, 4), (3, 5), (10, 5)):
+            countdowns = [self.policy.get_countdown(attempt) for _ in range(20)]
+            self.assertTrue(all(backoff / 2 <= countdown <= backoff for countdown in countdowns))
+        self.assertGreater(len(set(countdowns)), 1)
+
+    def test_attempt_budget(self):
+        """
+        Test that every failed attempt is recorded on the job, and transient errors are retried until the attempts of the job are exhausted.
+        """
+        job = self.create_job()
+        stage = ValidJobTypes.CLASS_DIAGRAM.value
+        self.assertIsNotNone(self.policy.record_failure(job.job_id, stage, self.get_error(TimeoutError("Request timed out"))))
+        self.assertIsNotNone(self.policy.record_failure(job.job_id, stage, self.get_error(TimeoutError("Request timed out"))))
+        self.assertIsNone(self.policy.record_failure(job.job_id, stage, self.get_error(TimeoutError("Request timed out"))))
+        # Attempts are counted per stage of the job
+        self.assertIsNotNone(self.policy.record_failure(job.job_id, ValidJobTypes.ER_DIAGRAM.value, self.get_error(TimeoutError("Request timed out"))))
+
+        attempts = list(job.attempts.filter(stage=stage))
+        self.assertEqual([attempt.attempt for attempt in attempts], [1, 2, 3])
+        self.assertTrue(all(attempt.error_category == ErrorCategory.TRANSIENT.value for attempt in attempts))
+        self.assertIsNone(attempts[-1].retry_countdown)
+        self.assertIn("Request timed out", attempts[0].error_message)
+
+        # Permanent errors are not retried
+        job = self.create_job()
+        self.assertIsNone(self.policy.record_failure(job.job_id, stage, self.get_error(ValueError("Invalid diagram"))))
+        self.assertEqual(JobAttempt.objects.get(job_id=job.job_id).error_category, ErrorCategory.PERMANENT.value)
+
+    def test_transient_errors_hold_the_job(self):
+        """
+        Test that a job that failed with a transient error is held in the Queued state and resumed by the task after a backoff.
+        """
+        job = self.create_job(ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+        JobQueue.objects.create(job=job, status=JobStatus.objects.get(name=ValidJobStatus.ERROR_FAILED_TO_PROCESS.value), job_type=job.job_type, model=job.model)
+        task, task_kwargs = StubTask(), {"model_provider": "fake", "model_name": "fake-diagram-model", "auditor_name": "fake-diagram-model", "job_id": str(job.job_id)}
+
+        self.assertTrue(retry_on_transient_error(task, self.get_error(TimeoutError("Request timed out")), job.job_type, **task_kwargs))
+        self.assertEqual(len(task.scheduled), 1)
+        self.assertEqual(task.scheduled[0][0], {**task_kwargs, "resume": True})
+        self.assertLessEqual(task.scheduled[0][1], 2)
+        job.refresh_from_db()
+        self.assertEqual(job.job_status.name, ValidJobStatus.QUEUED.value)
+        self.assertEqual(JobQueue.objects.get(job_id=job.job_id).status.name, ValidJobStatus.QUEUED.value)
+
+        self.assertFalse(retry_on_transient_error(task, self.get_error(ValueError("Invalid diagram")), job.job_type, **task_kwargs))
+        self.assertEqual(len(task.scheduled), 1)
+
+    def test_pipeline_stages_are_resumed(self):
+        """
+        Test that a pipeline stage that failed with a transient error is resumed in place, and the pipeline fails once the attempts are exhausted.
+        """
+        pipeline = DIAGRAM_PIPELINES[DiagramPipelines.PARALLEL.value]
+        stage = ValidJobTypes.CLASS_DIAGRAM.value
+        consumer = AsyncDiagramConsumerRunner.consumers[stage]
+        AsyncDiagramConsumerRunner.consumers[stage] = FailingConsumer
+        try:
+            FailingConsumer.failures, FailingConsumer.attempts = 2, []
+            job = self.create_job(pipeline=pipeline)
+            result = run_pipeline_stage_task.apply(kwargs={"root_job_id": str(job.job_id), "stage": stage}).get()
+            self.assertEqual(result, {"stage": stage, "job_id": str(job.job_id)})
+            # Retries resume the stage from its last completed step
+            self.assertEqual(FailingConsumer.attempts, [False, True, True])
+            self.assertEqual(job.attempts.count(), 2)
+
+            FailingConsumer.failures, FailingConsumer.attempts = 5, []
+            job = self.create_job(pipeline=pipeline)
+            with self.assertRaises(PipelineStageTaskError):
+                run_pipeline_stage_task.apply(kwargs={"root_job_id": str(job.job_id), "stage": stage}).get()
+            self.assertEqual(len(FailingConsumer.attempts), 3)
+            job.refresh_from_db()
+            self.assertEqual(job.job_status.name, ValidJobStatus.ERROR_FAILED_TO_PROCESS.value)
+        finally:
+            AsyncDiagramConsumerRunner.consumers[stage] = consumer
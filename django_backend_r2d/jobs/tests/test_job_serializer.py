@@ -9,6 +9,9 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 from uuid import uuid4 
 from model_manager.models import ModelName
+from model_manager.services.TokenCounter import TokenCounter
+import json
+import tiktoken
 import logging 
 
 class JobSerializerTest(TestCase):
@@ -46,7 +49,7 @@ class JobSerializerTest(TestCase):
             "user": self.user.id,
             "job_status": "Draft", # Draft so that no signal is triggered
             "job_details": "Initial job details",
-            "parameters": {"key1": "abc, def, ghi", "key2": "abc, def, ghi"}, # 8 tokens
+            "parameters": {"key1": "abc, def, ghi", "key2": "abc, def, ghi"},
             "job_type": "class_diagram", # For testing purposes
             "model_name": "gpt-3.5-turbo"
         }
@@ -66,7 +69,16 @@ class JobSerializerTest(TestCase):
         serializer = JobSerializer(data=self.job_payload_without_tokens)
         self.assertTrue(serializer.is_valid())
         job = serializer.save()
-        self.assertEqual(job.tokens, 8)
+        parameters = json.dumps(self.job_payload_without_tokens["parameters"])
+        if TokenCounter("gpt-3.5-turbo").is_exact():
+            # Tokens are counted using the tiktoken encoding of gpt-3.5-turbo
+            expected_tokens = len(tiktoken.encoding_for_model("gpt-3.5-turbo").encode(parameters))
+        else:
+            # The encoding could not be loaded, 50 characters are estimated at 4 characters per token
+            expected_tokens = 12
+        self.assertEqual(job.tokens, expected_tokens)
+        # The prompt includes the class diagram prompt template and response schema
+        self.assertGreater(job.prompt_tokens, job.tokens)
     
     def test_create_job_with_tokens(self):
         serializer = JobSerializer(data=self.job_payload_with_tokens)
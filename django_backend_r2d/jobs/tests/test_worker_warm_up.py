@@ -0,0 +1,68 @@
+import inspect
+from django.test import TestCase, override_settings
+from django_backend_r2d.celery_config import warm_up_worker_process
+from jobs.constants import ValidJobStatus
+from jobs.models import JobStatus
+from jobs.services.JobLookupCache import JobLookupCache
+from model_manager.models import ModelName
+from model_manager.services.ModelClientRegistry import ModelClientRegistry
+import logging
+
+@override_settings(R2D_WORKER_WARM_UP=True, R2D_WORKER_WARM_UP_MODELS=["fake-diagram-model", "unknown-model"], R2D_FAKE_LLM_CONFIG={})
+class WorkerWarmUpTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        JobLookupCache.reset()
+        ModelClientRegistry.reset()
+
+    def tearDown(self):
+        JobLookupCache.reset()
+        ModelClientRegistry.reset()
+
+    def test_warm_up(self):
+        """
+        Test that the warm-up loads the lookups and creates the model clients, and records the time spent on each step.
+        """
+        timings = warm_up_worker_process()
+        self.assertEqual(list(timings), ["imports", "lookups", "templates", "clients"])
+        self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+
+        # The model and auditor clients of the fake model are reused by the first job, unknown models are skipped
+        self.assertEqual(ModelClientRegistry.get_stats()["active_clients"], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(JobLookupCache.get_job_status(ValidJobStatus.COMPLETED.value).code, 8)
+            self.assertEqual(JobLookupCache.get_model_name("fake-diagram-model").provider, "fake")
+
+        with self.settings(R2D_WORKER_WARM_UP=False):
+            self.assertEqual(warm_up_worker_process(), {})
+
+    def test_lookups(self):
+        """
+        Test that rows are read from the database once, and that unknown names raise DoesNotExist.
+        """
+        with self.assertNumQueries(1):
+            JobLookupCache.get_job_status(ValidJobStatus.QUEUED.value)
+            JobLookupCache.get_job_status(ValidJobStatus.QUEUED.value)
+        self.assertEqual(JobLookupCache.get_job_status(ValidJobStatus.QUEUED.value), JobStatus.objects.get(name=ValidJobStatus.QUEUED.value))
+        with self.assertRaises(JobStatus.DoesNotExist):
+            JobLookupCache.get_job_status("Unknown")
+        with self.assertRaises(ModelName.DoesNotExist):
+            JobLookupCache.get_model_name("unknown-model")
+        self.assertEqual(JobLookupCache.warm_up(), JobStatus.objects.count() + ModelName.objects.count())
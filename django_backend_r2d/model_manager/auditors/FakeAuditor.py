@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Optional
+
+from model_manager.interfaces.BaseAuditor import BaseAuditor
+from model_manager.constants import FakeModels
+from model_manager.services.FakeResponseGenerator import FakeResponseGenerator
+from model_manager.services.ModelExceptions import *
+
+import logging 
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class FakeAuditor(BaseAuditor):
+    def __init__(self, model_name: str = FakeModels.FAKE_DIAGRAM_MODEL.value, **kwargs):
+        """
+        FakeAuditor returns schema-valid audit responses without invoking an LLM, used to load test the diagram pipeline.
+        Responses are never cached, each request waits for the configured latency.
+        args:
+            model_name: str
+            **kwargs: Keyword arguments used to configure the FakeResponseGenerator - latency_distribution, latency_mean, latency_stddev, 
+                      latency_min, latency_max, error_rate, diagrams_per_response, items_per_diagram, description_words, seed.
+        """
+        if isinstance(model_name, FakeModels):
+            model_name = model_name.value
+
+        super().__init__(model_name=model_name)
+        self.generator = FakeResponseGenerator(**kwargs)
+        
+    def audit(self, prompt: str, response_schema: Optional[dict] = None, use_cache: bool = True):
+        """
+        Waits for the configured latency and returns a response that is valid for the response_schema.
+        Args:
+            prompt (str): The prompt to be audited, ignored by the fake auditor.
+            response_schema (dict): Optional JSON schema for structured response.
+            use_cache (bool): Ignored, responses from the fake auditor are never cached.
+        Returns:
+            dict: The generated response.
+        Raises:
+            AuditorAnalysisError: If the request is selected to fail based on the configured error_rate.
+        """
+        time.sleep(self.generator.sample_latency())
+        return self._respond(response_schema)
+
+    async def aaudit(self, prompt: str, response_schema: Optional[dict] = None, use_cache: bool = True):
+        """
+        Asynchronous variant of audit, the latency is awaited without blocking the event loop.
+        """
+        await asyncio.sleep(self.generator.sample_latency())
+        return self._respond(response_schema)
+
+    def _respond(self, response_schema: Optional[dict]):
+        if self.generator.should_fail():
+            raise AuditorAnalysisError(f"Error auditing the prompt: simulated failure from {self.model_name}")
+        return self.generator.generate(response_schema)
@@ -1,5 +1,18 @@
+import asyncio
+import hashlib
+import json
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
 from framework.models.BaseAuditor import BaseAuditor
 from framework.models.BaseModel import BaseModel
+from framework.utils.DatabaseExecutor import DatabaseExecutor
+from model_manager.constants import MODEL_TOKEN_LIMITS, DEFAULT_MODEL_TOKEN_LIMITS, SHARD_OUTPUT_TOKEN_RATIO, ModelUsageStage, AuditPolicy
+from model_manager.services.JobParameterSharder import JobParameterSharder
+from model_manager.services.MermaidValidator import MermaidValidator
+from model_manager.services.TokenCounter import TokenCounter
+from model_manager.services.ModelUsageRecorder import ModelUsageRecorder
 from model_manager.services.ModelExceptions import *
 from model_manager.interfaces.BaseChain import BaseChain
 from model_manager.interfaces.BasePromptBuilder import BasePromptBuilder
@@ -10,19 +23,43 @@ import logging
 logger = logging.getLogger('application_logging')
 
 class AnalyzeAndAuditChain(BaseChain):
-    def __init__(self, model: BaseModel, auditor: BaseAuditor, chain_input:BaseChainInput, prompt_builder: BasePromptBuilder):
+    def __init__(self, model: BaseModel, auditor: BaseAuditor, chain_input:BaseChainInput, prompt_builder: BasePromptBuilder,
+                 sharder: JobParameterSharder = None, max_concurrent_shards: int = None,
+                 validator: MermaidValidator = None, audit_policy: Optional[str] = None, checkpoint_service = None):
         """
         Analyze and Audit chain supports chaining of responses from a model to an auditor.
+        
+        Job parameters that do not fit within the model's context window and output budget are split by feature into shards.
+        Each shard is analyzed and audited concurrently, and the diagrams of each shard are merged into a single response.
+
+        Diagrams of structured responses are checked locally by the validator before they are audited, the audit policy decides whether
+        every response is audited (always), responses are only audited if a diagram has issues (skip_valid), or only the diagrams with
+        issues are audited (flagged). The audited results only contain the diagrams returned by the auditor, diagrams that are not audited
+        are only returned in the analysis results, diagrams that passed the validator are marked with is_validated.
+
+        If a checkpoint service is provided the output of each step is saved against the job, a retried job restarts from the last
+        completed step of each shard instead of invoking the model again.
         args:
             model (BaseModel): Model to generate a response
             auditor (BaseAuditor): Auditor to audit the response
             chain_input (BaseChainInput): The input object containing the prompts and response schemas.
             prompt_builder (BasePromptBuilder): Prompt builder to generate prompts for the model and auditor.
+            sharder (JobParameterSharder): Splits the job parameters into shards. Default is JobParameterSharder using the TokenCounter of the model.
+            max_concurrent_shards (int): Maximum number of shards processed concurrently. Default is R2D_MAX_CONCURRENT_SHARDS.
+            validator (MermaidValidator): Checks the diagrams of the analysis. Default is MermaidValidator.
+            audit_policy (str): always, skip_valid or flagged, see AuditPolicy. Default is R2D_AUDIT_POLICY.
+            checkpoint_service (JobCheckpointService): Optional service used to save and restore the output of each step.
         """
         self.model = model
         self.auditor = auditor
         self.chain_input = chain_input
         self.prompt_builder = prompt_builder
+        self.token_counter = TokenCounter(model.model_name)
+        self.sharder = sharder or JobParameterSharder(self.token_counter)
+        self.max_concurrent_shards = max_concurrent_shards or getattr(settings, "R2D_MAX_CONCURRENT_SHARDS", 8)
+        self.validator = validator or MermaidValidator()
+        self.audit_policy = AuditPolicy(audit_policy or getattr(settings, "R2D_AUDIT_POLICY", AuditPolicy.ALWAYS.value))
+        self.checkpoint_service = checkpoint_service
 
     def execute_chain(self) -> dict:
         """
@@ -36,34 +73,299 @@ class AnalyzeAndAuditChain(BaseChain):
         """
         try:
             logger.debug("Running AnalyzeAndAuditChain")
-            # Build Model Prompt 
-            analysis_prompt = self.prompt_builder.generate_model_prompt(self.chain_input.get_model_prompt_template(), self.chain_input.get_job_parameters(), self.chain_input.get_analysis_context())
-            logger.debug(f"Model Prompt: {analysis_prompt}")
-            # Run analysis 
-            analysis_results = self.model.analyze(analysis_prompt, self.chain_input.get_model_response_schema())
-            # Build Audit Prompt using analysis
-            audit_prompt = self.prompt_builder.generate_audit_prompt(self.chain_input.get_audit_prompt_template(), analysis_results, self.chain_input.get_audit_criteria())
-            logger.debug(f"Audit Prompt: {audit_prompt}")
-            # Audit the results
-            audited_results = self.auditor.audit(audit_prompt, self.chain_input.get_auditor_response_schema())
-            # Store both analysis and audit results in a dictionary
-            results = {"analysis_results": analysis_results, "audited_results": audited_results}
+            shards = self._get_shards()
+            
+            if len(shards) == 1:
+                results = self._run_shard(shards[0])
+            else:
+                # Analyze and audit each shard concurrently, latency depends on the largest shard
+                logger.debug(f"Running AnalyzeAndAuditChain across {len(shards)} shards")
+                with ThreadPoolExecutor(max_workers=min(len(shards), self.max_concurrent_shards)) as executor:
+                    shard_results = list(executor.map(self._run_shard_in_thread, shards))
+                results = self._merge_shard_results(shard_results)
+            
             # Append additional information to the results dictionary
             results = self.append_additional_information(results)
             return results
-        except ModelPromptBuildingError as e:
-            raise AnalyzeAndAuditChainException(f"Error while building model prompt - {str(e)}")
-        except AuditPromptBuildingError as e:
-            raise AnalyzeAndAuditChainException(f"Error while building audit prompt - {str(e)}")
-        except ModelAnalysisError as e:
-            logger.error(f"Error in AnalyzeAndAuditChain: {str(e)}")
-            raise AnalyzeAndAuditChainException(f"Error while generating analysis - {str(e)}")
-        except AuditorAnalysisError as e:
-            logger.error(f"Error in AnalyzeAndAuditChain: {str(e)}")
-            raise AnalyzeAndAuditChainException(f"Error while auditing response - {str(e)}")
         except Exception as e:
-            logger.error(f"Error in AnalyzeAndAuditChain: {str(e)}")
-            raise AnalyzeAndAuditChainException(f"Unhandled Error while auditing response - {str(e)}")
+            raise self._to_chain_exception(e)
+
+    async def aexecute_chain(self) -> dict:
+        """
+        Asynchronous variant of execute_chain, the model and auditor are awaited so the event loop can serve other chains 
+        while waiting for the LLM to respond.
+        Returns:
+            dict: The output dictionary containing the results of each step in the chain.
+            example: {analysis_results: {model_response}, audited_results: {auditor_response}
+        Raises:
+            AnalyzeAndAuditChainException: If there is an error in the chain execution.
+        """
+        try:
+            logger.debug("Running AnalyzeAndAuditChain asynchronously")
+            shards = self._get_shards()
+            
+            if len(shards) == 1:
+                results = await self._arun_shard(shards[0])
+            else:
+                semaphore = asyncio.Semaphore(self.max_concurrent_shards)
+                async def run_with_limit(shard):
+                    async with semaphore:
+                        return await self._arun_shard(shard)
+                shard_results = await asyncio.gather(*(run_with_limit(shard) for shard in shards))
+                results = self._merge_shard_results(shard_results)
+            
+            results = self.append_additional_information(results)
+            return results
+        except Exception as e:
+            raise self._to_chain_exception(e)
+
+    def _run_shard(self, job_parameters:dict) -> dict:
+        """
+        Analyzes and audits the job parameters, see _shard_steps.
+        args:
+            job_parameters (dict): The job parameters, or a shard of the job parameters, to analyze.
+        returns:
+            dict: {"analysis_results": model_response, "audited_results": auditor_response}
+        """
+        steps = self._shard_steps(job_parameters)
+        try:
+            function, _, args = next(steps)
+            while True:
+                try:
+                    result = function(*args)
+                except Exception as e:
+                    # Raised within the step, so that the usage context of the step exits
+                    function, _, args = steps.throw(e)
+                else:
+                    function, _, args = steps.send(result)
+        except StopIteration as completed:
+            return completed.value
+
+    def _run_shard_in_thread(self, job_parameters:dict) -> dict:
+        """
+        Runs the shard in a worker thread, database connections opened by the thread (e.g., LLM response cache) are closed once the shard completes.
+        """
+        try:
+            return self._run_shard(job_parameters)
+        finally:
+            connections.close_all()
+
+    async def _arun_shard(self, job_parameters:dict) -> dict:
+        """
+        Asynchronous variant of _run_shard, the model and auditor are awaited and database calls are executed by the DatabaseExecutor.
+        """
+        steps = self._shard_steps(job_parameters)
+        try:
+            function, async_function, args = next(steps)
+            while True:
+                try:
+                    result = await async_function(*args) if async_function is not None else await DatabaseExecutor.run(function, *args)
+                except Exception as e:
+                    function, async_function, args = steps.throw(e)
+                else:
+                    function, async_function, args = steps.send(result)
+        except StopIteration as completed:
+            return completed.value
+
+    def _shard_steps(self, job_parameters:dict):
+        """
+        Steps of a shard shared by _run_shard and _arun_shard.
+        The output of each step is restored from its checkpoint if a previous attempt of the job completed it, the analysis is audited
+        based on the audit policy, and the output of each step is checkpointed.
+
+        The generator yields the calls that block as (function, async_function, args), async_function is None for database calls.
+        The caller invokes or awaits the call and sends back its result, the generator returns the results of the shard.
+        args:
+            job_parameters (dict): The job parameters, or a shard of the job parameters, to analyze.
+        """
+        shard_key = self._get_shard_key(job_parameters)
+        audited_checkpoint = yield self._load_checkpoint, None, (ModelUsageStage.AUDIT, shard_key)
+        if audited_checkpoint is not None:
+            return audited_checkpoint
+
+        analysis_results = yield self._load_checkpoint, None, (ModelUsageStage.ANALYSIS, shard_key)
+        if analysis_results is None:
+            # Build Model Prompt 
+            analysis_prompt = self._build_analysis_prompt(job_parameters)
+            # Run analysis 
+            with self._usage_context(ModelUsageStage.ANALYSIS):
+                analysis_results = yield self.model.analyze, self.model.aanalyze, (analysis_prompt, self.chain_input.get_model_response_schema(), self._use_cache())
+            yield self._save_checkpoint, None, (ModelUsageStage.ANALYSIS, shard_key, analysis_results)
+        # Audit the diagrams selected by the audit policy, diagrams that are not audited are only returned in the analysis results
+        diagrams_to_audit = self._get_diagrams_to_audit(analysis_results)
+        analysis_results = self._mark_validated_diagrams(analysis_results, diagrams_to_audit)
+        audited_results = {"diagrams": []}
+        if diagrams_to_audit != []:
+            # Build Audit Prompt using analysis
+            audit_prompt = self._build_audit_prompt(self._select_diagrams(analysis_results, diagrams_to_audit))
+            # Audit the results
+            with self._usage_context(ModelUsageStage.AUDIT):
+                audited_results = yield self.auditor.audit, self.auditor.aaudit, (audit_prompt, self.chain_input.get_auditor_response_schema(), self._use_cache())
+        # Store both analysis and audit results in a dictionary
+        results = {"analysis_results": analysis_results, "audited_results": audited_results}
+        yield self._save_checkpoint, None, (ModelUsageStage.AUDIT, shard_key, results)
+        return results
+
+    def _get_shards(self) -> list[dict]:
+        """
+        Splits the job parameters into shards that fit within the model's token budget.
+        Job parameters are not split if no response schema is provided, as unstructured responses cannot be merged.
+        returns:
+            list[dict]: The shards, a single shard containing the job parameters if sharding is not required.
+        """
+        job_parameters = self.chain_input.get_job_parameters()
+        if self.chain_input.get_model_response_schema() is None or not self.sharder.is_shardable(job_parameters):
+            return [job_parameters]
+        return self.sharder.shard(job_parameters, self._get_shard_token_budget())
+
+    def _get_shard_token_budget(self) -> int:
+        """
+        Returns the maximum number of tokens of job parameters in a single prompt.
+        The budget is bound by the context window (prompt + completion) and by the output budget, 
+        the completion is estimated to be SHARD_OUTPUT_TOKEN_RATIO times the size of the job parameters.
+        """
+        limits = MODEL_TOKEN_LIMITS.get(self.model.model_name, DEFAULT_MODEL_TOKEN_LIMITS)
+        max_output_tokens = limits["max_output_tokens"]
+        
+        # Tokens used by the prompt template and response schema excluding the job parameters
+        template_tokens = self.token_counter.estimate_prompt_tokens(self.chain_input.get_model_prompt_template(), {},
+                                                                    self.chain_input.get_model_response_schema(), self.chain_input.get_analysis_context())
+        
+        input_budget = limits["context_window"] - max_output_tokens - template_tokens
+        output_budget = int(max_output_tokens / SHARD_OUTPUT_TOKEN_RATIO)
+        return min(input_budget, output_budget)
+
+    @staticmethod
+    def _merge_shard_results(shard_results:list[dict]) -> dict:
+        """
+        Merges the results of each shard into the chain response shape, the diagrams of each shard are concatenated.
+        args:
+            shard_results (list[dict]): The results of each shard, in the order of the shards.
+        returns:
+            dict: {"analysis_results": {"diagrams": [...]}, "audited_results": {"diagrams": [...]}}
+        raises:
+            AnalyzeAndAuditChainException: If a shard did not return a structured response.
+        """
+        merged = {}
+        for step in ("analysis_results", "audited_results"):
+            responses = [shard_result[step] for shard_result in shard_results]
+            if not all(isinstance(response, dict) for response in responses):
+                raise AnalyzeAndAuditChainException(f"Unable to merge {step}, sharded responses must be structured responses")
+            merged_response = dict(responses[0])
+            merged_response["diagrams"] = [diagram for response in responses for diagram in response.get("diagrams", [])]
+            merged[step] = merged_response
+        return merged
+
+    def _get_diagrams_to_audit(self, analysis_results) -> Optional[list[int]]:
+        """
+        Returns the indexes of the diagrams of the analysis to audit, based on the audit policy and the issues found by the validator.
+        returns:
+            list[int]: The indexes of the diagrams to audit, an empty list if the audit is skipped.
+                       None if the entire response is audited e.g., the policy is always or the response is not structured.
+        """
+        if self.audit_policy == AuditPolicy.ALWAYS or not isinstance(analysis_results, dict) or not isinstance(analysis_results.get("diagrams"), list):
+            return None
+        flagged = self.validator.get_flagged_diagrams(analysis_results)
+        logger.debug(f"{len(flagged)} of {len(analysis_results['diagrams'])} diagrams have issues, audit policy is {self.audit_policy.value}")
+        if self.audit_policy == AuditPolicy.SKIP_VALID:
+            return None if flagged else []
+        return None if len(flagged) == len(analysis_results["diagrams"]) else flagged
+
+    @staticmethod
+    def _mark_validated_diagrams(analysis_results, diagram_indexes:Optional[list[int]]):
+        """
+        Returns the analysis with the diagrams that passed the validator and are not audited marked with is_validated,
+        validated diagrams are passed to dependent stages and reused by other jobs as audited diagrams are.
+        """
+        if diagram_indexes is None:
+            return analysis_results
+        audited = set(diagram_indexes)
+        return {**analysis_results, "diagrams": [diagram if index in audited else {**diagram, "is_validated": True}
+                                                 for index, diagram in enumerate(analysis_results["diagrams"])]}
+
+    @staticmethod
+    def _select_diagrams(analysis_results, diagram_indexes:Optional[list[int]]):
+        """
+        Returns the analysis containing only the diagrams to audit, the entire analysis if diagram_indexes is None.
+        """
+        if diagram_indexes is None:
+            return analysis_results
+        return {**analysis_results, "diagrams": [analysis_results["diagrams"][index] for index in diagram_indexes]}
+
+    def _get_shard_key(self, job_parameters:dict) -> str:
+        """
+        Returns the hash of the shard and the models used to process it, checkpoints are only restored for the same shard and models.
+        """
+        serialized = json.dumps([job_parameters, self.model.model_name, self.auditor.model_name], sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _load_checkpoint(self, step:ModelUsageStage, shard_key:str):
+        """
+        Returns the output of the step saved by a previous attempt of the job, None if the step has not been completed.
+        """
+        if self.checkpoint_service is None:
+            return None
+        output = self.checkpoint_service.get_checkpoint(self.chain_input.get_job_id(), step.value, shard_key)
+        if output is not None:
+            logger.info(f"Resuming job {self.chain_input.get_job_id()} from the {step.value} checkpoint")
+        return output
+
+    def _save_checkpoint(self, step:ModelUsageStage, shard_key:str, output):
+        """
+        Saves the output of the step against the job.
+        """
+        if self.checkpoint_service is not None:
+            self.checkpoint_service.save_checkpoint(self.chain_input.get_job_id(), step.value, shard_key, output)
+
+    def _usage_context(self, stage:ModelUsageStage):
+        """
+        Records the LLM calls made within the context against the job and stage in the ModelUsage ledger.
+        """
+        return ModelUsageRecorder.usage_context(job_id=self.chain_input.get_job_id(), stage=stage.value)
+
+    def _use_cache(self) -> bool:
+        """
+        Returns False if the job was submitted with bypass_cache, LLM responses will not be served from the cache.
+        """
+        return not self.chain_input.get_bypass_cache()
+
+    def _build_analysis_prompt(self, job_parameters:dict) -> str:
+        """
+        Builds the model prompt using the job parameters and the analysis context from the chain input.
+        """
+        analysis_prompt = self.prompt_builder.generate_model_prompt(self.chain_input.get_model_prompt_template(), job_parameters, self.chain_input.get_analysis_context())
+        logger.debug(f"Model Prompt: {analysis_prompt}")
+        return analysis_prompt
+
+    def _build_audit_prompt(self, analysis_results) -> str:
+        """
+        Builds the audit prompt using the analysis results and audit criteria from the chain input.
+        """
+        audit_prompt = self.prompt_builder.generate_audit_prompt(self.chain_input.get_audit_prompt_template(), analysis_results, self.chain_input.get_audit_criteria())
+        logger.debug(f"Audit Prompt: {audit_prompt}")
+        return audit_prompt
+
+    def _to_chain_exception(self, e:Exception) -> Exception:
+        """
+        Maps errors raised while executing the chain to an AnalyzeAndAuditChainException.
+        ModelCircuitOpenError is raised as is, so that consumers can hold the job until the circuit closes.
+        args:
+            e (Exception): The error raised while executing the chain.
+        returns:
+            AnalyzeAndAuditChainException: The exception to raise.
+        """
+        if isinstance(e, (AnalyzeAndAuditChainException, ModelCircuitOpenError)):
+            return e
+        if isinstance(e, ModelPromptBuildingError):
+            return AnalyzeAndAuditChainException(f"Error while building model prompt - {str(e)}")
+        if isinstance(e, AuditPromptBuildingError):
+            return AnalyzeAndAuditChainException(f"Error while building audit prompt - {str(e)}")
+        logger.error(f"Error in AnalyzeAndAuditChain: {str(e)}")
+        if isinstance(e, ModelAnalysisError):
+            return AnalyzeAndAuditChainException(f"Error while generating analysis - {str(e)}")
+        if isinstance(e, AuditorAnalysisError):
+            return AnalyzeAndAuditChainException(f"Error while auditing response - {str(e)}")
+        return AnalyzeAndAuditChainException(f"Unhandled Error while auditing response - {str(e)}")
 
     def append_additional_information(self, results:dict) -> dict:
         """
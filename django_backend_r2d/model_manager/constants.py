@@ -4,8 +4,10 @@ class ModelProvider(Enum):
     """
     List of model providers within R2D
     OPEN_AI: OpenAI models
+    FAKE: Fake models that return generated responses without invoking an LLM, used for load testing
     """
     OPEN_AI = "openai"
+    FAKE = "fake"
     # TOGETHER_AI = "togetherai"
     # LLAMA = "llama"
     # Add more providers as needed
@@ -24,3 +26,71 @@ class OpenAIModels(Enum):
     GPT_3_5_TURBO = "gpt-3.5-turbo"
     TEXT_EMBEDDING_3_LARGE = "text-embedding-3-large"
     TEXT_EMBEDDING_3_SMALL = "text-embedding-3-small"
+
+class FakeModels(Enum):
+    """
+    List of fake models within R2D, fake models return schema-valid responses with a configurable latency and error rate.
+    Configured using the R2D_FAKE_LLM_CONFIG environment variable (JSON) e.g., {"latency_distribution": "lognormal", "latency_mean": 8, "latency_stddev": 3, "error_rate": 0.01}
+    FAKE_DIAGRAM_MODEL: fake-diagram-model - 5
+    """
+    FAKE_DIAGRAM_MODEL = "fake-diagram-model"
+
+class ModelUsageStage(Enum):
+    """
+    Stages of the Analyze and Audit chain recorded in the ModelUsage ledger
+    ANALYSIS: GPTModel.analyze
+    AUDIT: GPTAuditor.audit
+    """
+    ANALYSIS = "analysis"
+    AUDIT = "audit"
+
+class AuditPolicy(Enum):
+    """
+    Policies of the Analyze and Audit chain, configured using R2D_AUDIT_POLICY. Diagrams are checked locally by the MermaidValidator.
+    ALWAYS: Every response is audited.
+    SKIP_VALID: The audit is skipped if every diagram passes the MermaidValidator, otherwise the response is audited.
+    FLAGGED: Only the diagrams flagged by the MermaidValidator are audited.
+    Diagrams that are not audited are saved as analyzed (is_audited False), diagrams that passed the MermaidValidator are saved with is_validated True
+    and are passed to dependent stages and reused by other jobs as audited diagrams are.
+    """
+    ALWAYS = "always"
+    SKIP_VALID = "skip_valid"
+    FLAGGED = "flagged"
+
+"""
+Token limits of the models within R2D, used to shard job parameters so that each prompt fits the model's context window and output budget.
+context_window: Maximum number of tokens (prompt + completion) supported by the model.
+max_output_tokens: Maximum number of completion tokens, must match the max_tokens used when initializing the model (see ModelFactory).
+"""
+MODEL_TOKEN_LIMITS = {
+    OpenAIModels.GPT_4_TURBO.value: {"context_window": 128000, "max_output_tokens": 4096},
+    OpenAIModels.GPT_3_5_TURBO.value: {"context_window": 16385, "max_output_tokens": 4096},
+    FakeModels.FAKE_DIAGRAM_MODEL.value: {"context_window": 128000, "max_output_tokens": 4096},
+}
+DEFAULT_MODEL_TOKEN_LIMITS = {"context_window": 16385, "max_output_tokens": 4096}
+
+"""
+tiktoken encodings used by the models within R2D, used by the TokenCounter to count the tokens billed by the provider.
+"""
+MODEL_TOKENIZER_ENCODINGS = {
+    OpenAIModels.GPT_4_TURBO.value: "cl100k_base",
+    OpenAIModels.GPT_3_5_TURBO.value: "cl100k_base",
+    OpenAIModels.TEXT_EMBEDDING_3_LARGE.value: "cl100k_base",
+    OpenAIModels.TEXT_EMBEDDING_3_SMALL.value: "cl100k_base",
+}
+DEFAULT_TOKENIZER_ENCODING = "cl100k_base"
+
+# Estimated number of completion tokens generated per token of job parameters, diagrams and descriptions are typically larger than the user stories
+SHARD_OUTPUT_TOKEN_RATIO = 2.0
+
+"""
+Rate limits of the models within R2D, enforced across every Celery worker by the ModelRateLimiter.
+Defaults match the OpenAI usage tier 1 limits, override using the R2D_MODEL_RATE_LIMITS environment variable (JSON)
+e.g., {"gpt-4-turbo": {"requests_per_minute": 5000, "tokens_per_minute": 600000}}
+requests_per_minute: Maximum number of requests sent to the model per minute (RPM).
+tokens_per_minute: Maximum number of prompt and completion tokens per minute (TPM), completion tokens are reserved using max_tokens.
+"""
+MODEL_RATE_LIMITS = {
+    OpenAIModels.GPT_4_TURBO.value: {"requests_per_minute": 500, "tokens_per_minute": 30000},
+    OpenAIModels.GPT_3_5_TURBO.value: {"requests_per_minute": 3500, "tokens_per_minute": 60000},
+}
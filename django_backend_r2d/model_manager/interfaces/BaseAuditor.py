@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from model_manager.interfaces.BasePromptTemplate import BasePromptTemplate
 
@@ -10,12 +11,23 @@ class BaseAuditor(ABC):
         self.model_name = model_name
         
     @abstractmethod
-    def audit(self, prompt: str, response_schema:dict, model_response:dict):
+    def audit(self, prompt: str, response_schema:dict, use_cache:bool=True):
         """
         Audit the results of the model and return the audit results.
         args:
-            prompt (str): The prompt to be audited.
+            prompt (str): The prompt to be audited, contains the response from the model that needs to be audited.
             response_schema (dict): Optional schema for structured response.
-            model_response (dict): The response from the model that needs to be audited.
+            use_cache (bool): Set to False to bypass the LLM response cache.
         """
         pass
+
+    async def aaudit(self, prompt: str, response_schema:dict, use_cache:bool=True):
+        """
+        Asynchronous variant of audit, auditors backed by an async client should override this method.
+        By default the blocking audit call is executed in a worker thread so the event loop is not blocked.
+        args:
+            prompt (str): The prompt to be audited.
+            response_schema (dict): Optional schema for structured response.
+            use_cache (bool): Set to False to bypass the LLM response cache.
+        """
+        return await asyncio.to_thread(self.audit, prompt, response_schema, use_cache)
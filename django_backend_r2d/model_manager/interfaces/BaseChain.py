@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class BaseChain(ABC):
@@ -12,3 +13,12 @@ class BaseChain(ABC):
             AnalyzeAndAuditChainException: If an error occurs during the chain.
         """
         pass
+
+    async def aexecute_chain(self):
+        """
+        Asynchronous variant of execute_chain, chains that can await their models should override this method.
+        By default the blocking execute_chain call is executed in a worker thread so the event loop is not blocked.
+        raises:
+            AnalyzeAndAuditChainException: If an error occurs during the chain.
+        """
+        return await asyncio.to_thread(self.execute_chain)
@@ -16,15 +16,18 @@ class BaseChainInput(ABC):
         audit_criteria (dict, optional): Optional criteria for the audit.
         model_response_schema (Union[Type[PydanticModel], dict], optional): Optional schema for the model response.
         auditor_response_schema (Union[Type[PydanticModel], dict], optional): Optional schema for the auditor response.
+        bypass_cache (bool, optional): Set to True to bypass the LLM response cache for this job. Default is False.
     functions:
         get_job_parameters: Returns the job parameters.
         set_job_parameters: Sets the job parameters.
         get_model_prompt_template: Returns the model prompt template.
         get_audit_prompt_template: Returns the audit prompt template.
         get_analysis_context: Returns the model context.
+        set_analysis_context: Sets the model context.
         get_audit_criteria: Returns the audit criteria.
         get_model_response_schema: Returns the model response schema.
         get_auditor_response_schema: Returns the auditor response schema.
+        get_bypass_cache: Returns True if the LLM response cache should be bypassed.
     """
     def __init__(self, job_id: str, 
                  model_prompt_template: BasePromptTemplate, 
@@ -33,7 +36,8 @@ class BaseChainInput(ABC):
                  analysis_context: Optional[dict] = None, 
                  audit_criteria: Optional[dict] = None, 
                  model_response_schema: Optional[Union[Type[PydanticModel], dict]] = None, 
-                 auditor_response_schema: Optional[Union[Type[PydanticModel], dict]] = None):
+                 auditor_response_schema: Optional[Union[Type[PydanticModel], dict]] = None,
+                 bypass_cache: bool = False):
         
         self.job_id = job_id
         self.model_prompt_template = model_prompt_template
@@ -43,6 +47,7 @@ class BaseChainInput(ABC):
         self.audit_criteria = audit_criteria or {}
         self.model_response_schema = model_response_schema
         self.auditor_response_schema = auditor_response_schema
+        self.bypass_cache = bypass_cache
         
     def get_job_id(self) -> str:
         """
@@ -80,6 +85,12 @@ class BaseChainInput(ABC):
         """
         return self.analysis_context
 
+    def set_analysis_context(self, analysis_context:Optional[dict]):
+        """
+        Sets the model context.
+        """
+        self.analysis_context = analysis_context or {}
+
     def get_audit_criteria(self) -> dict:
         """
         Returns the audit criteria.
@@ -97,4 +108,9 @@ class BaseChainInput(ABC):
         Returns the auditor response schema.
         """
         return self.auditor_response_schema
-    
\ No newline at end of file
+
+    def get_bypass_cache(self) -> bool:
+        """
+        Returns True if the LLM response cache should be bypassed.
+        """
+        return self.bypass_cache
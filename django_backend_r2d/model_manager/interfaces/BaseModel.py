@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class BaseModel(ABC):
@@ -8,11 +9,23 @@ class BaseModel(ABC):
         self.model_name = model_name
         
     @abstractmethod
-    def analyze(self, prompt:str, response_schema:dict):
+    def analyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
         """
         Analyze the prompt and context and return the generated output.
         args:
             prompt (str): The prompt to be analyzed.
             response_schema (dict): Optional schema for structured response.
+            use_cache (bool): Set to False to bypass the LLM response cache.
         """
         pass
+
+    async def aanalyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        """
+        Asynchronous variant of analyze, models backed by an async client should override this method.
+        By default the blocking analyze call is executed in a worker thread so the event loop is not blocked.
+        args:
+            prompt (str): The prompt to be analyzed.
+            response_schema (dict): Optional schema for structured response.
+            use_cache (bool): Set to False to bypass the LLM response cache.
+        """
+        return await asyncio.to_thread(self.analyze, prompt, response_schema, use_cache)
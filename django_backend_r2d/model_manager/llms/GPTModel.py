@@ -1,11 +1,12 @@
 from typing import Optional, Union, Type
 from pydantic import BaseModel as PydanticModel
-from langchain.output_parsers import PydanticOutputParser
 
 from langchain_openai import ChatOpenAI
 from model_manager.interfaces.BaseModel import BaseModel
-from model_manager.constants import OpenAIModels  
+from model_manager.constants import ModelProvider, OpenAIModels  
 from model_manager.interfaces.BasePromptTemplate import BasePromptTemplate
+from model_manager.services.LLMInvoker import LLMInvoker
+from model_manager.services.ModelUsageRecorder import ModelUsageRecorder
 from model_manager.services.ModelExceptions import *
 
 import logging 
@@ -31,36 +32,52 @@ class GPTModel(BaseModel):
             model_name = model_name.value
 
         super().__init__(model_name=model_name)
-        self.llm = ChatOpenAI(openai_api_key=openai_api_key, model_name=model_name, **kwargs)
+        # Requests sent by the client are counted by the ModelUsageRecorder, including the requests retried by the client
+        self.llm = ChatOpenAI(openai_api_key=openai_api_key, model_name=model_name, **{**ModelUsageRecorder.get_http_clients(), **kwargs})
+        self.invoker = LLMInvoker(self.llm, provider=ModelProvider.OPEN_AI.value)
         
-    def analyze(self, prompt: str, response_schema:(Optional[Union[Type[PydanticModel], dict]]) = None) -> str:
+    def analyze(self, prompt: str, response_schema:(Optional[Union[Type[PydanticModel], dict]]) = None, use_cache:bool = True) -> str:
         """
         Performs LLM analysis on the given prompt.
         Args:
             prompt (str): The prompt to be used for the analysis, retrieved from concrete BasePromptTemplate classes.
             response_schema (Optional[Type[PydanticModel], dict]): Optional schema for structured response, either a valid Pydantic model or None.
             The response_schema will be used to parse the output of the LLM.
+            use_cache (bool): Set to False to bypass the LLM response cache e.g., the job was submitted with bypass_cache. Default is True.
         Returns:
             str: The response from the LLM, potentially parsed by a Pydantic model.
         Raises:
             ModelAnalysisError: If there is an error in analyzing the prompt.
+            ModelCircuitOpenError: If the circuit of the model is open.
         """
         
         try:
-            if response_schema and isinstance(response_schema, PydanticModel):
-                logger.debug(f"Using Pydantic model for structured response")
-                # If a Pydantic model is defined, use it to parse the output
-                parser = PydanticOutputParser(pydantic_object=response_schema)
-                response = self.llm.invoke({"role": "user", "content": prompt}, output_parser=parser)
-            elif response_schema:
-                logger.debug(f"Using JSON schema for structured response")
-                # If a JSON schema is defined, use it to parse the output
-                structured_llm = self.llm.with_structured_output(response_schema)
-                response = structured_llm.invoke([{"role": "user", "content": prompt}])
-            else:
-                logger.debug("No default schema provided, returning the entire response.")
-                response = self.llm.invoke([{"role": "user", "content": prompt}])
+            response = self.invoker.invoke(prompt, response_schema, use_cache)
+        except ModelCircuitOpenError:
+            raise # Consumers hold the job until the circuit closes
         except Exception as e:
             raise ModelAnalysisError(f"Error analyzing the prompt: {str(e)}")
         
-        return response  # Return the entire response
\ No newline at end of file
+        return response  # Return the entire response
+
+    async def aanalyze(self, prompt: str, response_schema:(Optional[Union[Type[PydanticModel], dict]]) = None, use_cache:bool = True) -> str:
+        """
+        Performs LLM analysis on the given prompt without blocking the event loop.
+        Args:
+            prompt (str): The prompt to be used for the analysis, retrieved from concrete BasePromptTemplate classes.
+            response_schema (Optional[Type[PydanticModel], dict]): Optional schema for structured response, either a valid Pydantic model or None.
+            use_cache (bool): Set to False to bypass the LLM response cache e.g., the job was submitted with bypass_cache. Default is True.
+        Returns:
+            str: The response from the LLM, potentially parsed by a Pydantic model.
+        Raises:
+            ModelAnalysisError: If there is an error in analyzing the prompt.
+            ModelCircuitOpenError: If the circuit of the model is open.
+        """
+        try:
+            response = await self.invoker.ainvoke(prompt, response_schema, use_cache)
+        except ModelCircuitOpenError:
+            raise # Consumers hold the job until the circuit closes
+        except Exception as e:
+            raise ModelAnalysisError(f"Error analyzing the prompt: {str(e)}")
+        
+        return response
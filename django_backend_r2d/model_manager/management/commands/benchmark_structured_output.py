@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from langchain_openai import ChatOpenAI
+from diagrams.response_schemas.mermaid_class_diagram_schema import MERMAID_CLASS_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_er_diagram_schema import MERMAID_ER_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_sequence_diagram_schema import MERMAID_SEQUENCE_DIAGRAM_SCHEMA
+from model_manager.constants import OpenAIModels
+from model_manager.services.LLMInvoker import LLMInvoker
+
+class Command(BaseCommand):
+    """
+    Measures the per-call overhead of binding a response schema using with_structured_output, compared to the runnable cached by the LLMInvoker.
+    No requests are sent to the LLM, the client is created with a placeholder API key.
+    e.g., python manage.py benchmark_structured_output --iterations 1000
+    """
+    help = "Benchmarks with_structured_output against the structured output runnables cached by the LLMInvoker."
+
+    SCHEMAS = {
+        "class_diagram": MERMAID_CLASS_DIAGRAM_SCHEMA,
+        "er_diagram": MERMAID_ER_DIAGRAM_SCHEMA,
+        "sequence_diagram": MERMAID_SEQUENCE_DIAGRAM_SCHEMA,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000, help="Number of calls per schema. Default is 1000.")
+        parser.add_argument("--model", default=OpenAIModels.GPT_4_TURBO.value, help="Model name used to create the client.")
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        llm = ChatOpenAI(openai_api_key="benchmark", model_name=options["model"])
+        invoker = LLMInvoker(llm)
+
+        self.stdout.write(f"{'schema':<20}{'uncached (us)':>16}{'cached (us)':>16}{'speedup':>10}")
+        for name, schema in self.SCHEMAS.items():
+            uncached = self._time_per_call(lambda: llm.with_structured_output(schema), iterations)
+            invoker.get_structured_runnable(schema) # Bound once, as on the first request of a worker
+            cached = self._time_per_call(lambda: invoker.get_structured_runnable(schema), iterations)
+            speedup = uncached / cached if cached else float("inf")
+            self.stdout.write(f"{name:<20}{uncached:>16.2f}{cached:>16.2f}{speedup:>9.1f}x")
+
+    @staticmethod
+    def _time_per_call(function, iterations:int) -> float:
+        """
+        Returns the mean duration of a call in microseconds.
+        """
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        return (time.perf_counter() - start) / iterations * 1_000_000
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:00
+
+from django.db import migrations
+
+def create_fake_model_name(apps, schema_editor):
+    ModelName = apps.get_model('model_manager', 'ModelName')
+    # Fake model used to load test the diagram pipeline, see model_manager/llms/FakeModel.py
+    ModelName.objects.get_or_create(name="fake-diagram-model", defaults={"code": 5, "provider": "fake"})
+
+def delete_fake_model_name(apps, schema_editor):
+    ModelName = apps.get_model('model_manager', 'ModelName')
+    ModelName.objects.filter(name="fake-diagram-model").delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model_manager', '0003_update_model_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fake_model_name, delete_fake_model_name)
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model_manager', '0004_create_fake_model_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(blank=True, db_index=True, null=True)),
+                ('stage', models.CharField(max_length=20)),
+                ('provider', models.CharField(max_length=50)),
+                ('model_name', models.CharField(max_length=50)),
+                ('prompt_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('completion_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('latency', models.FloatField()),
+                ('retries', models.PositiveSmallIntegerField(default=0)),
+                ('cached', models.BooleanField(default=False)),
+                ('success', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Model Usage',
+                'verbose_name_plural': 'Model Usage',
+                'indexes': [models.Index(fields=['created_at', 'model_name'], name='model_manag_created_9984e3_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models, IntegrityError
+from django.utils import timezone
 
 class ModelName(models.Model):
     """
@@ -9,6 +10,7 @@ class ModelName(models.Model):
     3 | gpt-3.5-turbo | 2 |  openai
     4 | text-embedding-3-large | 3 | openai
     5 | text-embedding-3-small | 4 | openai
+    6 | fake-diagram-model | 5 | fake
     """
     name = models.CharField(max_length=50, unique=True)
     code = models.PositiveSmallIntegerField(unique=True)
@@ -26,4 +28,33 @@ class ModelName(models.Model):
         # Prevent changes to predefined statuses
         if self.pk:
             raise IntegrityError("Modification of predefined job statuses is not allowed.")
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class ModelUsage(models.Model):
+    """
+    Ledger of the LLM calls made by GPTModel.analyze and GPTAuditor.audit, one row per call.
+    Rows are buffered and written in batches by the ModelUsageRecorder, used to size worker pools and choose models.
+    job_id | stage | provider | model_name | prompt_tokens | completion_tokens | latency | retries | cached | success | created_at
+    <uuid> | analysis | openai | gpt-4-turbo | 1250 | 830 | 14.2 | 0 | False | True | 2024-07-01 12:00:00
+    prompt_tokens and completion_tokens are reported by the provider, cached responses do not consume tokens.
+    latency is the number of seconds the call took, including waiting for the rate limit budget and retries.
+    """
+    job_id = models.UUIDField(null=True, blank=True, db_index=True)
+    stage = models.CharField(max_length=20)
+    provider = models.CharField(max_length=50)
+    model_name = models.CharField(max_length=50)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency = models.FloatField()
+    retries = models.PositiveSmallIntegerField(default=0)
+    cached = models.BooleanField(default=False)
+    success = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now) # Time of the call, rows are written after the call
+
+    def __str__(self):
+        return f"{self.model_name} {self.stage} {self.job_id}"
+
+    class Meta:
+        verbose_name = "Model Usage"
+        verbose_name_plural = "Model Usage"
+        indexes = [models.Index(fields=["created_at", "model_name"])]
@@ -0,0 +1,184 @@
+import math
+import random
+import threading
+from typing import Optional
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class FakeResponseGenerator:
+    """
+    Generates schema-valid responses, latency and errors for the FAKE model provider.
+    Used to load test the diagram pipeline (Celery, database and signals) without invoking a real LLM.
+
+    Responses are generated from the response schema provided, diagram fields contain valid Mermaid syntax based on the schema title
+    (ClassDiagramResponse, ERDiagramResponse and SequenceDiagramResponse), every other field is generated from its JSON schema type.
+
+    args:
+        latency_distribution (str): constant, uniform, normal or lognormal. Default is constant.
+        latency_mean (float): Mean latency in seconds. Default is 0.
+        latency_stddev (float): Standard deviation of the latency in seconds, used by the normal and lognormal distributions. Default is 0.
+        latency_min (float): Minimum latency in seconds, lower bound of the uniform distribution. Default is 0.
+        latency_max (float): Maximum latency in seconds, upper bound of the uniform distribution. Default is latency_mean.
+        error_rate (float): Probability between 0 and 1 that a request fails. Default is 0.
+        diagrams_per_response (int): Number of diagrams in each response. Default is 1.
+        items_per_diagram (int): Number of classes, entities or actors in each diagram. Default is 3.
+        description_words (int): Number of words in each description. Default is 30.
+        seed (int): Optional seed so that latency, errors and responses are reproducible.
+    functions:
+        sample_latency: Returns the latency of the next request in seconds.
+        should_fail: Returns True if the next request should fail.
+        generate: Generates a response for the response schema.
+    """
+    LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+    def __init__(self, latency_distribution:str="constant", latency_mean:float=0.0, latency_stddev:float=0.0,
+                 latency_min:float=0.0, latency_max:Optional[float]=None, error_rate:float=0.0,
+                 diagrams_per_response:int=1, items_per_diagram:int=3, description_words:int=30, seed:Optional[int]=None):
+        if latency_distribution not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Invalid latency_distribution {latency_distribution}, expected one of {self.LATENCY_DISTRIBUTIONS}")
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"Invalid error_rate {error_rate}, expected a value between 0 and 1")
+
+        self.latency_distribution = latency_distribution
+        self.latency_mean = float(latency_mean)
+        self.latency_stddev = float(latency_stddev)
+        self.latency_min = float(latency_min)
+        self.latency_max = float(latency_max) if latency_max is not None else self.latency_mean
+        self.error_rate = float(error_rate)
+        self.diagrams_per_response = max(1, int(diagrams_per_response))
+        self.items_per_diagram = max(1, int(items_per_diagram))
+        self.description_words = max(1, int(description_words))
+        self._random = random.Random(seed)
+        self._lock = threading.Lock() # random.Random is shared by concurrent requests
+
+    def sample_latency(self) -> float:
+        """
+        Returns the latency of the next request in seconds, latencies are never negative.
+        """
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                latency = self._random.uniform(self.latency_min, max(self.latency_min, self.latency_max))
+            elif self.latency_distribution == "normal":
+                latency = self._random.gauss(self.latency_mean, self.latency_stddev)
+            elif self.latency_distribution == "lognormal":
+                latency = self._sample_lognormal()
+            else:
+                latency = self.latency_mean
+        return max(0.0, latency)
+
+    def should_fail(self) -> bool:
+        """
+        Returns True if the next request should fail, based on the error_rate.
+        """
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def generate(self, response_schema:Optional[dict] = None):
+        """
+        Generates a response that is valid for the response schema.
+        args:
+            response_schema (dict): JSON schema of the response e.g., MERMAID_CLASS_DIAGRAM_SCHEMA.
+        returns:
+            dict: The generated response, or a string if no response schema is provided.
+        """
+        with self._lock:
+            if not isinstance(response_schema, dict):
+                return self._words(self.description_words)
+            return self._generate_value(response_schema, response_schema.get("title", ""), name=None, index=0)
+
+    def _sample_lognormal(self) -> float:
+        """
+        Samples a lognormal latency whose mean and standard deviation match latency_mean and latency_stddev.
+        """
+        if self.latency_mean <= 0:
+            return 0.0
+        if self.latency_stddev <= 0:
+            return self.latency_mean
+        variance = math.log(1 + (self.latency_stddev ** 2) / (self.latency_mean ** 2))
+        mu = math.log(self.latency_mean) - variance / 2
+        return self._random.lognormvariate(mu, math.sqrt(variance))
+
+    def _generate_value(self, schema:dict, title:str, name:Optional[str], index:int):
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            return {
+                property_name: self._generate_value(property_schema, title, property_name, index)
+                for property_name, property_schema in schema.get("properties", {}).items()
+            }
+        if schema_type == "array":
+            if name == "diagrams":
+                return [self._generate_value(schema.get("items", {}), title, None, diagram_index)
+                        for diagram_index in range(self.diagrams_per_response)]
+            return [self._generate_item(schema.get("items", {}), title, name, index, item_index)
+                    for item_index in range(self._array_length(name))]
+        if schema_type == "string":
+            return self._generate_string(title, name, index)
+        if schema_type in ("integer", "number"):
+            return index
+        if schema_type == "boolean":
+            return True
+        return None
+
+    def _generate_item(self, schema:dict, title:str, name:Optional[str], index:int, item_index:int):
+        if schema.get("type") == "string":
+            return self._item_name(title, name, index, item_index)
+        return self._generate_value(schema, title, name, item_index)
+
+    def _array_length(self, name:Optional[str]) -> int:
+        # Each diagram is generated for a single feature
+        return 1 if name == "feature" else self.items_per_diagram
+
+    def _generate_string(self, title:str, name:Optional[str], index:int) -> str:
+        if name == "diagram":
+            return self._generate_diagram(title, index)
+        return self._words(self.description_words)
+
+    def _item_name(self, title:str, name:Optional[str], index:int, item_index:int) -> str:
+        if name == "feature":
+            return f"Feature{index + 1}"
+        if name == "helper_classes":
+            return f"Feature{index + 1}Controller{item_index + 1}"
+        if name == "actors":
+            return f"Actor{index + 1}_{item_index + 1}"
+        if name == "entities":
+            return f"ENTITY_{index + 1}_{item_index + 1}"
+        return f"Feature{index + 1}Class{item_index + 1}"
+
+    def _generate_diagram(self, title:str, index:int) -> str:
+        """
+        Generates a Mermaid diagram whose participants match the names generated for the same diagram.
+        """
+        if title == "ERDiagramResponse":
+            entities = [self._item_name(title, "entities", index, item_index) for item_index in range(self.items_per_diagram)]
+            lines = ["erDiagram"]
+            for entity in entities:
+                lines.extend([f"    {entity} {{", "        int id PK", "        string name", "    }"])
+            for left, right in zip(entities, entities[1:]):
+                lines.append(f"    {left} ||--o{{ {right} : has")
+            return "\n".join(lines)
+
+        if title == "SequenceDiagramResponse":
+            actors = [self._item_name(title, "actors", index, item_index) for item_index in range(self.items_per_diagram)]
+            lines = ["sequenceDiagram"]
+            lines.extend(f"    participant {actor}" for actor in actors)
+            for left, right in zip(actors, actors[1:]):
+                lines.append(f"    {left}->>{right}: request")
+                lines.append(f"    {right}-->>{left}: response")
+            return "\n".join(lines)
+
+        classes = [self._item_name(title, "classes", index, item_index) for item_index in range(self.items_per_diagram)]
+        helper_classes = [self._item_name(title, "helper_classes", index, item_index) for item_index in range(self.items_per_diagram)]
+        lines = ["classDiagram"]
+        for class_name in classes + helper_classes:
+            lines.extend([f"    class {class_name} {{", "        +int id", "        +execute() bool", "    }"])
+        for left, right in zip(classes, classes[1:]):
+            lines.append(f"    {left} --> {right} : uses")
+        for controller, class_name in zip(helper_classes, classes):
+            lines.append(f"    {controller} ..> {class_name} : manages")
+        return "\n".join(lines)
+
+    def _words(self, count:int) -> str:
+        vocabulary = ("the", "service", "stores", "user", "requests", "and", "returns", "validated", "responses", "for", "each", "feature")
+        return " ".join(self._random.choice(vocabulary) for _ in range(count))
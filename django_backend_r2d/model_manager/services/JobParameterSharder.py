@@ -0,0 +1,155 @@
+import json
+from typing import Callable
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+def estimate_tokens(text:str) -> int:
+    """
+    Estimates the number of tokens in the text, OpenAI models average roughly 4 characters per token for English text.
+    Used when the tiktoken encoding of the model is not available, see TokenCounter.
+    """
+    return max(1, len(text) // 4)
+
+class JobParameterSharder:
+    """
+    Splits job parameters containing user stories grouped by feature into shards that fit within a token budget.
+
+    Job parameters are expected to be in the UMLDiagramSerializer format:
+    {"features": [...], "sub_features": [...], "job_parameters": {feature: {sub_feature: {story_id: story}}}}
+
+    Features are never split unless a single feature exceeds the budget, in which case it is split by sub-feature,
+    then by user story. A single user story is never split.
+    Shards are packed using first-fit decreasing so that the number of shards, and the size of the largest shard, is kept small.
+    Job parameters in any other format are returned as a single shard.
+
+    args:
+        token_counter (Callable): Returns the number of tokens in a string e.g., TokenCounter. Default is estimate_tokens.
+    functions:
+        shard: Splits the job parameters into shards.
+        is_shardable: Returns True if the job parameters can be split by feature.
+    """
+    def __init__(self, token_counter:Callable[[str], int] = estimate_tokens):
+        self.token_counter = token_counter
+
+    @staticmethod
+    def is_shardable(job_parameters) -> bool:
+        """
+        Returns True if the job parameters contain user stories grouped by feature.
+        """
+        return (isinstance(job_parameters, dict)
+                and isinstance(job_parameters.get("job_parameters"), dict)
+                and all(isinstance(sub_features, dict) for sub_features in job_parameters["job_parameters"].values()))
+
+    def shard(self, job_parameters:dict, token_budget:int) -> list[dict]:
+        """
+        Splits the job parameters into shards, each shard contains at most token_budget tokens of user stories.
+        args:
+            job_parameters (dict): The job parameters to split.
+            token_budget (int): The maximum number of tokens of user stories in each shard.
+        returns:
+            list[dict]: The shards, each shard has the same format as the job parameters provided.
+        """
+        if not self.is_shardable(job_parameters) or token_budget <= 0:
+            return [job_parameters]
+
+        units = self._split_into_units(job_parameters["job_parameters"], token_budget)
+        if len(units) <= 1:
+            return [job_parameters]
+
+        bins = self._pack(units, token_budget)
+        if len(bins) == 1:
+            return [job_parameters]
+
+        shards = [self._build_shard(job_parameters, bin_units) for bin_units in bins]
+        logger.debug(f"Split job parameters into {len(shards)} shards with a budget of {token_budget} tokens")
+        return shards
+
+    def _count(self, value) -> int:
+        return self.token_counter(json.dumps(value, default=str))
+
+    def _split_into_units(self, stories_by_feature:dict, token_budget:int) -> list[tuple]:
+        """
+        Returns a list of (feature, {sub_feature: {story_id: story}}, tokens) units that are packed into shards.
+        Features that exceed the budget are split by sub-feature, sub-features that exceed the budget are split by user story.
+        """
+        units = []
+        for feature, sub_features in stories_by_feature.items():
+            feature_tokens = self._count({feature: sub_features})
+            if feature_tokens <= token_budget:
+                units.append((feature, dict(sub_features), feature_tokens))
+                continue
+
+            for sub_feature, stories in sub_features.items():
+                sub_feature_tokens = self._count({feature: {sub_feature: stories}})
+                if sub_feature_tokens <= token_budget or not isinstance(stories, dict):
+                    units.append((feature, {sub_feature: stories}, sub_feature_tokens))
+                    continue
+
+                # Pack the user stories of the sub-feature sequentially, preserving their order
+                chunk, chunk_tokens = {}, 0
+                for story_id, story in stories.items():
+                    story_tokens = self._count({story_id: story})
+                    if chunk and chunk_tokens + story_tokens > token_budget:
+                        units.append((feature, {sub_feature: chunk}, chunk_tokens))
+                        chunk, chunk_tokens = {}, 0
+                    chunk[story_id] = story
+                    chunk_tokens += story_tokens
+                if chunk:
+                    units.append((feature, {sub_feature: chunk}, chunk_tokens))
+        return units
+
+    @staticmethod
+    def _pack(units:list[tuple], token_budget:int) -> list[list[tuple]]:
+        """
+        Packs the units into bins using first-fit decreasing, sorting is stable so identical job parameters produce identical shards.
+        """
+        bins = []
+        bin_tokens = []
+        for unit in sorted(units, key=lambda unit: unit[2], reverse=True):
+            for index, tokens in enumerate(bin_tokens):
+                if tokens + unit[2] <= token_budget:
+                    bins[index].append(unit)
+                    bin_tokens[index] += unit[2]
+                    break
+            else:
+                bins.append([unit])
+                bin_tokens.append(unit[2])
+        return bins
+
+    @staticmethod
+    def _build_shard(job_parameters:dict, bin_units:list[tuple]) -> dict:
+        """
+        Builds job parameters containing only the features and sub-features in the bin, in their original order.
+        """
+        stories_by_feature = {}
+        for feature, sub_features, _ in bin_units:
+            feature_stories = stories_by_feature.setdefault(feature, {})
+            for sub_feature, stories in sub_features.items():
+                if isinstance(stories, dict) and isinstance(feature_stories.get(sub_feature), dict):
+                    feature_stories[sub_feature].update(stories)
+                else:
+                    feature_stories[sub_feature] = dict(stories) if isinstance(stories, dict) else stories
+
+        # Preserve the order in which features and user stories were provided
+        ordered = {}
+        for feature, sub_features in job_parameters["job_parameters"].items():
+            if feature not in stories_by_feature:
+                continue
+            ordered[feature] = {}
+            for sub_feature, stories in sub_features.items():
+                if sub_feature not in stories_by_feature[feature]:
+                    continue
+                shard_stories = stories_by_feature[feature][sub_feature]
+                if isinstance(stories, dict) and isinstance(shard_stories, dict):
+                    shard_stories = {story_id: story for story_id, story in stories.items() if story_id in shard_stories}
+                ordered[feature][sub_feature] = shard_stories
+
+        shard_sub_features = {sub_feature for sub_features in ordered.values() for sub_feature in sub_features}
+        return {
+            **job_parameters,
+            "features": [feature for feature in job_parameters.get("features", []) if feature in ordered] or list(ordered),
+            "sub_features": [sub_feature for sub_feature in job_parameters.get("sub_features", []) if sub_feature in shard_sub_features] or sorted(shard_sub_features),
+            "job_parameters": ordered,
+        }
@@ -0,0 +1,200 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Optional, Union, Type
+import openai
+from pydantic import BaseModel as PydanticModel
+from langchain.output_parsers import PydanticOutputParser
+from model_manager.constants import ModelProvider
+from model_manager.services.LLMResponseCache import LLMResponseCache
+from model_manager.services.ModelRateLimiter import ModelRateLimiter
+from model_manager.services.ModelCircuitBreaker import ModelCircuitBreaker
+from model_manager.services.ModelUsageRecorder import ModelUsageRecorder
+from model_manager.services.TokenCounter import TokenCounter
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class LLMInvoker:
+    """
+    Invokes a LangChain chat model with an optional response schema.
+    Shared by GPTModel and GPTAuditor so that the synchronous and asynchronous paths build identical requests.
+    Responses are cached using the LLMResponseCache, identical requests are served from the cache unless use_cache is False.
+    Requests sent to the LLM wait for the requests and tokens per minute budget of the model, cached responses do not consume the budget.
+    The prompt and max_tokens are reserved before the call, the tokens that the provider reports were not used are refunded after the call.
+    Requests are sent through the ModelCircuitBreaker of the provider and model, while the circuit is open requests fail fast with ModelCircuitOpenError.
+    Every call is recorded in the ModelUsage ledger by the ModelUsageRecorder, including the tokens reported by the provider and the number of retries.
+    Structured output runnables are bound once per response schema, the schemas are module constants so they are keyed by identity.
+    args:
+        llm: The LangChain chat model to invoke e.g., ChatOpenAI
+        response_cache (LLMResponseCache): The response cache to use. Default is LLMResponseCache.
+        rate_limiter (ModelRateLimiter): The rate limiter to use. Default is ModelRateLimiter.
+        circuit_breaker (ModelCircuitBreaker): The circuit breaker to use. Default is ModelCircuitBreaker.
+        provider (str): The model provider, used to identify the circuit. Default is openai.
+    functions:
+        invoke: Blocking call to the LLM.
+        ainvoke: Coroutine that awaits the LLM without blocking the event loop.
+        get_structured_runnable: Returns the runnable bound to the response schema.
+    """
+    MAX_STRUCTURED_RUNNABLES = 32
+    # Errors that indicate the provider is degraded, other errors (e.g., invalid requests) mean the provider responded
+    PROVIDER_FAILURES = (openai.APIConnectionError, openai.InternalServerError, openai.RateLimitError)
+
+    def __init__(self, llm, response_cache:LLMResponseCache = None, rate_limiter:ModelRateLimiter = None,
+                 circuit_breaker:ModelCircuitBreaker = None, provider:str = ModelProvider.OPEN_AI.value):
+        self.llm = llm
+        self.response_cache = response_cache or LLMResponseCache()
+        self.rate_limiter = rate_limiter or ModelRateLimiter()
+        self.circuit_breaker = circuit_breaker or ModelCircuitBreaker()
+        self.provider = provider
+        self.token_counter = TokenCounter(getattr(llm, "model_name", None))
+        self._structured_runnables = OrderedDict()
+        self._structured_runnables_lock = threading.Lock()
+
+    def invoke(self, prompt: str, response_schema: Optional[Union[Type[PydanticModel], dict]] = None, use_cache: bool = True):
+        """
+        Invokes the LLM and blocks until the response is returned.
+        args:
+            prompt (str): The prompt to send to the LLM.
+            response_schema ([PydanticModel, dict]): Optional schema for structured response.
+            use_cache (bool): Set to False to bypass the response cache. Default is True.
+        returns:
+            The response from the LLM, parsed using the response_schema if provided.
+        raises:
+            ModelCircuitOpenError: If the circuit of the model is open.
+        """
+        runnable, llm_input, kwargs = self._prepare(prompt, response_schema)
+
+        with ModelUsageRecorder.track_call(self.provider, self.llm.model_name, lambda: self.token_counter.count_messages([prompt])) as usage:
+            def call_llm():
+                self.circuit_breaker.before_request(self.provider, self.llm.model_name)
+                reserved_tokens = self._estimate_request_tokens(prompt)
+                self.rate_limiter.acquire(self.llm.model_name, reserved_tokens)
+                usage.cached = False
+                try:
+                    response = runnable.invoke(llm_input, config={"callbacks": [usage]}, **kwargs)
+                except self.PROVIDER_FAILURES:
+                    self.circuit_breaker.record_failure(self.provider, self.llm.model_name)
+                    raise
+                except Exception:
+                    self.circuit_breaker.record_success(self.provider, self.llm.model_name)
+                    raise
+                self.circuit_breaker.record_success(self.provider, self.llm.model_name)
+                used_tokens = self._get_used_tokens(usage)
+                if used_tokens is not None:
+                    self.rate_limiter.refund(self.llm.model_name, reserved_tokens, used_tokens)
+                return response
+
+            if not LLMResponseCache.is_enabled():
+                return call_llm()
+            if not use_cache:
+                self.response_cache.record_bypass()
+                return call_llm()
+
+            key = self.response_cache.build_key(self.llm.model_name, prompt, response_schema)
+            return self.response_cache.get_or_compute(key, call_llm)
+
+    async def ainvoke(self, prompt: str, response_schema: Optional[Union[Type[PydanticModel], dict]] = None, use_cache: bool = True):
+        """
+        Invokes the LLM asynchronously, the event loop is free to serve other requests while awaiting the response.
+        args:
+            prompt (str): The prompt to send to the LLM.
+            response_schema ([PydanticModel, dict]): Optional schema for structured response.
+            use_cache (bool): Set to False to bypass the response cache. Default is True.
+        returns:
+            The response from the LLM, parsed using the response_schema if provided.
+        raises:
+            ModelCircuitOpenError: If the circuit of the model is open.
+        """
+        runnable, llm_input, kwargs = self._prepare(prompt, response_schema)
+
+        async with ModelUsageRecorder.atrack_call(self.provider, self.llm.model_name, lambda: self.token_counter.count_messages([prompt])) as usage:
+            async def call_llm():
+                await asyncio.to_thread(self.circuit_breaker.before_request, self.provider, self.llm.model_name)
+                reserved_tokens = self._estimate_request_tokens(prompt)
+                await self.rate_limiter.aacquire(self.llm.model_name, reserved_tokens)
+                usage.cached = False
+                try:
+                    response = await runnable.ainvoke(llm_input, config={"callbacks": [usage]}, **kwargs)
+                except self.PROVIDER_FAILURES:
+                    await asyncio.to_thread(self.circuit_breaker.record_failure, self.provider, self.llm.model_name)
+                    raise
+                except Exception:
+                    await asyncio.to_thread(self.circuit_breaker.record_success, self.provider, self.llm.model_name)
+                    raise
+                await asyncio.to_thread(self.circuit_breaker.record_success, self.provider, self.llm.model_name)
+                used_tokens = self._get_used_tokens(usage)
+                if used_tokens is not None:
+                    await self.rate_limiter.arefund(self.llm.model_name, reserved_tokens, used_tokens)
+                return response
+
+            if not LLMResponseCache.is_enabled():
+                return await call_llm()
+            if not use_cache:
+                await self.response_cache.arecord_bypass()
+                return await call_llm()
+
+            key = self.response_cache.build_key(self.llm.model_name, prompt, response_schema)
+            return await self.response_cache.aget_or_compute(key, call_llm)
+
+    def get_structured_runnable(self, response_schema: Union[Type[PydanticModel], dict]):
+        """
+        Returns the runnable returned by with_structured_output for the response schema, bound once per schema.
+        with_structured_output converts the schema into a function definition on every call, the invoker is pooled with its
+        client by the ModelClientRegistry so the bound runnable is reused by every job processed by the worker.
+        Schemas are keyed by identity, the schema is kept with the runnable so that its id is not reused while cached.
+        args:
+            response_schema ([PydanticModel, dict]): The JSON schema or Pydantic model of the structured response.
+        returns:
+            The runnable that returns the parsed structured response.
+        """
+        key = id(response_schema)
+        with self._structured_runnables_lock:
+            cached = self._structured_runnables.get(key)
+            if cached is not None and cached[0] is response_schema:
+                self._structured_runnables.move_to_end(key)
+                return cached[1]
+
+        runnable = self.llm.with_structured_output(response_schema)
+        with self._structured_runnables_lock:
+            self._structured_runnables[key] = (response_schema, runnable)
+            # Bounded so that callers passing a new schema on every request do not grow the cache indefinitely
+            if len(self._structured_runnables) > self.MAX_STRUCTURED_RUNNABLES:
+                self._structured_runnables.popitem(last=False)
+        return runnable
+
+    def _estimate_request_tokens(self, prompt: str) -> int:
+        """
+        Returns the number of tokens reserved for the request, the provider counts max_tokens against the tokens per minute limit.
+        """
+        return self.token_counter.count_messages([prompt]) + (getattr(self.llm, "max_tokens", None) or 0)
+
+    @staticmethod
+    def _get_used_tokens(usage) -> Optional[int]:
+        """
+        Returns the prompt and completion tokens reported by the provider for the call, None if the completion tokens were not reported.
+        """
+        if usage.completion_tokens is None:
+            return None
+        return (usage.prompt_tokens or 0) + usage.completion_tokens
+
+    def _prepare(self, prompt: str, response_schema: Optional[Union[Type[PydanticModel], dict]] = None) -> tuple:
+        """
+        Selects the runnable, input and keyword arguments based on the response_schema provided.
+        returns:
+            tuple: (runnable, llm_input, kwargs)
+        """
+        if response_schema and isinstance(response_schema, PydanticModel):
+            logger.debug(f"Using Pydantic model for structured response")
+            # If a Pydantic model is defined, use it to parse the output
+            parser = PydanticOutputParser(pydantic_object=response_schema)
+            return self.llm, {"role": "user", "content": prompt}, {"output_parser": parser}
+        elif response_schema:
+            logger.debug(f"Using JSON schema for structured response")
+            # If a JSON schema is defined, use it to parse the output
+            structured_llm = self.get_structured_runnable(response_schema)
+            return structured_llm, [{"role": "user", "content": prompt}], {}
+        else:
+            logger.debug("No default schema provided, returning the entire response.")
+            return self.llm, [{"role": "user", "content": prompt}], {}
@@ -0,0 +1,437 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Optional, Union, Type
+from pydantic import BaseModel as PydanticModel
+from framework.utils.DatabaseExecutor import DatabaseExecutor
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+"""
+Renews the lock if it is held by the token.
+KEYS[1]: lock, ARGV[1]: token, ARGV[2]: time to live in milliseconds
+Returns 1 if the lock was renewed.
+"""
+LOCK_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+"""
+Deletes the lock if it is held by the token.
+KEYS[1]: lock, ARGV[1]: token
+"""
+LOCK_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class LLMResponseCache:
+    """
+    Content addressed cache for LLM responses, keyed by a hash of (model_name, prompt, response_schema).
+
+    Responses are stored in the llm_responses cache (see CACHES in settings.py), which is backed by Postgres or Redis
+    and expires entries after R2D_LLM_CACHE_TTL seconds.
+
+    Concurrent identical requests are coalesced (singleflight), the first request acquires a lock and invokes the LLM,
+    other requests, including requests made by other worker processes, wait for the response to be cached.
+    The holder renews the lock every lock_timeout / 3 seconds until the LLM returns, so waiting requests do not invoke the LLM
+    however long the call waits for the rate limiter and retries. The lock is released only by the request holding its token.
+    If the request holding the lock fails, the lock is released and a waiting request invokes the LLM instead, if the worker
+    crashes the lock expires after lock_timeout seconds.
+
+    Cache errors never fail a request, the LLM is invoked directly if the cache is unavailable.
+
+    args:
+        alias (str): The cache alias to use. Default is llm_responses.
+        lock_timeout (int): Seconds before the lock of an in-flight request expires unless renewed. Default is R2D_LLM_CACHE_LOCK_TIMEOUT.
+        poll_interval (float): Seconds between checks for the response of an in-flight request.
+    functions:
+        build_key: Returns the cache key for a request.
+        get_or_compute: Returns the cached response or computes, caches and returns the response.
+        aget_or_compute: Asynchronous variant of get_or_compute.
+        get_stats: Returns the hit and miss counters.
+    """
+    KEY_PREFIX = "llm_response"
+    STATS_PREFIX = "llm_response_stats"
+    STAT_NAMES = ("hits", "misses", "coalesced", "bypassed", "errors")
+
+    _stats_lock = threading.Lock()
+    _stats = {name: 0 for name in STAT_NAMES}
+
+    def __init__(self, alias:str="llm_responses", lock_timeout:Optional[int]=None, poll_interval:float=0.25):
+        self.alias = alias
+        self.lock_timeout = lock_timeout if lock_timeout is not None else getattr(settings, "R2D_LLM_CACHE_LOCK_TIMEOUT", 150)
+        self.poll_interval = poll_interval
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Returns True if the LLM response cache is enabled.
+        """
+        return getattr(settings, "R2D_LLM_CACHE_ENABLED", False)
+
+    def build_key(self, model_name:str, prompt:str, response_schema:Optional[Union[Type[PydanticModel], dict]] = None) -> str:
+        """
+        Returns the cache key for a request, identical requests always produce the same key.
+        args:
+            model_name (str): The model name e.g., gpt-4-turbo
+            prompt (str): The rendered prompt.
+            response_schema ([PydanticModel, dict]): Optional schema for structured response.
+        returns:
+            str: The cache key.
+        """
+        payload = json.dumps({
+            "model_name": str(model_name),
+            "prompt": prompt,
+            "response_schema": self._fingerprint_schema(response_schema),
+        }, sort_keys=True, default=str)
+        return f"{self.KEY_PREFIX}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def get_or_compute(self, key:str, compute:Callable):
+        """
+        Returns the cached response for the key, otherwise invokes compute and caches the response.
+        args:
+            key (str): The cache key, see build_key.
+            compute (Callable): Callable that invokes the LLM and returns the response.
+        returns:
+            The cached or computed response.
+        """
+        lock_key = f"{key}:lock"
+
+        while True:
+            response = self._get(key)
+            if response is not None:
+                return response
+
+            token = self._acquire(lock_key)
+            if token is None:
+                # The cache is unavailable, invoke the LLM directly
+                self._record("misses")
+                return compute()
+
+            if token:
+                # Lock acquired, this request invokes the LLM
+                with self._hold_lock(lock_key, token):
+                    response = self._get(key, record=False)
+                    if response is not None:
+                        self._record("hits")
+                        return response
+                    self._record("misses")
+                    response = compute()
+                    self._set(key, response)
+                    return response
+
+            # An identical request is in-flight, wait for it to populate the cache
+            while True:
+                time.sleep(self.poll_interval)
+                response = self._get(key, record=False)
+                if response is not None:
+                    self._record("coalesced")
+                    return response
+                if not self._is_locked(lock_key):
+                    break # The in-flight request failed, attempt to acquire the lock
+
+    async def aget_or_compute(self, key:str, compute:Callable[[], Awaitable]):
+        """
+        Asynchronous variant of get_or_compute, waiting for an in-flight request does not block the event loop.
+        args:
+            key (str): The cache key, see build_key.
+            compute (Callable): Callable that returns an awaitable that invokes the LLM.
+        returns:
+            The cached or computed response.
+        """
+        lock_key = f"{key}:lock"
+
+        while True:
+            response = await self._aget(key)
+            if response is not None:
+                return response
+
+            token = await self._aacquire(lock_key)
+            if token is None:
+                await self._arecord("misses")
+                return await compute()
+
+            if token:
+                async with self._ahold_lock(lock_key, token):
+                    response = await self._aget(key, record=False)
+                    if response is not None:
+                        await self._arecord("hits")
+                        return response
+                    await self._arecord("misses")
+                    response = await compute()
+                    await self._aset(key, response)
+                    return response
+
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                response = await self._aget(key, record=False)
+                if response is not None:
+                    await self._arecord("coalesced")
+                    return response
+                if not await self._ais_locked(lock_key):
+                    break
+
+    def record_bypass(self):
+        """
+        Records a request that bypassed the cache e.g., the job was submitted with bypass_cache.
+        """
+        self._record("bypassed")
+
+    async def arecord_bypass(self):
+        """
+        Asynchronous variant of record_bypass.
+        """
+        await self._arecord("bypassed")
+
+    def get_stats(self) -> dict:
+        """
+        Returns the hit and miss counters.
+        process counters are specific to the current worker process, shared counters are aggregated across all workers
+        using the cache backend and are best effort (shared counters may be evicted with other cache entries).
+        returns:
+            dict: {"process": {...}, "shared": {...}} each containing hits, misses, coalesced, bypassed, errors and hit_ratio.
+        """
+        with self._stats_lock:
+            process_stats = dict(self._stats)
+
+        try:
+            shared = self.cache.get_many([f"{self.STATS_PREFIX}:{name}" for name in self.STAT_NAMES])
+            shared_stats = {name: shared.get(f"{self.STATS_PREFIX}:{name}", 0) for name in self.STAT_NAMES}
+        except Exception as e:
+            logger.warning(f"Failed to retrieve shared LLM cache stats: {str(e)}")
+            shared_stats = {name: 0 for name in self.STAT_NAMES}
+
+        return {"process": self._with_hit_ratio(process_stats), "shared": self._with_hit_ratio(shared_stats)}
+
+    @classmethod
+    def reset_stats(cls):
+        """
+        Resets the process counters.
+        """
+        with cls._stats_lock:
+            cls._stats = {name: 0 for name in cls.STAT_NAMES}
+
+    @staticmethod
+    def _with_hit_ratio(stats:dict) -> dict:
+        # Coalesced requests share an upstream call, they are counted as hits
+        served = stats["hits"] + stats["coalesced"]
+        total = served + stats["misses"]
+        stats["hit_ratio"] = served / total if total else 0.0
+        return stats
+
+    @staticmethod
+    def _fingerprint_schema(response_schema) -> Optional[Union[dict, str]]:
+        """
+        Returns a JSON serializable representation of the response schema.
+        """
+        if response_schema is None:
+            return None
+        if isinstance(response_schema, dict):
+            return response_schema
+        if isinstance(response_schema, type) and issubclass(response_schema, PydanticModel):
+            return {"pydantic": f"{response_schema.__module__}.{response_schema.__qualname__}", "schema": response_schema.model_json_schema()}
+        return repr(response_schema)
+
+    def _record(self, name:str):
+        with self._stats_lock:
+            self._stats[name] += 1
+        self._record_shared(name)
+
+    async def _arecord(self, name:str):
+        with self._stats_lock:
+            self._stats[name] += 1
+        await DatabaseExecutor.run(self._record_shared, name)
+
+    def _record_shared(self, name:str):
+        """
+        Increments the counter shared by all worker processes, failures are ignored as counters are best effort.
+        """
+        stats_key = f"{self.STATS_PREFIX}:{name}"
+        try:
+            self.cache.incr(stats_key)
+        except ValueError:
+            # Counter does not exist yet or has been evicted
+            try:
+                if not self.cache.add(stats_key, 1, timeout=None):
+                    self.cache.incr(stats_key)
+            except Exception as e:
+                logger.debug(f"Failed to update shared LLM cache stats: {str(e)}")
+        except Exception as e:
+            logger.debug(f"Failed to update shared LLM cache stats: {str(e)}")
+
+    def _get(self, key:str, record:bool=True):
+        try:
+            response = self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Failed to read LLM response cache: {str(e)}")
+            self._record("errors")
+            return None
+        if response is not None and record:
+            self._record("hits")
+        return response
+
+    def _set(self, key:str, response):
+        try:
+            self.cache.set(key, response)
+        except Exception as e:
+            logger.warning(f"Failed to write LLM response cache: {str(e)}")
+            self._record("errors")
+
+    @contextmanager
+    def _hold_lock(self, lock_key:str, token:str):
+        """
+        Renews the lock with a heartbeat until the block exits, then releases the lock if it is still held by the token.
+        """
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lock_key, token, stop), name=f"llm-cache-{lock_key}", daemon=True)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            heartbeat.join()
+            self._release(lock_key, token)
+
+    def _heartbeat(self, lock_key:str, token:str, stop:threading.Event):
+        """
+        Renews the lock every lock_timeout / 3 seconds, runs in a daemon thread with its own database connection.
+        """
+        try:
+            while not stop.wait(self.lock_timeout / 3):
+                if not self._renew(lock_key, token):
+                    logger.warning(f"Lost LLM response cache lock {lock_key}, an identical request may invoke the LLM")
+                    return
+        finally:
+            connections.close_all()
+
+    def _redis_client(self):
+        """
+        Returns the Redis client of the cache if it is backed by Redis (R2D_LLM_CACHE_BACKEND=redis), None otherwise.
+        Locks are stored as plain tokens using the client, so that they can be compared by the lock scripts.
+        """
+        if isinstance(self.cache, RedisCache):
+            return self.cache._cache.get_client(write=True)
+        return None
+
+    def _acquire(self, lock_key:str) -> Optional[str]:
+        """
+        Attempts to acquire the lock for an in-flight request.
+        returns:
+            str: The lock token if acquired, empty string if another request holds the lock, None if the cache is unavailable.
+        """
+        token = uuid.uuid4().hex
+        try:
+            client = self._redis_client()
+            if client is not None:
+                acquired = client.set(self.cache.make_key(lock_key), token, nx=True, px=int(self.lock_timeout * 1000))
+            else:
+                acquired = self.cache.add(lock_key, token, timeout=self.lock_timeout)
+            return token if acquired else ""
+        except Exception as e:
+            logger.warning(f"Failed to acquire LLM response cache lock: {str(e)}")
+            self._record("errors")
+            return None
+
+    def _renew(self, lock_key:str, token:str) -> bool:
+        """
+        Extends the lock held by the token.
+        returns:
+            bool: True if the lock is still held by the token.
+        """
+        try:
+            client = self._redis_client()
+            if client is not None:
+                renew_script = client.register_script(LOCK_RENEW_SCRIPT)
+                return bool(renew_script(keys=[self.cache.make_key(lock_key)], args=[token, int(self.lock_timeout * 1000)]))
+            # Best effort on other backends, the lock may expire between the get and the touch
+            return self.cache.get(lock_key) == token and self.cache.touch(lock_key, self.lock_timeout)
+        except Exception as e:
+            logger.warning(f"Failed to renew LLM response cache lock: {str(e)}")
+            return True
+
+    def _release(self, lock_key:str, token:str):
+        """
+        Deletes the lock if it is held by the token, a lock that expired and was acquired by another request is kept.
+        """
+        try:
+            client = self._redis_client()
+            if client is not None:
+                release_script = client.register_script(LOCK_RELEASE_SCRIPT)
+                release_script(keys=[self.cache.make_key(lock_key)], args=[token])
+            elif self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Failed to release LLM response cache lock: {str(e)}")
+
+    def _is_locked(self, lock_key:str) -> bool:
+        try:
+            client = self._redis_client()
+            if client is not None:
+                return bool(client.exists(self.cache.make_key(lock_key)))
+            return self.cache.get(lock_key) is not None
+        except Exception:
+            return False
+
+    async def _aget(self, key:str, record:bool=True):
+        try:
+            response = await self.cache.aget(key)
+        except Exception as e:
+            logger.warning(f"Failed to read LLM response cache: {str(e)}")
+            await self._arecord("errors")
+            return None
+        if response is not None and record:
+            await self._arecord("hits")
+        return response
+
+    async def _aset(self, key:str, response):
+        try:
+            await self.cache.aset(key, response)
+        except Exception as e:
+            logger.warning(f"Failed to write LLM response cache: {str(e)}")
+            await self._arecord("errors")
+
+    @asynccontextmanager
+    async def _ahold_lock(self, lock_key:str, token:str):
+        """
+        Asynchronous variant of _hold_lock, the lock is renewed by a task on the event loop.
+        """
+        heartbeat = asyncio.create_task(self._aheartbeat(lock_key, token))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await DatabaseExecutor.run(self._release, lock_key, token)
+
+    async def _aheartbeat(self, lock_key:str, token:str):
+        while True:
+            await asyncio.sleep(self.lock_timeout / 3)
+            if not await DatabaseExecutor.run(self._renew, lock_key, token):
+                logger.warning(f"Lost LLM response cache lock {lock_key}, an identical request may invoke the LLM")
+                return
+
+    async def _aacquire(self, lock_key:str) -> Optional[str]:
+        return await DatabaseExecutor.run(self._acquire, lock_key)
+
+    async def _ais_locked(self, lock_key:str) -> bool:
+        return await DatabaseExecutor.run(self._is_locked, lock_key)
@@ -0,0 +1,395 @@
+import re
+from typing import Optional
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+CLASS_DIAGRAM = "classDiagram"
+ER_DIAGRAM = "erDiagram"
+SEQUENCE_DIAGRAM = "sequenceDiagram"
+
+INDENT = "    "
+
+# Kinds of the nodes of a MermaidDiagram
+CLASS = "class"                 # class Order { ... }, children are the members of the class
+NAMESPACE = "namespace"         # namespace Billing { ... }, children are the classes of the namespace
+ENTITY = "entity"               # ORDER { ... }, children are the attributes of the entity
+PARTICIPANT = "participant"     # participant API, actor User
+RELATIONSHIP = "relationship"   # Order --> Invoice : creates, CUSTOMER ||--o{ ORDER : places
+MESSAGE = "message"             # User->>API: login
+BLOCK = "block"                 # loop, alt, opt ... end, children are the statements of the block
+BRANCH = "branch"               # else, and, option within a block
+MEMBER = "member"               # Attributes and methods of a class, attributes of an entity
+STATEMENT = "statement"         # Annotations, notes, styles, directions and other lines without relationships
+COMMENT = "comment"             # %% comment
+RAW = "raw"                     # Lines that could not be parsed, rendered as written
+
+_DIAGRAM_TYPES = {CLASS_DIAGRAM.lower(): CLASS_DIAGRAM, f"{CLASS_DIAGRAM}-v2".lower(): f"{CLASS_DIAGRAM}-v2",
+                  ER_DIAGRAM.lower(): ER_DIAGRAM, SEQUENCE_DIAGRAM.lower(): SEQUENCE_DIAGRAM}
+# Headers of the diagram types that are not parsed, these diagrams are never given a missing header
+_UNSUPPORTED_HEADER = re.compile(r'^(?:flowchart|graph|stateDiagram(?:-v2)?|gantt|pie|journey|gitGraph|mindmap|timeline|quadrantChart|requirementDiagram|C4\w+|[\w-]+-beta)\b')
+_FENCE = re.compile(r'^```\s*(?:mermaid)?\s*$', re.IGNORECASE)
+_NAME = r"[A-Za-z_][\w.]*"
+_ER_NAME = r"[A-Za-z_][\w.-]*" # Entity names may contain hyphens e.g., LINE-ITEM
+
+# classDiagram
+_CLASS_ARROW = r"<\|--|--\|>|<\|\.\.|\.\.\|>|\*--|--\*|o--|--o|<--|-->|<\.\.|\.\.>|--|\.\."
+_CLASS_RELATIONSHIP = re.compile(rf'^(?P<left>{_NAME}(?:~[^~]*~)?)\s*(?P<left_cardinality>"[^"]*")?\s*(?P<operator>{_CLASS_ARROW})\s*(?P<right_cardinality>"[^"]*")?\s*(?P<right>{_NAME}(?:~[^~]*~)?)\s*(?::\s*(?P<label>.*))?$')
+_CLASS_DECLARATION = re.compile(rf'^class\s+(?P<name>{_NAME})(?P<suffix>(?:~[^~]*~)?(?:\["[^"]*"\])?)\s*(?P<style>:::\w+)?\s*(?P<open>\{{)?\s*(?P<close>\}})?$')
+_CLASS_MEMBER = re.compile(rf'^(?P<name>{_NAME})\s*:\s*(?P<member>\S.*)$')
+_CLASS_ANNOTATION = re.compile(rf'^<<\s*(?P<annotation>[^>]+?)\s*>>\s*(?P<name>{_NAME})?$')
+_CLASS_NAMESPACE = re.compile(r'^namespace\s+(?P<name>\S+?)\s*\{$')
+_CLASS_STATEMENT = re.compile(r'^(?:note\b.*|direction\s+(?:TB|BT|LR|RL)|(?:click|link|callback|cssClass|style|classDef)\b.*)$')
+# Labels of class relationships without a label, by arrow
+_CLASS_LABELS = {"<|--": "inherits", "--|>": "inherits", "<|..": "implements", "..|>": "implements", "*--": "composes", "--*": "composes",
+                 "o--": "aggregates", "--o": "aggregates", "<..": "depends on", "..>": "depends on", "..": "depends on", "<--": "uses", "-->": "uses", "--": "associated with"}
+
+# erDiagram
+_ER_CARDINALITY = r"(?:\|o|\|\||\}o|\}\|)(?:--|\.\.)(?:o\||\|\||o\{|\|\{)"
+_ER_RELATIONSHIP = re.compile(rf'^(?P<left>{_ER_NAME})\s*(?P<operator>{_ER_CARDINALITY})\s*(?P<right>{_ER_NAME})\s*(?::\s*(?P<label>.*))?$')
+_ER_ENTITY = re.compile(rf'^(?P<name>{_ER_NAME})(?P<suffix>\["[^"]*"\])?\s*(?P<open>\{{)?\s*(?P<close>\}})?$')
+_ER_ATTRIBUTE = re.compile(r'^(?P<type>[\w()\[\],.-]+)\s+(?P<name>[\w()\[\].-]+)(?P<keys>\s+(?:PK|FK|UK)(?:\s*,\s*(?:PK|FK|UK))*)?(?:\s+(?P<comment>"[^"]*"))?$')
+_ER_STATEMENT = re.compile(r'^(?:direction\s+(?:TB|BT|LR|RL)|(?:style|classDef|class)\b.*)$')
+_ER_LABEL = "relates to"
+
+# sequenceDiagram
+_SEQUENCE_PARTICIPANT = re.compile(rf'^(?P<create>create\s+)?(?P<kind>participant|actor)\s+(?P<name>{_NAME})(?:\s+as\s+(?P<alias>.+))?$')
+_SEQUENCE_MESSAGE = re.compile(rf'^(?P<left>{_NAME})\s*(?P<operator>-->>|->>|-->|->|--x|-x|--\)|-\))\s*(?P<activation>[+-])?\s*(?P<right>{_NAME})\s*(?::\s*(?P<label>.*))?$')
+_SEQUENCE_BLOCK_START = re.compile(r'^(?:loop|alt|opt|par|critical|break|rect|box)\b.*$')
+_SEQUENCE_BLOCK_BRANCH = re.compile(r'^(?:else|and|option)\b.*$')
+_SEQUENCE_STATEMENT = re.compile(rf'^(?:autonumber\b.*|title\b.*|links?\s+.*|(?:activate|deactivate|destroy)\s+{_NAME}|note\s+(?:left of|right of|over)\s+.*)$', re.IGNORECASE)
+
+class MermaidNode:
+    """
+    Node of a MermaidDiagram, a single statement of the diagram and the statements nested within it.
+    args:
+        kind (str): The kind of statement e.g., class, relationship, see the kinds above.
+        line (int): The line of the statement in the diagram, None for statements added by a repair.
+        text (str): The normalized statement, used to render statements that are not relationships or messages.
+        name (str): The name declared by the statement e.g., the class, entity or participant name.
+        left, right (str): The names connected by a relationship or message.
+        operator (str): The arrow or cardinality of a relationship or message, cardinalities of class relationships are included e.g., '"1" --> "*"'.
+        label (str): The label of a relationship or message.
+    """
+    def __init__(self, kind:str, line:int = None, text:str = None, name:str = None, left:str = None, right:str = None,
+                 operator:str = None, label:str = None):
+        self.kind = kind
+        self.line = line
+        self.text = text
+        self.name = name
+        self.left = left
+        self.right = right
+        self.operator = operator
+        self.label = label
+        self.children = []
+
+    def __repr__(self):
+        return f"MermaidNode({self.kind}, {self.name or self.text or f'{self.left} {self.operator} {self.right}'})"
+
+class MermaidDiagram:
+    """
+    Abstract syntax tree of a classDiagram, erDiagram or sequenceDiagram returned by the MermaidParser.
+    args:
+        diagram_type (str): classDiagram, erDiagram or sequenceDiagram, None if the diagram type is not supported.
+    attributes:
+        nodes (list[MermaidNode]): The top level statements of the diagram.
+        repairs (list[str]): The syntax faults repaired by the parser e.g., ["Line 3: added label 'uses' to relationship Order -> Invoice"]
+        issues (list[str]): The lines that could not be parsed or repaired, rendered as written.
+    functions:
+        walk: Yields every node of the diagram.
+        get_names: Returns the class, entity or participant names of the diagram.
+        to_mermaid: Returns the diagram in Mermaid syntax with normalized formatting.
+    """
+    def __init__(self, diagram_type:str):
+        self.diagram_type = diagram_type
+        self.nodes = []
+        self.repairs = []
+        self.issues = []
+
+    def is_valid(self) -> bool:
+        """
+        Returns True if every line of the diagram was parsed.
+        """
+        return not self.issues
+
+    def get_names(self) -> list[str]:
+        """
+        Returns the names declared or referenced in the diagram in order of appearance e.g., the classes of a class diagram
+        and the classes connected by its relationships.
+        """
+        names = {}
+        for node in self.walk():
+            for name in (node.name, node.left, node.right):
+                if name and node.kind not in (NAMESPACE, BLOCK, MEMBER):
+                    names.setdefault(name.split("~")[0], None)
+        return list(names)
+
+    def walk(self):
+        """
+        Yields every node of the diagram in order of appearance, nodes are yielded before the nodes nested within them.
+        """
+        yield from self._walk(self.nodes)
+
+    def to_mermaid(self) -> str:
+        """
+        Returns the diagram in Mermaid syntax, one statement per line indented by nesting level.
+        """
+        lines = [self.diagram_type]
+        self._render(self.nodes, 1, lines)
+        return "\n".join(lines)
+
+    def _render(self, nodes:list[MermaidNode], depth:int, lines:list[str]):
+        for node in nodes:
+            indent = INDENT * depth
+            if node.kind in (RELATIONSHIP, MESSAGE):
+                separator = "" if node.kind == MESSAGE else " "
+                label = f"{separator}: {node.label}" if node.label else ""
+                lines.append(f"{indent}{node.left}{separator}{node.operator}{separator}{node.right}{label}")
+            elif node.kind == BRANCH:
+                lines.append(f"{INDENT * (depth - 1)}{node.text}")
+            elif node.kind in (CLASS, ENTITY, NAMESPACE) and node.children or node.kind == BLOCK:
+                lines.append(f"{indent}{node.text}{' {' if node.kind != BLOCK else ''}")
+                self._render(node.children, depth + 1, lines)
+                lines.append(f"{indent}{'end' if node.kind == BLOCK else '}'}")
+            else:
+                lines.append(f"{indent}{node.text}")
+
+    @classmethod
+    def _walk(cls, nodes:list[MermaidNode]):
+        for node in nodes:
+            yield node
+            yield from cls._walk(node.children)
+
+class MermaidParser:
+    """
+    Parses the classDiagram, erDiagram and sequenceDiagram output of the models into a MermaidDiagram, repairing common syntax faults
+    so that a diagram with a fault can be saved without prompting the model again.
+
+    Faults repaired:
+        Markdown fences around the diagram, a missing or miscased diagram header.
+        Unbalanced braces: class and entity bodies that are not closed are closed, braces that close nothing are removed.
+        Unbalanced blocks: sequence blocks that are not closed with end are closed, end statements that close nothing are removed.
+        Relationships and messages without a label are labeled e.g., inheritance is labeled 'inherits'.
+        ER relationship labels containing spaces are quoted, trailing commas of ER attributes are removed.
+    Lines that cannot be parsed are kept as written and reported as issues of the diagram.
+
+    The parser is a single pass over the lines using precompiled patterns, so it can be run on every saved diagram.
+
+    functions:
+        parse: Returns the MermaidDiagram of a diagram.
+        repair: Returns the repaired diagram in Mermaid syntax and the repairs made.
+    """
+    def parse(self, diagram:str, diagram_type:Optional[str] = None) -> MermaidDiagram:
+        """
+        Returns the abstract syntax tree of the diagram, faults of the diagram are repaired while parsing.
+        args:
+            diagram (str): The diagram in Mermaid syntax.
+            diagram_type (str): The expected type of the diagram, used if the diagram has no header e.g., classDiagram.
+        returns:
+            MermaidDiagram: The parsed diagram, diagrams of unsupported types are returned without a diagram_type and with a single issue.
+        """
+        lines = [(number, line.strip()) for number, line in enumerate((diagram or "").splitlines(), start=1)]
+        lines = [(number, line) for number, line in lines if line]
+        repairs = []
+        if lines and _FENCE.match(lines[0][1]):
+            repairs.append("Removed markdown fences")
+            lines = [(number, line) for number, line in lines if not _FENCE.match(line)]
+
+        header = lines[0][1].split()[0] if lines else ""
+        parsed_type = _DIAGRAM_TYPES.get(header.lower())
+        if parsed_type is None and diagram_type in _DIAGRAM_TYPES.values() and lines and not _UNSUPPORTED_HEADER.match(header):
+            # The header is missing, every line is parsed as a statement of the expected diagram type
+            parsed_type = diagram_type
+            repairs.append(f"Added missing header {diagram_type}")
+        elif parsed_type is not None:
+            if header != parsed_type:
+                repairs.append(f"Line {lines[0][0]}: corrected header {header} to {parsed_type}")
+            # Statements may follow the header on the same line e.g., sequenceDiagram autonumber
+            remainder = lines[0][1][len(header):].strip()
+            lines = ([(lines[0][0], remainder)] if remainder else []) + lines[1:]
+
+        if parsed_type is None:
+            parsed = MermaidDiagram(None)
+            parsed.issues.append(f"Unsupported diagram type {header}" if header else "Diagram is empty")
+            return parsed
+        parsed = MermaidDiagram(parsed_type)
+        parsed.repairs.extend(repairs)
+        parsers = {ER_DIAGRAM: self._parse_er_diagram, SEQUENCE_DIAGRAM: self._parse_sequence_diagram}
+        parsers.get(parsed_type, self._parse_class_diagram)(lines, parsed)
+        return parsed
+
+    def repair(self, diagram:str, diagram_type:Optional[str] = None) -> tuple[str, list[str]]:
+        """
+        Returns the diagram with its faults repaired and formatting normalized, and the repairs made.
+        The diagram is returned unchanged if its type is not supported.
+        """
+        parsed = self.parse(diagram, diagram_type)
+        if parsed.diagram_type is None:
+            return diagram, []
+        return parsed.to_mermaid(), parsed.repairs
+
+    def _parse_class_diagram(self, lines:list[tuple], parsed:MermaidDiagram):
+        stack = [] # Open class bodies and namespaces
+        for number, line in lines:
+            nodes = stack[-1].children if stack else parsed.nodes
+            if line.startswith("%%"):
+                nodes.append(MermaidNode(COMMENT, number, text=line))
+                continue
+            if stack and stack[-1].kind == CLASS:
+                if line == "}":
+                    stack.pop()
+                    continue
+                if not (_CLASS_DECLARATION.match(line) or _CLASS_RELATIONSHIP.match(line) or _CLASS_NAMESPACE.match(line)):
+                    stack[-1].children.append(MermaidNode(MEMBER, number, text=" ".join(line.split())))
+                    continue
+                # A declaration or relationship cannot be a member, the body was not closed
+                parsed.repairs.append(f"Line {number}: closed the body of class {stack.pop().name}")
+                nodes = stack[-1].children if stack else parsed.nodes
+            if line == "}":
+                if stack:
+                    stack.pop()
+                else:
+                    parsed.repairs.append(f"Line {number}: removed '}}' that closes no class or namespace")
+                continue
+
+            match = _CLASS_DECLARATION.match(line)
+            if match:
+                node = MermaidNode(CLASS, number, name=match.group("name"),
+                                   text=f"class {match.group('name')}{match.group('suffix')}{match.group('style') or ''}")
+                nodes.append(node)
+                if match.group("open") and not match.group("close"):
+                    stack.append(node)
+                continue
+            match = _CLASS_RELATIONSHIP.match(line)
+            if match:
+                operator = " ".join(part for part in (match.group("left_cardinality"), match.group("operator"), match.group("right_cardinality")) if part)
+                nodes.append(self._to_relationship(RELATIONSHIP, number, match, operator, _CLASS_LABELS[match.group("operator")], parsed))
+                continue
+            match = _CLASS_NAMESPACE.match(line)
+            if match:
+                node = MermaidNode(NAMESPACE, number, name=match.group("name"), text=f"namespace {match.group('name')}")
+                nodes.append(node)
+                stack.append(node)
+                continue
+            match = _CLASS_ANNOTATION.match(line)
+            if match:
+                nodes.append(MermaidNode(STATEMENT, number, name=match.group("name"), text=f"<<{match.group('annotation')}>>{' ' + match.group('name') if match.group('name') else ''}"))
+                continue
+            match = _CLASS_MEMBER.match(line)
+            if match:
+                nodes.append(MermaidNode(STATEMENT, number, name=match.group("name"), text=f"{match.group('name')} : {match.group('member').strip()}"))
+                continue
+            if _CLASS_STATEMENT.match(line):
+                nodes.append(MermaidNode(STATEMENT, number, text=line))
+                continue
+            self._add_raw(number, line, nodes, parsed)
+        for node in reversed(stack):
+            parsed.repairs.append(f"Closed the body of {node.kind} {node.name}")
+
+    def _parse_er_diagram(self, lines:list[tuple], parsed:MermaidDiagram):
+        entity = None # Entity whose body is open
+        for number, line in lines:
+            if line.startswith("%%"):
+                (entity.children if entity else parsed.nodes).append(MermaidNode(COMMENT, number, text=line))
+                continue
+            if entity is not None:
+                if line == "}":
+                    entity = None
+                    continue
+                if not _ER_RELATIONSHIP.match(line) and not (_ER_ENTITY.match(line) and line.endswith("{")):
+                    attribute = line.rstrip(",;").rstrip()
+                    if attribute != line:
+                        parsed.repairs.append(f"Line {number}: removed trailing '{line[len(attribute):].strip()}' of attribute '{attribute}'")
+                    match = _ER_ATTRIBUTE.match(attribute)
+                    if match:
+                        keys = ", ".join(key.strip() for key in match.group("keys").split(",")) if match.group("keys") else None
+                        entity.children.append(MermaidNode(MEMBER, number, text=" ".join(part for part in (match.group("type"), match.group("name"), keys, match.group("comment")) if part)))
+                    else:
+                        self._add_raw(number, line, entity.children, parsed, "invalid attribute")
+                    continue
+                # A relationship or entity cannot be an attribute, the body was not closed
+                parsed.repairs.append(f"Line {number}: closed the body of entity {entity.name}")
+                entity = None
+            if line == "}":
+                parsed.repairs.append(f"Line {number}: removed '}}' that closes no entity")
+                continue
+
+            match = _ER_RELATIONSHIP.match(line)
+            if match:
+                parsed.nodes.append(self._to_relationship(RELATIONSHIP, number, match, match.group("operator"), _ER_LABEL, parsed))
+                continue
+            if _ER_STATEMENT.match(line):
+                parsed.nodes.append(MermaidNode(STATEMENT, number, text=line))
+                continue
+            match = _ER_ENTITY.match(line)
+            if match:
+                node = MermaidNode(ENTITY, number, name=match.group("name"), text=f"{match.group('name')}{match.group('suffix') or ''}")
+                parsed.nodes.append(node)
+                if match.group("open") and not match.group("close"):
+                    entity = node
+                continue
+            self._add_raw(number, line, parsed.nodes, parsed)
+        if entity is not None:
+            parsed.repairs.append(f"Closed the body of entity {entity.name}")
+
+    def _parse_sequence_diagram(self, lines:list[tuple], parsed:MermaidDiagram):
+        stack = [] # Open blocks
+        for number, line in lines:
+            nodes = stack[-1].children if stack else parsed.nodes
+            if line.startswith("%%"):
+                nodes.append(MermaidNode(COMMENT, number, text=line))
+                continue
+            match = _SEQUENCE_PARTICIPANT.match(line)
+            if match:
+                alias = f" as {match.group('alias').strip()}" if match.group("alias") else ""
+                nodes.append(MermaidNode(PARTICIPANT, number, name=match.group("name"),
+                                         text=f"{'create ' if match.group('create') else ''}{match.group('kind')} {match.group('name')}{alias}"))
+                continue
+            match = _SEQUENCE_MESSAGE.match(line)
+            if match:
+                operator = f"{match.group('operator')}{match.group('activation') or ''}"
+                label = "returns" if match.group("operator").startswith("--") else "calls"
+                nodes.append(self._to_relationship(MESSAGE, number, match, operator, label, parsed))
+                continue
+            if _SEQUENCE_BLOCK_START.match(line):
+                node = MermaidNode(BLOCK, number, name=line.split()[0], text=" ".join(line.split()))
+                nodes.append(node)
+                stack.append(node)
+                continue
+            if line == "end":
+                if stack:
+                    stack.pop()
+                else:
+                    parsed.repairs.append(f"Line {number}: removed 'end' that closes no block")
+                continue
+            if _SEQUENCE_BLOCK_BRANCH.match(line) and stack:
+                nodes.append(MermaidNode(BRANCH, number, text=" ".join(line.split())))
+                continue
+            if _SEQUENCE_STATEMENT.match(line):
+                nodes.append(MermaidNode(STATEMENT, number, text=" ".join(line.split())))
+                continue
+            self._add_raw(number, line, nodes, parsed)
+        for node in reversed(stack):
+            parsed.repairs.append(f"Closed the {node.name} block of line {node.line}")
+
+    @staticmethod
+    def _to_relationship(kind:str, number:int, match:re.Match, operator:str, default_label:str, parsed:MermaidDiagram) -> MermaidNode:
+        """
+        Returns the relationship or message of the match, labeled with the default label if it has no label.
+        """
+        left, right = match.group("left"), match.group("right")
+        label = (match.group("label") or "").strip()
+        if not label or label.strip('"').strip() == "":
+            label = f'"{default_label}"' if " " in default_label and parsed.diagram_type == ER_DIAGRAM else default_label
+            parsed.repairs.append(f"Line {number}: added label {label} to {kind} {left} -> {right}")
+        elif parsed.diagram_type == ER_DIAGRAM and not label.startswith('"') and re.search(r"\W", label):
+            # ER labels that are not a single word must be quoted
+            label = '"' + label.strip('"') + '"'
+            parsed.repairs.append(f"Line {number}: quoted label {label} of {kind} {left} -> {right}")
+        return MermaidNode(kind, number, left=left, right=right, operator=operator, label=label)
+
+    @staticmethod
+    def _add_raw(number:int, line:str, nodes:list[MermaidNode], parsed:MermaidDiagram, issue:str = "unrecognized syntax"):
+        nodes.append(MermaidNode(RAW, number, text=line))
+        parsed.issues.append(f"Line {number}: {issue} '{line}'")
@@ -0,0 +1,118 @@
+from typing import Optional
+from model_manager.services.MermaidParser import MermaidParser, MermaidDiagram, MermaidNode, CLASS_DIAGRAM, ER_DIAGRAM, SEQUENCE_DIAGRAM, \
+    CLASS, ENTITY, PARTICIPANT, RELATIONSHIP, MESSAGE, STATEMENT
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+# Fields of the diagram responses that list the names declared in the diagram, see diagrams/response_schemas
+LISTED_NAME_FIELDS = ("classes", "helper_classes", "entities", "actors")
+
+class MermaidValidator:
+    """
+    Local checker for the classDiagram, erDiagram and sequenceDiagram output of the models, used to decide which diagrams need to be audited.
+    Diagrams are checked on the abstract syntax tree of the MermaidParser, a diagram the parser cannot parse is reported as invalid
+    so that it is sent to the auditor rather than silently accepted.
+
+    Issues reported:
+        Syntax: unsupported diagram types and the lines the parser cannot parse.
+        Faults: the faults the parser repairs e.g., unbalanced blocks and relationships or messages without a label.
+        Dangling relationships: relationships or messages referencing a name that is not declared in the diagram or listed in the response.
+                                Entities are declared by the ER relationships that reference them, as in Mermaid.
+        Undeclared names: names listed in the classes, helper_classes, entities or actors of the response that do not appear in the diagram.
+
+    functions:
+        validate: Returns the issues of a Mermaid diagram.
+        validate_diagram: Returns the issues of a diagram of a structured response, including the names listed in the response.
+        get_flagged_diagrams: Returns the indexes of the diagrams of a structured response that have issues.
+    """
+    def __init__(self, parser:MermaidParser = None):
+        self.parser = parser or MermaidParser()
+
+    def validate(self, diagram:str, listed_names:Optional[list[str]] = None) -> list[str]:
+        """
+        Returns the issues of the Mermaid diagram, an empty list if the diagram is valid.
+        args:
+            diagram (str): The diagram in Mermaid syntax.
+            listed_names (list[str]): Optional names that must be declared in the diagram e.g., the classes of a class diagram.
+        returns:
+            list[str]: The issues found e.g., ["Line 4: added label uses to relationship Order -> Invoice"]
+        """
+        if not isinstance(diagram, str) or not diagram.strip():
+            return ["Diagram is empty"]
+        parsed = self.parser.parse(diagram)
+        if parsed.diagram_type is None:
+            return parsed.issues
+
+        validators = {ER_DIAGRAM: self._validate_er_diagram, SEQUENCE_DIAGRAM: self._validate_sequence_diagram}
+        listed_names = [name for name in (listed_names or []) if isinstance(name, str)]
+        return parsed.repairs + parsed.issues + validators.get(parsed.diagram_type, self._validate_class_diagram)(parsed, listed_names)
+
+    def validate_diagram(self, diagram_response:dict) -> list[str]:
+        """
+        Returns the issues of a diagram of a structured response e.g., {"diagram": "classDiagram ...", "classes": [...], "helper_classes": [...]}
+        """
+        if not isinstance(diagram_response, dict):
+            return ["Diagram response is not an object"]
+        listed_names = [name for field in LISTED_NAME_FIELDS for name in (diagram_response.get(field) or [])]
+        return self.validate(diagram_response.get("diagram"), listed_names)
+
+    def get_flagged_diagrams(self, response:dict) -> list[int]:
+        """
+        Returns the indexes of the diagrams of the structured response that have issues.
+        args:
+            response (dict): The response of the model e.g., {"diagrams": [{"diagram": ..., "classes": [...]}, ...]}
+        returns:
+            list[int]: The indexes of the diagrams with issues.
+        """
+        flagged = []
+        for index, diagram_response in enumerate(response.get("diagrams") or []):
+            issues = self.validate_diagram(diagram_response)
+            if issues:
+                logger.debug(f"Diagram {index} has {len(issues)} issues: {issues}")
+                flagged.append(index)
+        return flagged
+
+    def _validate_class_diagram(self, parsed:MermaidDiagram, listed_names:list[str]) -> list[str]:
+        # Classes are declared by class statements, annotations and members defined outside of the class body e.g., Order : +int id
+        declared = {self._get_name(node.name) for node in parsed.walk() if node.kind in (CLASS, STATEMENT) and node.name}
+        relationships = [node for node in parsed.walk() if node.kind == RELATIONSHIP]
+        return self._check_relationships(relationships, declared, listed_names, "relationship")
+
+    def _validate_er_diagram(self, parsed:MermaidDiagram, listed_names:list[str]) -> list[str]:
+        relationships = [node for node in parsed.walk() if node.kind == RELATIONSHIP]
+        # Entities referenced by relationships are declared implicitly
+        declared = {node.name for node in parsed.walk() if node.kind == ENTITY} | {name for node in relationships for name in (node.left, node.right)}
+        return self._check_relationships(relationships, declared, listed_names, "relationship")
+
+    def _validate_sequence_diagram(self, parsed:MermaidDiagram, listed_names:list[str]) -> list[str]:
+        declared = {node.name for node in parsed.walk() if node.kind == PARTICIPANT}
+        messages = [node for node in parsed.walk() if node.kind == MESSAGE]
+        return self._check_relationships(messages, declared, listed_names, "message")
+
+    @classmethod
+    def _check_relationships(cls, relationships:list[MermaidNode], declared:set, listed_names:list[str], kind:str) -> list[str]:
+        """
+        Checks that relationships reference declared or listed names, and that listed names appear in the diagram.
+        """
+        issues = []
+        known = declared | set(listed_names)
+        referenced = set()
+        for node in relationships:
+            names = (cls._get_name(node.left), cls._get_name(node.right))
+            referenced.update(names)
+            for name in names:
+                if name not in known:
+                    issues.append(f"Line {node.line}: {kind} references {name}, which is not declared")
+        for name in listed_names:
+            if name not in declared and name not in referenced:
+                issues.append(f"{name} is listed but not declared in the diagram")
+        return issues
+
+    @staticmethod
+    def _get_name(name:str) -> str:
+        """
+        Returns the name without its generic type e.g., List~Order~ is List.
+        """
+        return name.split("~")[0]
@@ -0,0 +1,262 @@
+import threading
+import time
+from typing import Optional
+
+import redis
+from django.conf import settings
+from model_manager.services.ModelExceptions import ModelCircuitOpenError
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+"""
+Reads the state of a circuit, and claims the half-open probe if requested.
+KEYS[1]: circuit state, KEYS[2]: probe lock
+ARGV[1]: probe timeout in milliseconds, ARGV[2]: 1 to claim the probe, 0 to only read the state
+Returns {state, seconds to wait before retrying, 1 if the probe was claimed}
+"""
+CIRCUIT_STATE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local opened_until = tonumber(redis.call('HGET', KEYS[1], 'opened_until')) or 0
+
+if opened_until == 0 then
+    return {'closed', '0', 0}
+end
+if now < opened_until then
+    return {'open', tostring(opened_until - now), 0}
+end
+if tonumber(ARGV[2]) == 1 and redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[1]) then
+    return {'half_open', '0', 1}
+end
+local probe_ttl = redis.call('PTTL', KEYS[2])
+if probe_ttl > 0 then
+    return {'half_open', tostring(probe_ttl / 1000), 0}
+end
+return {'half_open', '0', 0}
+"""
+
+"""
+Records the outcome of a request sent to the provider.
+KEYS[1]: circuit state, KEYS[2]: probe lock
+ARGV[1]: 1 if the request succeeded, ARGV[2]: failure threshold, ARGV[3]: failure window in seconds, ARGV[4]: recovery timeout in seconds
+Returns the state of the circuit after the outcome is recorded.
+"""
+CIRCUIT_RECORD_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local recovery_timeout = tonumber(ARGV[4])
+
+if tonumber(ARGV[1]) == 1 then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 'closed'
+end
+
+local opened_until = tonumber(redis.call('HGET', KEYS[1], 'opened_until')) or 0
+if opened_until > 0 then
+    if now >= opened_until then
+        -- The half-open probe failed, the circuit is opened for another recovery timeout
+        redis.call('HSET', KEYS[1], 'opened_until', tostring(now + recovery_timeout))
+        redis.call('DEL', KEYS[2])
+    end
+    return 'open'
+end
+
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+if failures >= tonumber(ARGV[2]) then
+    redis.call('HSET', KEYS[1], 'opened_until', tostring(now + recovery_timeout), 'failures', 0)
+    redis.call('PERSIST', KEYS[1])
+    return 'open'
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 'closed'
+"""
+
+class RedisCircuitStore:
+    """
+    Circuit state stored in Redis, shared by every worker process that connects to the same Redis database.
+    args:
+        url (str): Redis connection url e.g., redis://redis:6379/2
+    """
+    KEY_PREFIX = "r2d_circuit"
+
+    def __init__(self, url:str):
+        self.client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+        self.state_script = self.client.register_script(CIRCUIT_STATE_SCRIPT)
+        self.record_script = self.client.register_script(CIRCUIT_RECORD_SCRIPT)
+
+    def get_state(self, circuit:str, probe_timeout:float, claim_probe:bool) -> tuple:
+        """
+        returns:
+            tuple: (state, seconds to wait before retrying, True if the probe was claimed)
+        """
+        state, retry_after, probe_claimed = self.state_script(
+            keys=self._keys(circuit), args=[int(probe_timeout * 1000), 1 if claim_probe else 0])
+        return state.decode() if isinstance(state, bytes) else state, float(retry_after), bool(probe_claimed)
+
+    def record(self, circuit:str, success:bool, failure_threshold:int, failure_window:float, recovery_timeout:float) -> str:
+        state = self.record_script(keys=self._keys(circuit), args=[1 if success else 0, failure_threshold, int(failure_window), recovery_timeout])
+        return state.decode() if isinstance(state, bytes) else state
+
+    def _keys(self, circuit:str) -> list:
+        return [f"{self.KEY_PREFIX}:{circuit}:state", f"{self.KEY_PREFIX}:{circuit}:probe"]
+
+class LocalCircuitStore:
+    """
+    Circuit state stored in memory, only shared by the threads of the current process.
+    Used for local development and tests where Redis is not available.
+    """
+    def __init__(self):
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, circuit:str, probe_timeout:float, claim_probe:bool) -> tuple:
+        with self._lock:
+            now = time.monotonic()
+            state = self._circuits.get(circuit)
+            if state is None or state["opened_until"] == 0:
+                return CLOSED, 0.0, False
+            if now < state["opened_until"]:
+                return OPEN, state["opened_until"] - now, False
+            if claim_probe and state["probe_until"] <= now:
+                state["probe_until"] = now + probe_timeout
+                return HALF_OPEN, 0.0, True
+            return HALF_OPEN, max(0.0, state["probe_until"] - now), False
+
+    def record(self, circuit:str, success:bool, failure_threshold:int, failure_window:float, recovery_timeout:float) -> str:
+        with self._lock:
+            now = time.monotonic()
+            if success:
+                self._circuits.pop(circuit, None)
+                return CLOSED
+            state = self._circuits.get(circuit)
+            if state is None or (state["opened_until"] == 0 and now - state["last_failure"] > failure_window):
+                state = self._circuits[circuit] = {"failures": 0, "opened_until": 0, "probe_until": 0, "last_failure": now}
+            if state["opened_until"] > 0:
+                if now >= state["opened_until"]:
+                    # The half-open probe failed, the circuit is opened for another recovery timeout
+                    state.update({"opened_until": now + recovery_timeout, "probe_until": 0})
+                return OPEN
+            state["failures"] += 1
+            state["last_failure"] = now
+            if state["failures"] >= failure_threshold:
+                state.update({"opened_until": now + recovery_timeout, "failures": 0})
+                return OPEN
+            return CLOSED
+
+class ModelCircuitBreaker:
+    """
+    Circuit breaker per model provider and model, shared by every Celery worker.
+
+    Closed: requests are sent to the provider, consecutive provider failures within the failure window are counted.
+    Open: after failure_threshold failures requests fail fast with ModelCircuitOpenError for recovery_timeout seconds,
+          consumers hold their jobs in the Queued state and the tasks are retried once the circuit may have recovered.
+    Half-open: once the recovery timeout has elapsed a single probe request is allowed, the circuit is closed if it succeeds
+          and opened for another recovery timeout if it fails. Other requests wait until the probe completes.
+
+    The store is configured using R2D_CIRCUIT_BREAKER_BACKEND - redis (default, shared by all workers), local (per process) or disabled.
+    If Redis is unavailable requests are allowed.
+
+    functions:
+        before_request: Raises ModelCircuitOpenError if the request should not be sent to the provider.
+        record_success: Records a request that reached the provider.
+        record_failure: Records a request that failed due to the provider.
+        get_retry_after: Returns the number of seconds until requests may be sent to the provider, without claiming the probe.
+        reset: Discards the stores of the current process.
+    """
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, failure_threshold:Optional[int] = None, failure_window:Optional[float] = None,
+                 recovery_timeout:Optional[float] = None, probe_timeout:Optional[float] = None):
+        self.failure_threshold = failure_threshold or getattr(settings, "R2D_CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)
+        self.failure_window = failure_window or getattr(settings, "R2D_CIRCUIT_BREAKER_FAILURE_WINDOW", 60)
+        self.recovery_timeout = recovery_timeout or getattr(settings, "R2D_CIRCUIT_BREAKER_RECOVERY_TIMEOUT", 60)
+        self.probe_timeout = probe_timeout or getattr(settings, "R2D_CIRCUIT_BREAKER_PROBE_TIMEOUT", 120)
+
+    def before_request(self, provider:str, model_name:str):
+        """
+        Checks the circuit before a request is sent to the provider, claims the probe if the circuit is half-open.
+        args:
+            provider (str): The model provider e.g., openai
+            model_name (str): The name of the model e.g., gpt-4-turbo
+        raises:
+            ModelCircuitOpenError: If the circuit is open, or half-open while another request is probing the provider.
+        """
+        state, retry_after, _ = self._get_state(provider, model_name, claim_probe=True)
+        if state == OPEN or (state == HALF_OPEN and retry_after > 0):
+            raise ModelCircuitOpenError(f"Circuit for {provider}:{model_name} is {state}, retry after {retry_after:.0f} seconds",
+                                        provider=str(provider), model_name=str(model_name), retry_after=retry_after)
+
+    def get_retry_after(self, provider:str, model_name:str) -> float:
+        """
+        Returns the number of seconds until requests may be sent to the provider, 0 if the circuit is closed or ready to be probed.
+        Does not claim the probe, used by consumers to hold jobs before they start processing.
+        """
+        _, retry_after, _ = self._get_state(provider, model_name, claim_probe=False)
+        return retry_after
+
+    def record_success(self, provider:str, model_name:str):
+        """
+        Records a request that reached the provider, closes the circuit.
+        """
+        self._record(provider, model_name, success=True)
+
+    def record_failure(self, provider:str, model_name:str):
+        """
+        Records a request that failed due to the provider e.g., timeouts, connection errors, server errors and rate limits.
+        """
+        state = self._record(provider, model_name, success=False)
+        if state == OPEN:
+            logger.warning(f"Circuit for {provider}:{model_name} is open, requests will be held for {self.recovery_timeout} seconds")
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the stores of the current process, local circuits are closed.
+        """
+        with cls._stores_lock:
+            cls._stores = {}
+
+    def _get_state(self, provider:str, model_name:str, claim_probe:bool) -> tuple:
+        store = self._get_store()
+        if store is None:
+            return CLOSED, 0.0, False
+        try:
+            return store.get_state(self._circuit(provider, model_name), self.probe_timeout, claim_probe)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Circuit breaker unavailable, allowing request to {provider}:{model_name}: {e}")
+            return CLOSED, 0.0, False
+
+    def _record(self, provider:str, model_name:str, success:bool) -> str:
+        store = self._get_store()
+        if store is None:
+            return CLOSED
+        try:
+            return store.record(self._circuit(provider, model_name), success, self.failure_threshold, self.failure_window, self.recovery_timeout)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Unable to record the outcome of a request to {provider}:{model_name}: {e}")
+            return CLOSED
+
+    @staticmethod
+    def _circuit(provider:str, model_name:str) -> str:
+        return f"{provider}:{model_name}"
+
+    @classmethod
+    def _get_store(cls):
+        """
+        Returns the store configured by R2D_CIRCUIT_BREAKER_BACKEND, stores are created once per process.
+        """
+        backend_name = getattr(settings, "R2D_CIRCUIT_BREAKER_BACKEND", "redis")
+        if backend_name == "disabled":
+            return None
+        key = (backend_name, getattr(settings, "R2D_CIRCUIT_BREAKER_REDIS_URL", None))
+        with cls._stores_lock:
+            if key not in cls._stores:
+                cls._stores[key] = RedisCircuitStore(key[1]) if backend_name == "redis" else LocalCircuitStore()
+            return cls._stores[key]
@@ -0,0 +1,111 @@
+import os
+import threading
+from typing import Callable
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class ModelClientRegistry:
+    """
+    Per worker process registry of initialized model and auditor clients.
+
+    Creating a GPTModel or GPTAuditor creates a new ChatOpenAI client, which in turn opens new HTTP connections
+    (and TLS handshakes) on first use. The registry keeps one client per (provider, model, client_type, kwargs)
+    so that Celery tasks executed by the same worker process reuse the client and its keep-alive connection pool.
+
+    The registry is fork safe, clients created in a parent process are discarded in the child process.
+    Celery prefork workers therefore lazily create their own clients after fork.
+
+    functions:
+        get_or_create: Returns a pooled client, creating it if it does not exist.
+        get_stats: Returns the number of clients created and reused by the current process.
+        reset: Discards all pooled clients and statistics.
+    """
+    _lock = threading.Lock()
+    _clients = {}
+    _stats = {"created": 0, "reused": 0}
+    _pid = os.getpid()
+
+    @classmethod
+    def get_or_create(cls, provider:str, model_name:str, client_type:str, client_kwargs:dict, create_client:Callable):
+        """
+        Returns the pooled client for the given key, invokes create_client if the client does not exist.
+        args:
+            provider (str): The model provider e.g., openai
+            model_name (str): The model name e.g., gpt-4-turbo
+            client_type (str): The type of client e.g., model or auditor
+            client_kwargs (dict): The keyword arguments used to initialize the client e.g., temperature, max_tokens
+            create_client (Callable): Callable that returns a new client, only invoked if the client does not exist.
+        returns:
+            The pooled client.
+        """
+        cls._ensure_current_process()
+        key = cls._build_key(provider, model_name, client_type, client_kwargs)
+
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is not None:
+                cls._stats["reused"] += 1
+                logger.debug(f"Reusing {client_type} client for {provider}:{model_name} - {cls._stats}")
+                return client
+
+            # Clients are created within the lock so concurrent threads do not create duplicate clients
+            client = create_client()
+            cls._clients[key] = client
+            cls._stats["created"] += 1
+            logger.debug(f"Created {client_type} client for {provider}:{model_name} - {cls._stats}")
+            return client
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """
+        Returns the number of clients created and reused by the current worker process.
+        returns:
+            dict: {"pid": int, "created": int, "reused": int, "active_clients": int, "reuse_ratio": float}
+        """
+        cls._ensure_current_process()
+        with cls._lock:
+            created = cls._stats["created"]
+            reused = cls._stats["reused"]
+            total = created + reused
+            return {
+                "pid": cls._pid,
+                "created": created,
+                "reused": reused,
+                "active_clients": len(cls._clients),
+                "reuse_ratio": reused / total if total else 0.0,
+            }
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards all pooled clients and statistics.
+        Invoked automatically in child processes after fork, the lock is recreated as it may have been held during fork.
+        """
+        cls._lock = threading.Lock()
+        cls._clients = {}
+        cls._stats = {"created": 0, "reused": 0}
+        cls._pid = os.getpid()
+
+    @classmethod
+    def _ensure_current_process(cls):
+        """
+        Resets the registry if it was populated by a different process.
+        Guards against fork implementations that do not trigger os.register_at_fork hooks.
+        """
+        if cls._pid != os.getpid():
+            logger.debug(f"Resetting model client registry inherited from process {cls._pid}")
+            cls.reset()
+
+    @staticmethod
+    def _build_key(provider:str, model_name:str, client_type:str, client_kwargs:dict) -> tuple:
+        """
+        Builds a hashable registry key, kwargs are sorted so that the order they were provided in does not matter.
+        """
+        kwargs_key = tuple(sorted((key, repr(value)) for key, value in client_kwargs.items()))
+        return (str(provider), str(model_name), client_type, kwargs_key)
+
+# Discard clients inherited from the parent process, connection pools must not be shared across processes
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ModelClientRegistry.reset)
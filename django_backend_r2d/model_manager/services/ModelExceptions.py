@@ -52,4 +52,16 @@ class AuditPromptBuildingError(Exception):
     def __init__(self, message="Audit prompt building error"):
         self.error_message = f"AuditPromptBuildingError: {message}"
         super().__init__(self.error_message)
-    
\ No newline at end of file
+    
+class ModelRateLimitTimeoutError(Exception):
+    def __init__(self, message="Rate limit budget was not available"):
+        self.error_message = f"ModelRateLimitTimeoutError: {message}"
+        super().__init__(self.error_message)
+
+class ModelCircuitOpenError(Exception):
+    def __init__(self, message="Circuit breaker is open", provider=None, model_name=None, retry_after=0):
+        self.error_message = f"ModelCircuitOpenError: {message}"
+        self.provider = provider
+        self.model_name = model_name
+        self.retry_after = retry_after
+        super().__init__(self.error_message)
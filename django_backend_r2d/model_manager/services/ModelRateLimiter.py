@@ -0,0 +1,351 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+import redis
+from django.conf import settings
+from model_manager.constants import MODEL_RATE_LIMITS
+from model_manager.services.ModelExceptions import ModelRateLimitTimeoutError
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+"""
+Token bucket shared by every Celery worker, the requests and tokens buckets of a model are refilled and consumed atomically.
+Capacity of each bucket is its per-minute limit, buckets refill continuously at limit / 60 per second using the Redis clock.
+KEYS[1]: requests bucket, KEYS[2]: tokens bucket
+ARGV[1]: requests per minute, ARGV[2]: tokens per minute, ARGV[3]: tokens requested, ARGV[4]: 1 to consume, 0 to only read the buckets
+Returns {seconds to wait, requests available, tokens available}, values are returned as strings as Redis truncates Lua numbers to integers.
+"""
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local requests_per_minute = tonumber(ARGV[1])
+local tokens_per_minute = tonumber(ARGV[2])
+local tokens = tonumber(ARGV[3])
+local consume = tonumber(ARGV[4])
+
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'available', 'updated_at')
+    local available = tonumber(state[1]) or capacity
+    local updated_at = tonumber(state[2]) or now
+    return math.min(capacity, available + math.max(0, now - updated_at) * capacity / 60)
+end
+
+local requests_available = refill(KEYS[1], requests_per_minute)
+local tokens_available = refill(KEYS[2], tokens_per_minute)
+
+local wait = 0
+if requests_available < 1 then
+    wait = math.max(wait, (1 - requests_available) * 60 / requests_per_minute)
+end
+if tokens_available < tokens then
+    wait = math.max(wait, (tokens - tokens_available) * 60 / tokens_per_minute)
+end
+
+if consume == 1 and wait == 0 then
+    requests_available = requests_available - 1
+    tokens_available = tokens_available - tokens
+end
+
+redis.call('HSET', KEYS[1], 'available', tostring(requests_available), 'updated_at', tostring(now))
+redis.call('HSET', KEYS[2], 'available', tostring(tokens_available), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+return {tostring(wait), tostring(requests_available), tostring(tokens_available)}
+"""
+
+"""
+Returns unused tokens to the tokens bucket of a model, the bucket is refilled first and never exceeds its capacity.
+KEYS[1]: tokens bucket
+ARGV[1]: tokens per minute, ARGV[2]: tokens to return
+Returns the tokens available as a string.
+"""
+TOKEN_REFUND_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local tokens_per_minute = tonumber(ARGV[1])
+
+local state = redis.call('HMGET', KEYS[1], 'available', 'updated_at')
+local available = tonumber(state[1]) or tokens_per_minute
+local updated_at = tonumber(state[2]) or now
+available = math.min(tokens_per_minute, available + math.max(0, now - updated_at) * tokens_per_minute / 60 + tonumber(ARGV[2]))
+
+redis.call('HSET', KEYS[1], 'available', tostring(available), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(available)
+"""
+
+class RedisTokenBucket:
+    """
+    Token buckets stored in Redis, shared by every worker process that connects to the same Redis database.
+    args:
+        url (str): Redis connection url e.g., redis://redis:6379/2
+    """
+    KEY_PREFIX = "r2d_rate_limit"
+
+    def __init__(self, url:str):
+        # redis-py connection pools are reset automatically when a worker process is forked
+        self.client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.refund_script = self.client.register_script(TOKEN_REFUND_SCRIPT)
+
+    def try_acquire(self, model_name:str, requests_per_minute:int, tokens_per_minute:int, tokens:int, consume:bool=True) -> tuple:
+        """
+        Consumes 1 request and the tokens from the buckets of the model if both buckets have capacity.
+        returns:
+            tuple: (seconds to wait before retrying, 0 if acquired, requests available, tokens available)
+        """
+        keys = [f"{self.KEY_PREFIX}:{model_name}:requests", f"{self.KEY_PREFIX}:{model_name}:tokens"]
+        wait, requests_available, tokens_available = self.script(
+            keys=keys, args=[requests_per_minute, tokens_per_minute, tokens, 1 if consume else 0])
+        return float(wait), float(requests_available), float(tokens_available)
+
+    def refund(self, model_name:str, tokens_per_minute:int, tokens:int) -> float:
+        """
+        Returns the tokens to the tokens bucket of the model.
+        returns:
+            float: The tokens available.
+        """
+        return float(self.refund_script(keys=[f"{self.KEY_PREFIX}:{model_name}:tokens"], args=[tokens_per_minute, tokens]))
+
+class LocalTokenBucket:
+    """
+    Token buckets stored in memory, only shared by the threads of the current process.
+    Used for local development and tests where Redis is not available.
+    """
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, model_name:str, requests_per_minute:int, tokens_per_minute:int, tokens:int, consume:bool=True) -> tuple:
+        with self._lock:
+            now = time.monotonic()
+            requests_available = self._refill((model_name, "requests"), requests_per_minute, now)
+            tokens_available = self._refill((model_name, "tokens"), tokens_per_minute, now)
+
+            wait = 0.0
+            if requests_available < 1:
+                wait = max(wait, (1 - requests_available) * 60 / requests_per_minute)
+            if tokens_available < tokens:
+                wait = max(wait, (tokens - tokens_available) * 60 / tokens_per_minute)
+
+            if consume and wait == 0:
+                requests_available -= 1
+                tokens_available -= tokens
+
+            self._buckets[(model_name, "requests")] = (requests_available, now)
+            self._buckets[(model_name, "tokens")] = (tokens_available, now)
+            return wait, requests_available, tokens_available
+
+    def refund(self, model_name:str, tokens_per_minute:int, tokens:int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens_available = min(tokens_per_minute, self._refill((model_name, "tokens"), tokens_per_minute, now) + tokens)
+            self._buckets[(model_name, "tokens")] = (tokens_available, now)
+            return tokens_available
+
+    def _refill(self, key:tuple, capacity:int, now:float) -> float:
+        available, updated_at = self._buckets.get(key, (capacity, now))
+        return min(capacity, available + max(0.0, now - updated_at) * capacity / 60)
+
+class ModelRateLimiter:
+    """
+    Enforces requests per minute (RPM) and tokens per minute (TPM) limits per model across every Celery worker.
+    Callers wait until the budget of the model is available instead of failing with a rate limit error from the provider.
+
+    Limits are read from MODEL_RATE_LIMITS and can be overridden using the R2D_MODEL_RATE_LIMITS setting, models without limits are not rate limited.
+    The backend is configured using R2D_RATE_LIMIT_BACKEND - redis (default, shared by all workers), local (per process) or disabled.
+    If Redis is unavailable requests are allowed, the provider's own rate limits and client retries still apply.
+
+    args:
+        max_wait (float): Maximum number of seconds to wait for the budget. Default is R2D_RATE_LIMIT_MAX_WAIT.
+    functions:
+        acquire: Blocks until the budget for the request is available.
+        aacquire: Awaits the budget for the request without blocking the event loop.
+        refund: Returns the tokens reserved by a request that it did not use.
+        arefund: Asynchronous variant of refund.
+        get_metrics: Returns the current budget usage of each model.
+        reset: Discards the backends and counters of the current process.
+    """
+    _backends = {}
+    _backends_lock = threading.Lock()
+    _stats = {}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, max_wait:Optional[float] = None):
+        self.max_wait = max_wait if max_wait is not None else getattr(settings, "R2D_RATE_LIMIT_MAX_WAIT", 300)
+
+    def acquire(self, model_name:str, tokens:int) -> float:
+        """
+        Blocks until 1 request and the tokens are available in the budget of the model.
+        args:
+            model_name (str): The name of the model e.g., gpt-4-turbo
+            tokens (int): The number of tokens the request may consume (prompt and completion).
+        returns:
+            float: The number of seconds waited.
+        raises:
+            ModelRateLimitTimeoutError: If the budget is not available within max_wait seconds.
+        """
+        start = time.monotonic()
+        waited = False
+        while True:
+            wait = self._try_acquire(model_name, tokens)
+            if wait == 0:
+                return self._record_acquired(model_name, time.monotonic() - start if waited else 0.0)
+            time.sleep(self._next_sleep(model_name, wait, start))
+            waited = True
+
+    async def aacquire(self, model_name:str, tokens:int) -> float:
+        """
+        Asynchronous variant of acquire, the event loop is free to serve other requests while waiting for the budget.
+        """
+        start = time.monotonic()
+        waited = False
+        while True:
+            wait = await asyncio.to_thread(self._try_acquire, model_name, tokens)
+            if wait == 0:
+                return self._record_acquired(model_name, time.monotonic() - start if waited else 0.0)
+            await asyncio.sleep(self._next_sleep(model_name, wait, start))
+            waited = True
+
+    def refund(self, model_name:str, reserved_tokens:int, used_tokens:int) -> int:
+        """
+        Returns the tokens reserved by acquire that the request did not use to the budget of the model,
+        requests reserve max_tokens for the completion but usually complete with fewer tokens.
+        args:
+            model_name (str): The name of the model e.g., gpt-4-turbo
+            reserved_tokens (int): The number of tokens passed to acquire.
+            used_tokens (int): The number of prompt and completion tokens reported by the provider.
+        returns:
+            int: The number of tokens returned to the budget.
+        """
+        limits = self.get_limits(model_name)
+        backend = self._get_backend()
+        if limits is None or backend is None:
+            return 0
+        # acquire clamps the reservation to the size of the bucket
+        tokens = min(int(reserved_tokens), limits["tokens_per_minute"]) - int(used_tokens)
+        if tokens <= 0:
+            return 0
+        try:
+            backend.refund(model_name, limits["tokens_per_minute"], tokens)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Unable to refund {tokens} tokens to the rate limit budget of {model_name}: {e}")
+            return 0
+        self._record(model_name, "refunded_tokens", tokens)
+        return tokens
+
+    async def arefund(self, model_name:str, reserved_tokens:int, used_tokens:int) -> int:
+        """
+        Asynchronous variant of refund.
+        """
+        return await asyncio.to_thread(self.refund, model_name, reserved_tokens, used_tokens)
+
+    @classmethod
+    def get_limits(cls, model_name:str) -> Optional[dict]:
+        """
+        Returns the requests_per_minute and tokens_per_minute limits of the model, or None if the model is not rate limited.
+        """
+        limits = {**MODEL_RATE_LIMITS, **getattr(settings, "R2D_MODEL_RATE_LIMITS", {})}
+        return limits.get(model_name)
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """
+        Returns the current budget usage of every rate limited model, and the number of requests that waited for the budget in this process.
+        e.g., {"gpt-4-turbo": {"requests_per_minute": 500, "requests_available": 480.5, "request_utilization": 0.04, ...}}
+        """
+        limits = {**MODEL_RATE_LIMITS, **getattr(settings, "R2D_MODEL_RATE_LIMITS", {})}
+        backend = cls._get_backend()
+        metrics = {}
+        for model_name, model_limits in limits.items():
+            with cls._stats_lock:
+                model_metrics = {**model_limits, **cls._stats.get(model_name, cls._empty_stats())}
+            if backend is not None:
+                try:
+                    _, requests_available, tokens_available = backend.try_acquire(
+                        model_name, model_limits["requests_per_minute"], model_limits["tokens_per_minute"], 0, consume=False)
+                    model_metrics.update({
+                        "requests_available": round(requests_available, 2),
+                        "tokens_available": round(tokens_available, 2),
+                        "request_utilization": round(1 - requests_available / model_limits["requests_per_minute"], 4),
+                        "token_utilization": round(1 - tokens_available / model_limits["tokens_per_minute"], 4),
+                    })
+                except redis.exceptions.RedisError as e:
+                    logger.warning(f"Unable to read the rate limit budget of {model_name}: {e}")
+            metrics[model_name] = model_metrics
+        return metrics
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the backends and counters of the current process, local buckets are refilled.
+        """
+        with cls._backends_lock:
+            cls._backends = {}
+        with cls._stats_lock:
+            cls._stats = {}
+
+    def _try_acquire(self, model_name:str, tokens:int) -> float:
+        """
+        Returns 0 if the budget was acquired, otherwise the number of seconds to wait before retrying.
+        """
+        limits = self.get_limits(model_name)
+        backend = self._get_backend()
+        if limits is None or backend is None:
+            return 0
+        # A request larger than the bucket could never be served, it waits for a full bucket instead
+        tokens = min(int(tokens), limits["tokens_per_minute"])
+        try:
+            wait, _, _ = backend.try_acquire(model_name, limits["requests_per_minute"], limits["tokens_per_minute"], tokens)
+            return wait
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Rate limiter unavailable, allowing request to {model_name}: {e}")
+            return 0
+
+    def _next_sleep(self, model_name:str, wait:float, start:float) -> float:
+        """
+        Returns the number of seconds to sleep before retrying, jitter spreads out workers that are waiting for the same budget.
+        raises:
+            ModelRateLimitTimeoutError: If waiting would exceed max_wait.
+        """
+        elapsed = time.monotonic() - start
+        if elapsed + wait > self.max_wait:
+            self._record(model_name, "timeouts", 1)
+            raise ModelRateLimitTimeoutError(f"Rate limit budget for {model_name} was not available within {self.max_wait} seconds")
+        return wait + random.uniform(0, min(wait, 1.0) * 0.1)
+
+    def _record_acquired(self, model_name:str, waited:float) -> float:
+        self._record(model_name, "acquired", 1)
+        if waited > 0:
+            self._record(model_name, "waited", 1)
+            self._record(model_name, "wait_seconds", waited)
+        return waited
+
+    @classmethod
+    def _record(cls, model_name:str, name:str, value:float):
+        with cls._stats_lock:
+            stats = cls._stats.setdefault(model_name, cls._empty_stats())
+            stats[name] += value
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "timeouts": 0, "refunded_tokens": 0}
+
+    @classmethod
+    def _get_backend(cls):
+        """
+        Returns the token bucket backend configured by R2D_RATE_LIMIT_BACKEND, backends are created once per process.
+        """
+        backend_name = getattr(settings, "R2D_RATE_LIMIT_BACKEND", "redis")
+        if backend_name == "disabled":
+            return None
+        key = (backend_name, getattr(settings, "R2D_RATE_LIMIT_REDIS_URL", None))
+        with cls._backends_lock:
+            if key not in cls._backends:
+                cls._backends[key] = RedisTokenBucket(key[1]) if backend_name == "redis" else LocalTokenBucket()
+            return cls._backends[key]
@@ -0,0 +1,302 @@
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager, asynccontextmanager
+from datetime import timedelta
+from typing import Optional
+
+from framework.utils.DatabaseExecutor import DatabaseExecutor
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from langchain_core.callbacks import BaseCallbackHandler
+import openai
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+# Job and stage of the LLM calls made by the current thread or asyncio task, set by the AnalyzeAndAuditChain
+_usage_context = contextvars.ContextVar("r2d_model_usage_context", default={})
+# Usage of the LLM call in progress, requests sent by the OpenAI client are counted against it
+_current_call = contextvars.ContextVar("r2d_model_usage_call", default=None)
+
+class LLMCallUsage(BaseCallbackHandler):
+    """
+    Usage of a single LLM call, passed to the LangChain runnable as a callback to collect the tokens reported by the provider.
+    attributes:
+        prompt_tokens (int): Prompt tokens reported by the provider, None if not reported.
+        completion_tokens (int): Completion tokens reported by the provider, None if not reported.
+        attempts (int): Number of HTTP requests sent by the client for the call, counted by ModelUsageRecorder.count_request.
+        retries (int): Number of times the request was retried by the client.
+        cached (bool): True if the response was served from the LLM response cache.
+    """
+    def __init__(self):
+        super().__init__()
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.attempts = 0
+        self.cached = True
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def on_llm_end(self, response, **kwargs):
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if "prompt_tokens" in token_usage:
+            self.prompt_tokens = (self.prompt_tokens or 0) + token_usage["prompt_tokens"]
+        if "completion_tokens" in token_usage:
+            self.completion_tokens = (self.completion_tokens or 0) + token_usage["completion_tokens"]
+
+class ModelUsageRecorder:
+    """
+    Records a ModelUsage row for every LLM call, rows are buffered per process and written in batches.
+    The buffer is written once it holds R2D_MODEL_USAGE_BATCH_SIZE rows or R2D_MODEL_USAGE_FLUSH_INTERVAL seconds after the last write,
+    and when the worker shuts down. Rows that cannot be written are discarded, the ledger never fails a job.
+
+    functions:
+        usage_context: Sets the job and stage of the LLM calls made within the context.
+        track_call: Measures an LLM call and records it once the call completes.
+        atrack_call: Asynchronous variant of track_call.
+        get_http_clients: Returns the HTTP clients of an OpenAI chat model that count the requests sent for each call.
+        count_request: HTTP request hook that counts the attempts of the call in progress.
+        flush: Writes the buffered rows.
+        get_report: Returns p50/p95 latency and tokens per model and per diagram type.
+    """
+    _buffer = []
+    _lock = threading.Lock()
+    _last_flush = time.monotonic()
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return getattr(settings, "R2D_MODEL_USAGE_ENABLED", True)
+
+    @classmethod
+    @contextmanager
+    def usage_context(cls, **fields):
+        """
+        Sets the job_id and stage recorded for the LLM calls made within the context by the current thread or asyncio task.
+        e.g., with ModelUsageRecorder.usage_context(job_id=job_id, stage=ModelUsageStage.ANALYSIS.value): model.analyze(...)
+        """
+        token = _usage_context.set({**_usage_context.get(), **fields})
+        try:
+            yield
+        finally:
+            _usage_context.reset(token)
+
+    @classmethod
+    @contextmanager
+    def track_call(cls, provider:str, model_name:str, estimate_prompt_tokens=None):
+        """
+        Measures the LLM call made within the context and records it once the call completes or fails.
+        args:
+            provider (str): The model provider e.g., openai
+            model_name (str): The name of the model e.g., gpt-4-turbo
+            estimate_prompt_tokens (Callable): Optional callable returning the prompt tokens, used if the provider does not report them.
+        yields:
+            LLMCallUsage: The usage of the call, passed to the runnable as a callback.
+        """
+        usage, token, start = cls._start_call()
+        success = False
+        try:
+            yield usage
+            success = True
+        finally:
+            _current_call.reset(token)
+            if cls._record(provider, model_name, usage, time.monotonic() - start, success, estimate_prompt_tokens):
+                cls.flush()
+
+    @classmethod
+    @asynccontextmanager
+    async def atrack_call(cls, provider:str, model_name:str, estimate_prompt_tokens=None):
+        """
+        Asynchronous variant of track_call, buffered rows are written by the DatabaseExecutor so the event loop is not blocked.
+        """
+        usage, token, start = cls._start_call()
+        success = False
+        try:
+            yield usage
+            success = True
+        finally:
+            _current_call.reset(token)
+            if cls._record(provider, model_name, usage, time.monotonic() - start, success, estimate_prompt_tokens):
+                await DatabaseExecutor.run(cls.flush)
+
+    @classmethod
+    def get_http_clients(cls) -> dict:
+        """
+        Returns the http_client and http_async_client of a ChatOpenAI model, every request sent by the OpenAI client for a call,
+        including the requests retried by the client (see max_retries), is counted against the call in progress.
+        """
+        return {
+            "http_client": openai.DefaultHttpxClient(event_hooks={"request": [cls.count_request]}),
+            "http_async_client": openai.DefaultAsyncHttpxClient(event_hooks={"request": [cls.acount_request]}),
+        }
+
+    @staticmethod
+    def count_request(request):
+        """
+        Counts a request sent for the call in progress in the current thread or asyncio task, used as an httpx request event hook.
+        """
+        usage = _current_call.get()
+        if usage is not None:
+            usage.attempts += 1
+
+    @classmethod
+    async def acount_request(cls, request):
+        """
+        Asynchronous variant of count_request, httpx.AsyncClient requires coroutine event hooks.
+        """
+        cls.count_request(request)
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Writes the buffered rows using a single bulk insert.
+        returns:
+            int: The number of rows written.
+        """
+        # Imported here as the recorder is imported by the LLMInvoker before the apps are loaded
+        from model_manager.models import ModelUsage
+
+        with cls._lock:
+            rows, cls._buffer = cls._buffer, []
+            cls._last_flush = time.monotonic()
+        if not rows:
+            return 0
+        try:
+            ModelUsage.objects.bulk_create([ModelUsage(**row) for row in rows])
+            logger.debug(f"Recorded the usage of {len(rows)} LLM calls")
+            return len(rows)
+        except DatabaseError as e:
+            logger.warning(f"Unable to record the usage of {len(rows)} LLM calls: {e}")
+            return 0
+
+    @classmethod
+    def get_report(cls, hours:float = 24) -> dict:
+        """
+        Returns the latency and token percentiles of the LLM calls made within the last hours, per model and per diagram type.
+        Percentiles are computed from calls sent to the provider, calls served from the cache are only counted.
+        e.g., {"models": {"gpt-4-turbo": {"calls": 120, "latency_p50": 12.1, "latency_p95": 31.4, "prompt_tokens_p50": ...}}, "job_types": {...}}
+        args:
+            hours (float): The number of hours to report on. Default is 24.
+        returns:
+            dict: The report, grouped by model and by job type.
+        """
+        from django.db.models import OuterRef, Subquery
+        from jobs.models import Job
+        from model_manager.models import ModelUsage
+
+        since = timezone.now() - timedelta(hours=hours)
+        # The diagram type of each call is the job type of its job
+        job_types = Job.objects.filter(job_id=OuterRef("job_id")).values("job_type")[:1]
+        rows = (ModelUsage.objects.filter(created_at__gte=since)
+                .annotate(job_type=Subquery(job_types))
+                .values_list("model_name", "job_type", "latency", "prompt_tokens", "completion_tokens", "retries", "cached", "success"))
+
+        groups = {"models": defaultdict(list), "job_types": defaultdict(list)}
+        for row in rows.iterator():
+            groups["models"][row[0]].append(row)
+            groups["job_types"][row[1] or "unknown"].append(row)
+        return {
+            "since": since.isoformat(),
+            **{group: {key: cls._summarize(group_rows) for key, group_rows in sorted(values.items())} for group, values in groups.items()},
+        }
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the buffered rows, invoked in child processes after fork as the rows are recorded by the parent process.
+        """
+        cls._lock = threading.Lock()
+        cls._buffer = []
+        cls._last_flush = time.monotonic()
+
+    @classmethod
+    def _start_call(cls) -> tuple:
+        usage = LLMCallUsage()
+        return usage, _current_call.set(usage), time.monotonic()
+
+    @classmethod
+    def _record(cls, provider:str, model_name:str, usage:LLMCallUsage, latency:float, success:bool, estimate_prompt_tokens=None) -> bool:
+        """
+        Buffers the usage of the call.
+        returns:
+            bool: True if the buffer should be written.
+        """
+        if not cls.is_enabled():
+            return False
+        prompt_tokens = usage.prompt_tokens
+        if usage.cached and success:
+            prompt_tokens, completion_tokens = 0, 0 # Cached responses do not consume tokens
+        else:
+            completion_tokens = usage.completion_tokens
+            if prompt_tokens is None and estimate_prompt_tokens is not None:
+                prompt_tokens = estimate_prompt_tokens()
+
+        context = _usage_context.get()
+        row = {
+            "job_id": cls._to_uuid(context.get("job_id")),
+            "stage": context.get("stage", "unknown"),
+            "provider": str(provider),
+            "model_name": str(model_name),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency": latency,
+            "retries": usage.retries,
+            "cached": usage.cached and success,
+            "success": success,
+            "created_at": timezone.now(),
+        }
+        with cls._lock:
+            cls._buffer.append(row)
+            return (len(cls._buffer) >= getattr(settings, "R2D_MODEL_USAGE_BATCH_SIZE", 100)
+                    or time.monotonic() - cls._last_flush >= getattr(settings, "R2D_MODEL_USAGE_FLUSH_INTERVAL", 10))
+
+    @staticmethod
+    def _to_uuid(job_id) -> Optional[uuid.UUID]:
+        try:
+            return uuid.UUID(str(job_id)) if job_id is not None else None
+        except ValueError:
+            return None
+
+    @classmethod
+    def _summarize(cls, rows:list) -> dict:
+        provider_rows = [row for row in rows if not row[6]]
+        latencies = sorted(row[2] for row in provider_rows)
+        prompt_tokens = sorted(row[3] for row in provider_rows if row[3] is not None)
+        completion_tokens = sorted(row[4] for row in provider_rows if row[4] is not None)
+        return {
+            "calls": len(rows),
+            "cached_calls": len(rows) - len(provider_rows),
+            "failed_calls": sum(1 for row in rows if not row[7]),
+            "retries": sum(row[5] for row in rows),
+            "latency_p50": cls._percentile(latencies, 50),
+            "latency_p95": cls._percentile(latencies, 95),
+            "prompt_tokens_p50": cls._percentile(prompt_tokens, 50),
+            "prompt_tokens_p95": cls._percentile(prompt_tokens, 95),
+            "completion_tokens_p50": cls._percentile(completion_tokens, 50),
+            "completion_tokens_p95": cls._percentile(completion_tokens, 95),
+            "prompt_tokens": sum(prompt_tokens),
+            "completion_tokens": sum(completion_tokens),
+        }
+
+    @staticmethod
+    def _percentile(values:list, percentile:float) -> Optional[float]:
+        """
+        Returns the percentile of the sorted values using linear interpolation, None if there are no values.
+        """
+        if not values:
+            return None
+        position = (len(values) - 1) * percentile / 100
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return round(values[lower] + (values[upper] - values[lower]) * (position - lower), 4)
+
+# Discard rows buffered by the parent process, they are written by the parent process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ModelUsageRecorder.reset)
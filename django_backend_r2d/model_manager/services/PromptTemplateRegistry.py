@@ -0,0 +1,131 @@
+import string
+import threading
+from typing import Optional, Type
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class CompiledPromptTemplate:
+    """
+    Prompt template parsed once into literal text and variables, rendering only substitutes the variables.
+    Templates use the f-string syntax of LangChain's PromptTemplate, {{ and }} are rendered as literal braces.
+
+    args:
+        template (str): The template e.g., "Here are the user stories: {job_parameters}"
+    functions:
+        render: Returns the prompt with the variables substituted.
+        get_static_tokens: Returns the number of tokens in the literal text of the template.
+        estimate_tokens: Returns the number of tokens in the rendered prompt without rendering it.
+    """
+    _formatter = string.Formatter()
+
+    def __init__(self, template:str):
+        self.template = template
+        self.parts = []
+        for literal_text, field_name, format_spec, conversion in self._formatter.parse(template):
+            if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+                raise ValueError(f"Unsupported template variable {{{field_name}}}, only plain variables are supported")
+            self.parts.append((literal_text, field_name))
+        self.input_variables = sorted({field_name for _, field_name in self.parts if field_name is not None})
+        self.literal_text = "".join(literal_text for literal_text, _ in self.parts)
+        self._static_tokens = {}
+
+    def render(self, **variables) -> str:
+        """
+        Returns the prompt with the variables substituted, variables are rendered using str() as in LangChain's PromptTemplate.
+        raises:
+            KeyError: If a variable of the template is not provided.
+        """
+        return "".join(literal_text + (str(variables[field_name]) if field_name is not None else "")
+                       for literal_text, field_name in self.parts)
+
+    def get_static_tokens(self, token_counter) -> int:
+        """
+        Returns the number of tokens in the literal text of the template, counted once per encoding.
+        args:
+            token_counter (TokenCounter): Counts the tokens using the encoding of the model.
+        """
+        encoding_name = getattr(token_counter, "encoding_name", None) if token_counter.is_exact() else "estimate"
+        if encoding_name not in self._static_tokens:
+            self._static_tokens[encoding_name] = token_counter.count(self.literal_text)
+        return self._static_tokens[encoding_name]
+
+    def estimate_tokens(self, token_counter, **variables) -> int:
+        """
+        Returns the number of tokens in the rendered prompt, the static token count of the template plus the tokens of each variable.
+        Tokens may differ slightly from the rendered prompt where a variable is merged with the surrounding text by the tokenizer.
+        """
+        variable_tokens = sum(token_counter.count(str(variables[field_name])) for _, field_name in self.parts if field_name is not None)
+        return self.get_static_tokens(token_counter) + variable_tokens
+
+class PromptTemplateRegistry:
+    """
+    Registry of compiled prompt templates keyed by (template class, has_context).
+    Prompt template classes declare their templates as class attributes and register themselves when their module is imported:
+        TEMPLATE: Template used when no context is provided.
+        CONTEXT_TEMPLATE: Optional template used when context is provided.
+    Templates are parsed when registered, static token counts are computed by warm_up when a worker process starts.
+
+    functions:
+        register: Compiles and registers the templates of a prompt template class.
+        get: Returns the compiled template of a prompt template class.
+        render: Renders the compiled template of a prompt template class.
+        warm_up: Computes the static token counts of every registered template.
+    """
+    _templates = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, template_class:Type) -> Type:
+        """
+        Compiles the TEMPLATE and CONTEXT_TEMPLATE of the prompt template class, can be used as a class decorator.
+        """
+        compiled = {False: CompiledPromptTemplate(template_class.TEMPLATE)}
+        if getattr(template_class, "CONTEXT_TEMPLATE", None) is not None:
+            compiled[True] = CompiledPromptTemplate(template_class.CONTEXT_TEMPLATE)
+        with cls._lock:
+            for has_context, template in compiled.items():
+                cls._templates[(template_class, has_context)] = template
+        return template_class
+
+    @classmethod
+    def get(cls, template_class:Type, has_context:bool = False) -> Optional[CompiledPromptTemplate]:
+        """
+        Returns the compiled template, templates without a CONTEXT_TEMPLATE return TEMPLATE for both keys.
+        Returns None if the template class is not registered.
+        """
+        template = cls._templates.get((template_class, has_context))
+        if template is None and has_context:
+            template = cls._templates.get((template_class, False))
+        return template
+
+    @classmethod
+    def render(cls, template_class:Type, has_context:bool = False, **variables) -> str:
+        """
+        Renders the compiled template of the prompt template class.
+        raises:
+            KeyError: If the template class is not registered or a variable is not provided.
+        """
+        template = cls.get(template_class, has_context)
+        if template is None:
+            raise KeyError(f"Prompt template {template_class.__name__} is not registered")
+        return template.render(**variables)
+
+    @classmethod
+    def warm_up(cls, token_counter=None) -> int:
+        """
+        Computes the static token counts of every registered template, called when a worker process starts.
+        returns:
+            int: The number of templates warmed up.
+        """
+        if token_counter is None:
+            # Imported here as the TokenCounter loads the tiktoken encoding
+            from model_manager.services.TokenCounter import TokenCounter
+            token_counter = TokenCounter()
+        with cls._lock:
+            templates = list(cls._templates.items())
+        for (template_class, has_context), template in templates:
+            static_tokens = template.get_static_tokens(token_counter)
+            logger.debug(f"Compiled prompt template {template_class.__name__} (has_context={has_context}) with {static_tokens} static tokens")
+        return len(templates)
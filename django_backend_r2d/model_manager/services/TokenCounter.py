@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import tiktoken
+from model_manager.constants import MODEL_TOKENIZER_ENCODINGS, DEFAULT_TOKENIZER_ENCODING
+from model_manager.services.JobParameterSharder import estimate_tokens
+from model_manager.services.PromptTemplateRegistry import PromptTemplateRegistry
+
+import logging
+# Initialize the logger
+logger = logging.getLogger('application_logging')
+
+class TokenCounter:
+    """
+    Counts tokens using the tiktoken encoding of the model, so that sharding, quotas and rate limits use the number of tokens billed by the provider.
+    Encodings are loaded once per process. If the encoding cannot be loaded (e.g., the BPE file cannot be downloaded) tokens are estimated
+    from the number of characters instead, see TIKTOKEN_CACHE_DIR in the Dockerfile.
+
+    Counts of job parameters and rendered prompts are cached by the hash of their content, repeated requests for the same job are not re-tokenized.
+
+    args:
+        model_name (str): The name of the model e.g., gpt-4-turbo. Models without a known encoding use DEFAULT_TOKENIZER_ENCODING.
+    functions:
+        count: Returns the number of tokens in a string.
+        count_parameters: Returns the number of tokens in the JSON representation of the job parameters.
+        count_messages: Returns the number of tokens in a list of chat messages, including the per-message overhead.
+        estimate_prompt_tokens: Returns the number of prompt tokens of the rendered prompt, including the template and response schema.
+        is_exact: Returns True if tokens are counted using the tiktoken encoding.
+    """
+    MESSAGE_OVERHEAD_TOKENS = 3 # Every chat message is wrapped in <|start|>{role}<|message|>{content}<|end|>
+    REPLY_OVERHEAD_TOKENS = 3 # Every reply is primed with <|start|>assistant<|message|>
+    MAX_CACHED_COUNTS = 4096
+
+    _encodings = {}
+    _encodings_lock = threading.Lock()
+    _counts = OrderedDict()
+    _counts_lock = threading.Lock()
+
+    def __init__(self, model_name:Optional[str] = None):
+        self.model_name = model_name
+        self.encoding_name = MODEL_TOKENIZER_ENCODINGS.get(model_name, DEFAULT_TOKENIZER_ENCODING)
+        self.encoding = self._get_encoding(self.encoding_name)
+
+    def __call__(self, text:str) -> int:
+        return self.count(text)
+
+    def is_exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text:str) -> int:
+        """
+        Returns the number of tokens in the text.
+        """
+        if self.encoding is None:
+            return estimate_tokens(text)
+        # Special tokens in user provided text are counted as plain text, they are not sent as control tokens
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_parameters(self, parameters) -> int:
+        """
+        Returns the number of tokens in the JSON representation of the job parameters, cached by the hash of the parameters.
+        """
+        # Parameters of child jobs are stored as a JSON string
+        serialized = parameters if isinstance(parameters, str) else self._serialize(parameters)
+        return self._cached(("parameters", self._hash(serialized)), lambda: self.count(serialized))
+
+    def count_messages(self, messages:list[str]) -> int:
+        """
+        Returns the number of tokens in the chat messages, including the overhead of each message and the reply.
+        """
+        return sum(self.count(message) + self.MESSAGE_OVERHEAD_TOKENS for message in messages) + self.REPLY_OVERHEAD_TOKENS
+
+    def estimate_prompt_tokens(self, prompt_template, job_parameters, response_schema=None, context:Optional[dict] = None) -> int:
+        """
+        Returns the number of prompt tokens sent to the model for the job parameters.
+        Templates registered in the PromptTemplateRegistry are not rendered, the static token count of the template is added to the tokens of each variable.
+        The response schema is sent as a function definition when structured output is used.
+        Estimates are cached by the prompt template, job parameters, context and response schema.
+        args:
+            prompt_template (BasePromptTemplate): The prompt template used to render the prompt.
+            job_parameters (dict): The job parameters rendered into the prompt.
+            response_schema (dict): Optional JSON schema for structured response.
+            context (dict): Optional context rendered into the prompt.
+        returns:
+            int: The estimated number of prompt tokens.
+        """
+        template_name = f"{type(prompt_template).__module__}.{type(prompt_template).__qualname__}"
+        key = ("prompt", template_name, self._hash(self._serialize([job_parameters, context, self._schema_to_dict(response_schema)])))
+
+        def estimate():
+            compiled = PromptTemplateRegistry.get(type(prompt_template), has_context=context is not None)
+            if compiled is not None and set(compiled.input_variables) <= {"job_parameters", "context"}:
+                prompt_tokens = compiled.estimate_tokens(self, job_parameters=job_parameters, context=context)
+            else:
+                prompt_tokens = self.count(prompt_template.get_prompt(job_parameters, context))
+            schema = self._schema_to_dict(response_schema)
+            schema_tokens = self.count(json.dumps(schema)) if schema else 0
+            return prompt_tokens + self.MESSAGE_OVERHEAD_TOKENS + self.REPLY_OVERHEAD_TOKENS + schema_tokens
+
+        return self._cached(key, estimate)
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._counts_lock:
+            cls._counts.clear()
+
+    def _cached(self, key:tuple, compute) -> int:
+        key = (self.encoding_name if self.is_exact() else "estimate",) + key
+        with self._counts_lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        count = compute()
+        with self._counts_lock:
+            self._counts[key] = count
+            if len(self._counts) > self.MAX_CACHED_COUNTS:
+                self._counts.popitem(last=False)
+        return count
+
+    @staticmethod
+    def _serialize(value) -> str:
+        return json.dumps(value, default=str)
+
+    @staticmethod
+    def _hash(serialized:str) -> str:
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _schema_to_dict(response_schema) -> Optional[dict]:
+        if response_schema is None or isinstance(response_schema, dict):
+            return response_schema
+        if hasattr(response_schema, "model_json_schema"):
+            return response_schema.model_json_schema()
+        return None
+
+    @classmethod
+    def _get_encoding(cls, encoding_name:str):
+        """
+        Returns the tiktoken encoding, or None if it cannot be loaded. Failures are cached so the BPE file is requested once per process.
+        """
+        with cls._encodings_lock:
+            if encoding_name not in cls._encodings:
+                try:
+                    cls._encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+                except Exception as e:
+                    logger.warning(f"Unable to load tiktoken encoding {encoding_name}, token counts will be estimated: {e}")
+                    cls._encodings[encoding_name] = None
+            return cls._encodings[encoding_name]
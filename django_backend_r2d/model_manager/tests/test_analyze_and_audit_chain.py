@@ -0,0 +1,151 @@
+import asyncio
+import inspect
+import time
+from django.test import TestCase
+from model_manager.interfaces.BaseModel import BaseModel
+from model_manager.interfaces.BaseAuditor import BaseAuditor
+from model_manager.chains.AnalyzeAndAuditChain import AnalyzeAndAuditChain
+from model_manager.chains.AnalyzeAndAuditChainPromptBuilder import AnalyzeAndAuditChainPromptBuilder
+from model_manager.services.ModelExceptions import ModelAnalysisError, AnalyzeAndAuditChainException
+from model_manager.services.JobParameterSharder import JobParameterSharder
+from diagrams.chain_inputs.ClassDiagramAuditAnalyzeChainInputs import ClassDiagramAuditAnalyzeChainInputs
+from model_manager.tests.test_job_parameter_sharder import create_job_parameters
+import logging
+
+class LatencyModel(BaseModel):
+    """
+    Model that waits for the configured latency before returning a diagram, used to simulate a network bound LLM call.
+    """
+    def __init__(self, latency:float=0.0, fail:bool=False):
+        super().__init__(model_name="latency-model")
+        self.latency = latency
+        self.fail = fail
+
+    def analyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        time.sleep(self.latency)
+        return self._respond()
+
+    async def aanalyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        await asyncio.sleep(self.latency)
+        return self._respond()
+
+    def _respond(self):
+        if self.fail:
+            raise ModelAnalysisError("Simulated model failure")
+        return {"diagrams": [{"feature": "Login", "diagram": "classDiagram\n class User"}]}
+
+class LatencyAuditor(BaseAuditor):
+    """
+    Auditor that only implements the blocking audit method, aaudit falls back to the BaseAuditor default.
+    """
+    def __init__(self, latency:float=0.0):
+        super().__init__(model_name="latency-auditor")
+        self.latency = latency
+
+    def audit(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        time.sleep(self.latency)
+        return {"diagrams": [{"feature": "Login", "diagram": "classDiagram\n class User"}]}
+
+class AnalyzeAndAuditChainTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.job_parameters = {"features": ["Login"], "sub_features": ["Login"], "job_parameters": {"Login": {}}}
+
+    def create_chain(self, model:BaseModel, auditor:BaseAuditor, job_parameters:dict=None, sharder:JobParameterSharder=None) -> AnalyzeAndAuditChain:
+        chain_input = ClassDiagramAuditAnalyzeChainInputs(job_id="chain-test", job_parameters=job_parameters or self.job_parameters)
+        # Every response is audited so that the latency of the auditor is included
+        return AnalyzeAndAuditChain(model, auditor, chain_input, AnalyzeAndAuditChainPromptBuilder(), sharder=sharder, audit_policy="always")
+
+    def create_sharded_chain(self, latency:float=0.0) -> AnalyzeAndAuditChain:
+        """
+        Creates a chain whose job parameters are split into 3 shards, one per feature.
+        Tokens are counted as characters so that a small number of user stories exceeds the default output budget.
+        """
+        job_parameters = create_job_parameters({"Login": 4, "Logout": 4, "Register": 4})
+        sharder = JobParameterSharder(token_counter=len)
+        return self.create_chain(LatencyModel(latency), LatencyAuditor(latency), job_parameters, sharder)
+
+    def test_aexecute_chain_matches_execute_chain(self):
+        """
+        Test that the async chain returns the same response as the blocking chain.
+        """
+        sync_response = self.create_chain(LatencyModel(), LatencyAuditor()).execute_chain()
+        async_response = asyncio.run(self.create_chain(LatencyModel(), LatencyAuditor()).aexecute_chain())
+        self.assertEqual(sync_response, async_response)
+        self.assertFalse(async_response["analysis_results"]["is_audited"])
+        self.assertTrue(async_response["audited_results"]["is_audited"])
+        self.assertEqual(async_response["analysis_results"]["model_name"], "latency-model")
+        self.assertEqual(async_response["audited_results"]["model_name"], "latency-auditor")
+
+    def test_aexecute_chain_runs_chains_concurrently(self):
+        """
+        Test that awaiting multiple chains on a single event loop overlaps the model and auditor latency.
+        """
+        latency = 0.2
+        chain_count = 10
+
+        async def run_chains():
+            chains = [self.create_chain(LatencyModel(latency), LatencyAuditor(latency)) for _ in range(chain_count)]
+            return await asyncio.gather(*(chain.aexecute_chain() for chain in chains))
+
+        start = time.perf_counter()
+        responses = asyncio.run(run_chains())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(responses), chain_count)
+        # Sequential execution would take chain_count * 2 * latency seconds
+        self.assertLess(elapsed, chain_count * 2 * latency / 2)
+
+    def test_aexecute_chain_raises_chain_exception(self):
+        """
+        Test that errors raised by the model are mapped to AnalyzeAndAuditChainException.
+        """
+        chain = self.create_chain(LatencyModel(fail=True), LatencyAuditor())
+        with self.assertRaises(AnalyzeAndAuditChainException) as context:
+            asyncio.run(chain.aexecute_chain())
+        self.assertIn("Error while generating analysis", str(context.exception))
+
+    def test_execute_chain_merges_shards(self):
+        """
+        Test that job parameters exceeding the token budget are sharded and the diagrams of each shard are merged.
+        """
+        chain = self.create_sharded_chain()
+        self.assertEqual(len(chain._get_shards()), 3)
+
+        response = chain.execute_chain()
+        self.assertEqual(len(response["analysis_results"]["diagrams"]), 3)
+        self.assertEqual(len(response["audited_results"]["diagrams"]), 3)
+        self.assertFalse(response["analysis_results"]["is_audited"])
+        self.assertTrue(response["audited_results"]["is_audited"])
+
+    def test_shards_are_processed_concurrently(self):
+        """
+        Test that the latency of a sharded chain depends on the largest shard rather than the number of shards.
+        """
+        latency = 0.2
+        for execute in (lambda chain: chain.execute_chain(), lambda chain: asyncio.run(chain.aexecute_chain())):
+            chain = self.create_sharded_chain(latency)
+            start = time.perf_counter()
+            response = execute(chain)
+            elapsed = time.perf_counter() - start
+
+            self.assertEqual(len(response["audited_results"]["diagrams"]), 3)
+            # Sequential execution would take 3 shards * 2 calls * latency seconds
+            self.assertLess(elapsed, 3 * 2 * latency * 0.75)
@@ -0,0 +1,144 @@
+import asyncio
+import inspect
+import time
+from django.test import TestCase, override_settings
+from framework.factories.ModelFactory import ModelFactory
+from framework.factories.AuditorFactory import AuditorFactory
+from model_manager.constants import ModelProvider, FakeModels
+from model_manager.models import ModelName
+from model_manager.llms.FakeModel import FakeModel
+from model_manager.auditors.FakeAuditor import FakeAuditor
+from model_manager.services.FakeResponseGenerator import FakeResponseGenerator
+from model_manager.services.ModelExceptions import ModelAnalysisError, AuditorAnalysisError
+from model_manager.services.ModelClientRegistry import ModelClientRegistry
+from diagrams.response_schemas.mermaid_class_diagram_schema import MERMAID_CLASS_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_er_diagram_schema import MERMAID_ER_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_sequence_diagram_schema import MERMAID_SEQUENCE_DIAGRAM_SCHEMA
+import logging
+
+SCHEMAS = {
+    "classDiagram": MERMAID_CLASS_DIAGRAM_SCHEMA,
+    "erDiagram": MERMAID_ER_DIAGRAM_SCHEMA,
+    "sequenceDiagram": MERMAID_SEQUENCE_DIAGRAM_SCHEMA,
+}
+
+class FakeModelTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def assertMatchesSchema(self, value, schema:dict):
+        """
+        Asserts that the value matches the JSON schema types and required properties.
+        """
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            self.assertIsInstance(value, dict)
+            for required in schema.get("required", []):
+                self.assertIn(required, value)
+            for name, property_schema in schema.get("properties", {}).items():
+                self.assertMatchesSchema(value[name], property_schema)
+        elif schema_type == "array":
+            self.assertIsInstance(value, list)
+            for item in value:
+                self.assertMatchesSchema(item, schema.get("items", {}))
+        elif schema_type == "string":
+            self.assertIsInstance(value, str)
+
+    def test_responses_match_response_schemas(self):
+        """
+        Test that responses are valid for each diagram response schema and contain the matching Mermaid diagram type.
+        """
+        generator = FakeResponseGenerator(diagrams_per_response=2, items_per_diagram=4, seed=1)
+        for diagram_type, schema in SCHEMAS.items():
+            response = generator.generate(schema)
+            self.assertMatchesSchema(response, schema)
+            self.assertEqual(len(response["diagrams"]), 2)
+            for diagram in response["diagrams"]:
+                self.assertTrue(diagram["diagram"].startswith(diagram_type))
+                self.assertEqual(len(diagram["feature"]), 1)
+
+    def test_responses_are_reproducible(self):
+        """
+        Test that generators with the same seed produce the same latencies and responses.
+        """
+        first = FakeResponseGenerator(latency_distribution="lognormal", latency_mean=1, latency_stddev=0.5, seed=7)
+        second = FakeResponseGenerator(latency_distribution="lognormal", latency_mean=1, latency_stddev=0.5, seed=7)
+        self.assertEqual([first.sample_latency() for _ in range(5)], [second.sample_latency() for _ in range(5)])
+        self.assertEqual(first.generate(MERMAID_CLASS_DIAGRAM_SCHEMA), second.generate(MERMAID_CLASS_DIAGRAM_SCHEMA))
+
+    def test_latency_distributions(self):
+        """
+        Test that sampled latencies follow the configured distribution and are never negative.
+        """
+        uniform = FakeResponseGenerator(latency_distribution="uniform", latency_min=1, latency_max=2, seed=1)
+        self.assertTrue(all(1 <= uniform.sample_latency() <= 2 for _ in range(100)))
+
+        normal = FakeResponseGenerator(latency_distribution="normal", latency_mean=0, latency_stddev=1, seed=1)
+        self.assertTrue(all(normal.sample_latency() >= 0 for _ in range(100)))
+
+        lognormal = FakeResponseGenerator(latency_distribution="lognormal", latency_mean=2, latency_stddev=1, seed=1)
+        samples = [lognormal.sample_latency() for _ in range(5000)]
+        self.assertAlmostEqual(sum(samples) / len(samples), 2, delta=0.15)
+
+        with self.assertRaises(ValueError):
+            FakeResponseGenerator(latency_distribution="pareto")
+
+    def test_error_rate(self):
+        """
+        Test that the fake model and auditor fail at the configured error rate.
+        """
+        model = FakeModel(error_rate=0.25, seed=3)
+        failures = 0
+        for _ in range(2000):
+            try:
+                model.analyze("prompt", MERMAID_ER_DIAGRAM_SCHEMA)
+            except ModelAnalysisError:
+                failures += 1
+        self.assertAlmostEqual(failures / 2000, 0.25, delta=0.04)
+
+        with self.assertRaises(AuditorAnalysisError):
+            FakeAuditor(error_rate=1).audit("prompt", MERMAID_ER_DIAGRAM_SCHEMA)
+
+    def test_async_latency_does_not_block_event_loop(self):
+        """
+        Test that concurrent aanalyze calls overlap their latency.
+        """
+        model = FakeModel(latency_mean=0.2)
+
+        async def run_requests():
+            return await asyncio.gather(*(model.aanalyze("prompt", MERMAID_SEQUENCE_DIAGRAM_SCHEMA) for _ in range(10)))
+
+        start = time.perf_counter()
+        responses = asyncio.run(run_requests())
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(len(responses), 10)
+
+    @override_settings(R2D_FAKE_LLM_CONFIG={"items_per_diagram": 2, "seed": 1})
+    def test_factories_create_fake_clients(self):
+        """
+        Test that the factories create pooled fake models and auditors configured by R2D_FAKE_LLM_CONFIG.
+        """
+        ModelClientRegistry.reset()
+        model = ModelFactory.get_model("fake", "fake-diagram-model")
+        auditor = AuditorFactory.get_auditor(ModelProvider.FAKE, FakeModels.FAKE_DIAGRAM_MODEL)
+        self.assertIsInstance(model, FakeModel)
+        self.assertIsInstance(auditor, FakeAuditor)
+        self.assertIs(model, ModelFactory.get_model(ModelProvider.FAKE, FakeModels.FAKE_DIAGRAM_MODEL))
+        self.assertEqual(model.generator.items_per_diagram, 2)
+        # Diagrams generated by the fake model are saved against the fake-diagram-model ModelName
+        self.assertTrue(ModelName.objects.filter(name=model.model_name, provider=ModelProvider.FAKE.value).exists())
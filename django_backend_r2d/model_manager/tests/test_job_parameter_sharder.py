@@ -0,0 +1,125 @@
+import inspect
+from django.test import TestCase
+from model_manager.services.JobParameterSharder import JobParameterSharder, estimate_tokens
+import logging
+
+def create_story(story_id:str, words:int=20) -> dict:
+    return {
+        "id": story_id,
+        "requirement": " ".join(["requirement"] * words),
+        "services_to_use": ["CloudWatch"],
+        "acceptance_criteria": "Acceptance criteria",
+        "additional_information": "None",
+    }
+
+def create_job_parameters(stories_per_feature:dict) -> dict:
+    """
+    Creates job parameters with one sub-feature per feature e.g., {"Login": 3} creates 3 user stories for the Login feature.
+    """
+    job_parameters = {
+        feature: {f"{feature} Sub Feature": {f"{feature}-{index}": create_story(f"{feature}-{index}") for index in range(count)}}
+        for feature, count in stories_per_feature.items()
+    }
+    return {
+        "features": list(stories_per_feature),
+        "sub_features": [f"{feature} Sub Feature" for feature in stories_per_feature],
+        "job_parameters": job_parameters,
+    }
+
+class JobParameterSharderTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.sharder = JobParameterSharder()
+        self.story_tokens = self.sharder._count({"Login-0": create_story("Login-0")})
+
+    def collect_story_ids(self, shards:list[dict]) -> list[str]:
+        return [story_id for shard in shards for sub_features in shard["job_parameters"].values()
+                for stories in sub_features.values() for story_id in stories]
+
+    def test_small_job_parameters_are_not_sharded(self):
+        """
+        Test that job parameters within the budget are returned as a single shard.
+        """
+        job_parameters = create_job_parameters({"Login": 2, "Logout": 2})
+        shards = self.sharder.shard(job_parameters, token_budget=100000)
+        self.assertEqual(shards, [job_parameters])
+
+    def test_job_parameters_are_sharded_by_feature(self):
+        """
+        Test that features are not split across shards when each feature fits within the budget.
+        """
+        job_parameters = create_job_parameters({"Login": 3, "Logout": 3, "Register": 3})
+        shards = self.sharder.shard(job_parameters, token_budget=self.story_tokens * 4)
+
+        self.assertEqual(len(shards), 3)
+        for shard in shards:
+            self.assertEqual(len(shard["features"]), 1)
+            self.assertEqual(shard["features"], list(shard["job_parameters"]))
+            self.assertEqual(len(shard["sub_features"]), 1)
+        self.assertCountEqual(self.collect_story_ids(shards), self.collect_story_ids([job_parameters]))
+
+    def test_small_features_are_packed_together(self):
+        """
+        Test that small features are packed into the same shard.
+        """
+        job_parameters = create_job_parameters({"Login": 6, "Logout": 1, "Register": 1, "Profile": 5})
+        shards = self.sharder.shard(job_parameters, token_budget=self.story_tokens * 8)
+
+        self.assertEqual(len(shards), 2)
+        for shard in shards:
+            shard_tokens = self.sharder._count(shard["job_parameters"])
+            self.assertLessEqual(shard_tokens, self.story_tokens * 8 + 50)
+
+    def test_large_features_are_split_by_story(self):
+        """
+        Test that a feature larger than the budget is split without losing or duplicating user stories.
+        """
+        job_parameters = create_job_parameters({"Login": 10})
+        shards = self.sharder.shard(job_parameters, token_budget=self.story_tokens * 3)
+
+        self.assertGreater(len(shards), 1)
+        story_ids = self.collect_story_ids(shards)
+        self.assertEqual(len(story_ids), len(set(story_ids)))
+        self.assertCountEqual(story_ids, self.collect_story_ids([job_parameters]))
+        for shard in shards:
+            self.assertEqual(shard["features"], ["Login"])
+
+    def test_sharding_is_deterministic(self):
+        """
+        Test that identical job parameters produce identical shards, so that shard prompts can be served from the LLM response cache.
+        """
+        job_parameters = create_job_parameters({"Login": 3, "Logout": 2, "Register": 3, "Profile": 1})
+        budget = self.story_tokens * 4
+        self.assertEqual(self.sharder.shard(job_parameters, budget), self.sharder.shard(job_parameters, budget))
+
+    def test_unsupported_job_parameters_are_not_sharded(self):
+        """
+        Test that job parameters that are not grouped by feature are returned as a single shard.
+        """
+        job_parameters = {"features": ["Login"], "classes": ["User"], "descriptions": ["A user"], "helper_classes": []}
+        self.assertFalse(self.sharder.is_shardable(job_parameters))
+        self.assertEqual(self.sharder.shard(job_parameters, token_budget=1), [job_parameters])
+
+    def test_estimate_tokens(self):
+        """
+        Test that the token estimate is proportional to the length of the text.
+        """
+        self.assertEqual(estimate_tokens(""), 1)
+        self.assertEqual(estimate_tokens("a" * 400), 100)
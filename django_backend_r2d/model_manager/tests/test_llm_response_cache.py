@@ -0,0 +1,174 @@
+import asyncio
+import inspect
+import threading
+import time
+from django.test import TestCase, override_settings
+from django.core.cache import caches
+from model_manager.services.LLMResponseCache import LLMResponseCache
+from diagrams.response_schemas.mermaid_class_diagram_schema import MERMAID_CLASS_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_er_diagram_schema import MERMAID_ER_DIAGRAM_SCHEMA
+import logging
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'llm_responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'llm-response-cache-tests'},
+}
+
+@override_settings(CACHES=TEST_CACHES, R2D_LLM_CACHE_ENABLED=True)
+class LLMResponseCacheTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        caches['llm_responses'].clear()
+        LLMResponseCache.reset_stats()
+        self.response_cache = LLMResponseCache(lock_timeout=5, poll_interval=0.01)
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, latency:float=0.0):
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(latency)
+        return {"diagrams": [{"feature": "Login", "diagram": "classDiagram\n class User"}]}
+
+    def test_build_key_is_content_addressed(self):
+        """
+        Test that identical requests produce the same key and that the model, prompt and schema are part of the key.
+        """
+        key = self.response_cache.build_key("gpt-4-turbo", "prompt", MERMAID_CLASS_DIAGRAM_SCHEMA)
+        self.assertEqual(key, self.response_cache.build_key("gpt-4-turbo", "prompt", dict(MERMAID_CLASS_DIAGRAM_SCHEMA)))
+        self.assertNotEqual(key, self.response_cache.build_key("gpt-3.5-turbo", "prompt", MERMAID_CLASS_DIAGRAM_SCHEMA))
+        self.assertNotEqual(key, self.response_cache.build_key("gpt-4-turbo", "another prompt", MERMAID_CLASS_DIAGRAM_SCHEMA))
+        self.assertNotEqual(key, self.response_cache.build_key("gpt-4-turbo", "prompt", MERMAID_ER_DIAGRAM_SCHEMA))
+        self.assertNotEqual(key, self.response_cache.build_key("gpt-4-turbo", "prompt", None))
+
+    def test_identical_requests_are_served_from_cache(self):
+        """
+        Test that the LLM is invoked once for identical requests and the hit and miss counters are updated.
+        """
+        key = self.response_cache.build_key("gpt-4-turbo", "prompt", MERMAID_CLASS_DIAGRAM_SCHEMA)
+        first = self.response_cache.get_or_compute(key, self.compute)
+        second = self.response_cache.get_or_compute(key, self.compute)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+        stats = self.response_cache.get_stats()
+        self.assertEqual(stats["process"]["misses"], 1)
+        self.assertEqual(stats["process"]["hits"], 1)
+        self.assertEqual(stats["shared"]["hits"], 1)
+        self.assertEqual(stats["process"]["hit_ratio"], 0.5)
+
+    def test_failed_requests_are_not_cached(self):
+        """
+        Test that errors are propagated, not cached and release the in-flight lock.
+        """
+        key = self.response_cache.build_key("gpt-4-turbo", "prompt", None)
+
+        def fail():
+            raise RuntimeError("upstream error")
+
+        with self.assertRaises(RuntimeError):
+            self.response_cache.get_or_compute(key, fail)
+        self.assertEqual(self.response_cache.get_or_compute(key, self.compute), self.compute())
+        self.assertIsNone(caches['llm_responses'].get(f"{key}:lock"))
+
+    def test_concurrent_identical_requests_share_one_call(self):
+        """
+        Test that concurrent identical requests are coalesced into a single LLM call.
+        """
+        key = self.response_cache.build_key("gpt-4-turbo", "prompt", MERMAID_CLASS_DIAGRAM_SCHEMA)
+        responses = []
+
+        def request():
+            responses.append(self.response_cache.get_or_compute(key, lambda: self.compute(latency=0.2)))
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(responses), 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.response_cache.get_stats()["process"]["coalesced"], 7)
+
+    def test_concurrent_identical_async_requests_share_one_call(self):
+        """
+        Test that identical requests awaited on the same event loop are coalesced into a single LLM call.
+        """
+        key = self.response_cache.build_key("gpt-4-turbo", "prompt", MERMAID_CLASS_DIAGRAM_SCHEMA)
+
+        async def acompute():
+            self.calls += 1
+            await asyncio.sleep(0.2)
+            return {"diagrams": []}
+
+        async def run_requests():
+            return await asyncio.gather(*(self.response_cache.aget_or_compute(key, acompute) for _ in range(5)))
+
+        responses = asyncio.run(run_requests())
+        self.assertEqual(responses, [{"diagrams": []}] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_lock_is_renewed_while_the_request_is_in_flight(self):
+        """
+        Test that a request that outlives the lock timeout keeps the lock, so that waiting requests do not invoke the LLM.
+        """
+        response_cache = LLMResponseCache(lock_timeout=0.3, poll_interval=0.01)
+        key = response_cache.build_key("gpt-4-turbo", "prompt", MERMAID_CLASS_DIAGRAM_SCHEMA)
+        responses = []
+
+        def request():
+            responses.append(response_cache.get_or_compute(key, lambda: self.compute(latency=1.0)))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(responses), 4)
+        self.assertEqual(self.calls, 1)
+        self.assertIsNone(caches['llm_responses'].get(f"{key}:lock"))
+
+    def test_lock_is_only_released_by_its_holder(self):
+        """
+        Test that a request does not release a lock that expired and was acquired by another request.
+        """
+        key = self.response_cache.build_key("gpt-4-turbo", "prompt", None)
+        lock_key = f"{key}:lock"
+        token = self.response_cache._acquire(lock_key)
+        self.assertTrue(token)
+        self.assertEqual(self.response_cache._acquire(lock_key), "")
+
+        # The lock expired and was acquired by another request
+        caches['llm_responses'].set(lock_key, "another-token")
+        self.assertFalse(self.response_cache._renew(lock_key, token))
+        self.response_cache._release(lock_key, token)
+        self.assertEqual(caches['llm_responses'].get(lock_key), "another-token")
+
+        self.response_cache._release(lock_key, "another-token")
+        self.assertIsNone(caches['llm_responses'].get(lock_key))
+
+    def test_record_bypass(self):
+        """
+        Test that requests that bypass the cache are counted.
+        """
+        self.response_cache.record_bypass()
+        self.assertEqual(self.response_cache.get_stats()["process"]["bypassed"], 1)
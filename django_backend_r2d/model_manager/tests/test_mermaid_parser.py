@@ -0,0 +1,133 @@
+import inspect
+from uuid import uuid4
+from django.test import TestCase
+from diagrams.models import ClassDiagram, ERDiagram
+from diagrams.repository.ClassDiagramRepository import ClassDiagramRepository
+from diagrams.repository.ERDiagramRepository import ERDiagramRepository
+from jobs.constants import ValidJobStatus, ValidJobTypes
+from jobs.models import Job, JobStatus
+from model_manager.models import ModelName
+from model_manager.services.FakeResponseGenerator import FakeResponseGenerator
+from model_manager.services.MermaidParser import MermaidParser, CLASS_DIAGRAM, ER_DIAGRAM, SEQUENCE_DIAGRAM
+from model_manager.services.MermaidValidator import MermaidValidator
+from diagrams.response_schemas.mermaid_class_diagram_schema import MERMAID_CLASS_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_er_diagram_schema import MERMAID_ER_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_sequence_diagram_schema import MERMAID_SEQUENCE_DIAGRAM_SCHEMA
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+BROKEN_CLASS_DIAGRAM = '```mermaid\nclassdiagram\n  class User {\n  +String email\n  class Session\n  User-->Session\n  Session  <|--  Admin : ""\n}\n<<interface>> Repository\nUser "1" --> "*" Order : places\n```'
+
+class MermaidParserTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        cls.user = User.objects.create_user(username='parseruser', password='testpassword', email='parser@example.com')
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.parser = MermaidParser()
+        self.validator = MermaidValidator()
+
+    def create_job(self, job_type:str) -> Job:
+        return Job.objects.create(job_id=str(uuid4()), user=self.user, job_status=JobStatus.objects.get(name=ValidJobStatus.PROCESSING.value),
+                                  model=ModelName.objects.get(name="fake-diagram-model"), job_details="Mermaid parser", job_type=job_type,
+                                  tokens=100, parameters={"features": ["Login"]})
+
+    def test_valid_diagrams_are_unchanged(self):
+        """
+        Test that the diagrams generated by the FakeResponseGenerator are parsed without repairs and rendered unchanged, with the names they list.
+        """
+        generator = FakeResponseGenerator(diagrams_per_response=2, items_per_diagram=4, seed=1)
+        for schema, fields in ((MERMAID_CLASS_DIAGRAM_SCHEMA, ("classes", "helper_classes")), (MERMAID_ER_DIAGRAM_SCHEMA, ("entities",)), (MERMAID_SEQUENCE_DIAGRAM_SCHEMA, ("actors",))):
+            for diagram in generator.generate(schema)["diagrams"]:
+                parsed = self.parser.parse(diagram["diagram"])
+                self.assertEqual((parsed.repairs, parsed.issues), ([], []), schema["title"])
+                self.assertEqual(parsed.to_mermaid(), diagram["diagram"])
+                self.assertEqual(sorted(parsed.get_names()), sorted(name for field in fields for name in diagram[field]))
+
+    def test_class_diagram_repairs(self):
+        """
+        Test that fences, the header, unclosed class bodies, stray braces and missing labels of a class diagram are repaired.
+        """
+        parsed = self.parser.parse(BROKEN_CLASS_DIAGRAM)
+        self.assertEqual(parsed.to_mermaid(), 'classDiagram\n    class User {\n        +String email\n    }\n    class Session\n    User --> Session : uses\n'
+                                              '    Session <|-- Admin : inherits\n    <<interface>> Repository\n    User "1" --> "*" Order : places')
+        self.assertEqual(len(parsed.repairs), 6)
+        self.assertTrue(parsed.is_valid())
+        self.assertEqual(parsed.get_names(), ["User", "Session", "Admin", "Repository", "Order"])
+        self.assertEqual(self.validator.validate(parsed.to_mermaid(), parsed.get_names()), [])
+        # Repaired diagrams are not repaired again
+        self.assertEqual(self.parser.repair(parsed.to_mermaid()), (parsed.to_mermaid(), []))
+
+    def test_er_diagram_repairs(self):
+        """
+        Test that a missing header, unquoted labels, missing labels, trailing commas and unbalanced braces of an ER diagram are repaired.
+        """
+        diagram, repairs = self.parser.repair("CUSTOMER ||--o{ ORDER : places order\nORDER {\n  int id PK,\n  decimal(10,2) total\n  string ref PK,FK \"reference\"\n"
+                                              "LINE-ITEM }|..|{ ORDER\n}", ER_DIAGRAM)
+        self.assertEqual(diagram, 'erDiagram\n    CUSTOMER ||--o{ ORDER : "places order"\n    ORDER {\n        int id PK\n        decimal(10,2) total\n'
+                                  '        string ref PK, FK "reference"\n    }\n    LINE-ITEM }|..|{ ORDER : "relates to"')
+        self.assertEqual(len(repairs), 6)
+        self.assertEqual(self.validator.validate(diagram, ["CUSTOMER", "ORDER", "LINE-ITEM"]), [])
+
+    def test_sequence_diagram_repairs(self):
+        """
+        Test that unclosed blocks, end statements that close no block and missing labels of a sequence diagram are repaired.
+        """
+        parsed = self.parser.parse("sequenceDiagram autonumber\nactor User\nend\nalt Valid\nUser->>+API: login\nelse Invalid\nAPI-->>User\nloop Retry\nNote over User,API: retry\n")
+        self.assertEqual(parsed.to_mermaid(), "sequenceDiagram\n    autonumber\n    actor User\n    alt Valid\n        User->>+API: login\n    else Invalid\n"
+                                              "        API-->>User: returns\n        loop Retry\n            Note over User,API: retry\n        end\n    end")
+        self.assertEqual(len(parsed.repairs), 4)
+        self.assertEqual(parsed.get_names(), ["User", "API"])
+
+    def test_unparsed_lines_and_unsupported_diagrams(self):
+        """
+        Test that lines that cannot be parsed are kept and reported, and that diagrams of unsupported types are not changed.
+        """
+        parsed = self.parser.parse("classDiagram\n  class User\n  User ~~ Session", CLASS_DIAGRAM)
+        self.assertEqual(parsed.issues, ["Line 3: unrecognized syntax 'User ~~ Session'"])
+        self.assertEqual(parsed.to_mermaid(), "classDiagram\n    class User\n    User ~~ Session")
+        for diagram in ("flowchart TD\n    A --> B", "", None):
+            self.assertIsNone(self.parser.parse(diagram, SEQUENCE_DIAGRAM).diagram_type)
+            self.assertEqual(self.parser.repair(diagram, SEQUENCE_DIAGRAM), (diagram, []))
+
+    def test_saved_diagrams_are_repaired(self):
+        """
+        Test that save_diagram saves the repaired diagram with the names found in the diagram, unless R2D_MERMAID_AUTO_REPAIR is disabled.
+        """
+        job = self.create_job(ValidJobTypes.CLASS_DIAGRAM.value)
+        chain_response = {"audited_results": {"model_name": "fake-diagram-model", "is_audited": True, "diagrams": [{
+            "feature": ["Login"], "diagram": BROKEN_CLASS_DIAGRAM, "description": "Users create sessions",
+            "classes": ["User", "Session", "Token"], "helper_classes": ["Repository", "Cache"]}]}}
+        ClassDiagramRepository().save_diagram(job.job_id, chain_response)
+        saved = ClassDiagram.objects.get(job_id=job.job_id)
+        self.assertEqual(saved.diagram, self.parser.parse(BROKEN_CLASS_DIAGRAM).to_mermaid())
+        self.assertEqual(saved.classes, ["User", "Session", "Admin", "Order"])
+        self.assertEqual(saved.helper_classes, ["Repository"])
+
+        with self.settings(R2D_MERMAID_AUTO_REPAIR=False):
+            ClassDiagramRepository().save_diagram(job.job_id, chain_response)
+        self.assertTrue(ClassDiagram.objects.filter(job_id=job.job_id, diagram=BROKEN_CLASS_DIAGRAM, classes=["User", "Session", "Token"]).exists())
+
+        # Names listed by the model are kept if the diagram could not be entirely parsed
+        job = self.create_job(ValidJobTypes.ER_DIAGRAM.value)
+        ERDiagramRepository().save_diagram(job.job_id, {"analysis_results": {"model_name": "fake-diagram-model", "is_audited": False, "diagrams": [{
+            "feature": ["Login"], "diagram": "erDiagram\n    USER ||--o{ SESSION : creates\n    USER ~~ TOKEN", "description": "Users create sessions",
+            "entities": ["USER", "TOKEN"]}]}})
+        self.assertEqual(ERDiagram.objects.get(job_id=job.job_id).entities, ["USER", "SESSION", "TOKEN"])
@@ -0,0 +1,175 @@
+import asyncio
+import inspect
+import json
+from django.test import TestCase, override_settings
+from model_manager.interfaces.BaseModel import BaseModel
+from model_manager.interfaces.BaseAuditor import BaseAuditor
+from model_manager.chains.AnalyzeAndAuditChain import AnalyzeAndAuditChain
+from model_manager.chains.AnalyzeAndAuditChainPromptBuilder import AnalyzeAndAuditChainPromptBuilder
+from model_manager.services.FakeResponseGenerator import FakeResponseGenerator
+from model_manager.services.MermaidValidator import MermaidValidator
+from diagrams.chain_inputs.ClassDiagramAuditAnalyzeChainInputs import ClassDiagramAuditAnalyzeChainInputs
+from diagrams.response_schemas.mermaid_class_diagram_schema import MERMAID_CLASS_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_er_diagram_schema import MERMAID_ER_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_sequence_diagram_schema import MERMAID_SEQUENCE_DIAGRAM_SCHEMA
+import logging
+
+VALID_CLASS_DIAGRAM = {
+    "feature": ["Login"],
+    "diagram": "classDiagram\n    class User {\n        +String email\n        +login() bool\n    }\n    class Session\n    User --> Session : creates",
+    "description": "Users create sessions",
+    "classes": ["User", "Session"],
+    "helper_classes": [],
+}
+
+INVALID_CLASS_DIAGRAM = {
+    "feature": ["Checkout"],
+    "diagram": "classDiagram\n    class Order\n    Order --> Invoice",
+    "description": "Orders create invoices",
+    "classes": ["Order", "Invoice", "Payment"],
+    "helper_classes": [],
+}
+
+class StaticModel(BaseModel):
+    """
+    Model that returns the configured response.
+    """
+    def __init__(self, response:dict):
+        super().__init__(model_name="static-model")
+        self.response = response
+
+    def analyze(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        return json.loads(json.dumps(self.response))
+
+class RecordingAuditor(BaseAuditor):
+    """
+    Auditor that records its prompts and returns the diagrams of the audit prompt with a fixed diagram.
+    """
+    def __init__(self):
+        super().__init__(model_name="recording-auditor")
+        self.prompts = []
+
+    def audit(self, prompt:str, response_schema:dict, use_cache:bool=True):
+        self.prompts.append(prompt)
+        return {"diagrams": [{**VALID_CLASS_DIAGRAM, "feature": ["Audited"]}]}
+
+class MermaidValidatorTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.validator = MermaidValidator()
+
+    def create_chain(self, response:dict, auditor:BaseAuditor, audit_policy:str=None) -> AnalyzeAndAuditChain:
+        chain_input = ClassDiagramAuditAnalyzeChainInputs(job_id="validator-test", job_parameters={"features": ["Login"], "job_parameters": {}})
+        return AnalyzeAndAuditChain(StaticModel(response), auditor, chain_input, AnalyzeAndAuditChainPromptBuilder(), audit_policy=audit_policy)
+
+    def test_generated_diagrams_are_valid(self):
+        """
+        Test that the class, ER and sequence diagrams generated by the FakeResponseGenerator have no issues.
+        """
+        generator = FakeResponseGenerator(diagrams_per_response=2, items_per_diagram=4, seed=1)
+        for schema in (MERMAID_CLASS_DIAGRAM_SCHEMA, MERMAID_ER_DIAGRAM_SCHEMA, MERMAID_SEQUENCE_DIAGRAM_SCHEMA):
+            response = generator.generate(schema)
+            self.assertEqual(self.validator.get_flagged_diagrams(response), [], schema["title"])
+
+    def test_class_diagram_issues(self):
+        """
+        Test that dangling and unlabeled relationships, and classes listed but not declared are reported.
+        """
+        self.assertEqual(self.validator.validate_diagram(VALID_CLASS_DIAGRAM), [])
+        issues = self.validator.validate("classDiagram\n    class Order\n    Order --> Invoice", ["Order", "Payment"])
+        self.assertEqual(issues, ["Line 3: added label uses to relationship Order -> Invoice",
+                                  "Line 3: relationship references Invoice, which is not declared",
+                                  "Payment is listed but not declared in the diagram"])
+
+    def test_er_diagram_issues(self):
+        """
+        Test that invalid attributes, unclosed entities and unlabeled relationships are reported, and that entities referenced by relationships are declared.
+        """
+        self.assertEqual(self.validator.validate('erDiagram\n    CUSTOMER ||--o{ ORDER : places\n    ORDER {\n        int id PK\n        string status "open"\n    }', ["CUSTOMER", "ORDER"]), [])
+        issues = self.validator.validate("erDiagram\n    CUSTOMER ||--o{ ORDER\n    ORDER {\n        id\n", ["CUSTOMER"])
+        self.assertIn("Line 4: invalid attribute 'id'", issues)
+        self.assertIn("Closed the body of entity ORDER", issues)
+        self.assertIn('Line 2: added label "relates to" to relationship CUSTOMER -> ORDER', issues)
+        self.assertEqual(self.validator.validate("erDiagram\n    CUSTOMER ||--o{ ORDER : places\n    ORDER ||--|{ LINE-ITEM : contains", ["CUSTOMER", "LINE-ITEM"]), [])
+
+    def test_sequence_diagram_issues(self):
+        """
+        Test that messages to undeclared participants, unlabeled messages and unclosed blocks are reported.
+        """
+        valid = "sequenceDiagram\n    actor User\n    participant API\n    loop Every minute\n        User->>+API: poll\n        API-->>-User: status\n    end\n    Note over User,API: done"
+        self.assertEqual(self.validator.validate(valid, ["User", "API"]), [])
+        issues = self.validator.validate("sequenceDiagram\n    participant User\n    alt ok\n    User->>Database\n", ["User"])
+        self.assertEqual(issues, ["Line 4: added label calls to message User -> Database",
+                                  "Closed the alt block of line 3",
+                                  "Line 4: message references Database, which is not declared"])
+
+    def test_unsupported_and_empty_diagrams(self):
+        """
+        Test that diagrams that cannot be checked are reported so that they are audited.
+        """
+        self.assertEqual(self.validator.validate("flowchart TD\n    A --> B"), ["Unsupported diagram type flowchart"])
+        self.assertEqual(self.validator.validate("  \n"), ["Diagram is empty"])
+        self.assertEqual(self.validator.validate("classDiagram\n    class User\n    User ~~ Session"), ["Line 3: unrecognized syntax 'User ~~ Session'"])
+
+    def test_flagged_policy_audits_only_flagged_diagrams(self):
+        """
+        Test that only the diagrams with issues are sent to the auditor, diagrams without issues are only returned in the analysis results.
+        """
+        auditor = RecordingAuditor()
+        response = self.create_chain({"diagrams": [VALID_CLASS_DIAGRAM, INVALID_CLASS_DIAGRAM]}, auditor, "flagged").execute_chain()
+
+        self.assertEqual(len(auditor.prompts), 1)
+        self.assertIn("Checkout", auditor.prompts[0])
+        self.assertNotIn("Login", auditor.prompts[0])
+        self.assertEqual([diagram["feature"] for diagram in response["audited_results"]["diagrams"]], [["Audited"]])
+        # Diagrams without issues are marked as validated, so that they are handed off to dependent stages
+        self.assertEqual([diagram.get("is_validated", False) for diagram in response["analysis_results"]["diagrams"]], [True, False])
+
+    def test_valid_analysis_skips_audit(self):
+        """
+        Test that the auditor is not invoked if every diagram passes, using both the flagged and skip_valid policies.
+        """
+        for audit_policy in ("flagged", "skip_valid"):
+            auditor = RecordingAuditor()
+            response = asyncio.run(self.create_chain({"diagrams": [VALID_CLASS_DIAGRAM]}, auditor, audit_policy).aexecute_chain())
+            self.assertEqual(auditor.prompts, [])
+            # Diagrams that were not audited are not returned as the output of the auditor
+            self.assertEqual(response["audited_results"]["diagrams"], [])
+            self.assertEqual(response["analysis_results"]["diagrams"], [{**VALID_CLASS_DIAGRAM, "is_validated": True}])
+            self.assertFalse(response["analysis_results"]["is_audited"])
+
+    def test_skip_valid_policy_audits_entire_response(self):
+        """
+        Test that the skip_valid policy audits every diagram if any diagram has issues, and the always policy audits valid responses.
+        """
+        for audit_policy, response in (("skip_valid", {"diagrams": [VALID_CLASS_DIAGRAM, INVALID_CLASS_DIAGRAM]}),
+                                       ("always", {"diagrams": [VALID_CLASS_DIAGRAM]})):
+            auditor = RecordingAuditor()
+            chain_response = self.create_chain(response, auditor, audit_policy).execute_chain()
+            self.assertEqual(len(auditor.prompts), 1)
+            self.assertIn("Login", auditor.prompts[0])
+            self.assertEqual([diagram["feature"] for diagram in chain_response["audited_results"]["diagrams"]], [["Audited"]])
+
+    @override_settings(R2D_AUDIT_POLICY="skip_valid")
+    def test_audit_policy_setting(self):
+        """
+        Test that the audit policy defaults to R2D_AUDIT_POLICY.
+        """
+        self.assertEqual(self.create_chain({"diagrams": []}, RecordingAuditor()).audit_policy.value, "skip_valid")
@@ -0,0 +1,230 @@
+import asyncio
+import inspect
+import threading
+import time
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from langchain_core.outputs import LLMResult
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from model_manager.services.ModelRateLimiter import ModelRateLimiter
+from model_manager.services.LLMInvoker import LLMInvoker
+from model_manager.services.ModelExceptions import ModelRateLimitTimeoutError
+import logging
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+TEST_RATE_LIMITS = {"rate-limited-model": {"requests_per_minute": 600, "tokens_per_minute": 600}}
+
+class RateLimitedLLM:
+    """
+    Chat model stub that records the time of each call, used to verify that the LLMInvoker waits for the budget.
+    """
+    model_name = "rate-limited-model"
+    max_tokens = 4
+
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, llm_input, **kwargs):
+        self.calls.append(time.monotonic())
+        return "response"
+
+class UsageReportingLLM(RateLimitedLLM):
+    """
+    Chat model stub that reports the prompt tokens and fewer completion tokens than max_tokens to the callbacks.
+    """
+    max_tokens = 100
+
+    def invoke(self, llm_input, config=None, **kwargs):
+        for callback in (config or {}).get("callbacks", []):
+            callback.on_llm_end(LLMResult(generations=[[]], llm_output={"token_usage": {"prompt_tokens": 8, "completion_tokens": 20}}))
+        return super().invoke(llm_input, **kwargs)
+
+    async def ainvoke(self, llm_input, config=None, **kwargs):
+        return self.invoke(llm_input, config=config, **kwargs)
+
+@override_settings(R2D_RATE_LIMIT_BACKEND="local", R2D_MODEL_RATE_LIMITS=TEST_RATE_LIMITS, R2D_LLM_CACHE_ENABLED=False)
+class ModelRateLimiterTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        ModelRateLimiter.reset()
+        self.rate_limiter = ModelRateLimiter(max_wait=5)
+
+    def test_requests_within_budget_do_not_wait(self):
+        """
+        Test that requests within the requests and tokens per minute budget are not delayed.
+        """
+        for _ in range(5):
+            self.assertEqual(self.rate_limiter.acquire("rate-limited-model", 10), 0)
+        metrics = ModelRateLimiter.get_metrics()["rate-limited-model"]
+        self.assertEqual(metrics["acquired"], 5)
+        self.assertEqual(metrics["waited"], 0)
+        self.assertAlmostEqual(metrics["tokens_available"], 550, delta=1)
+
+    def test_exhausted_budget_waits_for_refill(self):
+        """
+        Test that a request waits, rather than fails, until the tokens per minute budget is refilled.
+        600 tokens per minute refills 10 tokens per second, so 5 tokens are available after roughly 0.5 seconds.
+        """
+        self.rate_limiter.acquire("rate-limited-model", 600)
+        waited = self.rate_limiter.acquire("rate-limited-model", 5)
+        self.assertGreaterEqual(waited, 0.4)
+        self.assertLess(waited, 1.5)
+        metrics = ModelRateLimiter.get_metrics()["rate-limited-model"]
+        self.assertEqual(metrics["waited"], 1)
+        self.assertGreater(metrics["token_utilization"], 0.9)
+
+    def test_concurrent_requests_share_the_budget(self):
+        """
+        Test that concurrent requests from multiple threads do not exceed the budget.
+        """
+        self.rate_limiter.acquire("rate-limited-model", 590)
+        waits = []
+
+        def request():
+            waits.append(self.rate_limiter.acquire("rate-limited-model", 5))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 10 tokens are available, 2 requests are served immediately and 2 wait for the refill
+        self.assertEqual(sum(1 for wait in waits if wait == 0), 2)
+        self.assertEqual(ModelRateLimiter.get_metrics()["rate-limited-model"]["waited"], 2)
+
+    def test_requests_larger_than_the_budget_are_clamped(self):
+        """
+        Test that a request larger than the tokens per minute limit waits for a full bucket instead of waiting forever.
+        """
+        self.assertEqual(self.rate_limiter.acquire("rate-limited-model", 10000), 0)
+
+    def test_wait_exceeding_max_wait_raises(self):
+        """
+        Test that ModelRateLimitTimeoutError is raised if the budget is not available within max_wait seconds.
+        """
+        rate_limiter = ModelRateLimiter(max_wait=0.1)
+        rate_limiter.acquire("rate-limited-model", 600)
+        with self.assertRaises(ModelRateLimitTimeoutError):
+            rate_limiter.acquire("rate-limited-model", 600)
+        self.assertEqual(ModelRateLimiter.get_metrics()["rate-limited-model"]["timeouts"], 1)
+
+    def test_aacquire_waits_without_blocking_event_loop(self):
+        """
+        Test that awaiting the budget allows other coroutines to run.
+        """
+        self.rate_limiter.acquire("rate-limited-model", 600)
+        ticks = []
+
+        async def tick():
+            for _ in range(3):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.05)
+
+        async def run():
+            return await asyncio.gather(self.rate_limiter.aacquire("rate-limited-model", 3), tick())
+
+        waited, _ = asyncio.run(run())
+        self.assertGreater(waited, 0)
+        self.assertEqual(len(ticks), 3)
+
+    def test_models_without_limits_are_not_rate_limited(self):
+        """
+        Test that models without configured limits are never delayed.
+        """
+        for _ in range(3):
+            self.assertEqual(self.rate_limiter.acquire("unlimited-model", 10 ** 9), 0)
+
+    def test_invoker_waits_for_budget(self):
+        """
+        Test that the LLMInvoker reserves the prompt and max_tokens against the budget before calling the LLM.
+        """
+        llm = RateLimitedLLM()
+        invoker = LLMInvoker(llm, rate_limiter=self.rate_limiter)
+        prompt = "a" * 4
+        self.assertEqual(invoker.invoke(prompt), "response")
+        self.rate_limiter.acquire("rate-limited-model", 600)
+        start = time.monotonic()
+        self.assertEqual(invoker.invoke(prompt), "response")
+        # The budget is exhausted, the request waits for the prompt tokens and max_tokens to be refilled at 10 tokens per second
+        self.assertGreater(llm.calls[1] - start, 0.4)
+
+    def test_unused_tokens_are_refunded(self):
+        """
+        Test that the tokens reserved for max_tokens that the completion did not use are returned to the budget after the call.
+        """
+        llm = UsageReportingLLM()
+        invoker = LLMInvoker(llm, rate_limiter=self.rate_limiter)
+        self.assertEqual(invoker.invoke("a" * 4), "response")
+        # The prompt and 100 max_tokens are reserved, 8 prompt and 20 completion tokens are reported
+        unused_tokens = invoker._estimate_request_tokens("a" * 4) - 28
+        self.assertGreater(unused_tokens, 70)
+        metrics = ModelRateLimiter.get_metrics()["rate-limited-model"]
+        self.assertEqual(metrics["refunded_tokens"], unused_tokens)
+        self.assertGreaterEqual(metrics["tokens_available"], 600 - 28)
+
+        self.assertEqual(asyncio.run(invoker.ainvoke("a" * 4)), "response")
+        self.assertEqual(ModelRateLimiter.get_metrics()["rate-limited-model"]["refunded_tokens"], unused_tokens * 2)
+        # Refunds never exceed the reservation or the size of the bucket
+        self.assertEqual(self.rate_limiter.refund("rate-limited-model", 10, 20), 0)
+        self.rate_limiter.refund("rate-limited-model", 600, 0)
+        self.assertLessEqual(ModelRateLimiter.get_metrics()["rate-limited-model"]["tokens_available"], 600)
+
+@override_settings(R2D_RATE_LIMIT_BACKEND="local", R2D_MODEL_RATE_LIMITS=TEST_RATE_LIMITS)
+class RateLimitMetricsViewTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ratelimituser', password='testpassword', email='ratelimit@example.com')
+        cls.admin = User.objects.create_user(username='ratelimitadmin', password='testpassword', email='ratelimitadmin@example.com', is_staff=True)
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def authenticated_get(self, user):
+        access_token = str(RefreshToken.for_user(user).access_token)
+        return self.client.get(reverse('rate-limit-metrics'), HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+    def test_admin_can_retrieve_metrics(self):
+        ModelRateLimiter.reset()
+        ModelRateLimiter().acquire("rate-limited-model", 60)
+        response = self.authenticated_get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        metrics = response.json()["data"]["rate_limits"]["rate-limited-model"]
+        self.assertEqual(metrics["tokens_per_minute"], 600)
+        self.assertEqual(metrics["acquired"], 1)
+
+    def test_non_admin_cannot_retrieve_metrics(self):
+        response = self.authenticated_get(self.user)
+        self.assertEqual(response.status_code, 403)
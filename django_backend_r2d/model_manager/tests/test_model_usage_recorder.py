@@ -0,0 +1,221 @@
+import asyncio
+import inspect
+import logging
+from uuid import uuid4
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+import httpx
+import openai
+from langchain_core.outputs import LLMResult
+from langchain_openai import ChatOpenAI
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from jobs.models import Job, JobStatus
+from model_manager.models import ModelName, ModelUsage
+from model_manager.services.LLMInvoker import LLMInvoker
+from model_manager.services.ModelUsageRecorder import ModelUsageRecorder
+
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'llm_responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'model-usage-tests'},
+}
+
+CHAT_COMPLETION = {
+    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4-turbo",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "response"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17},
+}
+
+class UsageReportingLLM:
+    """
+    Chat model stub that reports token usage to the callbacks, and counts its requests in the same way as the HTTP client hook.
+    """
+    model_name = "usage-model"
+    max_tokens = 4
+
+    def __init__(self, retries:int = 0):
+        self.retries = retries
+
+    def invoke(self, llm_input, config=None, **kwargs):
+        for _ in range(self.retries + 1):
+            ModelUsageRecorder.count_request(None)
+        for callback in (config or {}).get("callbacks", []):
+            callback.on_llm_end(LLMResult(generations=[[]], llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}}))
+        return "response"
+
+    async def ainvoke(self, llm_input, config=None, **kwargs):
+        return self.invoke(llm_input, config=config, **kwargs)
+
+@override_settings(CACHES=TEST_CACHES, R2D_LLM_CACHE_ENABLED=True, R2D_RATE_LIMIT_BACKEND="disabled", R2D_CIRCUIT_BREAKER_BACKEND="disabled",
+                   R2D_MODEL_USAGE_BATCH_SIZE=100, R2D_MODEL_USAGE_FLUSH_INTERVAL=3600)
+class ModelUsageRecorderTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        caches['llm_responses'].clear()
+        ModelUsageRecorder.reset()
+        self.job_id = str(uuid4())
+
+    def test_call_is_recorded_with_job_and_stage(self):
+        """
+        Test that a call records the tokens reported by the provider, the retries of the client, and the job and stage of the context.
+        """
+        invoker = LLMInvoker(UsageReportingLLM(retries=2))
+        with ModelUsageRecorder.usage_context(job_id=self.job_id, stage="analysis"):
+            invoker.invoke("prompt")
+        self.assertEqual(ModelUsageRecorder.flush(), 1)
+
+        usage = ModelUsage.objects.get(job_id=self.job_id)
+        self.assertEqual(usage.stage, "analysis")
+        self.assertEqual(usage.provider, "openai")
+        self.assertEqual(usage.model_name, "usage-model")
+        self.assertEqual((usage.prompt_tokens, usage.completion_tokens), (120, 30))
+        self.assertEqual(usage.retries, 2)
+        self.assertFalse(usage.cached)
+        self.assertTrue(usage.success)
+
+    def test_retries_are_counted_from_requests(self):
+        """
+        Test that the requests retried by the OpenAI client are counted using the HTTP client hooks, for blocking and asynchronous calls.
+        """
+        responses = []
+
+        def handler(request):
+            responses.append(request.url.path)
+            if len(responses) % 3:
+                # Rate limited, the client retries after the delay of the retry-after-ms header
+                return httpx.Response(429, headers={"retry-after-ms": "1"}, json={"error": {"message": "Rate limited"}})
+            return httpx.Response(200, json=CHAT_COMPLETION)
+
+        transport = httpx.MockTransport(handler)
+        llm = ChatOpenAI(openai_api_key="sk-test", model_name="gpt-4-turbo", base_url="http://openai.test/v1", max_retries=2,
+                         http_client=openai.DefaultHttpxClient(transport=transport, event_hooks={"request": [ModelUsageRecorder.count_request]}),
+                         http_async_client=openai.DefaultAsyncHttpxClient(transport=transport, event_hooks={"request": [ModelUsageRecorder.acount_request]}))
+        invoker = LLMInvoker(llm)
+        with ModelUsageRecorder.usage_context(job_id=self.job_id, stage="analysis"):
+            invoker.invoke("prompt", use_cache=False)
+            asyncio.run(invoker.ainvoke("prompt", use_cache=False))
+        ModelUsageRecorder.flush()
+
+        self.assertEqual(len(responses), 6)
+        usage = list(ModelUsage.objects.filter(job_id=self.job_id))
+        self.assertEqual([row.retries for row in usage], [2, 2])
+        self.assertEqual([(row.prompt_tokens, row.completion_tokens) for row in usage], [(12, 5), (12, 5)])
+        self.assertTrue(all(row.success for row in usage))
+
+    def test_cached_responses_do_not_consume_tokens(self):
+        """
+        Test that a response served from the LLM response cache is recorded as cached without tokens.
+        """
+        invoker = LLMInvoker(UsageReportingLLM())
+        with ModelUsageRecorder.usage_context(job_id=self.job_id, stage="audit"):
+            invoker.invoke("prompt")
+            asyncio.run(invoker.ainvoke("prompt"))
+        ModelUsageRecorder.flush()
+
+        usage = list(ModelUsage.objects.filter(job_id=self.job_id).order_by("created_at"))
+        self.assertEqual([row.cached for row in usage], [False, True])
+        self.assertEqual((usage[1].prompt_tokens, usage[1].completion_tokens), (0, 0))
+
+    def test_rows_are_written_in_batches(self):
+        """
+        Test that rows are buffered until R2D_MODEL_USAGE_BATCH_SIZE rows are recorded.
+        """
+        invoker = LLMInvoker(UsageReportingLLM())
+        with override_settings(R2D_MODEL_USAGE_BATCH_SIZE=3):
+            for index in range(2):
+                invoker.invoke(f"prompt {index}")
+            self.assertEqual(ModelUsage.objects.count(), 0)
+            invoker.invoke("prompt 2")
+            self.assertEqual(ModelUsage.objects.count(), 3)
+
+    def test_disabled_ledger_does_not_record(self):
+        """
+        Test that no rows are recorded when R2D_MODEL_USAGE_ENABLED is False.
+        """
+        with override_settings(R2D_MODEL_USAGE_ENABLED=False):
+            LLMInvoker(UsageReportingLLM()).invoke("prompt")
+        self.assertEqual(ModelUsageRecorder.flush(), 0)
+
+class ModelUsageMetricsViewTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='usageuser', password='testpassword', email='usage@example.com')
+        cls.admin = User.objects.create_user(username='usageadmin', password='testpassword', email='usageadmin@example.com', is_staff=True)
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def authenticated_get(self, user, **params):
+        access_token = str(RefreshToken.for_user(user).access_token)
+        return self.client.get(reverse('model-usage-metrics'), params, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+    def test_admin_can_retrieve_percentiles(self):
+        """
+        Test that the report contains the latency and token percentiles per model and per diagram type, cached calls are excluded from the percentiles.
+        """
+        job = Job.objects.create(job_id=uuid4(), user=self.user, job_status=JobStatus.objects.get(name="Completed"),
+                                 model=ModelName.objects.get(name="gpt-4-turbo"), job_details="Job Completed",
+                                 job_type="er_diagram", tokens=100, parameters={})
+        ModelUsage.objects.bulk_create(
+            [ModelUsage(job_id=job.job_id, stage="analysis", provider="openai", model_name="gpt-4-turbo",
+                        prompt_tokens=100 * latency, completion_tokens=10 * latency, latency=latency) for latency in range(1, 11)]
+            + [ModelUsage(job_id=job.job_id, stage="analysis", provider="openai", model_name="gpt-4-turbo", prompt_tokens=0, completion_tokens=0, latency=0.01, cached=True)]
+        )
+        response = self.authenticated_get(self.admin, hours=1)
+        self.assertEqual(response.status_code, 200)
+        usage = response.json()["data"]["usage"]
+        model_usage = usage["models"]["gpt-4-turbo"]
+        self.assertEqual(model_usage["calls"], 11)
+        self.assertEqual(model_usage["cached_calls"], 1)
+        self.assertAlmostEqual(model_usage["latency_p50"], 5.5)
+        self.assertAlmostEqual(model_usage["latency_p95"], 9.55)
+        self.assertAlmostEqual(model_usage["prompt_tokens_p95"], 955)
+        self.assertEqual(usage["job_types"]["er_diagram"]["calls"], 11)
+
+    def test_invalid_hours(self):
+        """
+        Test that non-numeric, non-positive and non-finite hours parameters are rejected.
+        """
+        for hours in ("abc", "0", "-1", "nan", "inf"):
+            response = self.authenticated_get(self.admin, hours=hours)
+            self.assertEqual(response.status_code, 400, hours)
+
+    def test_non_admin_cannot_retrieve_usage(self):
+        """
+        Test that non-admin users cannot retrieve the usage report.
+        """
+        response = self.authenticated_get(self.user)
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,80 @@
+import inspect
+from django.test import TestCase
+from langchain.prompts import PromptTemplate
+from diagrams.prompts.ClassDiagramPrompts import ClassDiagramPromptTemplate, AuditClassDiagramPromptTemplate
+from diagrams.prompts.ERDiagramPrompts import ERDiagramPromptTemplate, AuditERDiagramPromptTemplate
+from diagrams.prompts.SequenceDiagramPrompts import SequenceDiagramPromptTemplate, AuditSequenceDiagramPromptTemplate
+from model_manager.services.PromptTemplateRegistry import PromptTemplateRegistry, CompiledPromptTemplate
+from model_manager.services.TokenCounter import TokenCounter
+import logging
+
+JOB_PARAMETERS = {"Feature1": [{"story_id": "US-1", "story": "As a user I want to {login} so that I can view my orders"}]}
+CONTEXT = {"features": ["Feature1"], "notes": "Orders belong to a single customer"}
+
+class PromptTemplateRegistryTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def test_analysis_prompts_match_langchain(self):
+        """
+        Test that the compiled analysis templates render the same prompt as LangChain's PromptTemplate, with and without context.
+        """
+        for template_class in (ClassDiagramPromptTemplate, ERDiagramPromptTemplate, SequenceDiagramPromptTemplate):
+            expected = PromptTemplate(input_variables=["job_parameters"], template=template_class.TEMPLATE).format(job_parameters=JOB_PARAMETERS)
+            self.assertEqual(template_class.get_prompt(JOB_PARAMETERS), expected)
+
+            expected = PromptTemplate(input_variables=["job_parameters", "context"], template=template_class.CONTEXT_TEMPLATE).format(
+                job_parameters=JOB_PARAMETERS, context=CONTEXT)
+            self.assertEqual(template_class.get_prompt(JOB_PARAMETERS, CONTEXT), expected)
+
+    def test_audit_prompts_match_langchain(self):
+        """
+        Test that audit templates, which have no CONTEXT_TEMPLATE, render the same prompt as LangChain's PromptTemplate.
+        """
+        for template_class in (AuditClassDiagramPromptTemplate, AuditERDiagramPromptTemplate, AuditSequenceDiagramPromptTemplate):
+            self.assertIs(PromptTemplateRegistry.get(template_class, has_context=True), PromptTemplateRegistry.get(template_class))
+            expected = PromptTemplate(input_variables=["result", "context"], template=template_class.TEMPLATE).format(result=JOB_PARAMETERS, context=CONTEXT)
+            self.assertEqual(template_class.get_prompt(JOB_PARAMETERS, CONTEXT), expected)
+
+    def test_escaped_braces_are_rendered_as_literals(self):
+        template = CompiledPromptTemplate("Return {{\"diagram\": ...}} for {job_parameters}")
+        self.assertEqual(template.input_variables, ["job_parameters"])
+        self.assertEqual(template.render(job_parameters="{x}"), "Return {\"diagram\": ...} for {x}")
+
+    def test_unsupported_variables_raise(self):
+        with self.assertRaises(ValueError):
+            CompiledPromptTemplate("{job_parameters!r}")
+
+    def test_unregistered_template_raises(self):
+        with self.assertRaises(KeyError):
+            PromptTemplateRegistry.render(TokenCounter, job_parameters=JOB_PARAMETERS)
+
+    def test_estimated_tokens_match_rendered_prompt(self):
+        """
+        Test that the static token count plus the tokens of each variable approximates the tokens of the rendered prompt.
+        """
+        token_counter = TokenCounter("gpt-4-turbo")
+        for template_class in (ClassDiagramPromptTemplate, ERDiagramPromptTemplate, SequenceDiagramPromptTemplate):
+            compiled = PromptTemplateRegistry.get(template_class, has_context=True)
+            estimated = compiled.estimate_tokens(token_counter, job_parameters=JOB_PARAMETERS, context=CONTEXT)
+            counted = token_counter.count(template_class.get_prompt(JOB_PARAMETERS, CONTEXT))
+            self.assertAlmostEqual(estimated, counted, delta=max(10, counted * 0.02))
+
+    def test_warm_up_computes_static_tokens(self):
+        self.assertGreaterEqual(PromptTemplateRegistry.warm_up(TokenCounter("gpt-4-turbo")), 9)
+        self.assertTrue(PromptTemplateRegistry.get(ClassDiagramPromptTemplate)._static_tokens)
@@ -0,0 +1,92 @@
+import inspect
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from diagrams.response_schemas.mermaid_er_diagram_schema import MERMAID_ER_DIAGRAM_SCHEMA
+from diagrams.response_schemas.mermaid_sequence_diagram_schema import MERMAID_SEQUENCE_DIAGRAM_SCHEMA
+from model_manager.services.LLMInvoker import LLMInvoker
+import logging
+
+class StructuredOutputLLM:
+    """
+    Chat model stub that counts the number of times a response schema is bound.
+    """
+    model_name = "structured-output-model"
+    max_tokens = 4
+
+    def __init__(self):
+        self.bound = 0
+
+    def with_structured_output(self, response_schema):
+        self.bound += 1
+        return StructuredRunnable(response_schema)
+
+class StructuredRunnable:
+    def __init__(self, response_schema):
+        self.response_schema = response_schema
+
+    def invoke(self, llm_input, **kwargs):
+        return {"title": self.response_schema["title"]}
+
+@override_settings(R2D_RATE_LIMIT_BACKEND="disabled", R2D_LLM_CACHE_ENABLED=False)
+class StructuredOutputCacheTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def test_schema_is_bound_once(self):
+        """
+        Test that repeated requests with the same response schema reuse the bound runnable.
+        """
+        llm = StructuredOutputLLM()
+        invoker = LLMInvoker(llm)
+        for _ in range(3):
+            self.assertEqual(invoker.invoke("prompt", MERMAID_ER_DIAGRAM_SCHEMA), {"title": MERMAID_ER_DIAGRAM_SCHEMA["title"]})
+        self.assertEqual(llm.bound, 1)
+
+    def test_schemas_are_bound_separately(self):
+        llm = StructuredOutputLLM()
+        invoker = LLMInvoker(llm)
+        er_runnable = invoker.get_structured_runnable(MERMAID_ER_DIAGRAM_SCHEMA)
+        sequence_runnable = invoker.get_structured_runnable(MERMAID_SEQUENCE_DIAGRAM_SCHEMA)
+        self.assertIsNot(er_runnable, sequence_runnable)
+        self.assertIs(invoker.get_structured_runnable(MERMAID_ER_DIAGRAM_SCHEMA), er_runnable)
+        self.assertEqual(llm.bound, 2)
+
+    def test_equal_schemas_with_different_identity_are_bound_separately(self):
+        """
+        Test that schemas are keyed by identity, a copy of a schema that may be modified later is not served the cached runnable.
+        """
+        llm = StructuredOutputLLM()
+        invoker = LLMInvoker(llm)
+        invoker.get_structured_runnable(MERMAID_ER_DIAGRAM_SCHEMA)
+        invoker.get_structured_runnable(dict(MERMAID_ER_DIAGRAM_SCHEMA))
+        self.assertEqual(llm.bound, 2)
+
+    def test_cache_is_bounded(self):
+        llm = StructuredOutputLLM()
+        invoker = LLMInvoker(llm)
+        schemas = [{"title": f"Schema{index}"} for index in range(LLMInvoker.MAX_STRUCTURED_RUNNABLES + 5)]
+        for schema in schemas:
+            invoker.get_structured_runnable(schema)
+        self.assertEqual(len(invoker._structured_runnables), LLMInvoker.MAX_STRUCTURED_RUNNABLES)
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_structured_output", iterations=5, stdout=output)
+        for name in ("class_diagram", "er_diagram", "sequence_diagram"):
+            self.assertIn(name, output.getvalue())
@@ -0,0 +1,79 @@
+import inspect
+import json
+from django.test import TestCase
+from model_manager.services.TokenCounter import TokenCounter
+from model_manager.services.JobParameterSharder import estimate_tokens
+from diagrams.prompts.ClassDiagramPrompts import ClassDiagramPromptTemplate
+from diagrams.response_schemas.mermaid_class_diagram_schema import MERMAID_CLASS_DIAGRAM_SCHEMA
+from model_manager.tests.test_job_parameter_sharder import create_job_parameters
+import logging
+
+class TokenCounterTestCases(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Use inspect to get all methods of the class
+        methods = inspect.getmembers(cls, predicate=inspect.isfunction)
+        # Filter methods to only include those that start with 'test'
+        test_methods = [method for method in methods if method[0].startswith('test')]
+        # Count the test methods
+        test_count = len(test_methods)
+        print(f"\nExecuting {cls.__name__} containing {test_count} test cases")
+        logging.getLogger('application_logging').setLevel(logging.ERROR)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reset the log level after tests
+        logging.getLogger('application_logging').setLevel(logging.DEBUG)
+        super().tearDownClass()
+
+    def setUp(self):
+        TokenCounter.clear_cache()
+        self.token_counter = TokenCounter("gpt-4-turbo")
+
+    def test_count_uses_model_encoding(self):
+        """
+        Test that tokens are counted using the tiktoken encoding, or estimated if the encoding cannot be loaded.
+        """
+        text = "The user should be able to reset their password"
+        if self.token_counter.is_exact():
+            self.assertEqual(self.token_counter.count(text), len(self.token_counter.encoding.encode(text)))
+            self.assertEqual(self.token_counter.count("<|endoftext|>"), len(self.token_counter.encoding.encode("<|endoftext|>", disallowed_special=())))
+        else:
+            self.assertEqual(self.token_counter.count(text), estimate_tokens(text))
+        self.assertEqual(self.token_counter(text), self.token_counter.count(text))
+
+    def test_count_parameters_is_cached_by_hash(self):
+        """
+        Test that parameter counts are cached by the hash of the parameters, equal parameters are not re-tokenized.
+        """
+        parameters = create_job_parameters({"Login": 3})
+        calls = []
+        count = self.token_counter.count
+        self.token_counter.count = lambda text: calls.append(text) or count(text)
+
+        first = self.token_counter.count_parameters(parameters)
+        second = self.token_counter.count_parameters(json.loads(json.dumps(parameters)))
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        # JSON strings (child jobs) are counted as stored
+        self.assertEqual(self.token_counter.count_parameters(json.dumps(parameters)), first)
+
+    def test_prompt_tokens_include_template_and_schema(self):
+        """
+        Test that the prompt estimate includes the prompt template, message overhead and response schema.
+        """
+        parameters = create_job_parameters({"Login": 3, "Logout": 2})
+        prompt_tokens = self.token_counter.estimate_prompt_tokens(ClassDiagramPromptTemplate(), parameters, MERMAID_CLASS_DIAGRAM_SCHEMA)
+        without_schema = self.token_counter.estimate_prompt_tokens(ClassDiagramPromptTemplate(), parameters)
+
+        template_tokens = self.token_counter.count(ClassDiagramPromptTemplate().get_prompt({}))
+        self.assertGreater(without_schema, self.token_counter.count_parameters(parameters))
+        self.assertGreater(without_schema, template_tokens)
+        self.assertEqual(prompt_tokens - without_schema, self.token_counter.count(json.dumps(MERMAID_CLASS_DIAGRAM_SCHEMA)))
+
+    def test_unknown_models_use_default_encoding(self):
+        """
+        Test that models without a known encoding, e.g., the fake model, are counted using the default encoding.
+        """
+        self.assertEqual(TokenCounter("fake-diagram-model").count("hello world"), self.token_counter.count("hello world"))
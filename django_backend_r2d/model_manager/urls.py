@@ -0,0 +1,7 @@
+from django.urls import path
+from model_manager.views import RateLimitMetricsView, ModelUsageMetricsView
+
+urlpatterns = [
+    path('usage/', ModelUsageMetricsView.as_view(), name='model-usage-metrics'), # URL pattern for retrieving the latency and tokens of each model and diagram type
+    path('rate-limits/', RateLimitMetricsView.as_view(), name='rate-limit-metrics'), # URL pattern for retrieving the rate limit budget of each model
+]
@@ -0,0 +1,61 @@
+import math
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework import status
+
+from framework.responses.SyncAPIReturnObject import SyncAPIReturnObject
+from framework.views.BaseView import BaseView
+from model_manager.services.ModelRateLimiter import ModelRateLimiter
+from model_manager.services.ModelUsageRecorder import ModelUsageRecorder
+
+# Initialize logging class
+import logging
+logger = logging.getLogger('application_logging')
+
+class RateLimitMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @BaseView.handle_exceptions
+    def get(self, request):
+        """
+        Returns the current requests and tokens per minute budget usage of each rate limited model.
+        Budgets are shared by every worker, wait and timeout counters are reported by the process serving the request.
+        """
+        logger.info("api/models/rate-limits/ invoked")
+        return SyncAPIReturnObject(
+            data={"rate_limits": ModelRateLimiter.get_metrics()},
+            message="Retrieved rate limit metrics successfully.",
+            success=True,
+            status_code=status.HTTP_200_OK
+        )
+
+class ModelUsageMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @BaseView.handle_exceptions
+    def get(self, request):
+        """
+        Returns the p50/p95 latency and tokens of the LLM calls per model and per diagram type.
+        The number of hours to report on is provided using the hours query parameter, default is 24.
+        e.g., api/models/usage/?hours=6
+        """
+        logger.info("api/models/usage/ invoked")
+        try:
+            hours = float(request.query_params.get("hours", 24))
+        except ValueError:
+            hours = -1
+        # nan and inf are parsed by float, nan is never less than or equal to 0
+        if not math.isfinite(hours) or hours <= 0:
+            return SyncAPIReturnObject(
+                message="hours must be a positive number.",
+                success=False,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        # Rows buffered by the process serving the request are included in the report
+        ModelUsageRecorder.flush()
+        return SyncAPIReturnObject(
+            data={"usage": ModelUsageRecorder.get_report(hours)},
+            message="Retrieved model usage metrics successfully.",
+            success=True,
+            status_code=status.HTTP_200_OK
+        )